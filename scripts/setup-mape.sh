@@ -10,15 +10,13 @@
 # 3. MAP-Eトンネル (ip6tnl) 作成
 # 4. ルーティング設定
 #
-# 注意: パラメータはハードコードされています。
-#       DHCPv6-PDプレフィックスが変更された場合は手動更新が必要です。
-#       詳細: docs/troubleshooting-mape.md
+# 注意: パラメータは setup-mape.env から読み込みます。
+#       DHCPv6-PDプレフィックスが変更された場合は vyos_mape.py で再計算してください。
+#       vyos_prefix_watch.py を常駐させれば再計算と反映は自動で行われます。
+#       詳細: docs/troubleshooting.md
 #
-# NAT設定は別途VyOS configureモードで行う必要があります:
-#   set nat source rule 200 outbound-interface name 'mape'
-#   set nat source rule 200 translation address '<IPV4_ADDRESS>'
-#   set nat source rule 200 translation port '<PORT_RANGE>'
-#   set nat source rule 200 protocol 'tcp_udp'
+# NAT設定は別途VyOS configureモードで行う必要があります (全ポートブロック分):
+#   python3 vyos_mape.py --prefix <PDプレフィックス> --rules-file <ルール表> --nat
 
 set -e
 
@@ -36,13 +34,14 @@ echo_error() { echo -e "${RED}[ERROR]${NC} $1"; }
 # MAP-E パラメータ (.envから読み込み)
 # ============================================================
 # これらの値はDHCPv6-PDプレフィックスから計算されています。
-# 計算ツール: http://ipv4.web.fc2.com/map-e.html
+# 計算ツール: vyos_mape.py (RFC 7597)
 #
 # 設定手順:
 # 1. setup-mape.env.example を setup-mape.env にコピー
 # 2. eth1のIPv6プレフィックスを確認: show interfaces ethernet eth1
-# 3. 上記ツールでプレフィックスを入力しMAP-Eパラメータを取得
-# 4. setup-mape.env に値を記入
+# 3. プレフィックスとBMR (ルール表) からパラメータを計算:
+#    python3 vyos_mape.py --prefix <PDプレフィックス> --rules-file <ルール表> --env
+# 4. 出力を setup-mape.env に記入 (MAPE_NGN_GATEWAY は手動)
 
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 ENV_FILE="${SCRIPT_DIR}/setup-mape.env"
@@ -179,13 +178,10 @@ else
     echo ""
     echo "NAT設定を確認してください:"
     echo "  [VyOS] configure"
-    echo "  [VyOS] set nat source rule 200 outbound-interface name 'mape'"
-    echo "  [VyOS] set nat source rule 200 translation address '$IPV4_ADDRESS'"
-    echo "  [VyOS] set nat source rule 200 translation port '$FIRST_PORT_RANGE'"
-    echo "  [VyOS] set nat source rule 200 protocol 'tcp_udp'"
-    echo "  [VyOS] commit"
+    echo "  python3 vyos_mape.py --prefix <PDプレフィックス> --rules-file <ルール表> --nat"
+    echo "  の出力を configure モードで投入し commit"
     echo ""
-    echo "詳細: docs/troubleshooting-mape.md"
+    echo "詳細: docs/troubleshooting.md"
 fi
 
 echo ""
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""Apply configuration commands to a VyOS router over SSH.
+
+Feeds commands into a single ``configure`` session (``vbash -s`` with the
+VyOS script template) and commits them in batches. The router times each
+commit itself; the timings come back as marker lines in the output. The
+running configuration is saved before the first batch, and any failed
+``set`` or ``commit`` loads it back and commits again, so a failed apply
+leaves the router as it was.
+
+With a delta, only the commands that differ from the router's running
+configuration are sent, so a commit re-validates a handful of nodes
+instead of the whole tree.
+
+Usage:
+    with SSHSession("192.168.1.1", "vyos", timeout=600) as session:
+        result = apply_commands(session, commands, batch_size=200)
+    print_apply_result(result)
+
+    # Only what differs from the running configuration
+    delta = compute_delta(commands, fetch_running_config(session), prune=True)
+
+    # Usually run through vyos_restore.py
+    python vyos_restore.py --apply --host 192.168.1.1 --batch-size 200
+"""
+
+from __future__ import annotations
+
+import shlex
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+
+from vyos_config_check import SNAPSHOT_COMMAND
+from vyos_config_tree import ConfigTree, tokenize_command
+from vyos_ssh import SSHSession
+
+SCRIPT_TEMPLATE = "source /opt/vyatta/etc/functions/script-template"
+# Running configuration saved before applying, loaded back on failure
+PRE_APPLY_CONFIG = "/config/limen-pre-apply.config"
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_APPLY_TIMEOUT = 600.0
+
+# Output markers emitted by the apply script
+MARKER = "@@LIMEN"
+
+# Nodes the router generates itself; a delta never deletes them
+PRESERVED_NODES = frozenset({"hw-id", "encrypted-password"})
+
+
+@dataclass
+class CommitTiming:
+    """Outcome of one batch commit, as timed on the router."""
+
+    batch: int
+    commands: int
+    seconds: float
+    ok: bool
+
+
+@dataclass
+class ApplyResult:
+    """Outcome of an apply run."""
+
+    success: bool
+    commits: list[CommitTiming] = field(default_factory=list)
+    rolled_back: bool = False
+    error: str = ""
+    elapsed: float = 0.0
+
+
+def batched(commands: Iterable[str], size: int) -> Iterator[list[str]]:
+    """Split commands into lists of at most ``size`` items.
+
+    Args:
+        commands: Configuration commands
+        size: Maximum batch size (at least 1)
+
+    Yields:
+        Consecutive batches
+    """
+    batch: list[str] = []
+    for cmd in commands:
+        batch.append(cmd)
+        if len(batch) >= max(1, size):
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def commit_batches(commands: Iterable[str], size: int) -> Iterator[list[str]]:
+    """Split commands into commit batches without separating replacements.
+
+    A ``delete`` shares its batch with the next ``set`` under the same
+    parent node (the value compute_delta emits to replace it), so no commit
+    leaves the node with neither its old nor its new value. A batch only
+    grows past ``size`` to keep such a pair together.
+
+    Args:
+        commands: Configuration commands
+        size: Batch size (at least 1)
+
+    Yields:
+        Consecutive batches
+    """
+    commands = list(commands)
+    # Last index each command must share a batch with
+    until = list(range(len(commands)))
+    # Nearest later set below each path prefix
+    nearest: dict[tuple[str, ...], int] = {}
+    for index in range(len(commands) - 1, -1, -1):
+        cmd = commands[index].strip()
+        if cmd.startswith("delete "):
+            tokens = tokenize_command("set " + cmd.removeprefix("delete "))
+            if tokens and len(tokens) > 1:
+                until[index] = nearest.get(tuple(tokens[:-1]), index)
+        elif tokens := tokenize_command(cmd):
+            for i in range(1, len(tokens)):
+                nearest[tuple(tokens[:i])] = index
+
+    batch: list[str] = []
+    hold = 0
+    for index, cmd in enumerate(commands):
+        batch.append(cmd)
+        hold = max(hold, until[index])
+        if len(batch) >= max(1, size) and index >= hold:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def compute_delta(
+    desired: Iterable[str], current: Iterable[str], prune: bool = False
+) -> list[str]:
+    """Return the commands that turn the current configuration into ``desired``.
+
+    Lines are matched by their tokenized path, so quoting differences
+    (``host-name vyos`` vs ``host-name 'vyos'``) do not count as changes.
+    Single-valued leaves are simply ``set`` to their new value.
+
+    With ``prune``, paths only present on the router are deleted at the
+    highest node the desired configuration does not have at all, so a
+    removed subtree costs one ``delete``. Router-generated nodes
+    (PRESERVED_NODES) are never deleted, not even as part of a subtree.
+    A delete whose parent node also receives new values is placed right
+    before the first of those ``set`` commands (see commit_batches); the
+    other deletes come first.
+
+    Args:
+        desired: Rendered set commands
+        current: The router's ``show configuration commands`` output
+        prune: Also delete paths missing from ``desired``
+
+    Returns:
+        ``delete`` and ``set`` commands
+    """
+    desired = list(desired)
+    current_paths = {
+        tuple(tokens) for line in current if (tokens := tokenize_command(line))
+    }
+
+    sets: list[tuple[str, tuple[str, ...]]] = []
+    desired_paths: set[tuple[str, ...]] = set()
+    for line in desired:
+        tokens = tokenize_command(line)
+        if tokens is None:
+            continue
+        path = tuple(tokens)
+        if path in desired_paths:
+            continue
+        desired_paths.add(path)
+        if path not in current_paths:
+            sets.append((line, path))
+
+    delta: list[str] = []
+    # Deletes keyed by the parent node that a later set gives a new value
+    replaced: dict[tuple[str, ...], list[str]] = {}
+    if prune:
+        tree = ConfigTree()
+        for path in desired_paths:
+            tree.add(path)
+        # Every prefix of a preserved path must survive as well
+        kept = {
+            path[:i]
+            for path in current_paths
+            if PRESERVED_NODES.intersection(path)
+            for i in range(1, len(path) + 1)
+        }
+        removed: set[tuple[str, ...]] = set()
+        for path in sorted(current_paths - desired_paths):
+            if path in kept:
+                continue
+            # Shortest prefix missing from the desired tree
+            node = tree.root
+            depth = 0
+            while depth < len(path) and path[depth] in node.children:
+                node = node.children[path[depth]]
+                depth += 1
+            if depth == len(path):
+                # Still present as the parent of desired paths
+                continue
+            prefix = path[: depth + 1]
+            while prefix in kept:
+                prefix = path[: len(prefix) + 1]
+            if any(prefix[:i] in removed for i in range(1, len(prefix) + 1)):
+                continue
+            removed.add(prefix)
+            replaced.setdefault(prefix[:-1], []).append("delete " + shlex.join(prefix))
+
+        set_parents = {path[:i] for _, path in sets for i in range(1, len(path))}
+        for parent in list(replaced):
+            if parent not in set_parents:
+                delta.extend(replaced.pop(parent))
+
+    for line, path in sets:
+        for i in range(1, len(path)):
+            delta.extend(replaced.pop(path[:i], ()))
+        delta.append(line)
+    return delta
+
+
+def fetch_running_config(session: SSHSession) -> list[str] | None:
+    """Return the router's running configuration as set commands.
+
+    Args:
+        session: SSH session to the router
+
+    Returns:
+        Set commands, or None if the configuration could not be read
+    """
+    returncode, stdout, _ = session.run(SNAPSHOT_COMMAND)
+    if returncode != 0 and not stdout:
+        return None
+    return [line for line in stdout.splitlines() if line.startswith("set ")]
+
+
+def build_apply_script(
+    commands: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE, save: bool = True
+) -> str:
+    """Build the vbash script that applies commands in batches.
+
+    Args:
+        commands: Configuration commands (``set``/``delete`` lines)
+        batch_size: Commands per commit
+        save: Save the configuration to config.boot after the last commit
+
+    Returns:
+        Script text for ``vbash -s``
+    """
+    pre = shlex.quote(PRE_APPLY_CONFIG)
+    lines = [
+        SCRIPT_TEMPLATE,
+        "configure",
+        f"save {pre} >/dev/null || {{ echo '{MARKER} ERROR save'; exit 1; }}",
+        "limen_rollback() {",
+        "  discard >/dev/null",
+        f"  load {pre} >/dev/null",
+        "  commit >/dev/null",
+        f"  echo \"{MARKER} ROLLBACK $?\"",
+        "  exit 1",
+        "}",
+    ]
+    for number, batch in enumerate(commit_batches(commands, batch_size), 1):
+        lines.append("errors=0")
+        lines.extend(f"{cmd} || errors=$((errors+1))" for cmd in batch)
+        lines.extend(
+            [
+                f"if [ $errors -ne 0 ]; then echo \"{MARKER} SETFAIL {number} "
+                "$errors\"; limen_rollback; fi",
+                "start=$(date +%s.%N)",
+                "commit",
+                "rc=$?",
+                f"echo \"{MARKER} COMMIT {number} {len(batch)} $start "
+                "$(date +%s.%N) $rc\"",
+                "[ $rc -eq 0 ] || limen_rollback",
+            ]
+        )
+    if save:
+        lines.append(f"save >/dev/null || echo '{MARKER} ERROR save'")
+    lines.extend([f"rm -f {pre}", f"echo '{MARKER} DONE'", "exit"])
+    return "\n".join(lines) + "\n"
+
+
+def parse_apply_output(stdout: str) -> ApplyResult:
+    """Interpret the marker lines of an apply run.
+
+    Args:
+        stdout: Output of the apply script
+
+    Returns:
+        Result with per-batch commit timings
+    """
+    result = ApplyResult(success=False)
+    done = False
+    for line in stdout.splitlines():
+        if not line.startswith(MARKER + " "):
+            continue
+        fields = line.split()[1:]
+        kind = fields[0]
+        if kind == "COMMIT" and len(fields) == 6:
+            batch, count, start, end, rc = fields[1:]
+            seconds = float(end) - float(start)
+            result.commits.append(
+                CommitTiming(int(batch), int(count), seconds, rc == "0")
+            )
+            if rc != "0":
+                result.error = f"Commit of batch {batch} failed"
+        elif kind == "SETFAIL":
+            result.error = f"{fields[2]} command(s) of batch {fields[1]} rejected"
+        elif kind == "ROLLBACK":
+            result.rolled_back = fields[1:2] == ["0"]
+            if not result.rolled_back:
+                result.error += "; rollback commit failed"
+        elif kind == "ERROR":
+            result.error = f"Failed to {' '.join(fields[1:])}"
+        elif kind == "DONE":
+            done = True
+    result.success = done and not result.error
+    return result
+
+
+def apply_commands(
+    session: SSHSession,
+    commands: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    save: bool = True,
+) -> ApplyResult:
+    """Apply commands to a router in one configure session.
+
+    Args:
+        session: SSH session to the router
+        commands: Configuration commands
+        batch_size: Commands per commit
+        save: Save to config.boot after the last commit
+
+    Returns:
+        Apply result with per-commit timings
+    """
+    script = build_apply_script(commands, batch_size, save)
+    start = time.perf_counter()
+    returncode, stdout, stderr = session.run("vbash -s", input=script)
+    result = parse_apply_output(stdout)
+    result.elapsed = time.perf_counter() - start
+    if not result.success and not result.error:
+        result.error = stderr.strip() or f"Apply script exited with {returncode}"
+    return result
+
+
+def print_apply_result(result: ApplyResult) -> None:
+    """Print commit timings and the outcome to stderr.
+
+    Args:
+        result: Result from apply_commands
+    """
+    for c in result.commits:
+        icon = "✅" if c.ok else "❌"
+        print(
+            f"  {icon} commit {c.batch}: {c.commands} commands in {c.seconds:.2f}s",
+            file=sys.stderr,
+        )
+    total = sum(c.seconds for c in result.commits)
+    print(
+        f"Commits: {len(result.commits)}, commit time {total:.2f}s, "
+        f"total {result.elapsed:.2f}s",
+        file=sys.stderr,
+    )
+    if result.success:
+        print("✅ Configuration applied", file=sys.stderr)
+        return
+    print(f"❌ Apply failed: {result.error}", file=sys.stderr)
+    if result.rolled_back:
+        print("   Rolled back to the previous configuration", file=sys.stderr)
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the VyOS tools.
+
+Runs reproducible benchmarks against the simulated router (vyos_sim.py) and
+stores the results as JSON, named after the current git commit, so
+performance changes can be compared between commits.
+
+Usage:
+    # End-to-end checker time for 1/10/100 hosts and tiny..large configs
+    python vyos_bench.py checker
+
+    # Smaller run, compared against an earlier commit's results
+    python vyos_bench.py checker --hosts 1,10 --sizes tiny,small \\
+        --compare .bench/abc1234.json
+
+    # Compiled template cache load vs. cold parse
+    python vyos_bench.py template --scales 1,100
+
+    # set -> config.boot compile time for large command sets
+    python vyos_bench.py boot --sizes small,large
+
+    # Schema validation throughput
+    python vyos_bench.py schema
+
+    # Batched firewall flow evaluation (numpy and pure-Python backends)
+    python vyos_bench.py firewall --flows 10000,300000
+
+Suites:
+    checker  - vyos_config_check fleet runs (per-command and snapshot mode)
+    template - vyos_restore template parse, cached load and render
+    boot     - vyos_boot set-command to config.boot compile and back
+    schema   - vyos_schema validation of rendered commands
+    firewall - vyos_firewall_sim flow evaluation against the template
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from vyos_boot import boot_to_commands, commands_to_boot
+from vyos_config_check import run_fleet
+from vyos_firewall_sim import FirewallSimulator, np, parse_selector, sample_flows
+from vyos_restore import CompiledTemplate, template_cache_path
+from vyos_schema import validate_commands
+from vyos_sim import (
+    SimProfile,
+    SimulatedSession,
+    SimulatedVyOS,
+    pad_config,
+    template_config,
+)
+
+REPO_ROOT = Path(__file__).parent.parent
+DEFAULT_OUTPUT_DIR = REPO_ROOT / ".bench"
+
+# Configuration sizes served by the simulated router
+SIZES = {
+    "tiny": 0,
+    "small": 64 * 1024,
+    "medium": 1024 * 1024,
+    "large": 4 * 1024 * 1024,
+}
+
+
+@dataclass
+class BenchResult:
+    """A single benchmark measurement."""
+
+    name: str
+    seconds: float
+    params: dict[str, object] = field(default_factory=dict)
+
+
+def time_best(func: Callable[[], object], repeat: int) -> float:
+    """Return the best wall time of ``repeat`` calls in seconds."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_checker(
+    host_counts: list[int],
+    sizes: list[str],
+    latency: float = 0.02,
+    jitter: float = 0.005,
+    connect_latency: float = 0.2,
+    jobs: int = 32,
+    repeat: int = 3,
+) -> list[BenchResult]:
+    """Measure end-to-end fleet checker time against simulated routers.
+
+    Args:
+        host_counts: Fleet sizes to measure
+        sizes: Keys of SIZES for the served configuration size
+        latency: Per-command latency in seconds
+        jitter: Latency jitter in seconds
+        connect_latency: Connection setup latency in seconds
+        jobs: Worker pool size
+        repeat: Repetitions per scenario (best time is kept)
+
+    Returns:
+        One result per (mode, host count, size)
+    """
+    results: list[BenchResult] = []
+    base = template_config()
+    for size in sizes:
+        profile = SimProfile(
+            connect_latency=connect_latency,
+            latency=latency,
+            jitter=jitter,
+            config_bytes=SIZES[size],
+            seed=0,
+        )
+        endpoint = SimulatedVyOS(base, profile)
+        factory = functools.partial(
+            SimulatedSession, profile=profile, endpoint=endpoint
+        )
+        for count in host_counts:
+            hosts = [f"sim{i}" for i in range(count)]
+            for snapshot in (False, True):
+                mode = "snapshot" if snapshot else "per-command"
+                seconds = time_best(
+                    lambda hosts=hosts, snapshot=snapshot, factory=factory: run_fleet(
+                        hosts,
+                        "vyos",
+                        None,
+                        "all",
+                        snapshot,
+                        jobs=min(jobs, len(hosts)),
+                        session_factory=factory,
+                    ),
+                    repeat,
+                )
+                results.append(
+                    BenchResult(
+                        f"checker/{mode}/hosts={count}/size={size}",
+                        seconds,
+                        {
+                            "hosts": count,
+                            "size": size,
+                            "config_bytes": len(endpoint.snapshot.encode()),
+                            "mode": mode,
+                            "latency": latency,
+                            "jitter": jitter,
+                            "connect_latency": connect_latency,
+                        },
+                    )
+                )
+    return results
+
+
+def bench_template(scales: list[int], repeat: int = 3) -> list[BenchResult]:
+    """Compare compiled template cache loads against a cold parse.
+
+    Args:
+        scales: How many copies of the restore template to concatenate
+        repeat: Repetitions per scenario (best time is kept)
+
+    Returns:
+        Cold parse, cached load and render results per scale
+    """
+    source = (REPO_ROOT / "scripts" / "vyos-config-template.txt").read_text(
+        encoding="utf-8"
+    )
+    env_vars = {"VYOS_WG_PRIVATE_KEY": "key", "VYOS_DHCPV6_DUID": "00:03:00:01"}
+    results: list[BenchResult] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            backup = Path(tmp) / f"template-{scale}.txt"
+            backup.write_text(source * scale, encoding="utf-8")
+            cache_dir = Path(tmp) / "cache"
+            CompiledTemplate.load(backup, cache_dir=cache_dir)
+            template = CompiledTemplate.from_file(backup)
+            params: dict[str, object] = {
+                "scale": scale,
+                "commands": len(template.commands),
+                "cache_bytes": template_cache_path(backup, cache_dir).stat().st_size,
+            }
+            for name, func in (
+                ("parse", lambda b=backup: CompiledTemplate.from_file(b)),
+                (
+                    "cached-load",
+                    lambda b=backup, d=cache_dir: CompiledTemplate.load(b, cache_dir=d),
+                ),
+                ("render", lambda t=template: t.render(env_vars)),
+            ):
+                results.append(
+                    BenchResult(
+                        f"template/{name}/scale={scale}",
+                        time_best(func, repeat),
+                        params,
+                    )
+                )
+    return results
+
+
+def bench_boot(sizes: list[str], repeat: int = 3) -> list[BenchResult]:
+    """Measure compiling set commands to config.boot and parsing it back.
+
+    Args:
+        sizes: Keys of SIZES for the command set size
+        repeat: Repetitions per scenario (best time is kept)
+
+    Returns:
+        Compile and parse results per size
+    """
+    results: list[BenchResult] = []
+    base = template_config()
+    for size in sizes:
+        commands = pad_config(base, SIZES[size])
+        boot = list(commands_to_boot(commands))
+        params: dict[str, object] = {
+            "size": size,
+            "commands": len(commands),
+            "boot_lines": len(boot),
+        }
+        for name, func in (
+            ("compile", lambda c=commands: list(commands_to_boot(c))),
+            ("parse", lambda b=boot: boot_to_commands(b)),
+        ):
+            results.append(
+                BenchResult(f"boot/{name}/size={size}", time_best(func, repeat), params)
+            )
+    return results
+
+
+def bench_schema(sizes: list[str], repeat: int = 3) -> list[BenchResult]:
+    """Measure schema validation of rendered commands.
+
+    Args:
+        sizes: Keys of SIZES for the command set size
+        repeat: Repetitions per scenario (best time is kept)
+
+    Returns:
+        One validation result per size
+    """
+    results: list[BenchResult] = []
+    base = [c for c in template_config() if "<" not in c]
+    for size in sizes:
+        commands = pad_config(base, SIZES[size])
+        results.append(
+            BenchResult(
+                f"schema/validate/size={size}",
+                time_best(lambda c=commands: validate_commands(c), repeat),
+                {"size": size, "commands": len(commands)},
+            )
+        )
+    return results
+
+
+def bench_firewall(flows: list[int], repeat: int = 3) -> list[BenchResult]:
+    """Measure batched flow evaluation against the template firewall.
+
+    Flows are sampled once per size; only evaluation is timed. The numpy
+    backend is measured when numpy is installed.
+
+    Args:
+        flows: Batch sizes
+        repeat: Repetitions per scenario (best time is kept)
+
+    Returns:
+        One result per batch size, hook and backend
+    """
+    results: list[BenchResult] = []
+    commands = template_config()
+    backends = [False, True] if np is not None else [False]
+    for count in flows:
+        for hook in ("input", "forward"):
+            selector = parse_selector(hook)
+            for use_numpy in backends:
+                simulator = FirewallSimulator(commands, use_numpy=use_numpy)
+                batch = sample_flows(selector, count, simulator.interfaces)
+                backend = "numpy" if use_numpy else "python"
+                results.append(
+                    BenchResult(
+                        f"firewall/{hook}/flows={count}/backend={backend}",
+                        time_best(
+                            lambda s=simulator, h=hook, b=batch: s.evaluate(h, b),
+                            repeat,
+                        ),
+                        {"flows": count, "hook": hook, "backend": backend},
+                    )
+                )
+    return results
+
+
+def git_revision() -> str:
+    """Return the short git commit hash (with -dirty if modified)."""
+    try:
+        rev = subprocess.run(  # noqa: S603
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            cwd=REPO_ROOT,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(  # noqa: S603
+            ["git", "status", "--porcelain", "--untracked-files=no"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            cwd=REPO_ROOT,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{rev}-dirty" if dirty else rev
+
+
+def save_results(
+    results: list[BenchResult], output_dir: Path, revision: str | None = None
+) -> Path:
+    """Store results as ``<output_dir>/<revision>.json``.
+
+    Args:
+        results: Benchmark results
+        output_dir: Directory for result files
+        revision: Commit identifier (default: current git revision)
+
+    Returns:
+        Path of the written file
+    """
+    revision = revision or git_revision()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{revision}.json"
+    data = {
+        "revision": revision,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [asdict(r) for r in results],
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def load_results(path: Path) -> dict[str, float]:
+    """Load a result file as a {name: seconds} mapping."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {r["name"]: r["seconds"] for r in data["results"]}
+
+
+def compare_results(
+    results: list[BenchResult], baseline: dict[str, float]
+) -> list[str]:
+    """Format a comparison of results against a baseline.
+
+    Args:
+        results: Current results
+        baseline: {name: seconds} from an earlier run
+
+    Returns:
+        One formatted line per current result
+    """
+    lines = []
+    for r in results:
+        before = baseline.get(r.name)
+        if before is None or before == 0:
+            lines.append(f"  {r.name:<48} {r.seconds:>9.4f}s  (new)")
+            continue
+        change = (r.seconds - before) / before * 100
+        lines.append(
+            f"  {r.name:<48} {r.seconds:>9.4f}s  vs {before:.4f}s ({change:+.1f}%)"
+        )
+    return lines
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def _size_list(value: str) -> list[str]:
+    sizes = [v for v in value.split(",") if v]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown size(s): {', '.join(unknown)} (choose from {', '.join(SIZES)})"
+        )
+    return sizes
+
+
+def _run_checker(args: argparse.Namespace) -> list[BenchResult]:
+    return bench_checker(
+        args.hosts,
+        args.sizes,
+        latency=args.latency,
+        jitter=args.jitter,
+        connect_latency=args.connect_latency,
+        jobs=args.jobs,
+        repeat=args.repeat,
+    )
+
+
+def _run_template(args: argparse.Namespace) -> list[BenchResult]:
+    return bench_template(args.scales, repeat=args.repeat)
+
+
+def _run_boot(args: argparse.Namespace) -> list[BenchResult]:
+    return bench_boot(args.sizes, repeat=args.repeat)
+
+
+def _run_schema(args: argparse.Namespace) -> list[BenchResult]:
+    return bench_schema(args.sizes, repeat=args.repeat)
+
+
+def _run_firewall(args: argparse.Namespace) -> list[BenchResult]:
+    return bench_firewall(args.flows, repeat=args.repeat)
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code (0 for success, non-zero for errors)
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the VyOS tools")
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=DEFAULT_OUTPUT_DIR,
+        help="Directory for result files (default: .bench/)",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        help="Earlier result file to compare against",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Repetitions per scenario; the best time is kept (default: 3)",
+    )
+    parser.add_argument(
+        "--no-save",
+        action="store_true",
+        help="Don't write a result file",
+    )
+    suites = parser.add_subparsers(dest="suite", required=True)
+
+    checker = suites.add_parser("checker", help="vyos_config_check fleet runs")
+    checker.add_argument("--hosts", type=_int_list, default=[1, 10, 100])
+    checker.add_argument(
+        "--sizes", type=_size_list, default=["tiny", "small", "large"]
+    )
+    checker.add_argument("--latency", type=float, default=0.02)
+    checker.add_argument("--jitter", type=float, default=0.005)
+    checker.add_argument("--connect-latency", type=float, default=0.2)
+    checker.add_argument("--jobs", type=int, default=32)
+    checker.set_defaults(run=_run_checker)
+
+    template = suites.add_parser("template", help="vyos_restore template cache")
+    template.add_argument("--scales", type=_int_list, default=[1, 10, 100])
+    template.set_defaults(run=_run_template)
+
+    boot = suites.add_parser("boot", help="vyos_boot config.boot compiler")
+    boot.add_argument("--sizes", type=_size_list, default=["small", "medium", "large"])
+    boot.set_defaults(run=_run_boot)
+
+    schema = suites.add_parser("schema", help="vyos_schema validation")
+    schema.add_argument("--sizes", type=_size_list, default=["tiny", "small", "medium"])
+    schema.set_defaults(run=_run_schema)
+
+    firewall = suites.add_parser("firewall", help="vyos_firewall_sim evaluation")
+    firewall.add_argument("--flows", type=_int_list, default=[10000, 100000, 300000])
+    firewall.set_defaults(run=_run_firewall)
+
+    args = parser.parse_args()
+
+    results = args.run(args)
+    baseline = load_results(args.compare) if args.compare else {}
+    print(f"Benchmark: {args.suite}")
+    for line in compare_results(results, baseline):
+        print(line)
+
+    if not args.no_save:
+        path = save_results(results, args.output_dir)
+        print(f"Results written to: {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""VyOS config.boot format helpers.
+
+Converts the hierarchical config.boot format (as used by
+scripts/ci/initial-config.boot or a router's /config/config.boot) into flat
+set commands, in the same quoting style as ``show configuration commands``,
+and compiles set commands back into config.boot.
+
+Compiling lets the ISO boot straight into the final configuration instead
+of replaying and committing the set commands after the first boot. Set
+commands do not say which nodes are tag nodes (``ethernet eth0 {``) or
+valueless leaves (``default-log``), so both are taken from the tables
+below; extend them when a configuration uses nodes they do not cover.
+
+Usage:
+    # config.boot -> set commands
+    python vyos_boot.py ci/initial-config.boot
+
+    # Rendered set commands -> config.boot for the ISO
+    python vyos_restore.py --output restore.txt
+    python vyos_boot.py restore.txt --output ci/initial-config.boot
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import re
+import shlex
+import sys
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from vyos_config_tree import WILDCARD, ConfigNode, ConfigTree, tokenize_command
+
+# Tag nodes: the node name is followed by an instance name on the same line
+TAG_NODES = (
+    "container name",
+    "firewall group *",
+    "firewall * name",
+    "firewall * name * rule",
+    "firewall * * filter rule",
+    "interfaces *",
+    "interfaces * * vif",
+    "interfaces * * dhcpv6-options pd",
+    "interfaces * * dhcpv6-options pd * interface",
+    "interfaces wireguard * peer",
+    "nat * rule",
+    "nat66 * rule",
+    "policy *",
+    "policy * * rule",
+    "protocols static route",
+    "protocols static route6",
+    "protocols static * * interface",
+    "protocols static * * next-hop",
+    "service dhcp-server shared-network-name",
+    "service dhcp-server shared-network-name * subnet",
+    "service dhcp-server shared-network-name * subnet * range",
+    "service dhcp-server shared-network-name * subnet * static-mapping",
+    "service dns dynamic name",
+    "service ntp server",
+    "service router-advert interface",
+    "service router-advert interface * prefix",
+    "system console device",
+    "system login user",
+    "system login user * authentication public-keys",
+    "system static-host-mapping host-name",
+    "system sysctl parameter",
+    "system syslog * facility",
+    "system task-scheduler task",
+)
+
+# Leaves without a value (``default-log``), as opposed to ``host-name vyos``
+VALUELESS_LEAVES = frozenset(
+    {
+        "autoconf",
+        "default-log",
+        "disable",
+        "disable-password-authentication",
+        "log",
+        "no-default-link-local",
+    }
+)
+
+BOOT_INDENT = "    "
+
+_PLAIN_VALUE = re.compile(r"^[\w.:/@+,-]+$")
+
+
+def _index_patterns(patterns: Iterable[str]) -> dict[str, list[tuple[str, ...]]]:
+    """Group path patterns by their last token for O(1) candidate lookup."""
+    index: dict[str, list[tuple[str, ...]]] = {}
+    for pattern in patterns:
+        tokens = tuple(pattern.split())
+        index.setdefault(tokens[-1], []).append(tokens)
+    return index
+
+
+_TAG_INDEX = _index_patterns(TAG_NODES)
+
+# A config.boot line made of bare words and double-quoted strings
+_BOOT_LINE = re.compile(r'(?:(?:"(?:[^"\\]|\\.)*"|[^\s"\'\\]+)(?:\s+|$))+')
+_BOOT_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([^\s"\'\\]+)')
+_BOOT_ESCAPE = re.compile(r'\\(["\\])')
+
+
+def _is_comment(line: str) -> bool:
+    return line.startswith(("//", "/*", "#"))
+
+
+def is_boot_format(lines: Iterable[str]) -> bool:
+    """Return True if the lines look like config.boot rather than set commands.
+
+    Only reads up to the first meaningful line.
+
+    Args:
+        lines: File lines
+
+    Returns:
+        True if the first meaningful line opens a node block
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or _is_comment(line):
+            continue
+        return line.endswith("{")
+    return False
+
+
+def sniff_format(lines: Iterable[str]) -> tuple[bool, Iterator[str]]:
+    """Detect the format of a line stream without consuming it.
+
+    Args:
+        lines: File lines, e.g. an open file
+
+    Returns:
+        (True for config.boot, iterator over all the original lines)
+    """
+    it = iter(lines)
+    head: list[str] = []
+    for line in it:
+        head.append(line)
+        stripped = line.strip()
+        if stripped and not _is_comment(stripped):
+            break
+    return is_boot_format(head), itertools.chain(head, it)
+
+
+def quote_value(value: str) -> str:
+    """Quote a value the way ``show configuration commands`` prints it."""
+    if "'" in value:
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return f"'{value}'"
+
+
+def split_boot_line(line: str) -> list[str]:
+    """Split a config.boot line into tokens.
+
+    config.boot only uses bare words and double-quoted strings with ``\\"``
+    and ``\\\\`` escapes, which a regex handles much faster than shlex;
+    anything else falls back to shlex.
+
+    Args:
+        line: A stripped config.boot line (without a trailing ``{``)
+
+    Returns:
+        Tokens with quotes removed
+    """
+    if _BOOT_LINE.fullmatch(line):
+        return [
+            bare or _BOOT_ESCAPE.sub(r"\1", quoted)
+            for quoted, bare in _BOOT_TOKEN.findall(line)
+        ]
+    try:
+        return shlex.split(line)
+    except ValueError:
+        return line.split()
+
+
+def iter_boot_leaves(
+    lines: Iterable[str],
+) -> Iterator[tuple[int, tuple[str, ...], str | None]]:
+    """Stream the leaves of a config.boot file.
+
+    Holds only the currently open blocks in memory. An empty block (``server
+    ntp.nict.jp { }``) counts as a valueless leaf.
+
+    Args:
+        lines: Lines of a config.boot file, e.g. an open file
+
+    Yields:
+        (line number, node path, value or None for valueless leaves)
+    """
+    stack: list[list[str]] = []
+    path: list[str] = []
+    # Leaves emitted when each open block started
+    starts: list[int] = []
+    count = 0
+    in_comment = False
+
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if in_comment:
+            in_comment = "*/" not in line
+            continue
+        if not line or line.startswith(("//", "#")):
+            continue
+        if line.startswith("/*"):
+            in_comment = "*/" not in line
+            continue
+        if line == "}":
+            if stack:
+                if count == starts.pop():
+                    count += 1
+                    yield number, tuple(path), None
+                del path[len(path) - len(stack.pop()) :]
+            continue
+        if line.endswith("{"):
+            node = split_boot_line(line[:-1].rstrip())
+            stack.append(node)
+            path.extend(node)
+            starts.append(count)
+            continue
+
+        tokens = split_boot_line(line)
+        count += 1
+        if len(tokens) > 1:
+            yield number, (*path, tokens[0]), " ".join(tokens[1:])
+        else:
+            yield number, (*path, tokens[0]), None
+
+
+def iter_boot_paths(lines: Iterable[str]) -> Iterator[tuple[str, ...]]:
+    """Stream config.boot lines as flat set-command paths.
+
+    Args:
+        lines: Lines of a config.boot file
+
+    Yields:
+        Path tokens, value included, as tokenize_command would return them
+    """
+    for _, path, value in iter_boot_leaves(lines):
+        yield path if value is None else (*path, value)
+
+
+def iter_boot_commands(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """Stream config.boot lines as numbered set commands.
+
+    Args:
+        lines: Lines of a config.boot file
+
+    Yields:
+        (line number of the leaf, set command)
+    """
+    for number, path, value in iter_boot_leaves(lines):
+        command = "set " + " ".join(path)
+        if value is not None:
+            command += " " + quote_value(value)
+        yield number, command
+
+
+def boot_to_commands(lines: Iterable[str]) -> list[str]:
+    """Convert config.boot lines into set commands.
+
+    Args:
+        lines: Lines of a config.boot file
+
+    Returns:
+        List of set commands in file order
+    """
+    return [command for _, command in iter_boot_commands(lines)]
+
+
+def boot_quote(value: str) -> str:
+    """Quote a value the way config.boot writes it (only where needed)."""
+    if _PLAIN_VALUE.match(value):
+        return value
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def is_tag_node(path: tuple[str, ...]) -> bool:
+    """Return True if the node at ``path`` is a tag node.
+
+    Args:
+        path: Node path, ending with the node name
+
+    Returns:
+        True if a TAG_NODES pattern matches the whole path
+    """
+    for pattern in _TAG_INDEX.get(path[-1], []) + _TAG_INDEX.get(WILDCARD, []):
+        if len(pattern) == len(path) and all(
+            p in (WILDCARD, t) for p, t in zip(pattern, path, strict=True)
+        ):
+            return True
+    return False
+
+
+def _tag_sort_key(name: str) -> tuple[int, int, str]:
+    # Rule numbers sort numerically, everything else alphabetically
+    return (0, int(name), "") if name.isdigit() else (1, 0, name)
+
+
+def _render_node(
+    node: ConfigNode, path: tuple[str, ...], depth: int
+) -> Iterator[str]:
+    indent = BOOT_INDENT * depth
+    for name in sorted(node.children):
+        child = node.children[name]
+        child_path = (*path, name)
+        if is_tag_node(child_path):
+            for tag in sorted(child.children, key=_tag_sort_key):
+                yield f"{indent}{name} {boot_quote(tag)} {{"
+                yield from _render_node(
+                    child.children[tag], (*child_path, tag), depth + 1
+                )
+                yield f"{indent}}}"
+        elif not child.children:
+            # Only valueless leaves end a path without a value
+            yield f"{indent}{name}"
+        elif all(
+            not v.children and k not in VALUELESS_LEAVES
+            for k, v in child.children.items()
+        ):
+            for value in child.children:
+                yield f"{indent}{name} {boot_quote(value)}"
+        else:
+            yield f"{indent}{name} {{"
+            yield from _render_node(child, child_path, depth + 1)
+            yield f"{indent}}}"
+
+
+def commands_to_boot(commands: Iterable[str]) -> Iterator[str]:
+    """Compile set commands into config.boot lines.
+
+    Commands are merged into one tree first, so repeated or interleaved
+    paths end up in a single block. Nodes are sorted like VyOS writes them
+    (rule numbers numerically); multi-valued leaves keep their order.
+
+    Args:
+        commands: Set commands; comments, ``delete`` and other lines are
+            ignored
+
+    Yields:
+        config.boot lines without line endings
+    """
+    tree = ConfigTree()
+    for line in commands:
+        tokens = tokenize_command(line)
+        if tokens:
+            tree.add(tokens)
+    yield from _render_node(tree.root, (), 0)
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code (0 for success, non-zero for errors)
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert between VyOS config.boot and set commands"
+    )
+    parser.add_argument(
+        "input_file",
+        type=Path,
+        help="config.boot (converted to set commands) or set commands "
+        "(compiled to config.boot)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        help="Output file (default: stdout)",
+    )
+    args = parser.parse_args()
+
+    if not args.input_file.exists():
+        print(f"Error: File not found: {args.input_file}", file=sys.stderr)
+        return 1
+
+    lines = args.input_file.read_text(encoding="utf-8").splitlines()
+    if is_boot_format(lines):
+        output = boot_to_commands(lines)
+    else:
+        output = list(commands_to_boot(lines))
+    text = "".join(f"{line}\n" for line in output)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+        print(f"Written to: {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,675 @@
+#!/usr/bin/env python3
+"""Phased VyOS configuration generator.
+
+Generates the initial router configuration as seven phases (basic settings,
+SSH, IPv6, WireGuard, IPv4/NAT, DDNS and logging, backups), each ending
+with ``commit`` and ``save`` so a phase can be pasted into a configure
+session on its own.
+
+Every phase declares the Config fields (and extra inputs such as the SSH
+key or WireGuard peers) it reads, and the phases whose output it consumes.
+generate_all() keys each phase by a hash of those inputs, re-renders only
+the phases whose inputs changed since the last run and renders independent
+phases concurrently.
+
+Usage:
+    # Print every phase
+    python vyos_config.py
+
+    # Custom settings, keeping state so later runs only re-render changes
+    python vyos_config.py --config router.json --state-file .vyos-config.json \\
+        --ssh-pubkey-file ~/.ssh/id_ed25519.pub --peers-file peers.json
+
+    # Only one phase
+    python vyos_config.py --phase 3 --peers-file peers.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import shlex
+import sys
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from types import SimpleNamespace
+
+STATE_VERSION = 1
+DEFAULT_JOBS = 4
+
+Peers = dict[str, dict[str, str]]
+
+
+@dataclass
+class Config:
+    """Router settings the phases are generated from."""
+
+    hostname: str = "vyos"
+    timezone: str = "Asia/Tokyo"
+    ntp_servers: tuple[str, ...] = (
+        "ntp.nict.jp",
+        "ntp.jst.mfeed.ad.jp",
+        "time.cloudflare.com",
+    )
+    name_servers: tuple[str, ...] = (
+        "2606:4700:4700::1111",
+        "2001:4860:4860::8888",
+    )
+    wan_interface: str = "eth0"
+    lan_interface: str = "eth1"
+    wxr_interface: str = "eth2"
+    lan_address: str = "192.168.1.1/24"
+    lan_subnet: str = "192.168.1.0/24"
+    wxr_address: str = "192.168.100.2/24"
+    wxr_gateway: str = "192.168.100.1"
+    pd_length: int = 56
+    ssh_port: int = 22
+    ssh_user: str = "vyos"
+    wg_port: int = 51820
+    wg_address: str = "10.10.10.1/24"
+    wg_address6: str = "fd00:10:10:10::1/64"
+    ddns_zone: str = ""
+    ddns_hostname: str = ""
+    ddns_api_token: str = ""
+    backup_dir: str = "/config/backup"
+    backup_keep_days: int = 30
+
+
+def _q(value: object) -> str:
+    """Quote a value only where the shell needs it."""
+    return shlex.quote(str(value))
+
+
+# ============================================================
+# Phases
+# ============================================================
+
+
+def _phase0(c: SimpleNamespace) -> Iterator[str]:
+    yield f"set system host-name {_q(c.hostname)}"
+    yield f"set system time-zone {_q(c.timezone)}"
+    for server in c.ntp_servers:
+        yield f"set service ntp server {_q(server)}"
+    for server in c.name_servers:
+        yield f"set system name-server {_q(server)}"
+
+
+def _phase1(c: SimpleNamespace, ssh_pubkey: str | None = None) -> Iterator[str]:
+    yield f"set service ssh port {c.ssh_port}"
+    yield f"set service ssh listen-address {c.lan_address.split('/')[0]}"
+    if not ssh_pubkey:
+        return
+    # Accept either the bare key or a full "ssh-ed25519 AAAA... comment" line
+    parts = ssh_pubkey.split()
+    if len(parts) == 1:
+        parts.insert(0, "ssh-ed25519")
+    key_type, key = parts[:2]
+    user = f"set system login user {_q(c.ssh_user)}"
+    base = f"{user} authentication public-keys macbook"
+    yield f"{base} type {key_type}"
+    yield f"{base} key {_q(key)}"
+    yield "set service ssh disable-password-authentication"
+
+
+def _phase2(c: SimpleNamespace) -> Iterator[str]:
+    wan = f"set interfaces ethernet {c.wan_interface}"
+    yield f"{wan} description WAN"
+    yield f"{wan} ipv6 address autoconf"
+    yield f"{wan} dhcpv6-options pd 0 length {c.pd_length}"
+    yield f"{wan} dhcpv6-options pd 0 interface {c.lan_interface} address 1"
+    yield f"{wan} dhcpv6-options pd 0 interface {c.lan_interface} sla-id 1"
+
+    ra = f"set service router-advert interface {c.lan_interface}"
+    yield f"{ra} prefix ::/64"
+    for server in c.name_servers:
+        yield f"{ra} name-server {_q(server)}"
+
+    fw = "set firewall ipv6 name WAN6_IN"
+    yield f"{fw} default-action drop"
+    yield f"{fw} rule 10 action accept"
+    yield f"{fw} rule 10 state established"
+    yield f"{fw} rule 10 state related"
+    yield f"{fw} rule 20 action accept"
+    yield f"{fw} rule 20 protocol icmpv6"
+    yield f"{fw} rule 30 action accept"
+    yield f"{fw} rule 30 description {_q('DHCPv6 replies')}"
+    yield f"{fw} rule 30 protocol udp"
+    yield f"{fw} rule 30 source port 547"
+    yield f"{fw} rule 30 destination port 546"
+    for chain in ("input", "forward"):
+        hook = f"set firewall ipv6 {chain} filter rule 100"
+        yield f"{hook} action jump"
+        yield f"{hook} jump-target WAN6_IN"
+        yield f"{hook} inbound-interface name {c.wan_interface}"
+
+
+def _phase3(c: SimpleNamespace, peers: Peers | None = None) -> Iterator[str]:
+    wg = "set interfaces wireguard wg0"
+    yield f"{wg} address {c.wg_address}"
+    yield f"{wg} address {c.wg_address6}"
+    yield f"{wg} port {c.wg_port}"
+    yield f"{wg} description {_q('WireGuard VPN')}"
+    for name, peer in sorted((peers or {}).items()):
+        for key in ("ipv4", "ipv6"):
+            if peer.get(key):
+                yield f"{wg} peer {_q(name)} allowed-ips {peer[key]}"
+        yield f"{wg} peer {_q(name)} public-key {_q(peer['pubkey'])}"
+
+    for family in ("ipv4", "ipv6"):
+        fw = f"set firewall {family} input filter"
+        yield f"{fw} rule 40 action drop"
+        yield f"{fw} rule 40 description {_q('Rate limit WireGuard')}"
+        yield f"{fw} rule 40 protocol udp"
+        yield f"{fw} rule 40 destination port {c.wg_port}"
+        yield f"{fw} rule 40 recent count 10"
+        yield f"{fw} rule 40 recent time minute"
+        yield f"{fw} rule 50 action accept"
+        yield f"{fw} rule 50 protocol udp"
+        yield f"{fw} rule 50 destination port {c.wg_port}"
+
+    # VPN clients reach the LAN but never leave through the WAN
+    lan = "set firewall ipv4 name VPN_TO_LAN"
+    yield f"{lan} default-action accept"
+    yield f"{lan} description {_q('VPN to LAN: all allowed')}"
+    to_wan = "set firewall ipv4 name VPN_TO_WAN"
+    yield f"{to_wan} default-action drop"
+    yield f"{to_wan} description {_q('VPN to WAN: blocked')}"
+    for rule, target, outbound in (
+        (85, "VPN_TO_LAN", c.lan_interface),
+        (91, "VPN_TO_WAN", c.wan_interface),
+    ):
+        hook = f"set firewall ipv4 forward filter rule {rule}"
+        yield f"{hook} action jump"
+        yield f"{hook} jump-target {target}"
+        yield f"{hook} inbound-interface name wg0"
+        yield f"{hook} outbound-interface name {outbound}"
+
+
+def _phase4(c: SimpleNamespace) -> Iterator[str]:
+    wxr = f"set interfaces ethernet {c.wxr_interface}"
+    yield f"{wxr} address {c.wxr_address}"
+    yield f"{wxr} description WXR-upstream"
+    yield f"set interfaces ethernet {c.lan_interface} address {c.lan_address}"
+    yield f"set interfaces ethernet {c.lan_interface} description LAN"
+    yield f"set protocols static route 0.0.0.0/0 next-hop {c.wxr_gateway}"
+    nat = "set nat source rule 100"
+    yield f"{nat} outbound-interface name {c.wxr_interface}"
+    yield f"{nat} source address {c.lan_subnet}"
+    yield f"{nat} translation address masquerade"
+
+
+def _firewall_chains(upstream: list[str]) -> Iterator[str]:
+    """Yield the ``<family> name <NAME>`` paths defined by earlier phases."""
+    seen: set[str] = set()
+    for line in upstream:
+        tokens = line.split()
+        if tokens[:2] == ["set", "firewall"] and "default-action" in tokens:
+            chain = " ".join(tokens[2 : tokens.index("default-action")])
+            if chain not in seen:
+                seen.add(chain)
+                yield chain
+
+
+def _phase5(c: SimpleNamespace, upstream: list[str]) -> Iterator[str]:
+    ddns = "service dns dynamic name cloudflare"
+    if c.ddns_zone and c.ddns_hostname and c.ddns_api_token:
+        yield f"set {ddns} address interface {c.wan_interface}"
+        yield f"set {ddns} protocol cloudflare"
+        yield f"set {ddns} zone {_q(c.ddns_zone)}"
+        yield f"set {ddns} host-name {_q(c.ddns_hostname)}"
+        yield f"set {ddns} password {_q(c.ddns_api_token)}"
+    else:
+        # Placeholders, filled in by vyos_restore.py
+        yield f"# set {ddns} address interface {c.wan_interface}"
+        yield f"# set {ddns} protocol cloudflare"
+        yield f"# set {ddns} zone '<DDNS zone>'"
+        yield f"# set {ddns} host-name '<DDNS host name>'"
+        yield f"# set {ddns} password '<Cloudflare API token>'"
+
+    for family in ("ipv4", "ipv6"):
+        for chain in ("input", "forward"):
+            yield f"set firewall {family} {chain} filter default-log"
+    for chain in _firewall_chains(upstream):
+        yield f"set firewall {chain} default-log"
+
+
+def _phase6(c: SimpleNamespace) -> Iterator[str]:
+    script = "/config/scripts/daily-backup.sh"
+    yield f"mkdir -p {_q(c.backup_dir)} /config/scripts"
+    yield f"cat > {script} <<'EOF'"
+    yield "#!/bin/sh"
+    yield f'cp /config/config.boot "{c.backup_dir}/config.boot.$(date +%Y%m%d)"'
+    yield (
+        f"find {_q(c.backup_dir)} -name 'config.boot.*' "
+        f"-mtime +{c.backup_keep_days} -delete"
+    )
+    yield "EOF"
+    yield f"chmod +x {script}"
+    task = "set system task-scheduler task daily-backup"
+    yield f"{task} interval 1d"
+    yield f"{task} executable path {script}"
+
+
+@dataclass(frozen=True)
+class Phase:
+    """One generation phase and the inputs it depends on.
+
+    ``fields`` lists the Config attributes the phase reads; the render
+    function only sees those. ``extras`` are additional keyword inputs and
+    ``depends`` the phases whose output is passed in as ``upstream``.
+    """
+
+    number: int
+    title: str
+    render: Callable[..., Iterator[str]]
+    fields: tuple[str, ...]
+    extras: tuple[str, ...] = ()
+    depends: tuple[int, ...] = ()
+
+
+PHASES: tuple[Phase, ...] = (
+    Phase(
+        0,
+        "Basic settings",
+        _phase0,
+        ("hostname", "timezone", "ntp_servers", "name_servers"),
+    ),
+    Phase(
+        1,
+        "SSH",
+        _phase1,
+        ("ssh_port", "ssh_user", "lan_address"),
+        extras=("ssh_pubkey",),
+    ),
+    Phase(
+        2,
+        "IPv6 (DHCPv6-PD, RA, firewall)",
+        _phase2,
+        ("wan_interface", "lan_interface", "pd_length", "name_servers"),
+    ),
+    Phase(
+        3,
+        "WireGuard VPN",
+        _phase3,
+        (
+            "wan_interface",
+            "lan_interface",
+            "wg_port",
+            "wg_address",
+            "wg_address6",
+        ),
+        extras=("peers",),
+    ),
+    Phase(
+        4,
+        "IPv4 via WXR and NAT",
+        _phase4,
+        (
+            "wxr_interface",
+            "wxr_address",
+            "wxr_gateway",
+            "lan_interface",
+            "lan_address",
+            "lan_subnet",
+        ),
+    ),
+    Phase(
+        5,
+        "DDNS and firewall logging",
+        _phase5,
+        ("wan_interface", "ddns_zone", "ddns_hostname", "ddns_api_token"),
+        depends=(2, 3),
+    ),
+    Phase(
+        6,
+        "Backups",
+        _phase6,
+        ("backup_dir", "backup_keep_days"),
+    ),
+)
+
+
+def phase_view(phase: Phase, cfg: Config) -> SimpleNamespace:
+    """Return the part of ``cfg`` a phase declared.
+
+    Reading an undeclared field raises AttributeError, so a phase cannot
+    depend on settings its cache key does not cover.
+    """
+    return SimpleNamespace(**{name: getattr(cfg, name) for name in phase.fields})
+
+
+def _render_phase(
+    phase: Phase,
+    cfg: Config,
+    extras: dict[str, object],
+    upstream: list[str] | None = None,
+) -> Iterator[str]:
+    kwargs = {name: extras.get(name) for name in phase.extras}
+    if phase.depends:
+        kwargs["upstream"] = upstream or []
+    yield from phase.render(phase_view(phase, cfg), **kwargs)
+    yield "commit"
+    yield "save"
+
+
+def _generate(number: int, cfg: Config, **extras: object) -> Iterator[str]:
+    phase = PHASES[number]
+    upstream: list[str] = []
+    for dep in phase.depends:
+        upstream.extend(_generate(dep, cfg, **extras))
+    yield from _render_phase(phase, cfg, extras, upstream)
+
+
+def generate_phase0(cfg: Config) -> Iterator[str]:
+    """Generate Phase 0: host name, time zone, NTP and name servers."""
+    return _generate(0, cfg)
+
+
+def generate_phase1(cfg: Config, ssh_pubkey: str | None = None) -> Iterator[str]:
+    """Generate Phase 1: SSH service and the admin public key.
+
+    Args:
+        cfg: Router settings
+        ssh_pubkey: Bare ed25519 key or a full ``ssh-ed25519 AAAA...`` line
+    """
+    return _generate(1, cfg, ssh_pubkey=ssh_pubkey)
+
+
+def generate_phase2(cfg: Config) -> Iterator[str]:
+    """Generate Phase 2: IPv6 autoconf, DHCPv6-PD, RA and the WAN6 firewall."""
+    return _generate(2, cfg)
+
+
+def generate_phase3(cfg: Config, peers: Peers | None = None) -> Iterator[str]:
+    """Generate Phase 3: WireGuard, its rate limit and VPN restrictions.
+
+    Args:
+        cfg: Router settings
+        peers: {name: {"pubkey", "ipv4", "ipv6"}} for each client
+    """
+    return _generate(3, cfg, peers=peers)
+
+
+def generate_phase4(cfg: Config) -> Iterator[str]:
+    """Generate Phase 4: WXR uplink, default route and source NAT."""
+    return _generate(4, cfg)
+
+
+def generate_phase5(cfg: Config) -> Iterator[str]:
+    """Generate Phase 5: DDNS and logging for every firewall chain."""
+    return _generate(5, cfg)
+
+
+def generate_phase6(cfg: Config) -> Iterator[str]:
+    """Generate Phase 6: backup directory and the daily backup task."""
+    return _generate(6, cfg)
+
+
+# ============================================================
+# Incremental generation
+# ============================================================
+
+
+@dataclass
+class GeneratorState:
+    """Phase input hashes and outputs from the previous run.
+
+    ``rendered`` lists the phases the last generate_all() call actually
+    rendered; the others were reused unchanged.
+    """
+
+    digests: dict[int, str] = field(default_factory=dict)
+    outputs: dict[int, list[str]] = field(default_factory=dict)
+    rendered: list[int] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path) -> GeneratorState:
+        """Load a state file; a missing or unreadable file gives an empty state."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+            return cls()
+        phases = data.get("phases", {})
+        return cls(
+            digests={int(n): p["digest"] for n, p in phases.items()},
+            outputs={int(n): p["lines"] for n, p in phases.items()},
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the state file atomically.
+
+        Args:
+            path: State file path
+        """
+        data = {
+            "version": STATE_VERSION,
+            "phases": {
+                str(n): {"digest": self.digests[n], "lines": self.outputs[n]}
+                for n in sorted(self.digests)
+            },
+        }
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                tmp.unlink()
+            raise
+
+
+def phase_digest(
+    phase: Phase,
+    cfg: Config,
+    extras: dict[str, object],
+    upstream: list[str] | None = None,
+) -> str:
+    """Hash everything a phase's output depends on.
+
+    Args:
+        phase: The phase
+        cfg: Router settings (only the declared fields are hashed)
+        extras: Extra inputs (only the declared ones are hashed)
+        upstream: Output of the phases it depends on
+
+    Returns:
+        Hex sha256 digest
+    """
+    key = {
+        "phase": phase.number,
+        "fields": {name: getattr(cfg, name) for name in phase.fields},
+        "extras": {name: extras.get(name) for name in phase.extras},
+        "upstream": upstream or [],
+    }
+    return hashlib.sha256(
+        json.dumps(key, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+def _upstream(phase: Phase, outputs: dict[int, list[str]]) -> list[str]:
+    return [line for dep in phase.depends for line in outputs[dep]]
+
+
+def generate_all(
+    cfg: Config,
+    ssh_pubkey: str | None = None,
+    peers: Peers | None = None,
+    state: GeneratorState | None = None,
+    jobs: int = DEFAULT_JOBS,
+) -> list[str]:
+    """Generate every phase, re-rendering only what changed.
+
+    A phase is rendered once all the phases it depends on are available;
+    phases without pending dependencies render concurrently. A phase whose
+    input digest matches ``state`` reuses the stored output, and since
+    dependent phases hash their upstream output, an upstream phase that
+    re-renders to the same lines does not invalidate them.
+
+    Args:
+        cfg: Router settings
+        ssh_pubkey: SSH public key for Phase 1
+        peers: WireGuard peers for Phase 3
+        state: Previous run's state, updated in place
+        jobs: Maximum number of phases rendered at once
+
+    Returns:
+        All phases in order, each behind a ``# === Phase N: ... ===`` header
+    """
+    state = state if state is not None else GeneratorState()
+    extras: dict[str, object] = {"ssh_pubkey": ssh_pubkey, "peers": peers}
+    outputs: dict[int, list[str]] = {}
+    rendered: list[int] = []
+    pending = {phase.number: phase for phase in PHASES}
+    running: dict[Future[list[str]], tuple[Phase, str]] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for number, phase in list(pending.items()):
+                if any(dep not in outputs for dep in phase.depends):
+                    continue
+                del pending[number]
+                upstream = _upstream(phase, outputs)
+                digest = phase_digest(phase, cfg, extras, upstream)
+                if state.digests.get(number) == digest and number in state.outputs:
+                    outputs[number] = state.outputs[number]
+                    continue
+                future = pool.submit(
+                    lambda p=phase, u=upstream: list(
+                        _render_phase(p, cfg, extras, u)
+                    )
+                )
+                running[future] = (phase, digest)
+            if not running:
+                # Reused phases may have unblocked others
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                phase, digest = running.pop(future)
+                outputs[phase.number] = future.result()
+                state.digests[phase.number] = digest
+                state.outputs[phase.number] = outputs[phase.number]
+                rendered.append(phase.number)
+
+    state.rendered = sorted(rendered)
+    lines: list[str] = []
+    for phase in PHASES:
+        lines.append(f"# === Phase {phase.number}: {phase.title} ===")
+        lines.extend(outputs[phase.number])
+        lines.append("")
+    return lines
+
+
+def _load_config(path: Path) -> Config:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    known = {f.name: f for f in fields(Config)}
+    unknown = sorted(set(data) - set(known))
+    if unknown:
+        raise ValueError(f"unknown setting(s): {', '.join(unknown)}")
+    for name, value in data.items():
+        if isinstance(value, list):
+            data[name] = tuple(value)
+    return Config(**data)
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code (0 for success, non-zero for errors)
+    """
+    parser = argparse.ArgumentParser(
+        description="Generate the phased VyOS initial configuration"
+    )
+    parser.add_argument(
+        "--config",
+        type=Path,
+        help="JSON file with Config settings (default: built-in defaults)",
+    )
+    parser.add_argument(
+        "--ssh-pubkey-file",
+        type=Path,
+        help="SSH public key for Phase 1",
+    )
+    parser.add_argument(
+        "--peers-file",
+        type=Path,
+        help='WireGuard peers as JSON: {"name": {"pubkey", "ipv4", "ipv6"}}',
+    )
+    parser.add_argument(
+        "--phase",
+        type=int,
+        choices=range(len(PHASES)),
+        help="Generate a single phase",
+    )
+    parser.add_argument(
+        "--state-file",
+        type=Path,
+        help="Reuse unchanged phases from, and record this run in, a state file",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Phases rendered at once (default: {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        help="Output file (default: stdout)",
+    )
+    args = parser.parse_args()
+
+    try:
+        cfg = _load_config(args.config) if args.config else Config()
+        ssh_pubkey = (
+            args.ssh_pubkey_file.read_text(encoding="utf-8").strip()
+            if args.ssh_pubkey_file
+            else None
+        )
+        peers = (
+            json.loads(args.peers_file.read_text(encoding="utf-8"))
+            if args.peers_file
+            else None
+        )
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.phase is not None:
+        lines = list(
+            _generate(args.phase, cfg, ssh_pubkey=ssh_pubkey, peers=peers)
+        )
+    else:
+        state = GeneratorState.load(args.state_file) if args.state_file else None
+        lines = generate_all(cfg, ssh_pubkey, peers, state=state, jobs=args.jobs)
+        if state is not None:
+            cached = len(PHASES) - len(state.rendered)
+            rendered = ", ".join(map(str, state.rendered)) or "none"
+            print(f"Rendered phases: {rendered} ({cached} cached)", file=sys.stderr)
+            try:
+                state.save(args.state_file)
+            except OSError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+
+    text = "\n".join(lines) + "\n"
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+        print(f"Configuration written to: {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,9 @@
 """VyOS configuration checker script.
 
 This script connects to VyOS via SSH and validates the configuration
-against expected settings defined in CLAUDE.md.
+against expected settings defined in CLAUDE.md. All checks share a single
+multiplexed SSH connection (see vyos_ssh.py), so a full run costs one key
+exchange.
 
 Usage:
     # Check all configurations
@@ -14,6 +16,28 @@ Usage:
     # Use custom SSH settings
     python vyos_config_check.py --host 192.168.1.1 --user vyos
 
+    # Fetch the configuration once and evaluate config checks locally
+    python vyos_config_check.py --snapshot
+
+    # Check a saved config or the template offline (no SSH)
+    python vyos_config_check.py --config-file backup.txt
+    python vyos_config_check.py --config-file vyos-config-template.txt \
+        --include-commented
+
+    # Reuse results while the router's commit revision is unchanged
+    python vyos_config_check.py --cache
+
+    # Machine-readable output with per-check timing
+    python vyos_config_check.py --format json --profile
+    python vyos_config_check.py --format junit > results.xml
+
+    # Keep watching and alert within seconds of a bad commit
+    python vyos_config_check.py --watch --interval 5
+
+    # Check many routers concurrently
+    python vyos_config_check.py --hosts r1,r2,r3 --jobs 8 --deadline 60
+    python vyos_config_check.py --inventory routers.txt
+
 Categories:
     interface  - Network interface settings (eth0, eth1, eth2, wg0)
     ipv6       - IPv6 settings (RA, DHCPv6-PD)
@@ -21,26 +45,96 @@ Categories:
     wireguard  - WireGuard VPN settings
     ddns       - Dynamic DNS settings
     routing    - Routing and NAT settings
-    all        - All categories (default)
+    all        - All categories above (default)
+
+    firewall-hits - Rule hit counters vs. rule order (opt-in, see
+                    vyos_firewall.py)
 """
 
 from __future__ import annotations
 
 import argparse
+import json
+import os
+import re
+import shlex
 import subprocess
 import sys
-from dataclasses import dataclass
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
 from typing import Callable
 
+from vyos_boot import iter_boot_commands, sniff_format
+from vyos_config_tree import ConfigTree, matches_path, tokenize_command
+from vyos_firewall import (
+    DEFAULT_MIN_GAIN,
+    FIREWALL_CONFIG_COMMAND,
+    FIREWALL_COUNTERS_COMMAND,
+    profile_firewall,
+)
+from vyos_ssh import CommandStream, SessionStats, SSHSession, ssh_base_command
+
 
 @dataclass
 class CheckResult:
-    """Result of a configuration check."""
+    """Result of a configuration check.
+
+    Timing and size fields are instrumentation only and are ignored when
+    comparing results.
+    """
 
     name: str
     passed: bool
     message: str
     details: str = ""
+    category: str = field(default="", compare=False)
+    wall_time: float = field(default=0.0, compare=False)
+    connect_time: float = field(default=0.0, compare=False)
+    command_time: float = field(default=0.0, compare=False)
+    output_bytes: int = field(default=0, compare=False)
+    validator_time: float = field(default=0.0, compare=False)
+
+
+SNAPSHOT_COMMAND = "show configuration commands"
+# Newest line of the commit log; changes on every commit
+REVISION_COMMAND = "show system commit | head -n 1"
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "limen"
+    / "vyos_config_check"
+)
+
+# Characters that are literal in grep basic regular expressions
+_BRE_LITERALS = re.compile(r"([+?(){}|])")
+
+# Bounds on the output excerpt kept in a failed result's details
+DETAIL_LINES = 20
+DETAIL_LINE_CHARS = 200
+
+# Validators accept full output text or an iterable of lines
+Output = str | Iterable[str]
+
+
+def parse_grep_command(command: str) -> str | None:
+    """Return PATTERN from ``show configuration commands | grep PATTERN``.
+
+    Args:
+        command: VyOS operational command
+
+    Returns:
+        The unquoted grep pattern, or None for any other command
+    """
+    head, sep, tail = command.partition("|")
+    if not sep or head.strip() != SNAPSHOT_COMMAND:
+        return None
+    args = shlex.split(tail)
+    if len(args) != 2 or args[0] != "grep":
+        return None
+    return args[1]
 
 
 @dataclass
@@ -49,8 +143,155 @@ class ConfigCheck:
 
     name: str
     command: str
-    validator: Callable[[str], CheckResult]
+    validator: Callable[[Output], CheckResult]
     category: str
+    # grep pattern answering an operational check from configuration alone
+    offline_pattern: str | None = None
+
+    @property
+    def grep_pattern(self) -> str | None:
+        """Return the grep pattern if this is a filtered configuration query.
+
+        Commands of the form ``show configuration commands | grep PATTERN``
+        can be answered from a local configuration snapshot.
+        """
+        return parse_grep_command(self.command)
+
+    @property
+    def cacheable(self) -> bool:
+        """Return True if the result only depends on the committed config.
+
+        Operational state (routes, links, counters) changes without a
+        commit, so those checks are never answered from the cache.
+        """
+        return self.grep_pattern is not None
+
+    @property
+    def config_pattern(self) -> str | None:
+        """Return the pattern used to evaluate this check from a config file."""
+        return self.grep_pattern or self.offline_pattern
+
+
+def as_lines(output: Output) -> Iterable[str]:
+    """Return output as an iterable of lines."""
+    if isinstance(output, str):
+        return output.splitlines()
+    return output
+
+
+class OutputTap:
+    """Iterator over output lines that counts bytes and keeps an excerpt.
+
+    Only the first DETAIL_LINES lines (each cut to DETAIL_LINE_CHARS) are
+    retained, so memory stays bounded however large the output is.
+    """
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        self._lines = lines
+        self.bytes = 0
+        self.lines = 0
+        self._excerpt: list[str] = []
+
+    def __iter__(self) -> Iterator[str]:
+        for line in self._lines:
+            self.bytes += len(line.encode("utf-8")) + 1
+            self.lines += 1
+            if len(self._excerpt) < DETAIL_LINES:
+                self._excerpt.append(line[:DETAIL_LINE_CHARS])
+            yield line
+
+    def excerpt(self) -> str:
+        """Return the retained lines, noting any that were dropped."""
+        text = "\n".join(self._excerpt)
+        if self.lines > len(self._excerpt):
+            text += f"\n... ({self.lines - len(self._excerpt)} more lines)"
+        return text
+
+
+def validate(check: ConfigCheck, output: Output) -> CheckResult:
+    """Run a check's validator, recording validator time and output size.
+
+    Validators may stop reading as soon as their verdict is known; the
+    size recorded is what was actually consumed. A failed result gets a
+    bounded excerpt of the output as its details.
+
+    Args:
+        check: Check whose validator to run
+        output: Command output, a line stream, or filtered snapshot lines
+
+    Returns:
+        The validator's result with instrumentation fields filled in
+    """
+    tap = OutputTap(as_lines(output))
+    start = time.perf_counter()
+    result = check.validator(tap)
+    result.validator_time = time.perf_counter() - start
+    result.wall_time = result.validator_time
+    result.output_bytes = tap.bytes
+    result.category = check.category
+    if not result.passed and not result.details:
+        result.details = tap.excerpt()
+    return result
+
+
+def open_stream(session: SSHSession, command: str) -> CommandStream:
+    """Start a command on a session and return its output as a line stream.
+
+    Sessions without ``run_stream`` (such as simple stand-ins) fall back to
+    a buffered ``run``.
+
+    Args:
+        session: Session to run the command on
+        command: VyOS operational command
+
+    Returns:
+        Stream of output lines
+    """
+    run_stream = getattr(session, "run_stream", None)
+    if run_stream is not None:
+        return run_stream(command)
+    returncode, stdout, stderr = session.run(command)
+    return CommandStream(stdout.splitlines(), returncode, stderr)
+
+
+def select_checks(category: str) -> list[ConfigCheck]:
+    """Return the checks of a category ('all' for every default check).
+
+    Opt-in checks (PROFILE_CHECKS) only run when their category is asked
+    for by name.
+    """
+    if category == "all":
+        return list(CONFIG_CHECKS)
+    return [c for c in CONFIG_CHECKS + PROFILE_CHECKS if c.category == category]
+
+
+def iter_grep(lines: Iterable[str], pattern: str) -> Iterator[str]:
+    """Yield the lines ``grep PATTERN`` would print on the router.
+
+    Args:
+        lines: Lines of ``show configuration commands`` output
+        pattern: grep basic regular expression
+
+    Yields:
+        Matching lines
+    """
+    regex = re.compile(_BRE_LITERALS.sub(r"\\\1", pattern))
+    for line in lines:
+        if regex.search(line):
+            yield line
+
+
+def grep_snapshot(lines: list[str], pattern: str) -> str:
+    """Filter snapshot lines like ``grep PATTERN`` would on the router.
+
+    Args:
+        lines: Lines of ``show configuration commands`` output
+        pattern: grep basic regular expression
+
+    Returns:
+        Matching lines, newline-terminated as grep prints them
+    """
+    return "".join(f"{line}\n" for line in iter_grep(lines, pattern))
 
 
 def run_vyos_command(
@@ -67,9 +308,7 @@ def run_vyos_command(
     Returns:
         Tuple of (return_code, stdout, stderr)
     """
-    ssh_cmd = ["ssh", "-o", "StrictHostKeyChecking=no", "-o", "BatchMode=yes"]
-    if key_file:
-        ssh_cmd.extend(["-i", key_file])
+    ssh_cmd = ssh_base_command(key_file)
     ssh_cmd.extend([f"{user}@{host}", command])
 
     try:
@@ -83,153 +322,244 @@ def run_vyos_command(
         return 1, "", "SSH client not found"
 
 
-def check_interface_eth0(output: str) -> CheckResult:
+def find_missing(
+    output: Output, requirements: list[tuple[Callable[[str], bool], str]]
+) -> list[str]:
+    """Scan output for lines satisfying each requirement.
+
+    Reading stops as soon as every requirement has been met, so a match
+    near the top of a long output ends the command early.
+
+    Args:
+        output: Command output or lines
+        requirements: (line test, description) pairs
+
+    Returns:
+        Descriptions of the requirements no line satisfied, in order
+    """
+    pending = list(requirements)
+    for line in as_lines(output):
+        pending = [(test, msg) for test, msg in pending if not test(line)]
+        if not pending:
+            break
+    return [msg for _, msg in pending]
+
+
+def has_path(output: Output, pattern: str) -> bool:
+    """Return True as soon as a set command under ``pattern`` is seen."""
+    return any(
+        matches_path(tokenize_command(line), pattern) for line in as_lines(output)
+    )
+
+
+def check_interface_eth0(output: Output) -> CheckResult:
     """Check eth0 (WXR connection) configuration."""
-    checks = [
-        ("192.168.100.2/24" in output, "IPv4 address 192.168.100.2/24"),
-    ]
-    failed = [msg for passed, msg in checks if not passed]
+    failed = find_missing(
+        output,
+        [(lambda line: "192.168.100.2/24" in line, "IPv4 address 192.168.100.2/24")],
+    )
     if failed:
-        return CheckResult(
-            "eth0 (WXR接続)", False, f"Missing: {', '.join(failed)}", output
-        )
+        return CheckResult("eth0 (WXR接続)", False, f"Missing: {', '.join(failed)}")
     return CheckResult("eth0 (WXR接続)", True, "✅ 192.168.100.2/24 configured")
 
 
-def check_interface_eth1(output: str) -> CheckResult:
+def check_interface_eth1(output: Output) -> CheckResult:
     """Check eth1 (WAN) configuration."""
-    checks = [
-        ("dhcpv6" in output.lower() or "2404:" in output, "DHCPv6-PD enabled"),
-    ]
-    failed = [msg for passed, msg in checks if not passed]
+    failed = find_missing(
+        output,
+        [
+            (
+                lambda line: "dhcpv6" in line.lower() or "2404:" in line,
+                "DHCPv6-PD enabled",
+            ),
+        ],
+    )
     if failed:
-        return CheckResult("eth1 (WAN)", False, f"Missing: {', '.join(failed)}", output)
+        return CheckResult("eth1 (WAN)", False, f"Missing: {', '.join(failed)}")
     return CheckResult("eth1 (WAN)", True, "✅ DHCPv6-PD configured")
 
 
-def check_interface_eth2(output: str) -> CheckResult:
+def check_interface_eth2(output: Output) -> CheckResult:
     """Check eth2 (LAN) configuration."""
-    checks = [
-        ("192.168.1.1" in output, "IPv4 address 192.168.1.1"),
-    ]
-    failed = [msg for passed, msg in checks if not passed]
+    failed = find_missing(
+        output, [(lambda line: "192.168.1.1" in line, "IPv4 address 192.168.1.1")]
+    )
     if failed:
-        return CheckResult("eth2 (LAN)", False, f"Missing: {', '.join(failed)}", output)
+        return CheckResult("eth2 (LAN)", False, f"Missing: {', '.join(failed)}")
     return CheckResult("eth2 (LAN)", True, "✅ 192.168.1.1 configured")
 
 
-def check_interface_wg0(output: str) -> CheckResult:
+def check_interface_wg0(output: Output) -> CheckResult:
     """Check wg0 (WireGuard) configuration."""
-    checks = [
-        ("10.10.10.1" in output, "IPv4 address 10.10.10.1"),
-        ("fd00:10:10:10::1" in output, "IPv6 address fd00:10:10:10::1"),
-    ]
-    failed = [msg for passed, msg in checks if not passed]
+    failed = find_missing(
+        output,
+        [
+            (lambda line: "10.10.10.1" in line, "IPv4 address 10.10.10.1"),
+            (
+                lambda line: "fd00:10:10:10::1" in line,
+                "IPv6 address fd00:10:10:10::1",
+            ),
+        ],
+    )
     if failed:
-        return CheckResult(
-            "wg0 (WireGuard)", False, f"Missing: {', '.join(failed)}", output
-        )
+        return CheckResult("wg0 (WireGuard)", False, f"Missing: {', '.join(failed)}")
     return CheckResult("wg0 (WireGuard)", True, "✅ 10.10.10.1, fd00:10:10:10::1")
 
 
-def check_ipv6_ra(output: str) -> CheckResult:
+def check_ipv6_ra(output: Output) -> CheckResult:
     """Check IPv6 Router Advertisement configuration."""
-    if "eth2" not in output:
-        return CheckResult("IPv6 RA", False, "RA not configured on eth2", output)
+    if not has_path(output, "service router-advert interface eth2"):
+        return CheckResult("IPv6 RA", False, "RA not configured on eth2")
     return CheckResult("IPv6 RA", True, "✅ RA configured on eth2")
 
 
-def check_dhcpv6_pd(output: str) -> CheckResult:
+def check_dhcpv6_pd(output: Output) -> CheckResult:
     """Check DHCPv6-PD configuration."""
+    tree = ConfigTree.from_commands(as_lines(output))
+    options = "interfaces ethernet eth1 dhcpv6-options"
     checks = [
-        ("eth1" in output, "DHCPv6-PD on eth1"),
-        ("duid" in output.lower() or "pd" in output.lower(), "DUID/PD configured"),
+        (tree.exists(options), "DHCPv6-PD on eth1"),
+        (
+            tree.exists(f"{options} pd") or tree.exists(f"{options} duid"),
+            "DUID/PD configured",
+        ),
     ]
     failed = [msg for passed, msg in checks if not passed]
     if failed:
-        return CheckResult(
-            "DHCPv6-PD", False, f"Missing: {', '.join(failed)}", output
-        )
+        return CheckResult("DHCPv6-PD", False, f"Missing: {', '.join(failed)}")
     return CheckResult("DHCPv6-PD", True, "✅ DHCPv6-PD on eth1")
 
 
-def check_firewall_input(output: str) -> CheckResult:
+def check_firewall_input(output: Output) -> CheckResult:
     """Check input firewall rules."""
-    if "input" not in output.lower():
-        return CheckResult("FW Input", False, "Input filter not configured", output)
+    if not has_path(output, "firewall * input filter"):
+        return CheckResult("FW Input", False, "Input filter not configured")
     return CheckResult("FW Input", True, "✅ Input filter configured")
 
 
-def check_firewall_forward(output: str) -> CheckResult:
+def check_firewall_forward(output: Output) -> CheckResult:
     """Check forward firewall rules."""
-    if "forward" not in output.lower():
-        return CheckResult("FW Forward", False, "Forward filter not configured", output)
+    if not has_path(output, "firewall * forward filter"):
+        return CheckResult("FW Forward", False, "Forward filter not configured")
     return CheckResult("FW Forward", True, "✅ Forward filter configured")
 
 
-def check_wireguard_interface(output: str) -> CheckResult:
+def check_wireguard_interface(output: Output) -> CheckResult:
     """Check WireGuard interface configuration."""
+    tree = ConfigTree.from_commands(as_lines(output))
     checks = [
-        ("wg0" in output, "wg0 interface"),
-        ("51820" in output, "Port 51820"),
+        (tree.exists("interfaces wireguard wg0"), "wg0 interface"),
+        (tree.value("interfaces wireguard wg0 port") == "51820", "Port 51820"),
     ]
     failed = [msg for passed, msg in checks if not passed]
     if failed:
-        return CheckResult(
-            "WireGuard", False, f"Missing: {', '.join(failed)}", output
-        )
+        return CheckResult("WireGuard", False, f"Missing: {', '.join(failed)}")
     return CheckResult("WireGuard", True, "✅ wg0 on port 51820")
 
 
-def check_wireguard_peers(output: str) -> CheckResult:
+def check_wireguard_peers(output: Output) -> CheckResult:
     """Check WireGuard peer configuration."""
-    peer_count = output.lower().count("peer")
+    tree = ConfigTree.from_commands(as_lines(output))
+    peer_count = sum(1 for _ in tree.match("interfaces wireguard * peer *"))
     if peer_count < 2:
         return CheckResult(
-            "WG Peers", False, f"Expected 2 peers, found {peer_count}", output
+            "WG Peers", False, f"Expected 2 peers, found {peer_count}"
         )
     return CheckResult("WG Peers", True, f"✅ {peer_count} peers configured")
 
 
-def check_ddns(output: str) -> CheckResult:
+def check_ddns(output: Output) -> CheckResult:
     """Check Dynamic DNS configuration."""
+    tree = ConfigTree.from_commands(as_lines(output))
+    names = [path[-1] for path in tree.match("service dns dynamic name *")]
+    base = "service dns dynamic name"
     checks = [
-        ("cloudflare" in output.lower(), "Cloudflare provider"),
-        ("router.murata-lab.net" in output or "murata-lab" in output, "Domain"),
+        (
+            any(tree.value(f"{base} {n} protocol") == "cloudflare" for n in names),
+            "Cloudflare provider",
+        ),
+        (
+            any(
+                "murata-lab" in (tree.value(f"{base} {n} host-name") or "")
+                for n in names
+            ),
+            "Domain",
+        ),
     ]
     failed = [msg for passed, msg in checks if not passed]
     if failed:
-        return CheckResult("DDNS", False, f"Missing: {', '.join(failed)}", output)
+        return CheckResult("DDNS", False, f"Missing: {', '.join(failed)}")
     return CheckResult("DDNS", True, "✅ Cloudflare DDNS configured")
 
 
-def check_default_route(output: str) -> CheckResult:
+def check_default_route(output: Output) -> CheckResult:
     """Check default route configuration."""
-    if "192.168.100.1" not in output:
+    if find_missing(output, [(lambda line: "192.168.100.1" in line, "")]):
         return CheckResult(
-            "Default Route", False, "Default route via 192.168.100.1 not found", output
+            "Default Route", False, "Default route via 192.168.100.1 not found"
         )
     return CheckResult("Default Route", True, "✅ via 192.168.100.1 (WXR)")
 
 
-def check_nat_source(output: str) -> CheckResult:
+def check_nat_source(output: Output) -> CheckResult:
     """Check NAT source rules."""
-    checks = [
-        ("masquerade" in output.lower() or "source" in output.lower(), "Source NAT"),
-    ]
-    failed = [msg for passed, msg in checks if not passed]
-    if failed:
-        return CheckResult("NAT Source", False, f"Missing: {', '.join(failed)}", output)
+    if not has_path(output, "nat source rule *"):
+        return CheckResult("NAT Source", False, "Missing: Source NAT")
     return CheckResult("NAT Source", True, "✅ Source NAT configured")
 
 
+def check_firewall_hits(output: Output) -> CheckResult:
+    """Check that no chain would get much cheaper with its hot rules first.
+
+    Expects ``show firewall`` counters followed by the firewall set
+    commands (FIREWALL_HITS_COMMAND).
+    """
+    config: list[str] = []
+    counters: list[str] = []
+    for line in as_lines(output):
+        (config if line.startswith("set ") else counters).append(line)
+    profiles = profile_firewall(config, counters)
+    if not profiles:
+        return CheckResult("FW Hit Order", False, "No firewall counters found")
+    if not any(p.total for p in profiles):
+        return CheckResult("FW Hit Order", True, "✅ No traffic counted yet")
+    slow = [p for p in profiles if p.changed and p.gain >= DEFAULT_MIN_GAIN]
+    if slow:
+        return CheckResult(
+            "FW Hit Order",
+            False,
+            "Reorder would save rule evaluations: "
+            + ", ".join(
+                f"{p.chain.name} {p.before:.2f}→{p.after:.2f}" for p in slow
+            ),
+            "Run vyos_firewall.py for the renumbered set commands",
+        )
+    return CheckResult("FW Hit Order", True, "✅ Hottest rules already match first")
+
+
+# Counters first: the config lines are told apart by their 'set ' prefix
+FIREWALL_HITS_COMMAND = f"{FIREWALL_COUNTERS_COMMAND}; {FIREWALL_CONFIG_COMMAND}"
+
+
 # Define all checks
 CONFIG_CHECKS: list[ConfigCheck] = [
     # Interface checks
-    ConfigCheck("eth0", "show interfaces ethernet eth0", check_interface_eth0, "interface"),
-    ConfigCheck("eth1", "show interfaces ethernet eth1", check_interface_eth1, "interface"),
-    ConfigCheck("eth2", "show interfaces ethernet eth2", check_interface_eth2, "interface"),
-    ConfigCheck("wg0", "show interfaces wireguard wg0", check_interface_wg0, "interface"),
+    ConfigCheck(
+        "eth0", "show interfaces ethernet eth0", check_interface_eth0, "interface",
+        offline_pattern="interfaces ethernet eth0",
+    ),
+    ConfigCheck(
+        "eth1", "show interfaces ethernet eth1", check_interface_eth1, "interface",
+        offline_pattern="interfaces ethernet eth1",
+    ),
+    ConfigCheck(
+        "eth2", "show interfaces ethernet eth2", check_interface_eth2, "interface",
+        offline_pattern="interfaces ethernet eth2",
+    ),
+    ConfigCheck(
+        "wg0", "show interfaces wireguard wg0", check_interface_wg0, "interface",
+        offline_pattern="interfaces wireguard wg0",
+    ),
     # IPv6 checks
     ConfigCheck("RA", "show configuration commands | grep router-advert", check_ipv6_ra, "ipv6"),
     ConfigCheck("DHCPv6-PD", "show configuration commands | grep dhcpv6", check_dhcpv6_pd, "ipv6"),
@@ -240,12 +570,108 @@ CONFIG_CHECKS: list[ConfigCheck] = [
     ConfigCheck("WG Interface", "show configuration commands | grep wireguard", check_wireguard_interface, "wireguard"),
     ConfigCheck("WG Peers", "show configuration commands | grep 'wireguard.*peer'", check_wireguard_peers, "wireguard"),
     # DDNS checks
-    ConfigCheck("DDNS", "show configuration commands | grep dynamic-dns", check_ddns, "ddns"),
+    ConfigCheck(
+        "DDNS", "show configuration commands | grep 'dns dynamic'", check_ddns, "ddns"
+    ),
     # Routing checks
-    ConfigCheck("Default Route", "show ip route 0.0.0.0/0", check_default_route, "routing"),
+    ConfigCheck(
+        "Default Route", "show ip route 0.0.0.0/0", check_default_route, "routing",
+        offline_pattern="protocols static route 0.0.0.0/0",
+    ),
     ConfigCheck("NAT Source", "show configuration commands | grep 'nat source'", check_nat_source, "routing"),
 ]
 
+# Opt-in checks: excluded from 'all', selected by category name only
+PROFILE_CHECKS: list[ConfigCheck] = [
+    ConfigCheck(
+        "FW Hit Order", FIREWALL_HITS_COMMAND, check_firewall_hits, "firewall-hits"
+    ),
+]
+
+
+@dataclass
+class CacheEntry:
+    """Cached command output and check results for one commit revision."""
+
+    outputs: dict[str, str] = field(default_factory=dict)
+    results: dict[str, CheckResult] = field(default_factory=dict)
+
+
+class ResultCache:
+    """On-disk cache of check output and results, keyed by host and revision.
+
+    The commit revision marker changes on every ``commit``, so an entry is
+    valid for as long as the router's configuration is unchanged. Only
+    configuration queries are stored (see ``ConfigCheck.cacheable``);
+    ``ttl`` additionally bounds the age of an entry.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, ttl: float = 3600.0):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    def _path(self, host: str) -> Path:
+        return self.cache_dir / f"{host.replace('/', '_')}.json"
+
+    def load(self, host: str, revision: str) -> CacheEntry:
+        """Return the cached entry for a host at a revision (empty if none).
+
+        Args:
+            host: VyOS hostname or IP
+            revision: Commit revision marker
+
+        Returns:
+            Cached entry, or an empty one on miss, expiry or corruption
+        """
+        try:
+            with open(self._path(host), encoding="utf-8") as f:
+                data = json.load(f)
+            if data["revision"] != revision or time.time() - data["created"] > self.ttl:
+                return CacheEntry()
+            return CacheEntry(
+                outputs=dict(data["outputs"]),
+                results={k: CheckResult(**v) for k, v in data["results"].items()},
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return CacheEntry()
+
+    def store(self, host: str, revision: str, entry: CacheEntry) -> None:
+        """Atomically write the entry for a host at a revision.
+
+        Args:
+            host: VyOS hostname or IP
+            revision: Commit revision marker
+            entry: Entry to store
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(host)
+        data = {
+            "revision": revision,
+            "created": time.time(),
+            "outputs": entry.outputs,
+            "results": {k: asdict(v) for k, v in entry.results.items()},
+        }
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def fetch_revision(session: SSHSession) -> str | None:
+    """Return the router's current commit revision marker.
+
+    Args:
+        session: SSH session to the router
+
+    Returns:
+        The newest commit log line, or None if it could not be read
+    """
+    returncode, stdout, _ = session.run(REVISION_COMMAND)
+    revision = stdout.strip()
+    if returncode != 0 or not revision:
+        return None
+    return revision
+
 
 def run_checks(
     host: str,
@@ -253,42 +679,345 @@ def run_checks(
     key_file: str | None,
     category: str,
     verbose: bool,
+    session: SSHSession | None = None,
+    snapshot: bool = False,
+    cache: ResultCache | None = None,
+    checks: list[ConfigCheck] | None = None,
+    snapshot_lines: list[str] | None = None,
 ) -> list[CheckResult]:
     """Run configuration checks.
 
+    All checks share one multiplexed SSH session. If no session is given,
+    one is opened for the duration of the call and closed afterwards.
+
+    In snapshot mode the full ``show configuration commands`` output is
+    fetched once and every grep-style check is evaluated against that local
+    copy; only operational commands are still sent to the router.
+
+    Command output is streamed into the validators line by line and the
+    command is stopped as soon as the verdict is known; failed results keep
+    only a bounded excerpt of the output.
+
+    With a cache, the commit revision is queried first and any
+    configuration output or result already cached for that revision is
+    reused instead of fetched; operational checks always run.
+
     Args:
         host: VyOS hostname or IP
         user: SSH username
         key_file: Optional SSH key file path
         category: Category to check ('all' for all)
         verbose: Show detailed output
+        session: Optional already-created SSH session to reuse
+        snapshot: Evaluate configuration checks against one local snapshot
+        cache: Optional revision-keyed result cache
+        checks: Explicit checks to run instead of filtering by category
+        snapshot_lines: Already-fetched snapshot; implies snapshot mode
 
     Returns:
         List of check results
     """
+    if session is None:
+        with SSHSession(host, user, key_file) as own_session:
+            return run_checks(
+                host,
+                user,
+                key_file,
+                category,
+                verbose,
+                own_session,
+                snapshot,
+                cache,
+                checks,
+                snapshot_lines,
+            )
+
     results: list[CheckResult] = []
-    checks = [c for c in CONFIG_CHECKS if category == "all" or c.category == category]
+    if checks is None:
+        checks = select_checks(category)
+    snapshot = snapshot or snapshot_lines is not None
+
+    revision = fetch_revision(session) if cache is not None else None
+    entry = CacheEntry()
+    if cache is not None and revision:
+        entry = cache.load(host, revision)
+
+    def fetch(command: str) -> tuple[int, str, str]:
+        if command in entry.outputs:
+            return 0, entry.outputs[command], ""
+        returncode, stdout, stderr = session.run(command)
+        if returncode == 0:
+            entry.outputs[command] = stdout
+        return returncode, stdout, stderr
+
+    snapshot_error = ""
+    if snapshot and snapshot_lines is None and any(
+        c.grep_pattern is not None and c.name not in entry.results for c in checks
+    ):
+        if verbose:
+            print("Fetching configuration snapshot...", file=sys.stderr)
+        returncode, stdout, stderr = fetch(SNAPSHOT_COMMAND)
+        if returncode != 0 and not stdout:
+            snapshot_error = stderr or "Unknown error"
+        else:
+            snapshot_lines = stdout.splitlines()
 
     for check in checks:
+        if check.cacheable and check.name in entry.results:
+            if verbose:
+                print(f"Checking {check.name}... (cached)", file=sys.stderr)
+            results.append(
+                replace(
+                    entry.results[check.name],
+                    category=check.category,
+                    wall_time=0.0,
+                    connect_time=0.0,
+                    command_time=0.0,
+                    validator_time=0.0,
+                )
+            )
+            continue
+
         if verbose:
             print(f"Checking {check.name}...", file=sys.stderr)
 
-        returncode, stdout, stderr = run_vyos_command(host, user, check.command, key_file)
-
-        if returncode != 0 and not stdout:
+        start = time.perf_counter()
+        connect_start = session.stats.connect_time
+        command_start = session.stats.command_time
+        result: CheckResult | None = None
+        error = ""
+
+        pattern = check.grep_pattern if snapshot else None
+        if pattern is not None:
+            if snapshot_lines is None:
+                error = snapshot_error
+            else:
+                result = validate(check, iter_grep(snapshot_lines, pattern))
+        else:
+            # Validators read the output as it arrives; leaving the block
+            # stops the command once the verdict is known
+            with open_stream(session, check.command) as stream:
+                result = validate(check, stream)
+            # Cut-off output would give a verdict on a partial listing
+            if stream.timed_out or (
+                stream.returncode != 0 and result.output_bytes == 0
+            ):
+                error = stream.stderr or "Unknown error"
+                result = None
+
+        if result is None:
             result = CheckResult(
-                check.name,
-                False,
-                f"Command failed: {stderr or 'Unknown error'}",
+                check.name, False, f"Command failed: {error}", category=check.category
             )
-        else:
-            result = check.validator(stdout)
-
+        elif check.cacheable:
+            # Only verdicts on complete (or deliberately abandoned) output are
+            # cached; transport failures and timeouts are retried
+            entry.results[check.name] = result
+
+        result.wall_time = time.perf_counter() - start
+        result.connect_time = session.stats.connect_time - connect_start
+        result.command_time = session.stats.command_time - command_start
         results.append(result)
 
+    if cache is not None and revision:
+        cache.store(host, revision, entry)
+
+    return results
+
+
+def load_config_file(config_path: Path, include_commented: bool = False) -> list[str]:
+    """Load set commands from a saved configuration file.
+
+    Accepts a ``show configuration commands`` dump, vyos_restore.py output,
+    the template itself, or a config.boot file. The file is read line by
+    line; config.boot is converted while streaming.
+
+    Args:
+        config_path: Path to the configuration file
+        include_commented: Also load ``# set`` lines (template placeholders)
+
+    Returns:
+        List of set commands
+    """
+    with open(config_path, encoding="utf-8") as f:
+        boot, lines = sniff_format(f)
+        if boot:
+            return [command for _, command in iter_boot_commands(lines)]
+
+        commands: list[str] = []
+        for line in lines:
+            line = line.strip()
+            if include_commented and line.startswith("# set "):
+                line = line[2:]
+            if line.startswith("set "):
+                commands.append(line)
+        return commands
+
+
+def run_offline_checks(
+    commands: list[str], category: str, verbose: bool
+) -> list[CheckResult]:
+    """Run configuration checks against local set commands, without SSH.
+
+    Args:
+        commands: Set commands, e.g. from load_config_file
+        category: Category to check ('all' for all)
+        verbose: Show detailed output
+
+    Returns:
+        List of check results
+    """
+    results: list[CheckResult] = []
+    checks = select_checks(category)
+
+    for check in checks:
+        if verbose:
+            print(f"Checking {check.name}...", file=sys.stderr)
+
+        pattern = check.config_pattern
+        if pattern is None:
+            results.append(
+                CheckResult(
+                    check.name, False, "Requires a live router", category=check.category
+                )
+            )
+            continue
+        results.append(validate(check, iter_grep(commands, pattern)))
+
     return results
 
 
+def affected_categories(
+    old_lines: list[str], new_lines: list[str], checks: list[ConfigCheck]
+) -> set[str]:
+    """Return the categories whose configuration subtrees changed.
+
+    A check is affected when any added or removed set command matches its
+    configuration pattern.
+
+    Args:
+        old_lines: Previous configuration snapshot
+        new_lines: Current configuration snapshot
+        checks: Checks to consider
+
+    Returns:
+        Categories with at least one affected check
+    """
+    changed = sorted(set(old_lines) ^ set(new_lines))
+    if not changed:
+        return set()
+    return {
+        c.category
+        for c in checks
+        if c.config_pattern is None or any(iter_grep(changed, c.config_pattern))
+    }
+
+
+def watch(
+    host: str,
+    user: str,
+    key_file: str | None,
+    category: str,
+    interval: float,
+    verbose: bool = False,
+    iterations: int | None = None,
+    session_factory: Callable[..., SSHSession] = SSHSession,
+    sleep: Callable[[float], None] = time.sleep,
+) -> int:
+    """Poll the commit revision and re-check only changed categories.
+
+    Each poll costs one revision query. When the revision changes, a single
+    configuration snapshot is fetched and diffed against the previous one,
+    and only the categories whose subtrees changed are re-checked.
+
+    Args:
+        host: VyOS hostname or IP
+        user: SSH username
+        key_file: Optional SSH key file path
+        category: Category to check ('all' for all)
+        interval: Seconds between polls
+        verbose: Show detailed output
+        iterations: Stop after this many polls (None to run until interrupted)
+        session_factory: Callable creating SSH sessions
+        sleep: Sleep function between polls
+
+    Returns:
+        Exit code (0 if the last evaluated state passed, 1 otherwise)
+    """
+    checks = select_checks(category)
+    status: dict[str, CheckResult] = {}
+    revision: str | None = None
+    lines: list[str] | None = None
+    session = session_factory(host, user, key_file)
+    polls = 0
+
+    try:
+        while iterations is None or polls < iterations:
+            polls += 1
+            current = fetch_revision(session)
+            if current is None:
+                _watch_log(f"⚠️  Cannot read commit revision on {host}; reconnecting")
+                session.close()
+                session = session_factory(host, user, key_file)
+            elif current != revision:
+                returncode, stdout, stderr = session.run(SNAPSHOT_COMMAND)
+                if returncode != 0 and not stdout:
+                    _watch_log(f"⚠️  Snapshot failed: {stderr or 'Unknown error'}")
+                else:
+                    new_lines = stdout.splitlines()
+                    if lines is None:
+                        rerun = checks
+                    else:
+                        categories = affected_categories(lines, new_lines, checks)
+                        rerun = [c for c in checks if c.category in categories]
+                    _report_watch(
+                        current,
+                        rerun,
+                        run_checks(
+                            host,
+                            user,
+                            key_file,
+                            category,
+                            verbose,
+                            session,
+                            checks=rerun,
+                            snapshot_lines=new_lines,
+                        ),
+                        status,
+                    )
+                    revision, lines = current, new_lines
+            if iterations is None or polls < iterations:
+                sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        session.close()
+
+    return 0 if status and all(r.passed for r in status.values()) else 1
+
+
+def _watch_log(message: str) -> None:
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+
+def _report_watch(
+    revision: str,
+    checks: list[ConfigCheck],
+    results: list[CheckResult],
+    status: dict[str, CheckResult],
+) -> None:
+    """Print drift alerts and recoveries for one re-check and update status."""
+    categories = sorted({c.category for c in checks})
+    _watch_log(f"Revision: {revision} (re-checked: {', '.join(categories) or 'none'})")
+    for check, result in zip(checks, results, strict=True):
+        previous = status.get(check.name)
+        if not result.passed and (previous is None or previous.passed):
+            _watch_log(f"❌ ALERT {result.name}: {result.message}")
+        elif result.passed and previous is not None and not previous.passed:
+            _watch_log(f"✅ RECOVERED {result.name}: {result.message}")
+        status[check.name] = result
+
+
 def print_results(results: list[CheckResult], verbose: bool) -> int:
     """Print check results.
 
@@ -332,6 +1061,315 @@ def print_results(results: list[CheckResult], verbose: bool) -> int:
     return 0
 
 
+def print_session_stats(stats: SessionStats) -> None:
+    """Print SSH connect/command timing for a session.
+
+    Args:
+        stats: Session statistics
+    """
+    print(
+        f"SSH timing: connect {stats.connect_time:.2f}s, "
+        f"commands {stats.command_time:.2f}s ({stats.commands} commands)"
+    )
+
+
+@dataclass
+class HostReport:
+    """Check results for one host of a fleet run."""
+
+    host: str
+    results: list[CheckResult] = field(default_factory=list)
+    stats: SessionStats = field(default_factory=SessionStats)
+    elapsed: float = 0.0
+
+    @property
+    def passed(self) -> bool:
+        """Return True if the host ran checks and all of them passed."""
+        return bool(self.results) and all(r.passed for r in self.results)
+
+
+def load_inventory(inventory_path: Path) -> list[str]:
+    """Load hosts from an inventory file.
+
+    One host per line; blank lines and ``#`` comments are ignored.
+
+    Args:
+        inventory_path: Path to the inventory file
+
+    Returns:
+        List of hosts in file order
+    """
+    hosts: list[str] = []
+    with open(inventory_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                hosts.append(line)
+    return hosts
+
+
+def check_host(
+    host: str,
+    user: str,
+    key_file: str | None,
+    category: str,
+    snapshot: bool,
+    deadline: float,
+    cache: ResultCache | None = None,
+    session_factory: Callable[..., SSHSession] = SSHSession,
+) -> HostReport:
+    """Run all checks against one host within a deadline.
+
+    Args:
+        host: VyOS hostname or IP
+        user: SSH username
+        key_file: Optional SSH key file path
+        category: Category to check ('all' for all)
+        snapshot: Evaluate configuration checks against one local snapshot
+        deadline: Seconds the host may take in total
+        cache: Optional revision-keyed result cache
+        session_factory: Callable creating SSH sessions
+
+    Returns:
+        Report for the host
+    """
+    start = time.monotonic()
+    with session_factory(host, user, key_file, deadline=start + deadline) as session:
+        results = run_checks(
+            host, user, key_file, category, False, session, snapshot, cache
+        )
+    return HostReport(host, results, session.stats, time.monotonic() - start)
+
+
+def run_fleet(
+    hosts: list[str],
+    user: str,
+    key_file: str | None,
+    category: str,
+    snapshot: bool = False,
+    jobs: int = 8,
+    deadline: float = 60.0,
+    cache: ResultCache | None = None,
+    session_factory: Callable[..., SSHSession] = SSHSession,
+) -> list[HostReport]:
+    """Check many hosts concurrently with a bounded worker pool.
+
+    Args:
+        hosts: VyOS hostnames or IPs
+        user: SSH username
+        key_file: Optional SSH key file path
+        category: Category to check ('all' for all)
+        snapshot: Evaluate configuration checks against one local snapshot
+        jobs: Maximum number of hosts checked at once
+        deadline: Per-host deadline in seconds
+        cache: Optional revision-keyed result cache
+        session_factory: Callable creating SSH sessions
+
+    Returns:
+        Reports in the same order as ``hosts``; a host whose check raised
+        gets a single failed result carrying the error
+    """
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [
+            pool.submit(
+                check_host,
+                h,
+                user,
+                key_file,
+                category,
+                snapshot,
+                deadline,
+                cache,
+                session_factory,
+            )
+            for h in hosts
+        ]
+        reports = []
+        for host, future in zip(hosts, futures, strict=True):
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                # One broken host must not cost the report of the others
+                reports.append(
+                    HostReport(host, [CheckResult("Host", False, f"Error: {e}")])
+                )
+        return reports
+
+
+def print_fleet_results(
+    reports: list[HostReport], verbose: bool, elapsed: float
+) -> int:
+    """Print an aggregated fleet report.
+
+    Args:
+        reports: Per-host reports
+        verbose: Show failed checks for every failing host
+        elapsed: Wall time of the whole fleet run in seconds
+
+    Returns:
+        Exit code (0 if every host passed, 1 otherwise)
+    """
+    print("\n" + "=" * 50)
+    print("VyOS Fleet Check Results")
+    print("=" * 50)
+
+    for report in reports:
+        passed = sum(1 for r in report.results if r.passed)
+        icon = "✅" if report.passed else "❌"
+        print(
+            f"{icon} {report.host}: {passed}/{len(report.results)} checks passed "
+            f"({report.elapsed:.2f}s)"
+        )
+        if verbose and not report.passed:
+            for r in report.results:
+                if not r.passed:
+                    print(f"    {r.name}: {r.message}")
+
+    hosts_passed = sum(1 for r in reports if r.passed)
+    slowest = max((r.elapsed for r in reports), default=0.0)
+    print("\n" + "-" * 50)
+    print(f"Summary: {hosts_passed}/{len(reports)} hosts passed")
+    print(f"Wall time: {elapsed:.2f}s (slowest host {slowest:.2f}s)")
+
+    if hosts_passed < len(reports):
+        print(f"⚠️  {len(reports) - hosts_passed} host(s) failed")
+        return 1
+
+    print("✅ All hosts passed")
+    return 0
+
+
+def report_to_dict(report: HostReport) -> dict[str, object]:
+    """Convert a host report into a JSON-serialisable dict."""
+    return {
+        "host": report.host,
+        "passed": report.passed,
+        "elapsed": report.elapsed,
+        "session": asdict(report.stats),
+        "results": [asdict(r) for r in report.results],
+    }
+
+
+def render_json(reports: list[HostReport]) -> str:
+    """Render reports as a JSON document.
+
+    Args:
+        reports: Per-host reports
+
+    Returns:
+        JSON text
+    """
+    return json.dumps(
+        {
+            "passed": all(r.passed for r in reports),
+            "hosts": [report_to_dict(r) for r in reports],
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+
+
+def render_junit(reports: list[HostReport]) -> str:
+    """Render reports as JUnit XML, one testsuite per host.
+
+    Args:
+        reports: Per-host reports
+
+    Returns:
+        JUnit XML text
+    """
+    suites = ET.Element("testsuites", name="vyos-config-check")
+    for report in reports:
+        failures = sum(1 for r in report.results if not r.passed)
+        suite = ET.SubElement(
+            suites,
+            "testsuite",
+            name=report.host,
+            tests=str(len(report.results)),
+            failures=str(failures),
+            time=f"{report.elapsed:.6f}",
+        )
+        for r in report.results:
+            case = ET.SubElement(
+                suite,
+                "testcase",
+                classname=f"vyos.{r.category or 'check'}",
+                name=r.name,
+                time=f"{r.wall_time:.6f}",
+            )
+            if not r.passed:
+                failure = ET.SubElement(case, "failure", message=r.message)
+                failure.text = r.details
+            ET.SubElement(case, "system-out").text = (
+                f"connect_time={r.connect_time:.6f} "
+                f"command_time={r.command_time:.6f} "
+                f"validator_time={r.validator_time:.6f} "
+                f"output_bytes={r.output_bytes}"
+            )
+    ET.indent(suites)
+    return ET.tostring(suites, encoding="unicode", xml_declaration=True)
+
+
+def print_profile(reports: list[HostReport], top: int = 10) -> None:
+    """Print the slowest checks across all reports to stderr.
+
+    Args:
+        reports: Per-host reports
+        top: Number of checks to show
+    """
+    rows = sorted(
+        ((report.host, r) for report in reports for r in report.results),
+        key=lambda row: row[1].wall_time,
+        reverse=True,
+    )[:top]
+    print("\nSlowest checks:", file=sys.stderr)
+    print(
+        f"  {'host':<16} {'check':<20} {'wall':>8} {'connect':>8} "
+        f"{'command':>8} {'validate':>9} {'bytes':>9}",
+        file=sys.stderr,
+    )
+    for host, r in rows:
+        print(
+            f"  {host[:16]:<16} {r.name[:20]:<20} {r.wall_time:>8.3f} "
+            f"{r.connect_time:>8.3f} {r.command_time:>8.3f} "
+            f"{r.validator_time:>9.4f} {r.output_bytes:>9}",
+            file=sys.stderr,
+        )
+
+
+def emit_reports(
+    reports: list[HostReport],
+    output_format: str,
+    verbose: bool,
+    elapsed: float,
+    fleet: bool,
+) -> int:
+    """Print reports in the requested format.
+
+    Args:
+        reports: Per-host reports
+        output_format: 'text', 'json' or 'junit'
+        verbose: Show detailed output (text format)
+        elapsed: Wall time of the whole run in seconds
+        fleet: Whether this was a multi-host run (text format)
+
+    Returns:
+        Exit code (0 if everything passed, 1 otherwise)
+    """
+    if output_format == "json":
+        print(render_json(reports))
+    elif output_format == "junit":
+        print(render_junit(reports))
+    elif fleet:
+        return print_fleet_results(reports, verbose, elapsed)
+    else:
+        exit_code = print_results(reports[0].results, verbose)
+        if reports[0].stats.commands:
+            print_session_stats(reports[0].stats)
+        return exit_code
+    return 0 if all(r.passed for r in reports) else 1
+
+
 def main() -> int:
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -342,6 +1380,28 @@ def main() -> int:
         default="192.168.1.1",
         help="VyOS hostname or IP (default: 192.168.1.1)",
     )
+    parser.add_argument(
+        "--hosts",
+        help="Comma-separated hosts to check concurrently (fleet mode)",
+    )
+    parser.add_argument(
+        "--inventory",
+        type=Path,
+        help="File with one host per line to check concurrently (fleet mode)",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=8,
+        help="Maximum hosts checked at once in fleet mode (default: 8)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=60.0,
+        help="Per-host deadline in seconds in fleet mode (default: 60)",
+    )
     parser.add_argument(
         "--user",
         default="vyos",
@@ -355,9 +1415,18 @@ def main() -> int:
     parser.add_argument(
         "--category",
         "-c",
-        choices=["interface", "ipv6", "firewall", "wireguard", "ddns", "routing", "all"],
+        choices=[
+            "interface",
+            "ipv6",
+            "firewall",
+            "wireguard",
+            "ddns",
+            "routing",
+            "all",
+            "firewall-hits",
+        ],
         default="all",
-        help="Category to check (default: all)",
+        help="Category to check (default: all; firewall-hits is opt-in)",
     )
     parser.add_argument(
         "--verbose",
@@ -365,24 +1434,160 @@ def main() -> int:
         action="store_true",
         help="Show detailed output",
     )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json", "junit"],
+        default="text",
+        help="Output format (default: text)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the slowest checks with their timing breakdown to stderr",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Show commands without executing",
     )
+    parser.add_argument(
+        "--config-file",
+        type=Path,
+        help="Check a saved config (set commands or config.boot) without SSH",
+    )
+    parser.add_argument(
+        "--include-commented",
+        action="store_true",
+        help="With --config-file, also check '# set' placeholder lines",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse configuration check results cached for the router's current "
+        "commit revision (operational checks always run)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Result cache directory (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=3600.0,
+        help="Maximum age of cached results in seconds (default: 3600)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-check categories whose config changed",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=5.0,
+        help="Seconds between commit-revision polls in watch mode (default: 5)",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="Fetch the configuration once and evaluate config checks locally",
+    )
 
     args = parser.parse_args()
 
     if args.dry_run:
         print("Commands that would be executed:")
-        checks = [c for c in CONFIG_CHECKS if args.category == "all" or c.category == args.category]
+        checks = select_checks(args.category)
+        if args.snapshot and any(c.grep_pattern is not None for c in checks):
+            print(f"  [snapshot] {SNAPSHOT_COMMAND}")
         for check in checks:
+            if args.snapshot and check.grep_pattern is not None:
+                print(
+                    f"  [{check.category}] {check.name}: "
+                    f"(local) grep {check.grep_pattern}"
+                )
+                continue
             print(f"  [{check.category}] {check.name}: {check.command}")
         return 0
 
-    print(f"Connecting to {args.user}@{args.host}...")
-    results = run_checks(args.host, args.user, args.key_file, args.category, args.verbose)
-    return print_results(results, args.verbose)
+    # Keep stdout machine-readable for json/junit output
+    status = sys.stdout if args.format == "text" else sys.stderr
+
+    def finish(reports: list[HostReport], elapsed: float, fleet: bool) -> int:
+        exit_code = emit_reports(reports, args.format, args.verbose, elapsed, fleet)
+        if args.profile:
+            print_profile(reports)
+        return exit_code
+
+    if args.config_file:
+        if not args.config_file.exists():
+            print(f"Error: Config file not found: {args.config_file}", file=sys.stderr)
+            return 1
+        print(f"Checking {args.config_file} (offline)...", file=status)
+        start = time.monotonic()
+        commands = load_config_file(args.config_file, args.include_commented)
+        results = run_offline_checks(commands, args.category, args.verbose)
+        elapsed = time.monotonic() - start
+        report = HostReport(str(args.config_file), results, elapsed=elapsed)
+        return finish([report], elapsed, fleet=False)
+
+    if args.watch:
+        print(f"Watching {args.user}@{args.host} every {args.interval:g}s...")
+        return watch(
+            args.host,
+            args.user,
+            args.key_file,
+            args.category,
+            args.interval,
+            args.verbose,
+        )
+
+    cache = ResultCache(args.cache_dir, args.cache_ttl) if args.cache else None
+
+    hosts: list[str] = []
+    if args.hosts:
+        hosts.extend(h.strip() for h in args.hosts.split(",") if h.strip())
+    if args.inventory:
+        if not args.inventory.exists():
+            print(f"Error: Inventory file not found: {args.inventory}", file=sys.stderr)
+            return 1
+        hosts.extend(load_inventory(args.inventory))
+
+    if hosts:
+        print(
+            f"Checking {len(hosts)} host(s) with {args.jobs} worker(s)...", file=status
+        )
+        start = time.monotonic()
+        reports = run_fleet(
+            hosts,
+            args.user,
+            args.key_file,
+            args.category,
+            args.snapshot,
+            args.jobs,
+            args.deadline,
+            cache,
+        )
+        return finish(reports, time.monotonic() - start, fleet=True)
+
+    print(f"Connecting to {args.user}@{args.host}...", file=status)
+    start = time.monotonic()
+    with SSHSession(args.host, args.user, args.key_file) as session:
+        results = run_checks(
+            args.host,
+            args.user,
+            args.key_file,
+            args.category,
+            args.verbose,
+            session,
+            args.snapshot,
+            cache,
+        )
+    elapsed = time.monotonic() - start
+    report = HostReport(args.host, results, session.stats, elapsed)
+    return finish([report], elapsed, fleet=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Indexed tree of VyOS set-command paths.
+
+Parses ``show configuration commands`` output, restore output or a
+vyos-config-template.txt file into a compact trie keyed by path token, so
+callers can do O(depth) lookups, wildcard queries and value extraction
+instead of substring tests over raw text.
+
+Usage:
+    tree = ConfigTree.from_file(Path("vyos-config-template.txt"))
+    tree.values("interfaces wireguard wg0 address")
+    # -> ['10.10.10.1/24', 'fd00:10:10:10::1/64']
+    list(tree.match("interfaces wireguard wg0 peer *"))
+    # -> [('interfaces', 'wireguard', 'wg0', 'peer', 'mac'), ...]
+"""
+
+from __future__ import annotations
+
+import re
+import shlex
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+
+WILDCARD = "*"
+
+PathLike = str | Sequence[str]
+
+# Whitespace-separated bare or single-quoted tokens, the form ``show
+# configuration commands`` prints; these lines skip the slow shlex parser
+_SIMPLE_LINE = re.compile(r"(?:(?:'[^']*'|[^\s'\"\\]+)(?:\s+|$))+")
+_SIMPLE_TOKEN = re.compile(r"'([^']*)'|([^\s'\"\\]+)")
+
+
+def tokenize_command(line: str) -> list[str] | None:
+    """Split a ``set`` command into its path tokens.
+
+    Quotes are removed, so ``address '10.0.0.1/24'`` and ``address
+    10.0.0.1/24`` produce the same path.
+
+    Args:
+        line: A single configuration line
+
+    Returns:
+        Path tokens without the leading ``set``, or None for other lines
+    """
+    line = line.strip()
+    if not line.startswith("set "):
+        return None
+    if _SIMPLE_LINE.fullmatch(line):
+        tokens = [bare or quoted for quoted, bare in _SIMPLE_TOKEN.findall(line)]
+        return tokens[1:] or None
+    try:
+        tokens = shlex.split(line)
+    except ValueError:
+        # Unbalanced quote: fall back to plain whitespace splitting
+        tokens = line.split()
+    return tokens[1:] or None
+
+
+def _split(path: PathLike) -> Sequence[str]:
+    if isinstance(path, str):
+        return path.split()
+    return path
+
+
+def matches_path(tokens: Sequence[str] | None, pattern: PathLike) -> bool:
+    """Return True if a command's path starts with ``pattern``.
+
+    Works on a single tokenized line, so callers can test lines as they
+    stream in without building a tree. ``*`` matches exactly one token.
+
+    Args:
+        tokens: Path tokens from tokenize_command (None never matches)
+        pattern: Path pattern such as ``nat source rule *``
+
+    Returns:
+        True if every pattern token matches the corresponding path token
+    """
+    if tokens is None:
+        return False
+    pattern = _split(pattern)
+    if len(tokens) < len(pattern):
+        return False
+    return all(
+        p in (WILDCARD, t)
+        for p, t in zip(pattern, tokens[: len(pattern)], strict=True)
+    )
+
+
+class ConfigNode:
+    """A node of the configuration tree."""
+
+    __slots__ = ("children",)
+
+    def __init__(self) -> None:
+        self.children: dict[str, ConfigNode] = {}
+
+
+class ConfigTree:
+    """Trie of VyOS configuration paths.
+
+    Every ``set`` command contributes one root-to-leaf path; the final
+    token of a valued node is stored as a child, so multi-valued leaves
+    such as ``address`` simply have several children.
+    """
+
+    def __init__(self) -> None:
+        self.root = ConfigNode()
+
+    @classmethod
+    def from_commands(
+        cls, lines: Iterable[str], include_commented: bool = False
+    ) -> ConfigTree:
+        """Build a tree from set-command lines.
+
+        Args:
+            lines: Configuration lines; anything but ``set`` is ignored
+            include_commented: Also load ``# set`` lines (template
+                placeholders), keeping placeholder values verbatim
+
+        Returns:
+            The populated tree
+        """
+        tree = cls()
+        for line in lines:
+            if include_commented and line.startswith("# set "):
+                line = line[2:]
+            tokens = tokenize_command(line)
+            if tokens:
+                tree.add(tokens)
+        return tree
+
+    @classmethod
+    def from_file(cls, path: Path, include_commented: bool = False) -> ConfigTree:
+        """Build a tree from a set-command file.
+
+        Args:
+            path: File with set commands
+            include_commented: Also load ``# set`` lines
+
+        Returns:
+            The populated tree
+        """
+        with open(path, encoding="utf-8") as f:
+            return cls.from_commands(f, include_commented)
+
+    def add(self, path: PathLike) -> None:
+        """Insert a path.
+
+        Args:
+            path: Path tokens (or a whitespace-separated string)
+        """
+        node = self.root
+        for token in _split(path):
+            child = node.children.get(token)
+            if child is None:
+                child = node.children[token] = ConfigNode()
+            node = child
+
+    def node(self, path: PathLike) -> ConfigNode | None:
+        """Return the node at ``path`` in O(depth), or None."""
+        node = self.root
+        for token in _split(path):
+            child = node.children.get(token)
+            if child is None:
+                return None
+            node = child
+        return node
+
+    def exists(self, path: PathLike) -> bool:
+        """Return True if ``path`` is present (as a leaf or a prefix)."""
+        return self.node(path) is not None
+
+    def children(self, path: PathLike) -> list[str]:
+        """Return the child tokens of ``path`` in insertion order."""
+        node = self.node(path)
+        return list(node.children) if node is not None else []
+
+    def values(self, path: PathLike) -> list[str]:
+        """Return the values of a leaf node (its childless children)."""
+        node = self.node(path)
+        if node is None:
+            return []
+        return [k for k, v in node.children.items() if not v.children]
+
+    def value(self, path: PathLike) -> str | None:
+        """Return the single value of a leaf node, or None."""
+        values = self.values(path)
+        return values[0] if values else None
+
+    def match(self, pattern: PathLike) -> Iterator[tuple[str, ...]]:
+        """Yield every path matching ``pattern``.
+
+        ``*`` matches exactly one token at its position.
+
+        Args:
+            pattern: Path pattern such as ``interfaces wireguard * peer *``
+
+        Yields:
+            Matching path prefixes as tuples
+        """
+        tokens = _split(pattern)
+
+        def walk(
+            node: ConfigNode, depth: int, prefix: tuple[str, ...]
+        ) -> Iterator[tuple[str, ...]]:
+            if depth == len(tokens):
+                yield prefix
+                return
+            token = tokens[depth]
+            if token == WILDCARD:
+                for name, child in node.children.items():
+                    yield from walk(child, depth + 1, (*prefix, name))
+            else:
+                child = node.children.get(token)
+                if child is not None:
+                    yield from walk(child, depth + 1, (*prefix, token))
+
+        yield from walk(self.root, 0, ())
+
+    def paths(self, path: PathLike = ()) -> Iterator[tuple[str, ...]]:
+        """Yield every full root-to-leaf path below ``path``."""
+        start = tuple(_split(path))
+        node = self.node(start)
+        if node is None:
+            return
+        stack = [(node, start)]
+        while stack:
+            node, prefix = stack.pop()
+            if not node.children:
+                if prefix:
+                    yield prefix
+                continue
+            for name, child in reversed(node.children.items()):
+                stack.append((child, (*prefix, name)))
+
+    def __len__(self) -> int:
+        """Return the number of distinct leaf paths."""
+        return sum(1 for _ in self.paths())
+
+    def __contains__(self, path: object) -> bool:
+        return isinstance(path, (str, tuple, list)) and self.exists(path)
@@ -0,0 +1,737 @@
+#!/usr/bin/env python3
+"""Firewall rule hit-counter profiler for VyOS.
+
+Reads the firewall rules from set commands and the per-rule packet and
+byte counters from ``show firewall``, ranks every chain's rules by hits
+and recommends an order in which the hottest rules match first.
+
+A rule may only move ahead of another when no packet could tell the
+difference: either the two rules can never match the same packet, or
+both end in the same verdict and neither logs or keeps state (``recent``,
+``limit``). Those constraints form a dependency graph per chain; the
+recommended order is a topological order of it that greedily pulls the
+rules with the most hits per rule placed towards the front.
+
+Usage:
+    # Profile the router and print renumbered set commands
+    python vyos_firewall.py --host 192.168.1.1
+
+    # Offline, from saved configuration and counter output
+    python vyos_firewall.py --config-file backup.txt \
+        --counters-file show-firewall.txt --output reorder.txt
+
+    # As a checker category (opt-in, not part of 'all')
+    python vyos_config_check.py --category firewall-hits
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import re
+import shlex
+import socket
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from fractions import Fraction
+from pathlib import Path
+from typing import TextIO
+
+from vyos_boot import iter_boot_commands, sniff_format
+from vyos_config_tree import tokenize_command
+from vyos_ssh import SSHSession
+
+FIREWALL_COUNTERS_COMMAND = "show firewall"
+FIREWALL_CONFIG_COMMAND = "show configuration commands | grep '^set firewall'"
+
+# Verdicts that end rule evaluation
+TERMINAL_ACTIONS = frozenset({"accept", "drop", "reject"})
+# Matchers with effects beyond the verdict; such rules never swap places
+SIDE_EFFECTS = frozenset({"log", "recent", "limit", "add-address-to-group"})
+
+# Minimum fraction of rule evaluations a reorder must save to be reported
+DEFAULT_MIN_GAIN = 0.1
+DEFAULT_STEP = 10
+
+_PROTOCOL_ALIASES = {
+    "1": "icmp",
+    "6": "tcp",
+    "17": "udp",
+    "58": "icmpv6",
+    "ipv6-icmp": "icmpv6",
+}
+
+# ``ipv4 Firewall "input filter"`` / ``ipv6 Firewall "name WAN_IN"``
+_CHAIN_HEADER = re.compile(r'^\s*(ipv[46])\s+firewall\s+"(\S+)\s+(\S+)"', re.I)
+# ``10  accept  all  1234  567890  ct state ...``
+_COUNTER_ROW = re.compile(r"^\s*(\d+|default)\s+\S+\s+\S+\s+(\d+)\s+(\d+)")
+
+# (family, hook, name), e.g. ('ipv4', 'input', 'filter')
+ChainKey = tuple[str, str, str]
+# (group type, name) -> members; None when a member can't be resolved
+FirewallGroups = dict[tuple[str, str], list[str] | None]
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+@dataclass
+class FirewallRule:
+    """One numbered rule and the matchers it was parsed into.
+
+    Matchers left as None match anything. Matchers the model does not
+    understand are only listed in ``opaque``; they narrow what the rule
+    matches, so treating them as "anything" stays on the safe side.
+    """
+
+    number: int
+    # Path tokens below ``rule N``, kept for re-rendering
+    body: list[tuple[str, ...]] = field(default_factory=list)
+    action: str = ""
+    protocols: frozenset[str] | None = None
+    sources: tuple[Network, ...] | None = None
+    destinations: tuple[Network, ...] | None = None
+    source_ports: tuple[tuple[int, int], ...] | None = None
+    destination_ports: tuple[tuple[int, int], ...] | None = None
+    # Interface names, possibly with nftables wildcards (eth*)
+    inbound: frozenset[str] | None = None
+    outbound: frozenset[str] | None = None
+    states: frozenset[str] | None = None
+    opaque: set[str] = field(default_factory=set)
+    disabled: bool = False
+    # Chain a 'jump' action continues in
+    target: str = ""
+
+    @property
+    def has_effects(self) -> bool:
+        """Return whether matching this rule does more than decide a verdict."""
+        return bool(self.opaque & SIDE_EFFECTS)
+
+
+@dataclass
+class FirewallChain:
+    """Rules of one chain in evaluation order."""
+
+    key: ChainKey
+    default_action: str = ""
+    default_log: bool = False
+    rules: list[FirewallRule] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        """Return the chain's configuration path, e.g. ``ipv4 input filter``."""
+        return " ".join(self.key)
+
+
+@dataclass
+class RuleCounters:
+    """Packet and byte counters of one rule."""
+
+    packets: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class ChainCounters:
+    """Counters of one chain from ``show firewall``."""
+
+    rules: dict[int, RuleCounters] = field(default_factory=dict)
+    default: RuleCounters = field(default_factory=RuleCounters)
+
+
+@dataclass
+class ChainProfile:
+    """Hit ranking and recommended order of one chain."""
+
+    chain: FirewallChain
+    counters: ChainCounters
+    order: list[FirewallRule]
+    # Mean rules evaluated per packet, before and after reordering
+    before: float
+    after: float
+
+    @property
+    def total(self) -> int:
+        """Return the packets counted in this chain, default action included."""
+        hits = sum(c.packets for c in self.counters.rules.values())
+        return hits + self.counters.default.packets
+
+    @property
+    def gain(self) -> float:
+        """Return the fraction of rule evaluations the new order saves."""
+        return 1 - self.after / self.before if self.before else 0.0
+
+    @property
+    def changed(self) -> bool:
+        """Return whether the recommended order differs from the current one."""
+        return [r.number for r in self.order] != [r.number for r in self.chain.rules]
+
+    def packets(self, rule: FirewallRule) -> int:
+        """Return the packets counted for a rule."""
+        return self.counters.rules.get(rule.number, RuleCounters()).packets
+
+
+def _parse_protocols(value: str) -> frozenset[str] | None:
+    value = _PROTOCOL_ALIASES.get(value.lower(), value.lower())
+    if value == "all":
+        return None
+    if value == "tcp_udp":
+        return frozenset({"tcp", "udp"})
+    return frozenset({value})
+
+
+def _parse_addresses(value: str) -> tuple[Network, ...] | None:
+    try:
+        if "-" in value:
+            first, last = (ipaddress.ip_address(v) for v in value.split("-", 1))
+            return tuple(ipaddress.summarize_address_range(first, last))
+        return (ipaddress.ip_network(value, strict=False),)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_ports(value: str) -> tuple[tuple[int, int], ...] | None:
+    ranges = []
+    for part in value.split(","):
+        low, _, high = part.partition("-")
+        try:
+            if low.isdigit() and (not high or high.isdigit()):
+                ranges.append((int(low), int(high or low)))
+            else:
+                port = socket.getservbyname(part)
+                ranges.append((port, port))
+        except OSError:
+            return None
+    return tuple(ranges)
+
+
+def _group_members(
+    groups: FirewallGroups, family: str, kind: str, name: str
+) -> list[str] | None:
+    if family == "ipv6" and kind in ("address-group", "network-group"):
+        kind = "ipv6-" + kind
+    return groups.get((kind, name))
+
+
+def _parse_group(
+    groups: FirewallGroups, family: str, kind: str, name: str
+) -> tuple[Network, ...] | tuple[tuple[int, int], ...] | None:
+    """Resolve a ``group <kind> <name>`` reference to networks or ports."""
+    members = _group_members(groups, family, kind, name)
+    if not members:
+        return None
+    if kind == "port-group":
+        return _parse_ports(",".join(members))
+    networks: list[Network] = []
+    for member in members:
+        parsed = _parse_addresses(member)
+        if parsed is None:
+            return None
+        networks.extend(parsed)
+    return tuple(networks)
+
+
+def _apply_setting(
+    rule: FirewallRule,
+    tokens: tuple[str, ...],
+    family: str = "ipv4",
+    groups: FirewallGroups | None = None,
+) -> None:
+    """Fold one ``rule N ...`` setting into the rule's matchers."""
+    rule.body.append(tokens)
+    key, values = tokens[0], tokens[1:]
+    value = values[-1] if values else ""
+    negated = value.startswith("!")
+    groups = groups or {}
+
+    if key == "description":
+        return
+    if key == "disable":
+        rule.disabled = True
+    elif key == "action" and values:
+        rule.action = value
+    elif key == "jump-target" and values:
+        rule.target = value
+    elif key == "log" and value != "disable":
+        rule.opaque.add("log")
+    elif key == "protocol" and values and not negated:
+        rule.protocols = _parse_protocols(value)
+    elif key == "state" and values:
+        # 'state established' or the older 'state established enable'
+        if value == "disable":
+            return
+        state = values[0]
+        rule.states = (rule.states or frozenset()) | {state}
+    elif key in ("source", "destination") and values and not negated:
+        kind = values[0]
+        parsed = None
+        if kind == "address" and len(values) == 2:
+            parsed = _parse_addresses(value)
+        elif kind == "port" and len(values) == 2:
+            parsed = _parse_ports(value)
+        elif kind == "group" and len(values) == 3:
+            parsed = _parse_group(groups, family, values[1], value)
+            kind = "port" if values[1] == "port-group" else "address"
+        attr = {
+            ("source", "address"): "sources",
+            ("destination", "address"): "destinations",
+            ("source", "port"): "source_ports",
+            ("destination", "port"): "destination_ports",
+        }.get((key, kind))
+        # A second matcher on the same field would intersect; keep the model
+        # simple and leave such rules to the opaque (match anything) path
+        if parsed is None or attr is None or getattr(rule, attr) is not None:
+            rule.opaque.add(f"{key} {kind}")
+        else:
+            setattr(rule, attr, parsed)
+    elif (
+        key in ("inbound-interface", "outbound-interface")
+        and len(values) == 2
+        and not negated
+    ):
+        names = None
+        if values[0] == "name":
+            names = [value]
+        elif values[0] == "group":
+            names = _group_members(groups, family, "interface-group", value)
+        if names:
+            attr = "inbound" if key == "inbound-interface" else "outbound"
+            setattr(rule, attr, frozenset(names))
+        else:
+            rule.opaque.add(key)
+    else:
+        rule.opaque.add(key)
+
+
+def parse_firewall_groups(commands: Iterable[str]) -> FirewallGroups:
+    """Parse ``firewall group`` definitions.
+
+    Args:
+        commands: Set commands
+
+    Returns:
+        Members per (group type, name); None for groups that include
+        other groups, which are not resolved
+    """
+    groups: FirewallGroups = {}
+    for line in commands:
+        tokens = tokenize_command(line)
+        if tokens is None or len(tokens) < 5 or tokens[:2] != ["firewall", "group"]:
+            continue
+        key = (tokens[2], tokens[3])
+        members = groups.setdefault(key, [])
+        if tokens[4] in ("address", "network", "port", "interface"):
+            if members is not None and len(tokens) == 6:
+                members.append(tokens[5])
+        elif tokens[4] != "description":
+            groups[key] = None
+    return groups
+
+
+def parse_firewall_rules(commands: Iterable[str]) -> dict[ChainKey, FirewallChain]:
+    """Parse the firewall chains out of set commands.
+
+    Both base chains (``firewall ipv4 input filter``) and named chains
+    (``firewall ipv4 name WAN_IN``) are recognised. Group references are
+    resolved against the ``firewall group`` definitions.
+
+    Args:
+        commands: Set commands, e.g. ``show configuration commands`` output
+
+    Returns:
+        Chains keyed by (family, hook, name), rules sorted by number
+    """
+    commands = list(commands)
+    groups = parse_firewall_groups(commands)
+    chains: dict[ChainKey, FirewallChain] = {}
+    rules: dict[ChainKey, dict[int, FirewallRule]] = {}
+    for line in commands:
+        tokens = tokenize_command(line)
+        if (
+            tokens is None
+            or len(tokens) < 5
+            or tokens[0] != "firewall"
+            or tokens[1] not in ("ipv4", "ipv6")
+        ):
+            continue
+        key: ChainKey = (tokens[1], tokens[2], tokens[3])
+        chain = chains.setdefault(key, FirewallChain(key))
+        rest = tokens[4:]
+        if rest[0] == "default-action" and len(rest) > 1:
+            chain.default_action = rest[1]
+        elif rest[0] == "default-log":
+            chain.default_log = True
+        elif rest[0] == "rule" and len(rest) > 1 and rest[1].isdigit():
+            number = int(rest[1])
+            rule = rules.setdefault(key, {}).setdefault(number, FirewallRule(number))
+            if len(rest) > 2:
+                _apply_setting(rule, tuple(rest[2:]), key[0], groups)
+    for key, chain in chains.items():
+        chain.rules = sorted(rules.get(key, {}).values(), key=lambda r: r.number)
+    return chains
+
+
+def parse_firewall_counters(lines: Iterable[str]) -> dict[ChainKey, ChainCounters]:
+    """Parse the per-rule counters printed by ``show firewall``.
+
+    Args:
+        lines: ``show firewall`` output lines
+
+    Returns:
+        Counters keyed by (family, hook, name)
+    """
+    counters: dict[ChainKey, ChainCounters] = {}
+    current: ChainCounters | None = None
+    for line in lines:
+        if header := _CHAIN_HEADER.match(line):
+            family, hook, name = header.groups()
+            current = counters.setdefault(
+                (family.lower(), hook, name), ChainCounters()
+            )
+        elif current is not None and (row := _COUNTER_ROW.match(line)):
+            number, packets, size = row.groups()
+            entry = RuleCounters(int(packets), int(size))
+            if number == "default":
+                current.default = entry
+            else:
+                current.rules[int(number)] = entry
+    return counters
+
+
+def _disjoint_networks(a: tuple[Network, ...], b: tuple[Network, ...]) -> bool:
+    return not any(x.version == y.version and x.overlaps(y) for x in a for y in b)
+
+
+def _disjoint_ranges(
+    a: tuple[tuple[int, int], ...], b: tuple[tuple[int, int], ...]
+) -> bool:
+    return not any(lo1 <= hi2 and lo2 <= hi1 for lo1, hi1 in a for lo2, hi2 in b)
+
+
+def _disjoint_interfaces(a: frozenset[str], b: frozenset[str]) -> bool:
+    # Wildcards (eth*, eth+) may cover each other; only compare literal names
+    return not any(x == y or any(c in x + y for c in "*+") for x in a for y in b)
+
+
+def rules_overlap(a: FirewallRule, b: FirewallRule) -> bool:
+    """Return whether some packet could match both rules.
+
+    Conservative: only a matcher both rules set to provably disjoint
+    values separates them.
+
+    Args:
+        a: A rule
+        b: Another rule of the same chain
+
+    Returns:
+        False if no packet can match both rules
+    """
+    if a.disabled or b.disabled:
+        return False
+    pairs = (
+        (a.protocols, b.protocols, lambda x, y: not x & y),
+        (a.states, b.states, lambda x, y: not x & y),
+        (a.sources, b.sources, _disjoint_networks),
+        (a.destinations, b.destinations, _disjoint_networks),
+        (a.source_ports, b.source_ports, _disjoint_ranges),
+        (a.destination_ports, b.destination_ports, _disjoint_ranges),
+        (a.inbound, b.inbound, _disjoint_interfaces),
+        (a.outbound, b.outbound, _disjoint_interfaces),
+    )
+    return not any(
+        x is not None and y is not None and disjoint(x, y)
+        for x, y, disjoint in pairs
+    )
+
+
+def must_precede(first: FirewallRule, second: FirewallRule) -> bool:
+    """Return whether ``first`` has to stay ahead of ``second``.
+
+    Args:
+        first: The rule evaluated first today
+        second: A later rule of the same chain
+
+    Returns:
+        True if swapping the two could change a verdict or a side effect
+    """
+    if not rules_overlap(first, second):
+        return False
+    interchangeable = (
+        first.action == second.action
+        and first.action in TERMINAL_ACTIONS
+        and not first.has_effects
+        and not second.has_effects
+    )
+    return not interchangeable
+
+
+def reorder_rules(
+    rules: list[FirewallRule], hits: dict[int, int]
+) -> list[FirewallRule]:
+    """Return a policy-preserving order with the hottest rules first.
+
+    Each step picks the rule whose not yet placed prerequisites, placed
+    together with it, carry the most hits per rule, and places that group
+    in its current relative order. Ties keep the current order, so a
+    chain without counters is returned unchanged. Disabled rules go last.
+
+    Args:
+        rules: Rules in their current order
+        hits: Packets per rule number
+
+    Returns:
+        The same rules in the recommended order
+    """
+    active = [r for r in rules if not r.disabled]
+    # Transitive prerequisites; constraints only point to earlier rules
+    ancestors: list[set[int]] = []
+    for i, rule in enumerate(active):
+        before: set[int] = set()
+        for j in range(i):
+            if j not in before and must_precede(active[j], rule):
+                before |= ancestors[j] | {j}
+        ancestors.append(before)
+
+    weight = [hits.get(r.number, 0) for r in active]
+    remaining = set(range(len(active)))
+    order: list[FirewallRule] = []
+    while remaining:
+        best: tuple[Fraction, int] | None = None
+        best_group: set[int] = set()
+        for i in sorted(remaining):
+            group = (ancestors[i] & remaining) | {i}
+            key = (Fraction(sum(weight[j] for j in group), len(group)), -i)
+            if best is None or key > best:
+                best, best_group = key, group
+        order.extend(active[j] for j in sorted(best_group))
+        remaining -= best_group
+    return order + [r for r in rules if r.disabled]
+
+
+def mean_evaluations(
+    rules: list[FirewallRule], hits: dict[int, int], default_hits: int = 0
+) -> float:
+    """Return the mean number of rules a packet is matched against.
+
+    Packets that fall through to the default action are matched against
+    every rule. Counters are assumed to stay with their rule in any order
+    the dependency graph allows.
+
+    Args:
+        rules: Rules in evaluation order
+        hits: Packets per rule number
+        default_hits: Packets handled by the default action
+
+    Returns:
+        Mean rules evaluated per packet (0.0 without traffic)
+    """
+    active = [r for r in rules if not r.disabled]
+    total = sum(hits.get(r.number, 0) for r in active) + default_hits
+    if not total:
+        return 0.0
+    cost = sum(pos * hits.get(r.number, 0) for pos, r in enumerate(active, 1))
+    return (cost + default_hits * len(active)) / total
+
+
+def profile_chain(chain: FirewallChain, counters: ChainCounters) -> ChainProfile:
+    """Rank a chain's rules and compute the recommended order.
+
+    Args:
+        chain: Parsed chain
+        counters: The chain's counters
+
+    Returns:
+        Profile with the current and recommended cost
+    """
+    hits = {number: c.packets for number, c in counters.rules.items()}
+    order = reorder_rules(chain.rules, hits)
+    default = counters.default.packets
+    return ChainProfile(
+        chain,
+        counters,
+        order,
+        mean_evaluations(chain.rules, hits, default),
+        mean_evaluations(order, hits, default),
+    )
+
+
+def profile_firewall(
+    commands: Iterable[str], counter_lines: Iterable[str]
+) -> list[ChainProfile]:
+    """Profile every configured chain that has counters.
+
+    Args:
+        commands: Firewall set commands
+        counter_lines: ``show firewall`` output lines
+
+    Returns:
+        One profile per chain, in configuration order
+    """
+    counters = parse_firewall_counters(counter_lines)
+    return [
+        profile_chain(chain, counters[key])
+        for key, chain in parse_firewall_rules(commands).items()
+        if key in counters and chain.rules
+    ]
+
+
+def renumber_commands(profile: ChainProfile, step: int = DEFAULT_STEP) -> list[str]:
+    """Return the commands that rewrite a chain in its recommended order.
+
+    The chain's rules are deleted and set again under new numbers
+    (``step``, ``2 * step``, ...). Apply them in a single commit so the
+    chain is never left empty.
+
+    Args:
+        profile: Chain profile
+        step: Distance between rule numbers
+
+    Returns:
+        A ``delete`` of the chain's rules followed by ``set`` commands
+    """
+    prefix = ("firewall", *profile.chain.key, "rule")
+    commands = ["delete " + shlex.join(prefix)]
+    for position, rule in enumerate(profile.order, 1):
+        path = (*prefix, str(position * step))
+        if not rule.body:
+            commands.append("set " + shlex.join(path))
+        commands.extend("set " + shlex.join(path + tokens) for tokens in rule.body)
+    return commands
+
+
+def print_profiles(profiles: list[ChainProfile], file: TextIO = sys.stderr) -> None:
+    """Print each chain's hit ranking and the cost before and after reordering.
+
+    Args:
+        profiles: Chain profiles
+        file: Stream to print to
+    """
+    for p in profiles:
+        total = p.total
+        print(
+            f"{p.chain.name}: {total} packets, "
+            f"{p.before:.2f} -> {p.after:.2f} rules/packet ({p.gain:.0%} saved)",
+            file=file,
+        )
+        current = {r.number: i for i, r in enumerate(p.chain.rules, 1)}
+        proposed = {r.number: i for i, r in enumerate(p.order, 1)}
+        ranked = sorted(p.chain.rules, key=lambda r: (-p.packets(r), r.number))
+        print("  rule  action      packets   share  position", file=file)
+        for rule in ranked:
+            share = p.packets(rule) / total if total else 0.0
+            print(
+                f"  {rule.number:>4}  {rule.action or '-':<8} {p.packets(rule):>10} "
+                f"{share:>7.1%}  {current[rule.number]} -> {proposed[rule.number]}",
+                file=file,
+            )
+
+
+def _read_lines(path: Path) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        boot, lines = sniff_format(f)
+        if boot:
+            return [command for _, command in iter_boot_commands(lines)]
+        return [line.rstrip("\n") for line in lines]
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Rank firewall rules by hits and recommend a faster order"
+    )
+    parser.add_argument(
+        "--host",
+        default="192.168.1.1",
+        help="VyOS hostname or IP (default: 192.168.1.1)",
+    )
+    parser.add_argument(
+        "--user",
+        default="vyos",
+        help="SSH username (default: vyos)",
+    )
+    parser.add_argument(
+        "--key-file",
+        "-i",
+        help="SSH private key file",
+    )
+    parser.add_argument(
+        "--config-file",
+        type=Path,
+        help="Saved configuration (set commands or config.boot) instead of SSH",
+    )
+    parser.add_argument(
+        "--counters-file",
+        type=Path,
+        help="Saved 'show firewall' output (required with --config-file)",
+    )
+    parser.add_argument(
+        "--min-gain",
+        type=float,
+        default=DEFAULT_MIN_GAIN,
+        help="Only rewrite chains saving at least this fraction of rule "
+        f"evaluations (default: {DEFAULT_MIN_GAIN})",
+    )
+    parser.add_argument(
+        "--step",
+        type=int,
+        default=DEFAULT_STEP,
+        help=f"Distance between new rule numbers (default: {DEFAULT_STEP})",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        help="Write the commands to a file instead of stdout",
+    )
+
+    args = parser.parse_args()
+
+    if args.config_file:
+        if args.counters_file is None:
+            print("Error: --config-file requires --counters-file", file=sys.stderr)
+            return 1
+        for path in (args.config_file, args.counters_file):
+            if not path.exists():
+                print(f"Error: File not found: {path}", file=sys.stderr)
+                return 1
+        commands = _read_lines(args.config_file)
+        counter_lines = _read_lines(args.counters_file)
+    else:
+        print(f"Connecting to {args.user}@{args.host}...", file=sys.stderr)
+        with SSHSession(args.host, args.user, args.key_file) as session:
+            rc, stdout, stderr = session.run(FIREWALL_COUNTERS_COMMAND)
+            if rc != 0:
+                print(f"Error: Failed to read counters: {stderr}", file=sys.stderr)
+                return 1
+            counter_lines = stdout.splitlines()
+            rc, stdout, stderr = session.run(FIREWALL_CONFIG_COMMAND)
+            if rc != 0 and not stdout:
+                print(f"Error: Failed to read configuration: {stderr}", file=sys.stderr)
+                return 1
+            commands = stdout.splitlines()
+
+    profiles = profile_firewall(commands, counter_lines)
+    if not profiles:
+        print("Error: No firewall chains with counters found", file=sys.stderr)
+        return 1
+    print_profiles(profiles)
+
+    output: list[str] = []
+    for p in profiles:
+        if p.changed and p.gain >= args.min_gain:
+            output.append(f"# {p.chain.name}: apply in a single commit")
+            output.extend(renumber_commands(p, args.step))
+    if not output:
+        print("✅ No reordering worth applying", file=sys.stderr)
+        return 0
+
+    text = "\n".join(output) + "\n"
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+        print(f"Written to {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,788 @@
+#!/usr/bin/env python3
+"""Firewall shadowing/redundancy analyzer and group compiler for VyOS.
+
+Finds rules that can never match because earlier rules take all their
+packets (shadowed) and rules whose removal changes no verdict
+(redundant), and folds runs of rules that differ in a single address,
+port or interface matcher into ``firewall group`` definitions, which
+nftables compiles to sets with one lookup instead of a rule per value.
+
+Every rule is a box in the packet space, with one dimension per matcher
+(protocol, state, source and destination address and port, inbound and
+outbound interface). Matchers the model does not understand (``recent``,
+ICMP types, negations, ...) become one extra yes/no dimension per
+distinct condition, so rules using them are still analysed exactly.
+
+The rewritten chain comes with a proof: the packet space is split along
+rule boundaries until, in each part, the first rule of the original and
+of the rewritten chain cover it completely (or neither chain has a rule
+left). Every packet lies in exactly one part, so identical verdicts and
+logging on every part mean the two chains are equivalent.
+
+Usage:
+    # Report findings and print the set/delete commands of the rewrite
+    python vyos_firewall_lint.py --config-file vyos-config-template.txt
+
+    # In CI: fail when anything could be simplified
+    python vyos_firewall_lint.py --config-file backup.txt --check
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import ipaddress
+import shlex
+import sys
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TextIO
+
+from vyos_apply import compute_delta
+from vyos_config_tree import tokenize_command
+from vyos_firewall import (
+    TERMINAL_ACTIONS,
+    FirewallChain,
+    FirewallRule,
+    must_precede,
+    parse_firewall_groups,
+    parse_firewall_rules,
+)
+from vyos_firewall_sim import PROTOCOLS, STATES, load_commands, proto_number
+
+# Verdicts the analyzer can compare; 'return' leaves a named chain
+VERDICT_ACTIONS = TERMINAL_ACTIONS | {"return"}
+# Parts of the packet space a single proof may examine before giving up
+MAX_REGIONS = 1_000_000
+
+PROTO, STATE, SRC, DST, SPORT, DPORT, IN, OUT = range(8)
+
+# Matchers that can be folded into a group -> group name suffix
+FOLDABLE = {
+    ("source", "address"): "src",
+    ("destination", "address"): "dst",
+    ("source", "port"): "sport",
+    ("destination", "port"): "dport",
+    ("inbound-interface", "name"): "in",
+    ("outbound-interface", "name"): "out",
+}
+_GROUP_MEMBER = {
+    "address-group": "address",
+    "ipv6-address-group": "address",
+    "network-group": "network",
+    "ipv6-network-group": "network",
+    "port-group": "port",
+    "interface-group": "interface",
+}
+_ADDRESS_BITS = {"ipv4": 32, "ipv6": 128}
+_PORT_PROTOCOLS = ((PROTOCOLS["tcp"],) * 2, (PROTOCOLS["udp"],) * 2)
+
+# Sorted, disjoint, inclusive ranges of one dimension
+Intervals = tuple[tuple[int, int], ...]
+# One Intervals per dimension
+Region = tuple[Intervals, ...]
+# (action, logged)
+Verdict = tuple[str, bool]
+
+
+class AnalysisError(Exception):
+    """Raised when a proof needs more than MAX_REGIONS parts."""
+
+
+def _merge(intervals: Iterable[tuple[int, int]]) -> Intervals:
+    merged: list[list[int]] = []
+    for low, high in sorted(intervals):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return tuple((low, high) for low, high in merged)
+
+
+def _intersect(a: Intervals, b: Intervals) -> Intervals:
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        low, high = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if low <= high:
+            result.append((low, high))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return tuple(result)
+
+
+def _subtract(a: Intervals, b: Intervals) -> Intervals:
+    result = []
+    for low, high in a:
+        for b_low, b_high in b:
+            if b_high < low or b_low > high:
+                continue
+            if b_low > low:
+                result.append((low, b_low - 1))
+            low = b_high + 1
+            if low > high:
+                break
+        if low <= high:
+            result.append((low, high))
+    return tuple(result)
+
+
+def _overlaps(box: Region, region: Region) -> bool:
+    return all(_intersect(b, r) for b, r in zip(box, region, strict=True))
+
+
+def _covers(box: Region, region: Region) -> bool:
+    return not any(_subtract(r, b) for b, r in zip(box, region, strict=True))
+
+
+def _split(region: Region, box: Region) -> tuple[Region, Region]:
+    """Split a region into the parts inside and outside an overlapping box."""
+    for dim, (r, b) in enumerate(zip(region, box, strict=True)):
+        outside = _subtract(r, b)
+        if outside:
+            inside = _intersect(r, b)
+            head, tail = region[:dim], region[dim + 1 :]
+            return (*head, inside, *tail), (*head, outside, *tail)
+    raise ValueError("Box covers the region")
+
+
+def _hidden_condition(rule: FirewallRule) -> tuple[tuple[str, ...], ...]:
+    """Return the settings of a rule the box model cannot express."""
+    keys = {key.split()[0] for key in rule.opaque} - {"log"}
+    if rule.protocols and any(proto_number(p) is None for p in rule.protocols):
+        keys.add("protocol")
+    if rule.states and not rule.states <= set(STATES):
+        keys.add("state")
+    return tuple(sorted(t for t in rule.body if t[0] in keys))
+
+
+def _verdict(rule: FirewallRule) -> Verdict:
+    return rule.action, "log" in rule.opaque
+
+
+def _default_verdict(chain: FirewallChain) -> Verdict:
+    # Base chains accept what no rule decides; named chains return to the caller
+    fallback = "return" if chain.key[1] == "name" else "accept"
+    return chain.default_action or fallback, chain.default_log
+
+
+@dataclass
+class PacketSpace:
+    """The packets one chain can see, as integer dimensions.
+
+    Interfaces are numbered: no interface, each literal name the rules
+    mention, one stand-in per wildcard for names only it matches, and
+    ``*`` for any other interface. Each hidden condition adds a 0/1
+    dimension.
+    """
+
+    family: str
+    interfaces: list[str]
+    hidden: list[tuple[tuple[str, ...], ...]] = field(default_factory=list)
+
+    @classmethod
+    def for_rules(cls, family: str, rules: Iterable[FirewallRule]) -> PacketSpace:
+        """Build the space covering every matcher of ``rules``."""
+        rules = list(rules)
+        names: set[str] = set()
+        patterns: set[str] = set()
+        for rule in rules:
+            for value in (*(rule.inbound or ()), *(rule.outbound or ())):
+                (patterns if any(c in value for c in "*+") else names).add(value)
+        interfaces = list(dict.fromkeys(["", *sorted(names), *sorted(patterns), "*"]))
+        hidden = list(dict.fromkeys(filter(None, map(_hidden_condition, rules))))
+        return cls(family, interfaces, hidden)
+
+    def full(self) -> Region:
+        """Return the region of all packets."""
+        bits = _ADDRESS_BITS[self.family]
+        address = ((0, (1 << bits) - 1),)
+        port = ((0, 65535),)
+        interface = ((0, len(self.interfaces) - 1),)
+        return (
+            ((0, 255),),
+            ((0, len(STATES) - 1),),
+            address,
+            address,
+            port,
+            port,
+            interface,
+            interface,
+            *[((0, 1),)] * len(self.hidden),
+        )
+
+    def _interface_codes(self, patterns: frozenset[str]) -> Intervals:
+        globs = [p.replace("+", "*") for p in patterns]
+        return _merge(
+            (code, code)
+            for code, name in enumerate(self.interfaces)
+            if any(fnmatch.fnmatchcase(name, g) for g in globs)
+        )
+
+    def box(self, rule: FirewallRule) -> Region:
+        """Return the packets a rule matches."""
+        dims = list(self.full())
+        condition = _hidden_condition(rule)
+        hidden = {tokens[0] for tokens in condition}
+        if rule.protocols is not None and "protocol" not in hidden:
+            dims[PROTO] = _merge((proto_number(p),) * 2 for p in rule.protocols)
+        if rule.source_ports is not None or rule.destination_ports is not None:
+            # Port matchers only apply to TCP and UDP
+            dims[PROTO] = _intersect(dims[PROTO], _PORT_PROTOCOLS)
+        if rule.states is not None and "state" not in hidden:
+            dims[STATE] = _merge((STATES.index(s),) * 2 for s in rule.states)
+        version = 4 if self.family == "ipv4" else 6
+        for dim, networks in ((SRC, rule.sources), (DST, rule.destinations)):
+            if networks is not None:
+                dims[dim] = _merge(
+                    (int(n.network_address), int(n.broadcast_address))
+                    for n in networks
+                    if n.version == version
+                )
+        for dim, ports in (
+            (SPORT, rule.source_ports),
+            (DPORT, rule.destination_ports),
+        ):
+            if ports is not None:
+                dims[dim] = _merge(ports)
+        for dim, patterns in ((IN, rule.inbound), (OUT, rule.outbound)):
+            if patterns is not None:
+                dims[dim] = self._interface_codes(patterns)
+        if condition:
+            dims[OUT + 1 + self.hidden.index(condition)] = ((1, 1),)
+        return tuple(dims)
+
+    def describe(self, region: Region) -> str:
+        """Return one packet of a region in the simulator's selector syntax."""
+        point = [dim[0][0] for dim in region]
+        address = (
+            ipaddress.IPv4Address if self.family == "ipv4" else ipaddress.IPv6Address
+        )
+        names = {number: name for name, number in PROTOCOLS.items()}
+        parts = [
+            f"in={self.interfaces[point[IN]] or '-'}",
+            f"out={self.interfaces[point[OUT]] or '-'}",
+            f"proto={names.get(point[PROTO], point[PROTO])}",
+            f"src={address(point[SRC])}",
+            f"dst={address(point[DST])}",
+            f"sport={point[SPORT]}",
+            f"dport={point[DPORT]}",
+            f"state={STATES[point[STATE]]}",
+        ]
+        for condition, value in zip(self.hidden, point[OUT + 1 :], strict=True):
+            text = " ".join(" ".join(tokens) for tokens in condition)
+            parts.append(f"[{text}]={'yes' if value else 'no'}")
+        return " ".join(parts)
+
+
+@dataclass
+class _Boxed:
+    rule: FirewallRule
+    box: Region
+    verdict: Verdict
+
+
+def _cover(rules: Sequence[_Boxed], region: Region) -> list[FirewallRule] | None:
+    """Return the rules that together take every packet of a region.
+
+    Returns:
+        The rules involved, or None if some packet of the region gets past
+        all of them
+    """
+    used: dict[int, FirewallRule] = {}
+    stack = [(region, [r for r in rules if _overlaps(r.box, region)])]
+    while stack:
+        part, candidates = stack.pop()
+        if not candidates:
+            return None
+        first = candidates[0]
+        if _covers(first.box, part):
+            used[id(first)] = first.rule
+            continue
+        for piece in _split(part, first.box):
+            stack.append((piece, [r for r in candidates if _overlaps(r.box, piece)]))
+    return sorted(used.values(), key=lambda r: r.number)
+
+
+def _compare(
+    first: Sequence[_Boxed],
+    second: Sequence[_Boxed],
+    region: Region,
+    defaults: tuple[Verdict, Verdict],
+) -> tuple[int, Region | None]:
+    """Compare the verdicts two rule lists give every packet of a region.
+
+    Returns:
+        The number of parts compared and a part where the verdicts differ,
+        or None if the lists agree on the whole region
+    """
+    regions = 0
+    stack = [
+        (
+            region,
+            [r for r in first if _overlaps(r.box, region)],
+            [r for r in second if _overlaps(r.box, region)],
+        )
+    ]
+    while stack:
+        part, a, b = stack.pop()
+        splitter = next(
+            (c[0] for c in (a, b) if c and not _covers(c[0].box, part)), None
+        )
+        if splitter is None:
+            regions += 1
+            if regions > MAX_REGIONS:
+                raise AnalysisError(f"More than {MAX_REGIONS} regions to compare")
+            verdicts = (a[0].verdict if a else defaults[0]), (
+                b[0].verdict if b else defaults[1]
+            )
+            if verdicts[0] != verdicts[1]:
+                return regions, part
+            continue
+        for piece in _split(part, splitter.box):
+            stack.append(
+                (
+                    piece,
+                    [r for r in a if _overlaps(r.box, piece)],
+                    [r for r in b if _overlaps(r.box, piece)],
+                )
+            )
+    return regions, None
+
+
+def _numbers(rules: Iterable[FirewallRule]) -> str:
+    numbers = [str(r.number) for r in rules]
+    return ("rules " if len(numbers) > 1 else "rule ") + ", ".join(numbers)
+
+
+@dataclass
+class Finding:
+    """One simplification of a chain."""
+
+    kind: str  # 'shadowed', 'redundant' or 'folded'
+    rules: list[int]
+    detail: str
+
+    def __str__(self) -> str:
+        label = "rules" if len(self.rules) > 1 else "rule"
+        numbers = ", ".join(map(str, self.rules))
+        return f"{label} {numbers}: {self.kind} {self.detail}"
+
+
+@dataclass
+class ChainAnalysis:
+    """Findings and rewritten rules of one chain."""
+
+    chain: FirewallChain
+    rules: list[FirewallRule]
+    findings: list[Finding] = field(default_factory=list)
+    # Groups the folded rules refer to: (type, name) -> members
+    groups: dict[tuple[str, str], list[str]] = field(default_factory=dict)
+    group_descriptions: dict[tuple[str, str], str] = field(default_factory=dict)
+    # Parts of the packet space the equivalence proof compared
+    regions: int = 0
+    # Why the chain was left alone
+    skipped: str = ""
+
+    @property
+    def changed(self) -> bool:
+        """Return whether the chain was rewritten."""
+        return bool(self.findings) and not self.skipped
+
+
+def _remove_unneeded(
+    rules: list[_Boxed], default: Verdict
+) -> tuple[list[_Boxed], list[Finding]]:
+    """Drop shadowed rules, and redundant rules without side effects."""
+    kept = list(rules)
+    findings = []
+    i = 0
+    while i < len(kept):
+        item = kept[i]
+        number = item.rule.number
+        if not all(item.box):
+            findings.append(Finding("shadowed", [number], "(matches no packet)"))
+        elif (by := _cover(kept[:i], item.box)) is not None:
+            findings.append(Finding("shadowed", [number], f"by {_numbers(by)}"))
+        elif not item.rule.has_effects and (
+            _compare(kept, kept[:i] + kept[i + 1 :], item.box, (default,) * 2)[1]
+            is None
+        ):
+            later = [
+                r.rule
+                for r in kept[i + 1 :]
+                if r.verdict == item.verdict and _overlaps(r.box, item.box)
+            ]
+            sources = [_numbers(later)] if later else []
+            if _cover(kept[i + 1 :], item.box) is None:
+                sources.append("the default action")
+            detail = f"(same verdict from {' and '.join(sources)})"
+            findings.append(Finding("redundant", [number], detail))
+        else:
+            i += 1
+            continue
+        del kept[i]
+    return kept, findings
+
+
+def _fold_value(rule: FirewallRule, matcher: tuple[str, str]) -> str | None:
+    values = [t[2] for t in rule.body if t[:2] == matcher and len(t) == 3]
+    if len(values) != 1 or values[0].startswith("!") or rule.has_effects:
+        return None
+    return values[0]
+
+
+def _fold_key(rule: FirewallRule, matcher: tuple[str, str]) -> tuple:
+    return tuple(
+        sorted(t for t in rule.body if t[:2] != matcher and t[0] != "description")
+    )
+
+
+def _group_type(
+    matcher: tuple[str, str], values: list[str], family: str
+) -> tuple[str, list[str]] | None:
+    """Return the group type and members holding folded matcher values."""
+    if matcher[1] == "port":
+        members = [part for value in values for part in value.split(",")]
+        return "port-group", list(dict.fromkeys(members))
+    if matcher[1] == "name":
+        return "interface-group", values
+    prefix = "ipv6-" if family == "ipv6" else ""
+    if not any("/" in v for v in values):
+        return prefix + "address-group", values
+    if any("-" in v for v in values):
+        # Ranges only fit address groups, prefixes only network groups
+        return None
+    bits = _ADDRESS_BITS[family]
+    return prefix + "network-group", [v if "/" in v else f"{v}/{bits}" for v in values]
+
+
+def _fold_runs(
+    analysis: ChainAnalysis, rules: list[FirewallRule], taken: set[str]
+) -> tuple[list[FirewallRule], list[Finding]]:
+    """Fold rules that differ in one matcher into a rule matching a group.
+
+    A later rule joins a run only if it may move up past every rule in
+    between (see vyos_firewall.must_precede). The new groups are added to
+    ``analysis``.
+    """
+    family, hook, name = analysis.chain.key
+    label = name if hook == "name" else hook
+    result: list[FirewallRule] = []
+    findings: list[Finding] = []
+    folded: set[int] = set()
+    for i, rule in enumerate(rules):
+        if i in folded:
+            continue
+        best: tuple[tuple[str, str], list[int]] | None = None
+        for matcher in FOLDABLE:
+            if _fold_value(rule, matcher) is None:
+                continue
+            key = _fold_key(rule, matcher)
+            run = [i]
+            for j in range(i + 1, len(rules)):
+                other = rules[j]
+                if (
+                    j in folded
+                    or _fold_value(other, matcher) is None
+                    or _fold_key(other, matcher) != key
+                ):
+                    continue
+                between = (
+                    rules[k]
+                    for k in range(i + 1, j)
+                    if k not in folded and k not in run
+                )
+                if not any(must_precede(b, other) for b in between):
+                    run.append(j)
+            members = [_fold_value(rules[k], matcher) or "" for k in run]
+            if (
+                len(run) > 1
+                and _group_type(matcher, members, family) is not None
+                and (best is None or len(run) > len(best[1]))
+            ):
+                best = (matcher, run)
+        if best is None:
+            result.append(rule)
+            continue
+        matcher, run = best
+        values = [_fold_value(rules[k], matcher) or "" for k in run]
+        group_type, members = _group_type(matcher, values, family) or ("", [])
+        group = f"{family}-{label}-{rule.number}-{FOLDABLE[matcher]}"
+        suffix = 1
+        while group in taken:
+            suffix += 1
+            group = f"{family}-{label}-{rule.number}-{FOLDABLE[matcher]}-{suffix}"
+        taken.add(group)
+        if matcher[1] == "name":
+            reference = (matcher[0], "group", group)
+        else:
+            reference = (matcher[0], "group", group_type.removeprefix("ipv6-"), group)
+        body = [reference if t[:2] == matcher else t for t in rule.body]
+        result.append(FirewallRule(rule.number, body))
+        analysis.groups[group_type, group] = members
+        # Keep the descriptions of the folded rules with the group
+        descriptions = [
+            f"Rule {rules[k].number}: {t[1]}"
+            for k in run
+            for t in rules[k].body
+            if t[0] == "description" and k != i
+        ]
+        if descriptions:
+            text = "; ".join(descriptions)
+            analysis.group_descriptions[group_type, group] = text
+        folded.update(run)
+        findings.append(
+            Finding(
+                "folded",
+                [rules[k].number for k in run],
+                f"into {group_type} {group} ({', '.join(members)})",
+            )
+        )
+    return result, findings
+
+
+def rule_commands(chain: FirewallChain, rules: Iterable[FirewallRule]) -> list[str]:
+    """Render the set commands of a chain's rules."""
+    prefix = ("firewall", *chain.key, "rule")
+    commands = []
+    for rule in rules:
+        path = (*prefix, str(rule.number))
+        if not rule.body:
+            commands.append("set " + shlex.join(path))
+        commands.extend("set " + shlex.join(path + tokens) for tokens in rule.body)
+    return commands
+
+
+def group_commands(analysis: ChainAnalysis) -> list[str]:
+    """Render the set commands of the groups a chain's folded rules use."""
+    commands = []
+    for (kind, name), members in analysis.groups.items():
+        prefix = ("firewall", "group", kind, name)
+        if description := analysis.group_descriptions.get((kind, name)):
+            commands.append("set " + shlex.join((*prefix, "description", description)))
+        commands.extend(
+            "set " + shlex.join((*prefix, _GROUP_MEMBER[kind], member))
+            for member in members
+        )
+    return commands
+
+
+def prove_equivalent(
+    original: FirewallChain, rewritten: FirewallChain
+) -> tuple[int, str | None]:
+    """Prove that two versions of a chain give every packet the same verdict.
+
+    Verdicts include whether the packet is logged. Rules with actions
+    other than accept, drop, reject and return are not modelled.
+
+    Args:
+        original: The chain as configured
+        rewritten: The simplified chain
+
+    Returns:
+        The number of regions compared, and a packet (in the simulator's
+        selector syntax) the chains treat differently, or None if they
+        are equivalent
+
+    Raises:
+        AnalysisError: If the proof needs more than MAX_REGIONS regions
+    """
+    rules = [
+        [r for r in chain.rules if not r.disabled] for chain in (original, rewritten)
+    ]
+    space = PacketSpace.for_rules(original.key[0], rules[0] + rules[1])
+    boxed = [[_Boxed(r, space.box(r), _verdict(r)) for r in side] for side in rules]
+    defaults = _default_verdict(original), _default_verdict(rewritten)
+    regions, mismatch = _compare(boxed[0], boxed[1], space.full(), defaults)
+    return regions, None if mismatch is None else space.describe(mismatch)
+
+
+def analyse_chain(
+    chain: FirewallChain,
+    group_lines: Sequence[str] = (),
+    taken: set[str] | None = None,
+    fold: bool = True,
+) -> ChainAnalysis:
+    """Simplify one chain and prove the result equivalent.
+
+    Args:
+        chain: Parsed chain
+        group_lines: The configuration's ``firewall group`` set commands,
+            needed to resolve groups the rules already use
+        taken: Group names in use; names of new groups are added
+        fold: Also fold runs of rules into groups
+
+    Returns:
+        The analysis; ``rules`` is the original list if nothing changed,
+        the chain uses actions the model does not cover, or the proof failed
+    """
+    taken = set() if taken is None else taken
+    active = [r for r in chain.rules if not r.disabled]
+    unsupported = sorted({r.action or "(none)" for r in active} - VERDICT_ACTIONS)
+    if unsupported:
+        skipped = f"action {', '.join(unsupported)} not modelled"
+        return ChainAnalysis(chain, chain.rules, skipped=skipped)
+
+    space = PacketSpace.for_rules(chain.key[0], active)
+    default = _default_verdict(chain)
+    original = [_Boxed(r, space.box(r), _verdict(r)) for r in active]
+    kept, findings = _remove_unneeded(original, default)
+    rules = [item.rule for item in kept]
+    analysis = ChainAnalysis(chain, rules)
+    if fold:
+        rules, folds = _fold_runs(analysis, rules, taken)
+        findings += folds
+    if not findings:
+        return ChainAnalysis(chain, chain.rules)
+
+    # Disabled rules stay as they are, in their place
+    dropped = {number for f in findings if f.kind != "folded" for number in f.rules}
+    merged = {number for f in findings if f.kind == "folded" for number in f.rules[1:]}
+    by_number = {r.number: r for r in rules}
+    analysis.rules = [
+        by_number.get(r.number, r)
+        for r in chain.rules
+        if r.disabled or (r.number not in dropped and r.number not in merged)
+    ]
+    analysis.findings = findings
+
+    # The proof works on the rewrite as parsed back from its commands
+    commands = [
+        *group_lines,
+        *group_commands(analysis),
+        *rule_commands(chain, analysis.rules),
+    ]
+    rewritten = parse_firewall_rules(commands).get(chain.key, FirewallChain(chain.key))
+    rewritten.default_action = chain.default_action
+    rewritten.default_log = chain.default_log
+    analysis.regions, mismatch = prove_equivalent(chain, rewritten)
+    if mismatch is not None:
+        skipped = f"rewrite not equivalent for {mismatch}"
+        return ChainAnalysis(chain, chain.rules, skipped=skipped)
+    return analysis
+
+
+def analyse_firewall(
+    commands: Iterable[str], fold: bool = True
+) -> tuple[list[ChainAnalysis], list[str]]:
+    """Simplify every chain of a configuration.
+
+    Args:
+        commands: Set commands
+        fold: Also fold runs of rules into groups
+
+    Returns:
+        One analysis per chain, and the configuration with every changed
+        chain rewritten (the new groups precede the chain's rules)
+    """
+    commands = list(commands)
+    group_lines = [
+        line
+        for line in commands
+        if (tokens := tokenize_command(line)) and tokens[:2] == ["firewall", "group"]
+    ]
+    taken = {name for _, name in parse_firewall_groups(group_lines)}
+    analyses = [
+        analyse_chain(chain, group_lines, taken, fold)
+        for chain in parse_firewall_rules(commands).values()
+    ]
+    changed = {a.chain.key: a for a in analyses if a.changed}
+    rewritten: list[str] = []
+    done: set[tuple[str, ...]] = set()
+    for line in commands:
+        tokens = tokenize_command(line) or []
+        key = tuple(tokens[1:4])
+        if tokens[:1] != ["firewall"] or key not in changed or tokens[4:5] != ["rule"]:
+            rewritten.append(line)
+        elif key not in done:
+            # First rule line of a changed chain: emit the whole rewrite here
+            done.add(key)
+            rewritten += group_commands(changed[key])
+            rewritten += rule_commands(changed[key].chain, changed[key].rules)
+    return analyses, rewritten
+
+
+def print_analyses(analyses: list[ChainAnalysis], file: TextIO = sys.stderr) -> None:
+    """Print each chain's findings and the outcome of its proof.
+
+    Args:
+        analyses: Chain analyses
+        file: Stream to print to
+    """
+    for a in analyses:
+        if a.skipped:
+            print(f"{a.chain.name}: skipped ({a.skipped})", file=file)
+            continue
+        if not a.changed:
+            print(f"{a.chain.name}: nothing to simplify", file=file)
+            continue
+        before = sum(not r.disabled for r in a.chain.rules)
+        after = sum(not r.disabled for r in a.rules)
+        print(
+            f"{a.chain.name}: {before} -> {after} rules, "
+            f"proved equivalent over {a.regions} regions",
+            file=file,
+        )
+        for finding in a.findings:
+            print(f"  {finding}", file=file)
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Find shadowed and redundant VyOS firewall rules "
+        "and fold rule runs into groups"
+    )
+    parser.add_argument(
+        "--config-file",
+        type=Path,
+        required=True,
+        help="Configuration (set commands, template or config.boot)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        help="Write the commands to this file instead of stdout",
+    )
+    parser.add_argument(
+        "--no-fold",
+        action="store_true",
+        help="Only remove shadowed and redundant rules",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if any chain can be simplified",
+    )
+
+    args = parser.parse_args()
+
+    if not args.config_file.exists():
+        print(f"Error: File not found: {args.config_file}", file=sys.stderr)
+        return 1
+
+    commands = load_commands(args.config_file)
+    try:
+        analyses, rewritten = analyse_firewall(commands, fold=not args.no_fold)
+    except AnalysisError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print_analyses(analyses)
+
+    delta = compute_delta(rewritten, commands, prune=True)
+    text = "\n".join(delta) + "\n" if delta else ""
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+        print(f"Commands written to {args.output}", file=sys.stderr)
+    else:
+        print(text, end="")
+    return 1 if args.check and any(a.changed for a in analyses) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
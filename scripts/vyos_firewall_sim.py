@@ -0,0 +1,987 @@
+#!/usr/bin/env python3
+"""Offline firewall policy simulator for VyOS.
+
+Compiles the firewall chains of a configuration (the template, a backup
+or a live snapshot) into per-rule predicates and evaluates flows against
+them in batches: each rule is tested against all still-undecided flows
+at once, with vectorized numpy comparisons when numpy is installed and
+plain list filtering otherwise. Both backends return the same verdicts.
+
+A policy file lists the verdict expected for classes of flows. As in a
+firewall, the first matching line wins, so catch-all lines can follow
+the specific ones::
+
+    accept input   in=eth1 proto=udp dport=51820 state=new  # WireGuard
+    accept forward in=eth2 out=eth0,eth1 state=new          # LAN to WAN
+    drop   input   in=eth0,eth1 state=new                   # everything else
+
+Keys are family, in, out, proto, src, dst, sport, dport and state. Values
+are comma-separated alternatives (literals, prefixes, port ranges; ``-``
+for no interface), and flows are sampled from them. Unset keys cover
+their whole range.
+
+Matchers the simulator cannot evaluate are reported as approximations:
+``recent`` never triggers for a sampled flow, ``limit`` always passes and
+anything else is treated as matching.
+
+Usage:
+    # Check the policy against the template in CI
+    python vyos_firewall_sim.py --config-file vyos-config-template.txt \
+        --policy firewall-policy.txt --samples 100000
+
+    # Trace a single flow
+    python vyos_firewall_sim.py --config-file backup.txt \
+        --flow "input in=eth1 proto=udp src=203.0.113.7 dport=51820"
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import ipaddress
+import random
+import socket
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from vyos_boot import iter_boot_commands, sniff_format
+from vyos_config_tree import tokenize_command
+from vyos_firewall import (
+    TERMINAL_ACTIONS,
+    ChainKey,
+    FirewallChain,
+    FirewallRule,
+    parse_firewall_rules,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised where numpy is missing
+    np = None
+
+STATES = ("new", "established", "related", "invalid")
+PROTOCOLS = {"icmp": 1, "tcp": 6, "udp": 17, "icmpv6": 58}
+PORT_PROTOCOLS = frozenset({PROTOCOLS["tcp"], PROTOCOLS["udp"]})
+POLICY_KEYS = frozenset(
+    {"family", "in", "out", "proto", "src", "dst", "sport", "dport", "state"}
+)
+DEFAULT_SAMPLES = 10000
+# Nested jumps followed before a flow is treated as returned
+MAX_JUMP_DEPTH = 16
+
+_ADDRESS_BITS = {4: 32, 6: 128}
+_LOW_64 = (1 << 64) - 1
+
+
+class PolicyError(ValueError):
+    """Raised for malformed policy lines or flow selectors."""
+
+
+@dataclass(frozen=True)
+class Flow:
+    """One flow as seen by the firewall."""
+
+    src: str
+    dst: str
+    proto: str = "tcp"
+    sport: int = 0
+    dport: int = 0
+    inbound: str = ""
+    outbound: str = ""
+    state: str = "new"
+
+    def __str__(self) -> str:
+        ports = f" {self.sport}->{self.dport}" if self.sport or self.dport else ""
+        return (
+            f"{self.proto} {self.src} -> {self.dst}{ports} "
+            f"in={self.inbound or '-'} out={self.outbound or '-'} {self.state}"
+        )
+
+
+def proto_number(name: str) -> int | None:
+    """Return the IP protocol number of a protocol name, or None if unknown."""
+    if name.isdigit():
+        return int(name)
+    if name in PROTOCOLS:
+        return PROTOCOLS[name]
+    try:
+        return socket.getprotobyname(name)
+    except OSError:
+        return None
+
+
+def _proto_name(number: int) -> str:
+    for name, value in PROTOCOLS.items():
+        if value == number:
+            return name
+    return str(number)
+
+
+@dataclass
+class FlowBatch:
+    """Flows stored column by column.
+
+    Addresses are integers (the family column tells IPv4 from IPv6);
+    interfaces and states are codes into ``interfaces`` and STATES.
+    """
+
+    family: list[int] = field(default_factory=list)
+    src: list[int] = field(default_factory=list)
+    dst: list[int] = field(default_factory=list)
+    proto: list[int] = field(default_factory=list)
+    sport: list[int] = field(default_factory=list)
+    dport: list[int] = field(default_factory=list)
+    inbound: list[int] = field(default_factory=list)
+    outbound: list[int] = field(default_factory=list)
+    state: list[int] = field(default_factory=list)
+    # Interface vocabulary; code 0 is "no interface"
+    interfaces: list[str] = field(default_factory=lambda: [""])
+    _arrays: dict[str, Any] | None = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.family)
+
+    def interface_code(self, name: str) -> int:
+        """Return the code of an interface name, adding it if new."""
+        try:
+            return self.interfaces.index(name)
+        except ValueError:
+            self.interfaces.append(name)
+            return len(self.interfaces) - 1
+
+    def append(self, flow: Flow) -> None:
+        """Add one flow.
+
+        Raises:
+            PolicyError: If the flow's fields are invalid
+        """
+        try:
+            src = ipaddress.ip_address(flow.src)
+            dst = ipaddress.ip_address(flow.dst)
+        except ValueError as e:
+            raise PolicyError(str(e)) from e
+        proto = proto_number(flow.proto)
+        if src.version != dst.version or proto is None or flow.state not in STATES:
+            raise PolicyError(f"Invalid flow: {flow}")
+        self.family.append(src.version)
+        self.src.append(int(src))
+        self.dst.append(int(dst))
+        self.proto.append(proto)
+        self.sport.append(flow.sport)
+        self.dport.append(flow.dport)
+        self.inbound.append(self.interface_code(flow.inbound))
+        self.outbound.append(self.interface_code(flow.outbound))
+        self.state.append(STATES.index(flow.state))
+        self._arrays = None
+
+    @classmethod
+    def from_flows(cls, flows: Iterable[Flow]) -> FlowBatch:
+        """Build a batch from individual flows."""
+        batch = cls()
+        for flow in flows:
+            batch.append(flow)
+        return batch
+
+    def flow(self, i: int) -> Flow:
+        """Return the i-th flow."""
+        make = ipaddress.IPv4Address if self.family[i] == 4 else ipaddress.IPv6Address
+        return Flow(
+            str(make(self.src[i])),
+            str(make(self.dst[i])),
+            _proto_name(self.proto[i]),
+            self.sport[i],
+            self.dport[i],
+            self.interfaces[self.inbound[i]],
+            self.interfaces[self.outbound[i]],
+            STATES[self.state[i]],
+        )
+
+    def arrays(self) -> dict[str, Any]:
+        """Return the columns as numpy arrays, addresses split into 64-bit halves."""
+        if self._arrays is None:
+            arrays = {
+                name: np.array(getattr(self, name), dtype=np.int64)
+                for name in (
+                    "family",
+                    "proto",
+                    "sport",
+                    "dport",
+                    "inbound",
+                    "outbound",
+                    "state",
+                )
+            }
+            for name in ("src", "dst"):
+                column = getattr(self, name)
+                if 6 in self.family:
+                    hi = np.array([a >> 64 for a in column], dtype=np.uint64)
+                    lo = np.array([a & _LOW_64 for a in column], dtype=np.uint64)
+                else:
+                    lo = np.array(column, dtype=np.uint64)
+                    hi = np.zeros(len(column), dtype=np.uint64)
+                arrays[name + "_hi"], arrays[name + "_lo"] = hi, lo
+            self._arrays = arrays
+        return self._arrays
+
+
+@dataclass
+class Predicate:
+    """One matcher of a compiled rule.
+
+    ``values`` depends on ``kind``: a set of codes (family, proto, state),
+    (version, prefix value, host bits) triples (net), (low, high) ranges
+    (port) or interface name patterns (iface).
+    """
+
+    kind: str
+    column: str
+    values: Any
+
+
+@dataclass
+class CompiledRule:
+    """A rule reduced to predicates that all have to hold."""
+
+    number: int
+    action: str
+    predicates: list[Predicate]
+    target: str = ""
+
+
+@dataclass
+class CompiledChain:
+    """A chain's compiled rules and what happens to flows falling through."""
+
+    key: ChainKey
+    rules: list[CompiledRule]
+    default_action: str
+
+
+def _net_values(networks: Iterable[Any]) -> tuple[tuple[int, int, int], ...]:
+    values = []
+    for n in networks:
+        shift = n.max_prefixlen - n.prefixlen
+        values.append((n.version, int(n.network_address) >> shift, shift))
+    return tuple(values)
+
+
+def _rule_predicates(rule: FirewallRule) -> tuple[list[Predicate], list[str]]:
+    """Return a rule's predicates and the matchers that had to be approximated."""
+    predicates: list[Predicate] = []
+    notes: list[str] = []
+    if "recent" in rule.opaque:
+        # A sampled flow never exceeds a rate threshold
+        predicates.append(Predicate("never", "", None))
+        notes.append("recent (never triggers)")
+    if rule.protocols is not None:
+        numbers = {proto_number(p) for p in rule.protocols}
+        if None in numbers:
+            notes.append(f"protocol {','.join(sorted(rule.protocols))}")
+        else:
+            predicates.append(Predicate("code", "proto", frozenset(numbers)))
+    if rule.states is not None:
+        codes = frozenset(STATES.index(s) for s in rule.states if s in STATES)
+        predicates.append(Predicate("code", "state", codes))
+    for column, networks in (("src", rule.sources), ("dst", rule.destinations)):
+        if networks is not None:
+            predicates.append(Predicate("net", column, _net_values(networks)))
+    for column, ranges in (
+        ("sport", rule.source_ports),
+        ("dport", rule.destination_ports),
+    ):
+        if ranges is not None:
+            predicates.append(Predicate("port", column, ranges))
+    for column, names in (("inbound", rule.inbound), ("outbound", rule.outbound)):
+        if names is not None:
+            predicates.append(Predicate("iface", column, names))
+    notes.extend(
+        f"{key} (treated as matching)"
+        for key in sorted(rule.opaque - {"recent", "limit", "log"})
+    )
+    return predicates, notes
+
+
+def compile_chains(
+    chains: dict[ChainKey, FirewallChain],
+) -> tuple[dict[ChainKey, CompiledChain], list[str]]:
+    """Compile parsed chains into predicate lists.
+
+    Args:
+        chains: Chains from parse_firewall_rules
+
+    Returns:
+        Compiled chains and notes on approximated matchers
+    """
+    compiled: dict[ChainKey, CompiledChain] = {}
+    notes: list[str] = []
+    for key, chain in chains.items():
+        rules = []
+        for rule in chain.rules:
+            if rule.disabled:
+                continue
+            predicates, rule_notes = _rule_predicates(rule)
+            notes.extend(f"{chain.name} rule {rule.number}: {n}" for n in rule_notes)
+            rules.append(
+                CompiledRule(rule.number, rule.action, predicates, rule.target)
+            )
+        compiled[key] = CompiledChain(key, rules, chain.default_action)
+    return compiled, notes
+
+
+def _interface_codes(batch: FlowBatch, patterns: frozenset[str]) -> set[int]:
+    # nftables wildcards: eth* (and VyOS' eth+) match by prefix
+    globs = [p.replace("+", "*") for p in patterns]
+    return {
+        code
+        for code, name in enumerate(batch.interfaces)
+        if name and any(fnmatch.fnmatchcase(name, g) for g in globs)
+    }
+
+
+def _select_python(pred: Predicate, batch: FlowBatch, idx: list[int]) -> list[int]:
+    """Return the indices in ``idx`` whose flow satisfies ``pred``."""
+    if pred.kind == "never":
+        return []
+    if pred.kind == "code":
+        column, codes = getattr(batch, pred.column), pred.values
+        return [i for i in idx if column[i] in codes]
+    if pred.kind == "iface":
+        column = getattr(batch, pred.column)
+        codes = _interface_codes(batch, pred.values)
+        return [i for i in idx if column[i] in codes]
+    if pred.kind == "port":
+        column, ranges = getattr(batch, pred.column), pred.values
+        proto = batch.proto
+        if len(ranges) == 1:
+            ((low, high),) = ranges
+            return [
+                i
+                for i in idx
+                if low <= column[i] <= high and proto[i] in PORT_PROTOCOLS
+            ]
+        return [
+            i
+            for i in idx
+            if proto[i] in PORT_PROTOCOLS
+            and any(lo <= column[i] <= hi for lo, hi in ranges)
+        ]
+    # net
+    column, family, nets = getattr(batch, pred.column), batch.family, pred.values
+    if len(nets) == 1:
+        ((version, prefix, shift),) = nets
+        return [
+            i for i in idx if column[i] >> shift == prefix and family[i] == version
+        ]
+    return [
+        i
+        for i in idx
+        if any(
+            family[i] == version and column[i] >> shift == prefix
+            for version, prefix, shift in nets
+        )
+    ]
+
+
+def _select_numpy(pred: Predicate, batch: FlowBatch, idx: Any) -> Any:
+    """Vectorized _select_python over an index array."""
+    arrays = batch.arrays()
+    if pred.kind == "never":
+        return idx[:0]
+    if pred.kind in ("code", "iface"):
+        codes = (
+            pred.values
+            if pred.kind == "code"
+            else _interface_codes(batch, pred.values)
+        )
+        mask = np.isin(arrays[pred.column][idx], sorted(codes))
+    elif pred.kind == "port":
+        column = arrays[pred.column][idx]
+        mask = np.zeros(len(idx), dtype=bool)
+        for lo, hi in pred.values:
+            mask |= (column >= lo) & (column <= hi)
+        mask &= np.isin(arrays["proto"][idx], sorted(PORT_PROTOCOLS))
+    else:
+        family = arrays["family"][idx]
+        hi = arrays[pred.column + "_hi"][idx]
+        lo = arrays[pred.column + "_lo"][idx]
+        mask = np.zeros(len(idx), dtype=bool)
+        for version, prefix, shift in pred.values:
+            # Compare the top bits of the 128-bit value held in two halves
+            value = prefix << shift
+            if shift >= 128:
+                match = np.ones(len(idx), dtype=bool)
+            elif shift >= 64:
+                match = (hi >> np.uint64(shift - 64)) == np.uint64(value >> shift)
+            else:
+                match = (hi == np.uint64(value >> 64)) & (
+                    (lo >> np.uint64(shift)) == np.uint64((value & _LOW_64) >> shift)
+                )
+            mask |= (family == version) & match
+    return idx[mask]
+
+
+@dataclass
+class Verdicts:
+    """Verdict of each flow of a batch."""
+
+    actions: list[str]
+    # (chain name, rule number); rule 0 is the chain's default action
+    rules: list[tuple[str, int]]
+
+    def counts(self) -> Counter[str]:
+        """Return how many flows got each verdict."""
+        return Counter(self.actions)
+
+
+class FirewallSimulator:
+    """Evaluates flows against compiled firewall chains.
+
+    Args:
+        commands: Set commands containing the firewall configuration
+        use_numpy: Use the numpy backend (default: when installed)
+    """
+
+    def __init__(self, commands: Iterable[str], use_numpy: bool | None = None) -> None:
+        commands = list(commands)
+        self.chains, self.notes = compile_chains(parse_firewall_rules(commands))
+        self.interfaces = _config_interfaces(commands)
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy and np is None:
+            raise RuntimeError("numpy is not installed")
+
+    def _all(self, batch: FlowBatch) -> Any:
+        return np.arange(len(batch)) if self.use_numpy else list(range(len(batch)))
+
+    def _select(self, pred: Predicate, batch: FlowBatch, idx: Any) -> Any:
+        if self.use_numpy:
+            return _select_numpy(pred, batch, idx)
+        return _select_python(pred, batch, idx)
+
+    def _without(self, idx: Any, remove: Any) -> Any:
+        if self.use_numpy:
+            return np.setdiff1d(idx, remove, assume_unique=True)
+        drop = set(remove)
+        return [i for i in idx if i not in drop]
+
+    def _join(self, parts: list[Any]) -> Any:
+        if self.use_numpy:
+            return np.sort(np.concatenate(parts)) if parts else np.arange(0)
+        return sorted(i for part in parts for i in part)
+
+    def _run_chain(
+        self,
+        chain: CompiledChain,
+        batch: FlowBatch,
+        idx: Any,
+        decisions: list[tuple[Any, str, str, int]],
+        depth: int = 0,
+    ) -> Any:
+        """Evaluate a chain; return the flows leaving it without a verdict.
+
+        Verdicts are appended to ``decisions`` as (indices, verdict, chain,
+        rule) and only written out per flow once the batch is done.
+        """
+        name = " ".join(chain.key)
+        undecided = idx
+        returned: list[Any] = []
+        for rule in chain.rules:
+            if not len(undecided):
+                break
+            hit = undecided
+            for pred in rule.predicates:
+                hit = self._select(pred, batch, hit)
+                if not len(hit):
+                    break
+            if not len(hit) or rule.action == "continue":
+                continue
+            if rule.action == "jump":
+                target = self.chains.get((chain.key[0], "name", rule.target))
+                if target is None or depth >= MAX_JUMP_DEPTH:
+                    continue
+                back = self._run_chain(target, batch, hit, decisions, depth + 1)
+                undecided = self._without(undecided, self._without(hit, back))
+                continue
+            undecided = self._without(undecided, hit)
+            if rule.action == "return":
+                returned.append(hit)
+            else:
+                decisions.append((hit, rule.action, name, rule.number))
+
+        default = chain.default_action
+        if chain.key[1] != "name" and default not in TERMINAL_ACTIONS:
+            # Base chains accept what no rule decided
+            default = "accept"
+        if default in TERMINAL_ACTIONS:
+            if len(undecided):
+                decisions.append((undecided, default, name, 0))
+            return self._join(returned)
+        return self._join([undecided, *returned])
+
+    def evaluate(self, hook: str, batch: FlowBatch) -> Verdicts:
+        """Return the verdict of every flow in a batch.
+
+        Args:
+            hook: Base chain hook: input, forward or output
+            batch: Flows to evaluate
+
+        Returns:
+            Verdicts in batch order
+        """
+        decisions: list[tuple[Any, str, str, int]] = []
+        everything = self._all(batch)
+        for version in (4, 6):
+            chain = self.chains.get((f"ipv{version}", hook, "filter"))
+            if chain is None:
+                continue
+            idx = self._select(
+                Predicate("code", "family", frozenset({version})), batch, everything
+            )
+            if len(idx):
+                self._run_chain(chain, batch, idx, decisions)
+
+        # Flows no chain decided on are accepted
+        labels = [("accept", ("", 0))]
+        labels.extend((action, (chain, rule)) for _, action, chain, rule in decisions)
+        if self.use_numpy:
+            codes = np.zeros(len(batch), dtype=np.int64)
+            for code, (idx, *_) in enumerate(decisions, 1):
+                codes[idx] = code
+            actions = np.empty(len(labels), dtype=object)
+            rules = np.empty(len(labels), dtype=object)
+            for code, (action, where) in enumerate(labels):
+                actions[code], rules[code] = action, where
+            return Verdicts(actions[codes].tolist(), rules[codes].tolist())
+        out = Verdicts(["accept"] * len(batch), [("", 0)] * len(batch))
+        for idx, action, chain, rule in decisions:
+            where = (chain, rule)
+            for i in idx:
+                out.actions[i] = action
+                out.rules[i] = where
+        return out
+
+    def verdict(self, hook: str, flow: Flow) -> tuple[str, str, int]:
+        """Return (verdict, chain, rule number) for a single flow."""
+        result = self.evaluate(hook, FlowBatch.from_flows([flow]))
+        return (result.actions[0], *result.rules[0])
+
+    def matching(self, selector: Selector, batch: FlowBatch) -> Any:
+        """Return the indices of flows a selector covers."""
+        idx = self._all(batch)
+        for pred in selector.predicates:
+            idx = self._select(pred, batch, idx)
+        return idx
+
+
+def _config_interfaces(commands: Iterable[str]) -> list[str]:
+    """Return the configured interface names, in configuration order."""
+    names: list[str] = []
+    for line in commands:
+        tokens = tokenize_command(line)
+        if (
+            tokens
+            and tokens[0] == "interfaces"
+            and len(tokens) >= 3
+            and tokens[2] not in names
+        ):
+            names.append(tokens[2])
+    return names
+
+
+@dataclass
+class Selector:
+    """A class of flows, as written in a policy line."""
+
+    hook: str
+    fields: dict[str, list[str]]
+    predicates: list[Predicate]
+    families: tuple[int, ...]
+
+
+def _parse_networks(values: list[str], key: str) -> list[Any]:
+    try:
+        return [ipaddress.ip_network(v, strict=False) for v in values]
+    except ValueError as e:
+        raise PolicyError(f"Invalid {key}: {e}") from e
+
+
+def _parse_port_values(values: list[str], key: str) -> tuple[tuple[int, int], ...]:
+    ranges = []
+    for value in values:
+        low, _, high = value.partition("-")
+        if not low.isdigit() or (high and not high.isdigit()):
+            raise PolicyError(f"Invalid {key}: {value}")
+        ranges.append((int(low), int(high or low)))
+    return tuple(ranges)
+
+
+def parse_selector(text: str) -> Selector:
+    """Parse ``HOOK key=value ...`` into a flow selector.
+
+    Args:
+        text: Selector text
+
+    Returns:
+        Selector with predicates matching the described flows
+
+    Raises:
+        PolicyError: If the selector is malformed
+    """
+    words = text.split()
+    if not words or words[0] not in ("input", "forward", "output"):
+        raise PolicyError(f"Expected input, forward or output: {text!r}")
+    fields: dict[str, list[str]] = {}
+    for word in words[1:]:
+        key, sep, value = word.partition("=")
+        if not sep or key not in POLICY_KEYS or not value:
+            raise PolicyError(f"Invalid selector field: {word!r}")
+        fields[key] = value.split(",")
+
+    predicates: list[Predicate] = []
+    families = {4, 6}
+    if "family" in fields:
+        families &= {
+            int(f.removeprefix("ipv"))
+            for f in fields["family"]
+            if f in ("ipv4", "ipv6", "4", "6")
+        }
+    for key in ("src", "dst"):
+        if key in fields:
+            networks = _parse_networks(fields[key], key)
+            families &= {n.version for n in networks}
+            predicates.append(Predicate("net", key, _net_values(networks)))
+    if not families:
+        raise PolicyError(f"No address family fits: {text!r}")
+    predicates.append(Predicate("code", "family", frozenset(families)))
+    if "proto" in fields:
+        numbers = {proto_number(p) for p in fields["proto"]}
+        if None in numbers:
+            raise PolicyError(f"Unknown protocol in {fields['proto']}")
+        predicates.append(Predicate("code", "proto", frozenset(numbers)))
+    for key in ("sport", "dport"):
+        if key in fields:
+            ranges = _parse_port_values(fields[key], key)
+            predicates.append(Predicate("port", key, ranges))
+    for key, column in (("in", "inbound"), ("out", "outbound")):
+        if key in fields and "-" not in fields[key]:
+            predicates.append(Predicate("iface", column, frozenset(fields[key])))
+    if "state" in fields:
+        unknown = set(fields["state"]) - set(STATES)
+        if unknown:
+            raise PolicyError(f"Unknown state: {', '.join(sorted(unknown))}")
+        codes = frozenset(STATES.index(s) for s in fields["state"])
+        predicates.append(Predicate("code", "state", codes))
+    return Selector(words[0], fields, predicates, tuple(sorted(families)))
+
+
+def sample_flows(
+    selector: Selector,
+    count: int,
+    interfaces: Sequence[str],
+    rng: random.Random | None = None,
+) -> FlowBatch:
+    """Draw flows uniformly from the alternatives of a selector.
+
+    Args:
+        selector: Flow class to sample
+        count: Number of flows
+        interfaces: Interface names used where the selector sets none
+        rng: Random source (seeded for reproducible runs)
+
+    Returns:
+        Batch of sampled flows
+    """
+    rng = rng or random.Random(0)
+    fields = selector.fields
+    batch = FlowBatch()
+    choices, bits = rng.choices, rng.getrandbits
+
+    networks = {
+        key: {
+            version: [
+                (int(n.network_address), n.max_prefixlen - n.prefixlen)
+                for n in _parse_networks(fields[key], key)
+                if n.version == version
+            ]
+            if key in fields
+            else [(0, _ADDRESS_BITS[version])]
+            for version in selector.families
+        }
+        for key in ("src", "dst")
+    }
+    ports = {
+        key: _parse_port_values(fields[key], key) if key in fields else ((0, 65535),)
+        for key in ("sport", "dport")
+    }
+    if "proto" in fields:
+        protocols = [proto_number(p) or 0 for p in fields["proto"]]
+    elif "sport" in fields or "dport" in fields:
+        protocols = [PROTOCOLS["tcp"], PROTOCOLS["udp"]]
+    else:
+        protocols = [PROTOCOLS["tcp"], PROTOCOLS["udp"], PROTOCOLS["icmp"]]
+    states = [STATES.index(s) for s in fields.get("state", STATES)]
+
+    def codes(key: str, default: Sequence[str]) -> list[int]:
+        names = fields.get(key, default)
+        return [batch.interface_code("" if n == "-" else n) for n in names]
+
+    usable = list(interfaces) or ["eth0"]
+    inbound = codes("in", [] if selector.hook == "output" else usable) or [0]
+    outbound = codes("out", [] if selector.hook == "input" else usable) or [0]
+    icmp = {4: PROTOCOLS["icmp"], 6: PROTOCOLS["icmpv6"]}
+
+    # Column by column: rng.choices draws a whole column in one call
+    family = choices(selector.families, k=count)
+    batch.family = family
+    for key, column in (("src", batch.src), ("dst", batch.dst)):
+        picks = {v: choices(nets, k=count) for v, nets in networks[key].items()}
+        column.extend(
+            base | bits(host_bits)
+            for base, host_bits in (picks[v][i] for i, v in enumerate(family))
+        )
+    # ICMP alternatives follow the family of the flow
+    batch.proto = [
+        icmp[v] if p in icmp.values() else p
+        for v, p in zip(family, choices(protocols, k=count), strict=True)
+    ]
+    draw = rng.random
+    for key, column in (("sport", batch.sport), ("dport", batch.dport)):
+        column.extend(
+            low + int(draw() * (high - low + 1)) if p in PORT_PROTOCOLS else 0
+            for p, (low, high) in zip(
+                batch.proto, choices(ports[key], k=count), strict=True
+            )
+        )
+    batch.inbound = choices(inbound, k=count)
+    batch.outbound = choices(outbound, k=count)
+    batch.state = choices(states, k=count)
+    return batch
+
+
+@dataclass
+class Expectation:
+    """One policy line: the verdict expected for a class of flows."""
+
+    verdict: str
+    selector: Selector
+    line: int = 0
+    comment: str = ""
+    text: str = ""
+
+
+@dataclass
+class PolicyResult:
+    """Outcome of checking one expectation."""
+
+    expectation: Expectation
+    checked: int
+    failures: int
+    # First failing flow with its actual (verdict, chain, rule)
+    example: tuple[Flow, str, str, int] | None = None
+
+    @property
+    def passed(self) -> bool:
+        """Return whether every checked flow got the expected verdict."""
+        return self.failures == 0
+
+
+def parse_policy(lines: Iterable[str]) -> list[Expectation]:
+    """Parse a policy file.
+
+    Args:
+        lines: Policy lines (``VERDICT HOOK key=value ... # comment``)
+
+    Returns:
+        Expectations in file order
+
+    Raises:
+        PolicyError: On the first malformed line
+    """
+    expectations = []
+    for number, line in enumerate(lines, 1):
+        text, _, comment = line.partition("#")
+        text = text.strip()
+        if not text:
+            continue
+        verdict, _, rest = text.partition(" ")
+        if verdict not in TERMINAL_ACTIONS:
+            raise PolicyError(f"Line {number}: unknown verdict {verdict!r}")
+        try:
+            selector = parse_selector(rest)
+        except PolicyError as e:
+            raise PolicyError(f"Line {number}: {e}") from e
+        expectations.append(
+            Expectation(verdict, selector, number, comment.strip(), text)
+        )
+    return expectations
+
+
+def check_policy(
+    simulator: FirewallSimulator,
+    expectations: list[Expectation],
+    samples: int = DEFAULT_SAMPLES,
+    seed: int = 0,
+) -> list[PolicyResult]:
+    """Check sampled flows of every expectation against the firewall.
+
+    Flows covered by an earlier expectation of the same hook are not
+    counted against a later one.
+
+    Args:
+        simulator: Compiled firewall
+        expectations: Parsed policy
+        samples: Flows sampled per expectation
+        seed: Random seed
+
+    Returns:
+        One result per expectation
+    """
+    rng = random.Random(seed)
+    results = []
+    for n, expectation in enumerate(expectations):
+        selector = expectation.selector
+        batch = sample_flows(selector, samples, simulator.interfaces, rng)
+        idx = simulator._all(batch)
+        for earlier in expectations[:n]:
+            if earlier.selector.hook == selector.hook:
+                covered = simulator.matching(earlier.selector, batch)
+                idx = simulator._without(idx, covered)
+        indices = idx.tolist() if simulator.use_numpy else idx
+        verdicts = simulator.evaluate(selector.hook, batch)
+        failing = [i for i in indices if verdicts.actions[i] != expectation.verdict]
+        example = None
+        if failing:
+            i = failing[0]
+            example = (batch.flow(i), verdicts.actions[i], *verdicts.rules[i])
+        results.append(PolicyResult(expectation, len(indices), len(failing), example))
+    return results
+
+
+def describe_rule(chain: str, rule: int) -> str:
+    """Return where a verdict came from, e.g. ``ipv4 input filter rule 50``."""
+    if not chain:
+        return "no filter chain"
+    return f"{chain} rule {rule}" if rule else f"{chain} default-action"
+
+
+def print_policy_results(results: list[PolicyResult]) -> int:
+    """Print policy results.
+
+    Args:
+        results: Results from check_policy
+
+    Returns:
+        Exit code (0 if every expectation held, 1 otherwise)
+    """
+    for r in results:
+        e = r.expectation
+        label = e.comment or e.text
+        if r.passed:
+            print(f"  ✅ {label}: {r.checked} flows {e.verdict}")
+            continue
+        print(f"  ❌ {label}: {r.failures}/{r.checked} flows not {e.verdict}")
+        if r.example is not None:
+            flow, action, chain, rule = r.example
+            print(f"     e.g. {flow}: {action} by {describe_rule(chain, rule)}")
+    failed = sum(1 for r in results if not r.passed)
+    print(f"\nSummary: {len(results) - failed}/{len(results)} expectations hold")
+    return 1 if failed else 0
+
+
+def load_commands(path: Path) -> list[str]:
+    """Load set commands from a saved configuration or config.boot."""
+    with open(path, encoding="utf-8") as f:
+        boot, lines = sniff_format(f)
+        if boot:
+            return [command for _, command in iter_boot_commands(lines)]
+        return [line.strip() for line in lines if line.startswith("set ")]
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Simulate flows against a VyOS firewall configuration"
+    )
+    parser.add_argument(
+        "--config-file",
+        type=Path,
+        required=True,
+        help="Configuration (set commands, template or config.boot)",
+    )
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
+        "--policy",
+        type=Path,
+        help="Policy file with expected verdicts",
+    )
+    mode.add_argument(
+        "--flow",
+        help="Evaluate one selector, e.g. 'input in=eth1 proto=udp dport=51820'",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=DEFAULT_SAMPLES,
+        help=f"Flows sampled per policy line (default: {DEFAULT_SAMPLES})",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed for sampling (default: 0)",
+    )
+    parser.add_argument(
+        "--no-numpy",
+        action="store_true",
+        help="Use the pure-Python backend even if numpy is installed",
+    )
+
+    args = parser.parse_args()
+
+    for path in (args.config_file, args.policy):
+        if path is not None and not path.exists():
+            print(f"Error: File not found: {path}", file=sys.stderr)
+            return 1
+
+    simulator = FirewallSimulator(
+        load_commands(args.config_file), use_numpy=False if args.no_numpy else None
+    )
+    for note in simulator.notes:
+        print(f"⚠️  Approximated: {note}", file=sys.stderr)
+
+    if args.flow:
+        # A traced flow opens a connection unless told otherwise
+        text = args.flow if "state=" in args.flow else args.flow + " state=new"
+        try:
+            selector = parse_selector(text)
+        except PolicyError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        rng = random.Random(args.seed)
+        flow = sample_flows(selector, 1, simulator.interfaces, rng).flow(0)
+        action, chain, rule = simulator.verdict(selector.hook, flow)
+        print(f"{flow}: {action} ({describe_rule(chain, rule)})")
+        return 0
+
+    try:
+        text = args.policy.read_text(encoding="utf-8")
+        expectations = parse_policy(text.splitlines())
+    except PolicyError as e:
+        print(f"Error: {args.policy}: {e}", file=sys.stderr)
+        return 1
+    backend = "numpy" if simulator.use_numpy else "python"
+    print(f"Checking {args.policy} against {args.config_file} ({backend})...")
+    start = time.perf_counter()
+    results = check_policy(simulator, expectations, args.samples, args.seed)
+    elapsed = time.perf_counter() - start
+    flows = sum(r.checked for r in results)
+    print(f"Evaluated {flows} flows in {elapsed:.2f}s")
+    return print_policy_results(results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
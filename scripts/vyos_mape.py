@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""MAP-E (RFC 7597) parameter calculator and port-set NAT generator.
+
+Computes the shared IPv4 address, the PSID, the port sets and the CE
+IPv6 address from the DHCPv6-PD prefix and the Basic Mapping Rule (rule
+IPv6 prefix, rule IPv4 prefix, EA-bits length, PSID offset), then renders
+the source NAT rules for the tunnel.
+
+The EA bits are the bits of the delegated prefix following the rule IPv6
+prefix: their upper part is the IPv4 address suffix, the rest the PSID.
+With PSID offset ``a`` and PSID length ``k``, the ports of the CE are
+``(A << (16 - a)) | (PSID << m) | j`` for every ``A`` from 1 to
+``2^a - 1`` and ``j`` below ``2^m``, where ``m = 16 - a - k``.
+
+nftables translates to one port range per rule, so each maximal run of
+contiguous ports becomes one rule. NAT rules are tried in order and the
+first match wins; rules that all match the same packets would leave every
+range but the first unused, so each rule takes its own share of the
+original source ports (and the last one the rest).
+
+Usage:
+    # Print the parameters, as the web calculators do
+    python vyos_mape.py --prefix 2001:db8:12:3400::/56 \\
+        --rule-ipv6-prefix 2001:db8::/40 --rule-ipv4-prefix 192.0.2.0/24 \\
+        --ea-length 16 --psid-offset 6
+
+    # Pick the rule from a table and print setup-mape.env or NAT commands
+    python vyos_mape.py --prefix 2001:db8:12:3400::/56 --rules-file rules.txt --env
+    python vyos_mape.py --prefix 2001:db8:12:3400::/56 --rules-file rules.txt --nat
+
+A rules file has one rule per line: IPv6 prefix, IPv4 prefix, EA-bits
+length and optionally the PSID offset (default 4); ``#`` starts a comment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import shlex
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+# Japanese MAP-E services (v6プラス, OCN バーチャルコネクト) use 4;
+# RFC 7597 suggests 6
+DEFAULT_PSID_OFFSET = 4
+DEFAULT_BR_ADDRESS = "2001:260:700:1::1:275"
+DEFAULT_TUNNEL = "mape"
+DEFAULT_FIRST_RULE = 200
+# Original source ports are dealt to the NAT rules in chunks of this size,
+# so every rule gets a share of any client's ephemeral port range
+SOURCE_PORT_CHUNK = 1024
+# 'rfc7597': 16 zero bits, IPv4 address, 16-bit PSID (RFC 7597 section 6)
+# 'draft': 8 zero bits, IPv4 address, 16-bit PSID, 8 zero bits
+# (draft-ietf-softwire-map-03, used by v6プラス)
+IID_FORMATS = ("draft", "rfc7597")
+
+
+class MapeError(ValueError):
+    """Raised when a prefix and a mapping rule do not fit together."""
+
+
+@dataclass(frozen=True)
+class MappingRule:
+    """A MAP-E Basic Mapping Rule."""
+
+    ipv6_prefix: ipaddress.IPv6Network
+    ipv4_prefix: ipaddress.IPv4Network
+    ea_length: int
+    psid_offset: int = DEFAULT_PSID_OFFSET
+
+    @property
+    def psid_length(self) -> int:
+        """Return the PSID length: EA bits not taken by the IPv4 suffix."""
+        return self.ea_length - (32 - self.ipv4_prefix.prefixlen)
+
+
+@dataclass(frozen=True)
+class MapeParameters:
+    """Everything the CE needs, computed from its prefix and rule."""
+
+    rule: MappingRule
+    prefix: ipaddress.IPv6Network
+    ipv4_address: ipaddress.IPv4Address
+    psid: int
+    ce_address: ipaddress.IPv6Address
+    br_address: ipaddress.IPv6Address
+
+    @property
+    def block_size(self) -> int:
+        """Return the number of contiguous ports in each block (2^m)."""
+        return 1 << (16 - self.rule.psid_offset - self.rule.psid_length)
+
+    def port_blocks(self) -> list[tuple[int, int]]:
+        """Return the CE's port blocks, first and last port inclusive.
+
+        Blocks with A = 0 (the system ports and beyond) are excluded unless
+        the PSID offset is 0.
+        """
+        offset, size = self.rule.psid_offset, self.block_size
+        base = self.psid * size
+        first = 1 if offset else 0
+        return [
+            ((a << (16 - offset)) | base, ((a << (16 - offset)) | base) + size - 1)
+            for a in range(first, 1 << offset)
+        ]
+
+    def port_ranges(self) -> list[tuple[int, int]]:
+        """Return the port blocks with adjacent blocks merged."""
+        ranges: list[tuple[int, int]] = []
+        for low, high in self.port_blocks():
+            if ranges and low == ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], high)
+            else:
+                ranges.append((low, high))
+        return ranges
+
+    @property
+    def port_count(self) -> int:
+        """Return the number of ports the CE may use."""
+        return sum(high - low + 1 for low, high in self.port_blocks())
+
+
+def _format_range(low: int, high: int) -> str:
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def interface_id(
+    ipv4_address: ipaddress.IPv4Address, psid: int, iid_format: str = "draft"
+) -> int:
+    """Return the 64-bit interface identifier of the MAP-E CE address."""
+    if iid_format == "rfc7597":
+        return (int(ipv4_address) << 16) | psid
+    if iid_format == "draft":
+        return (int(ipv4_address) << 24) | (psid << 8)
+    raise MapeError(f"Unknown interface ID format: {iid_format}")
+
+
+def compute_mape(
+    prefix: str | ipaddress.IPv6Network,
+    rule: MappingRule,
+    br_address: str = DEFAULT_BR_ADDRESS,
+    iid_format: str = "draft",
+) -> MapeParameters:
+    """Compute the MAP-E parameters of a delegated prefix.
+
+    Args:
+        prefix: DHCPv6-PD prefix, e.g. ``2001:db8:12:3400::/56``; bits past
+            the rule's PD length (rule prefix plus EA bits) are ignored, so
+            a LAN /64 or an address from any subnet of the delegation works
+            too
+        rule: Basic Mapping Rule covering the prefix
+        br_address: Border Relay address, passed through
+        iid_format: Interface ID layout of the CE address (IID_FORMATS)
+
+    Returns:
+        IPv4 address, PSID, CE address and port sets
+
+    Raises:
+        MapeError: If the rule does not cover the prefix or its lengths
+            are inconsistent
+    """
+    try:
+        prefix = ipaddress.IPv6Network(prefix, strict=False)
+        br = ipaddress.IPv6Address(br_address)
+    except ValueError as e:
+        raise MapeError(str(e)) from e
+    r6 = rule.ipv6_prefix.prefixlen
+    if not prefix.subnet_of(rule.ipv6_prefix):
+        raise MapeError(f"{prefix} is not inside rule prefix {rule.ipv6_prefix}")
+    if prefix.prefixlen < r6 + rule.ea_length:
+        raise MapeError(
+            f"{prefix} is shorter than the rule prefix plus EA bits "
+            f"(/{r6 + rule.ea_length})"
+        )
+    k = rule.psid_length
+    if k < 0:
+        raise MapeError("EA bits shorter than the IPv4 suffix are not supported")
+    if rule.psid_offset + k > 16:
+        raise MapeError(
+            f"PSID offset {rule.psid_offset} plus PSID length {k} exceeds 16 bits"
+        )
+
+    # Drop the subnet ID and host bits: the rule defines the delegation
+    prefix = prefix.supernet(new_prefix=r6 + rule.ea_length)
+    ea = (int(prefix.network_address) >> (128 - r6 - rule.ea_length)) & (
+        (1 << rule.ea_length) - 1
+    )
+    psid = ea & ((1 << k) - 1)
+    ipv4 = ipaddress.IPv4Address(int(rule.ipv4_prefix.network_address) | ea >> k)
+    # The CE address lives in the first /64 of the delegation (subnet ID 0)
+    high = int(prefix.network_address) >> 64 << 64
+    ce = ipaddress.IPv6Address(high | interface_id(ipv4, psid, iid_format))
+    return MapeParameters(rule, prefix, ipv4, psid, ce, br)
+
+
+def parse_rules(lines: Iterable[str]) -> list[MappingRule]:
+    """Parse a mapping rule table.
+
+    Args:
+        lines: ``<ipv6 prefix> <ipv4 prefix> <ea length> [psid offset]``
+            lines; ``#`` starts a comment
+
+    Returns:
+        The rules in file order
+
+    Raises:
+        MapeError: On a malformed line
+    """
+    rules = []
+    for number, line in enumerate(lines, 1):
+        fields = line.split("#", 1)[0].split()
+        if not fields:
+            continue
+        try:
+            if len(fields) not in (3, 4):
+                raise ValueError("expected 3 or 4 fields")
+            rules.append(
+                MappingRule(
+                    ipaddress.IPv6Network(fields[0]),
+                    ipaddress.IPv4Network(fields[1]),
+                    int(fields[2]),
+                    int(fields[3]) if len(fields) == 4 else DEFAULT_PSID_OFFSET,
+                )
+            )
+        except ValueError as e:
+            raise MapeError(f"Line {number}: {e}") from e
+    return rules
+
+
+def select_rule(
+    rules: Iterable[MappingRule], prefix: str | ipaddress.IPv6Network
+) -> MappingRule:
+    """Return the rule with the longest IPv6 prefix covering ``prefix``.
+
+    Raises:
+        MapeError: If no rule covers the prefix
+    """
+    prefix = ipaddress.IPv6Network(prefix, strict=False)
+    matches = [r for r in rules if prefix.subnet_of(r.ipv6_prefix)]
+    if not matches:
+        raise MapeError(f"No mapping rule covers {prefix}")
+    return max(matches, key=lambda r: r.ipv6_prefix.prefixlen)
+
+
+def source_port_shares(count: int) -> list[str]:
+    """Deal the original source ports to ``count`` NAT rules.
+
+    Chunks of SOURCE_PORT_CHUNK ports go round-robin to the rules, so the
+    ephemeral ranges of Linux (32768-60999) and Windows/macOS (49152-65535)
+    are spread over all of them.
+
+    Returns:
+        One ``source port`` value per rule
+    """
+    shares: list[list[str]] = [[] for _ in range(count)]
+    for chunk in range(65536 // SOURCE_PORT_CHUNK):
+        low = chunk * SOURCE_PORT_CHUNK
+        # Port 0 is not a valid matcher value (and never a source port)
+        shares[chunk % count].append(f"{max(low, 1)}-{low + SOURCE_PORT_CHUNK - 1}")
+    return [",".join(share) for share in shares]
+
+
+def nat_commands(
+    params: MapeParameters,
+    first_rule: int = DEFAULT_FIRST_RULE,
+    interface: str = DEFAULT_TUNNEL,
+) -> list[str]:
+    """Render the source NAT rules translating onto the CE's port sets.
+
+    One rule per contiguous port range. When there are several, every
+    rule but the last matches its share of the original source ports, so
+    each range is used; the last rule takes everything left.
+
+    Args:
+        params: Computed MAP-E parameters
+        first_rule: Number of the first NAT rule
+        interface: Tunnel interface
+
+    Returns:
+        ``set nat source rule`` commands
+    """
+    ranges = params.port_ranges()
+    shares = source_port_shares(len(ranges))
+    commands = []
+    for i, (low, high) in enumerate(ranges):
+        rule = ("nat", "source", "rule", str(first_rule + i))
+        settings = [
+            ("outbound-interface", "name", interface),
+            ("protocol", "tcp_udp"),
+        ]
+        if i < len(ranges) - 1:
+            settings.append(("source", "port", shares[i]))
+        settings += [
+            ("translation", "address", str(params.ipv4_address)),
+            ("translation", "port", _format_range(low, high)),
+        ]
+        commands.extend("set " + shlex.join(rule + s) for s in settings)
+    return commands
+
+
+def env_lines(params: MapeParameters) -> list[str]:
+    """Render the setup-mape.env settings (the NGN gateway is not derived)."""
+    low, high = params.port_blocks()[0]
+    return [
+        f"MAPE_CE_ADDRESS={params.ce_address}",
+        f"MAPE_BR_ADDRESS={params.br_address}",
+        f"MAPE_IPV4_ADDRESS={params.ipv4_address}",
+        f"MAPE_FIRST_PORT_RANGE={_format_range(low, high)}",
+    ]
+
+
+def print_parameters(params: MapeParameters) -> None:
+    """Print the parameters in the layout of the usual web calculators."""
+    rule = params.rule
+    blocks = params.port_blocks()
+    print(f"Prefix:          {params.prefix}")
+    print(
+        f"Rule:            {rule.ipv6_prefix} -> {rule.ipv4_prefix} "
+        f"(EA {rule.ea_length} bits, PSID offset {rule.psid_offset})"
+    )
+    print(f"IPv4 address:    {params.ipv4_address}")
+    psid = f"{params.psid} (0x{params.psid:x}, {rule.psid_length} bits)"
+    print(f"PSID:            {psid}")
+    print(f"CE address:      {params.ce_address}")
+    print(f"BR address:      {params.br_address}")
+    print(
+        f"Ports:           {params.port_count} in {len(blocks)} blocks "
+        f"of {params.block_size}"
+    )
+    for low, high in params.port_ranges():
+        print(f"  {_format_range(low, high)}")
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Compute MAP-E parameters and NAT rules from a delegated prefix"
+    )
+    parser.add_argument(
+        "--prefix",
+        required=True,
+        help="DHCPv6-PD prefix (or an address within it), e.g. 2001:db8:12:3400::/56",
+    )
+    parser.add_argument("--rule-ipv6-prefix", help="BMR rule IPv6 prefix")
+    parser.add_argument("--rule-ipv4-prefix", help="BMR rule IPv4 prefix")
+    parser.add_argument("--ea-length", type=int, help="BMR EA-bits length")
+    parser.add_argument(
+        "--psid-offset",
+        type=int,
+        default=DEFAULT_PSID_OFFSET,
+        help=f"BMR PSID offset (default: {DEFAULT_PSID_OFFSET})",
+    )
+    parser.add_argument(
+        "--rules-file",
+        type=Path,
+        help="Rule table; the longest rule prefix covering --prefix is used",
+    )
+    parser.add_argument(
+        "--br-address",
+        default=DEFAULT_BR_ADDRESS,
+        help=f"Border Relay address (default: {DEFAULT_BR_ADDRESS})",
+    )
+    parser.add_argument(
+        "--iid-format",
+        choices=IID_FORMATS,
+        default="draft",
+        help="Interface ID layout of the CE address (default: draft)",
+    )
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument(
+        "--env", action="store_true", help="Print setup-mape.env settings"
+    )
+    output.add_argument(
+        "--nat", action="store_true", help="Print the NAT set commands"
+    )
+    parser.add_argument(
+        "--first-rule",
+        type=int,
+        default=DEFAULT_FIRST_RULE,
+        help=f"First NAT rule number (default: {DEFAULT_FIRST_RULE})",
+    )
+    parser.add_argument(
+        "--interface",
+        default=DEFAULT_TUNNEL,
+        help=f"Tunnel interface (default: {DEFAULT_TUNNEL})",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        if args.rules_file:
+            if not args.rules_file.exists():
+                print(f"Error: File not found: {args.rules_file}", file=sys.stderr)
+                return 1
+            text = args.rules_file.read_text(encoding="utf-8")
+            rule = select_rule(parse_rules(text.splitlines()), args.prefix)
+        elif args.rule_ipv6_prefix and args.rule_ipv4_prefix and args.ea_length:
+            rule = MappingRule(
+                ipaddress.IPv6Network(args.rule_ipv6_prefix),
+                ipaddress.IPv4Network(args.rule_ipv4_prefix),
+                args.ea_length,
+                args.psid_offset,
+            )
+        else:
+            print(
+                "Error: Give --rules-file or --rule-ipv6-prefix, "
+                "--rule-ipv4-prefix and --ea-length",
+                file=sys.stderr,
+            )
+            return 1
+        params = compute_mape(args.prefix, rule, args.br_address, args.iid_format)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.env:
+        print("\n".join(env_lines(params)))
+    elif args.nat:
+        print("\n".join(nat_commands(params, args.first_rule, args.interface)))
+    else:
+        print_parameters(params)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
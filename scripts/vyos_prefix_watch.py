@@ -0,0 +1,854 @@
+#!/usr/bin/env python3
+"""Renumber the prefix-dependent configuration after a DHCPv6-PD change.
+
+The LAN address, the router-advert prefix and everything MAP-E derives
+from the delegated prefix (CE address, tunnel, shared IPv4 address and
+port sets) are static configuration, so an ISP renumbering silently
+breaks them. This watcher notices the new prefix and pushes only what
+changed.
+
+The prefix the configuration was rendered for is read from the LAN
+address numbered from the delegation (``dhcpv6-options pd <n> interface
+<lan> sla-id/address``). dhcp6c assigns the same address from the current
+delegation, so a second global address with the delegation's subnet ID
+and interface ID on the LAN interface is the new prefix.
+
+On a change:
+
+1. Every IPv6 address and prefix inside the old delegation is moved to
+   the same offset in the new one, and the MAP-E NAT rules on the tunnel
+   are regenerated (vyos_mape.py). Only the delta to the running
+   configuration is committed, with rollback on failure (vyos_apply.py).
+2. The ip6tnl tunnel created by setup-mape.sh lives outside the VyOS
+   configuration: its local address, the CE address on the WAN interface
+   and the IPv4 address on the tunnel are changed in place, and
+   setup-mape.env is updated so the next boot agrees.
+
+In watch mode the router is polled every ``--interval`` seconds, and an
+``ip -6 monitor address`` stream on the LAN interface wakes the watcher
+as soon as dhcp6c adds an address.
+
+Usage:
+    # Keep watching and renumber on every prefix change
+    python vyos_prefix_watch.py --host 192.168.1.1 --rules-file mape-rules.txt
+
+    # Check once (from cron or a dhcp6c hook); --dry-run only prints
+    python vyos_prefix_watch.py --once --dry-run --rules-file mape-rules.txt
+
+    # Offline: renumber a saved configuration to a given prefix
+    python vyos_prefix_watch.py --config-file running.txt \\
+        --prefix 2001:db8:12:4200::/56 --rules-file mape-rules.txt
+
+Without ``--rules-file`` only the IPv6 addresses are renumbered.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import re
+import shlex
+import sys
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from vyos_apply import (
+    DEFAULT_APPLY_TIMEOUT,
+    apply_commands,
+    compute_delta,
+    fetch_running_config,
+    print_apply_result,
+)
+from vyos_config_check import load_config_file, open_stream
+from vyos_config_tree import tokenize_command
+from vyos_mape import (
+    DEFAULT_BR_ADDRESS,
+    DEFAULT_FIRST_RULE,
+    DEFAULT_TUNNEL,
+    IID_FORMATS,
+    MapeError,
+    MapeParameters,
+    MappingRule,
+    compute_mape,
+    env_lines,
+    nat_commands,
+    parse_rules,
+    select_rule,
+)
+from vyos_schema import default_schema
+from vyos_ssh import SSHSession
+
+# Where setup-mape.sh reads its parameters on the router
+DEFAULT_ENV_FILE = "/config/scripts/setup-mape.env"
+DEFAULT_INTERVAL = 60.0
+# dhcp6c adds and removes addresses one by one; let it finish first
+SETTLE_SECONDS = 2.0
+# VyOS defaults for dhcpv6-options pd
+DEFAULT_PD_LENGTH = 48
+DEFAULT_SLA_ID = 0
+ADDRESS_COMMAND = "ip -6 -o addr show dev {interface} scope global"
+MONITOR_COMMAND = "timeout {seconds} ip -6 monitor address dev {interface}"
+# Exit status of timeout(1) when the time limit was reached
+TIMEOUT_STATUS = 124
+
+_ADDRESS_LINE = re.compile(r"\binet6\s+(\S+)")
+
+
+class PrefixError(ValueError):
+    """Raised when the delegated prefix cannot be determined or applied."""
+
+
+@dataclass
+class Delegation:
+    """A DHCPv6-PD delegation and the LAN interface numbered from it."""
+
+    wan_interface: str
+    lan_interface: str
+    length: int = DEFAULT_PD_LENGTH
+    sla_id: int = DEFAULT_SLA_ID
+    # Interface identifier of the LAN address (None: any)
+    address: int | None = None
+
+    def prefix_of(
+        self, interface: ipaddress.IPv6Interface
+    ) -> ipaddress.IPv6Network | None:
+        """Return the delegated prefix a LAN address was numbered from.
+
+        Args:
+            interface: Address with prefix length, e.g. ``2001:db8:0:1::1/64``
+
+        Returns:
+            The delegated prefix, or None if the address does not carry the
+            delegation's subnet ID and interface ID
+        """
+        if interface.network.prefixlen != 64 or self.length > 64:
+            return None
+        value = int(interface.ip)
+        if self.address is not None and value & ((1 << 64) - 1) != self.address:
+            return None
+        subnet_bits = 64 - self.length
+        if (value >> 64) & ((1 << subnet_bits) - 1) != self.sla_id:
+            return None
+        return interface.network.supernet(new_prefix=self.length)
+
+
+@dataclass
+class Renumbering:
+    """Changes moving the configuration from one delegated prefix to another."""
+
+    old_prefix: ipaddress.IPv6Network
+    new_prefix: ipaddress.IPv6Network
+    # Configuration delta (delete commands first)
+    commands: list[str] = field(default_factory=list)
+    old_mape: MapeParameters | None = None
+    new_mape: MapeParameters | None = None
+
+
+def parse_delegations(commands: Iterable[str]) -> list[Delegation]:
+    """Find the PD delegations and their LAN interfaces in a configuration.
+
+    Args:
+        commands: Set commands
+
+    Returns:
+        One entry per (delegation, LAN interface), in configuration order
+    """
+    lengths: dict[tuple[str, str], int] = {}
+    delegations: dict[tuple[str, str, str], Delegation] = {}
+    for line in commands:
+        tokens = tokenize_command(line)
+        if (
+            tokens is None
+            or len(tokens) < 7
+            or tokens[0] != "interfaces"
+            or tokens[3:5] != ["dhcpv6-options", "pd"]
+        ):
+            continue
+        wan, pd, rest = tokens[2], tokens[5], tokens[6:]
+        try:
+            if rest[0] == "length" and len(rest) == 2:
+                lengths[wan, pd] = int(rest[1])
+            elif rest[0] == "interface" and len(rest) >= 2:
+                key = (wan, pd, rest[1])
+                delegation = delegations.setdefault(key, Delegation(wan, rest[1]))
+                if rest[2:3] == ["sla-id"] and len(rest) == 4:
+                    delegation.sla_id = int(rest[3])
+                elif rest[2:3] == ["address"] and len(rest) == 4:
+                    delegation.address = int(rest[3])
+        except ValueError:
+            continue
+    for (wan, pd, _), delegation in delegations.items():
+        delegation.length = lengths.get((wan, pd), DEFAULT_PD_LENGTH)
+    return list(delegations.values())
+
+
+def configured_prefix(
+    commands: Iterable[str], delegation: Delegation
+) -> ipaddress.IPv6Network | None:
+    """Return the prefix the static LAN address was numbered from.
+
+    Args:
+        commands: Set commands
+        delegation: Delegation numbering the LAN interface
+
+    Returns:
+        Delegated prefix, or None if no LAN address matches the delegation
+    """
+    for line in commands:
+        tokens = tokenize_command(line)
+        if (
+            tokens is None
+            or len(tokens) != 5
+            or tokens[0] != "interfaces"
+            or tokens[2:4] != [delegation.lan_interface, "address"]
+        ):
+            continue
+        try:
+            interface = ipaddress.IPv6Interface(tokens[4])
+        except ValueError:
+            continue
+        prefix = delegation.prefix_of(interface)
+        if prefix is not None:
+            return prefix
+    return None
+
+
+def observed_prefix(
+    output: str,
+    delegation: Delegation,
+    configured: ipaddress.IPv6Network | None = None,
+) -> ipaddress.IPv6Network | None:
+    """Return the delegated prefix currently assigned to the LAN interface.
+
+    The static address of the configured prefix is on the interface as
+    well, so any other matching address wins. Deprecated addresses are
+    left over from an old delegation and are ignored.
+
+    Args:
+        output: ``ip -6 -o addr show dev <lan> scope global`` output
+        delegation: Delegation numbering the LAN interface
+        configured: Prefix the configuration was rendered for
+
+    Returns:
+        Current delegated prefix, or None if none is assigned
+    """
+    found: list[ipaddress.IPv6Network] = []
+    for line in output.splitlines():
+        match = _ADDRESS_LINE.search(line)
+        if match is None or "deprecated" in line.split():
+            continue
+        try:
+            interface = ipaddress.IPv6Interface(match[1])
+        except ValueError:
+            continue
+        prefix = delegation.prefix_of(interface)
+        if prefix is not None and prefix not in found:
+            found.append(prefix)
+    others = [prefix for prefix in found if prefix != configured]
+    if others:
+        # Newest delegation: dhcp6c adds addresses after the static one
+        return others[-1]
+    return found[0] if found else None
+
+
+def _renumber_address(
+    text: str, old: ipaddress.IPv6Network, new: ipaddress.IPv6Network
+) -> str | None:
+    """Move an address or prefix token from the old prefix to the new one."""
+    negated = text.startswith("!")
+    body = text[1:] if negated else text
+    if "-" in body:
+        parts = body.split("-")
+        if len(parts) != 2:
+            return None
+        moved = [_renumber_address(part, old, new) for part in parts]
+        if None in moved:
+            return None
+        result = "-".join(str(part) for part in moved)
+    else:
+        try:
+            interface = ipaddress.ip_interface(body)
+        except ValueError:
+            return None
+        if interface.version != 6 or interface.ip not in old:
+            return None
+        offset = int(interface.ip) - int(old.network_address)
+        ip = ipaddress.IPv6Address(int(new.network_address) + offset)
+        result = str(ip) if "/" not in body else f"{ip}/{interface.network.prefixlen}"
+    return "!" + result if negated else result
+
+
+def renumber_commands(
+    commands: Iterable[str],
+    old: ipaddress.IPv6Network,
+    new: ipaddress.IPv6Network,
+) -> list[str]:
+    """Move every IPv6 address and prefix inside ``old`` into ``new``.
+
+    Addresses keep their offset in the delegation, so the LAN ``::1/64``
+    of subnet 1 stays ``::1/64`` of subnet 1. Unchanged lines are kept as
+    they are.
+
+    Args:
+        commands: Set commands
+        old: Previous delegated prefix
+        new: New delegated prefix
+
+    Returns:
+        Renumbered set commands
+
+    Raises:
+        PrefixError: If the prefix lengths differ
+    """
+    if old.prefixlen != new.prefixlen:
+        raise PrefixError(
+            f"Delegated prefix length changed from /{old.prefixlen} to "
+            f"/{new.prefixlen}; re-render the configuration instead"
+        )
+    result = []
+    for line in commands:
+        tokens = tokenize_command(line)
+        if tokens is None:
+            result.append(line)
+            continue
+        moved = [_renumber_address(token, old, new) for token in tokens]
+        if all(token is None for token in moved):
+            result.append(line)
+            continue
+        tokens = [
+            m if m is not None else t for m, t in zip(moved, tokens, strict=True)
+        ]
+        result.append("set " + shlex.join(tokens))
+    return result
+
+
+def replace_mape_nat(
+    commands: Iterable[str], params: MapeParameters, tunnel: str = DEFAULT_TUNNEL
+) -> list[str]:
+    """Replace the source NAT rules on the tunnel with ones for ``params``.
+
+    The new rules start at the lowest number of the old ones (or
+    DEFAULT_FIRST_RULE), so an unchanged port layout only changes the
+    translation address.
+
+    Args:
+        commands: Set commands
+        params: MAP-E parameters of the new prefix
+        tunnel: MAP-E tunnel interface
+
+    Returns:
+        Set commands with the regenerated NAT rules
+    """
+    commands = list(commands)
+    outbound = ["outbound-interface", "name", tunnel]
+    rule = ["nat", "source", "rule"]
+    numbers = set()
+    for line in commands:
+        tokens = tokenize_command(line)
+        if tokens and tokens[:3] == rule and tokens[4:] == outbound:
+            numbers.add(tokens[3])
+    kept = []
+    for line in commands:
+        tokens = tokenize_command(line)
+        if tokens and tokens[:3] == rule and tokens[3] in numbers:
+            continue
+        kept.append(line)
+    rule_numbers = [int(n) for n in numbers if n.isdigit()]
+    first = min(rule_numbers, default=DEFAULT_FIRST_RULE)
+    return kept + nat_commands(params, first, tunnel)
+
+
+def _single_valued(path: list[str]) -> bool:
+    """Return whether the schema has ``path`` as a leaf taking one value."""
+    node = default_schema()
+    for token in path:
+        child = node.children.get(token)
+        if child is not None:
+            node = child
+        elif node.tag is not None and node.tag[0](token):
+            node = node.tag[1]
+        else:
+            return False
+    # A tag node takes any number of values, like a multi-valued leaf
+    return node.value is not None and not node.multi and node.tag is None
+
+
+def drop_overwritten(delta: list[str]) -> list[str]:
+    """Drop deletes of single-valued leaves that the delta sets anew.
+
+    ``set`` replaces the value of such a leaf, so deleting it first only
+    adds a command to the commit.
+
+    Args:
+        delta: Output of compute_delta
+
+    Returns:
+        The delta without the redundant deletes
+    """
+    replaced = set()
+    for line in delta:
+        tokens = tokenize_command(line)
+        if tokens and _single_valued(tokens[:-1]):
+            replaced.add(tuple(tokens[:-1]))
+    result = []
+    for line in delta:
+        if line.startswith("delete "):
+            tokens = tokenize_command("set " + line[7:])
+            if tokens and tuple(tokens[:-1]) in replaced:
+                continue
+        result.append(line)
+    return result
+
+
+def _mape_for(
+    prefix: ipaddress.IPv6Network,
+    rules: list[MappingRule],
+    br_address: str,
+    iid_format: str,
+) -> MapeParameters:
+    return compute_mape(prefix, select_rule(rules, prefix), br_address, iid_format)
+
+
+def plan_renumbering(
+    commands: Iterable[str],
+    old: ipaddress.IPv6Network,
+    new: ipaddress.IPv6Network,
+    rules: list[MappingRule] | None = None,
+    br_address: str = DEFAULT_BR_ADDRESS,
+    iid_format: str = "draft",
+    tunnel: str = DEFAULT_TUNNEL,
+) -> Renumbering:
+    """Work out the changes moving a configuration to a new delegated prefix.
+
+    Args:
+        commands: The router's running configuration
+        old: Prefix the configuration was rendered for
+        new: Current delegated prefix
+        rules: MAP-E mapping rules (None: no MAP-E)
+        br_address: Border Relay address
+        iid_format: Interface ID layout of the CE address
+        tunnel: MAP-E tunnel interface
+
+    Returns:
+        The configuration delta and the old and new MAP-E parameters
+
+    Raises:
+        PrefixError: If the new prefix cannot be mapped
+    """
+    current = list(commands)
+    desired = renumber_commands(current, old, new)
+    plan = Renumbering(old, new)
+    if rules:
+        try:
+            plan.new_mape = _mape_for(new, rules, br_address, iid_format)
+        except MapeError as e:
+            raise PrefixError(f"MAP-E: {e}") from e
+        try:
+            plan.old_mape = _mape_for(old, rules, br_address, iid_format)
+        except MapeError:
+            # Nothing to clean up beyond what the tunnel change replaces
+            plan.old_mape = None
+        desired = replace_mape_nat(desired, plan.new_mape, tunnel)
+    plan.commands = drop_overwritten(compute_delta(desired, current, prune=True))
+    return plan
+
+
+def tunnel_script(
+    plan: Renumbering,
+    tunnel: str = DEFAULT_TUNNEL,
+    wan_interface: str = "eth1",
+    env_file: str = DEFAULT_ENV_FILE,
+) -> str:
+    """Build the shell script that moves the MAP-E tunnel to the new prefix.
+
+    The tunnel is changed in place rather than recreated, so the default
+    route through it survives.
+
+    Args:
+        plan: Renumbering with MAP-E parameters
+        tunnel: ip6tnl interface created by setup-mape.sh
+        wan_interface: Interface carrying the CE address
+        env_file: setup-mape.env on the router
+
+    Returns:
+        Script for ``sh -s`` (empty without MAP-E)
+    """
+    new, old = plan.new_mape, plan.old_mape
+    if new is None:
+        return ""
+    q = shlex.quote
+    ce, br, ipv4 = str(new.ce_address), str(new.br_address), str(new.ipv4_address)
+    lines = [
+        "set -e",
+        f"ip -6 addr replace {q(ce + '/64')} dev {q(wan_interface)}",
+        f"ip -6 tunnel change {q(tunnel)} mode ip4ip6 remote {q(br)} local {q(ce)}",
+        f"ip addr replace {q(ipv4 + '/32')} dev {q(tunnel)}",
+    ]
+    if old is not None and old.ce_address != new.ce_address:
+        lines.append(
+            f"ip -6 addr del {q(str(old.ce_address) + '/64')} "
+            f"dev {q(wan_interface)} 2>/dev/null || true"
+        )
+    if old is not None and old.ipv4_address != new.ipv4_address:
+        lines.append(
+            f"ip addr del {q(str(old.ipv4_address) + '/32')} "
+            f"dev {q(tunnel)} 2>/dev/null || true"
+        )
+    expressions = []
+    for setting in env_lines(new):
+        name = setting.partition("=")[0]
+        expressions += ["-e", f"s|^{name}=.*|{setting}|"]
+    lines.append(
+        f"if [ -f {q(env_file)} ]; then sed -i {shlex.join(expressions)} "
+        f"{q(env_file)}; fi"
+    )
+    return "\n".join(lines) + "\n"
+
+
+def print_renumbering(plan: Renumbering) -> None:
+    """Print a summary of a renumbering."""
+    print(f"Delegated prefix: {plan.old_prefix} -> {plan.new_prefix}")
+    old, new = plan.old_mape, plan.new_mape
+    if new is not None:
+        if old is not None:
+            print(f"CE address:       {old.ce_address} -> {new.ce_address}")
+            print(f"IPv4 address:     {old.ipv4_address} -> {new.ipv4_address}")
+        else:
+            print(f"CE address:       {new.ce_address}")
+            print(f"IPv4 address:     {new.ipv4_address}")
+    deletes = sum(1 for cmd in plan.commands if cmd.startswith("delete "))
+    print(f"Delta:            {len(plan.commands) - deletes} set, {deletes} delete")
+
+
+def check_once(
+    session: SSHSession,
+    rules: list[MappingRule] | None = None,
+    br_address: str = DEFAULT_BR_ADDRESS,
+    iid_format: str = "draft",
+    tunnel: str = DEFAULT_TUNNEL,
+    env_file: str = DEFAULT_ENV_FILE,
+    prefix: ipaddress.IPv6Network | None = None,
+    dry_run: bool = False,
+) -> Renumbering | None:
+    """Compare the delegated prefix with the configuration and renumber.
+
+    Args:
+        session: SSH session to the router
+        rules: MAP-E mapping rules (None: no MAP-E)
+        br_address: Border Relay address
+        iid_format: Interface ID layout of the CE address
+        tunnel: MAP-E tunnel interface
+        env_file: setup-mape.env on the router
+        prefix: Use this prefix instead of reading it from the router
+        dry_run: Print the changes instead of applying them
+
+    Returns:
+        The renumbering performed, or None if the prefix is unchanged
+
+    Raises:
+        PrefixError: If the state cannot be read or the changes fail
+    """
+    current = fetch_running_config(session)
+    if current is None:
+        raise PrefixError(session.error or "Cannot read running config")
+    delegations = parse_delegations(current)
+    if not delegations:
+        raise PrefixError("No dhcpv6-options pd delegation in the configuration")
+    delegation = delegations[0]
+    old = configured_prefix(current, delegation)
+    if old is None:
+        raise PrefixError(
+            f"No {delegation.lan_interface} address numbered from the delegation"
+        )
+    if prefix is None:
+        command = ADDRESS_COMMAND.format(interface=delegation.lan_interface)
+        returncode, stdout, stderr = session.run(command)
+        if returncode != 0:
+            raise PrefixError(stderr.strip() or f"{command} failed")
+        prefix = observed_prefix(stdout, delegation, old)
+    if prefix is None or prefix == old:
+        return None
+
+    plan = plan_renumbering(current, old, prefix, rules, br_address, iid_format, tunnel)
+    script = tunnel_script(plan, tunnel, delegation.wan_interface, env_file)
+    print_renumbering(plan)
+    if dry_run:
+        print("\n".join(plan.commands))
+        if script:
+            print(f"# sudo sh -s <<'EOF'\n{script}# EOF")
+        return plan
+
+    if plan.commands:
+        result = apply_commands(session, plan.commands)
+        print_apply_result(result)
+        if not result.success:
+            raise PrefixError(f"Apply failed: {result.error}")
+    if script:
+        returncode, _, stderr = session.run("sudo sh -s", input=script)
+        if returncode != 0:
+            raise PrefixError(f"Tunnel update failed: {stderr.strip()}")
+    return plan
+
+
+def wait_for_change(
+    session: SSHSession,
+    interface: str,
+    interval: float,
+    sleep: Callable[[float], None] = time.sleep,
+) -> bool:
+    """Wait until an address on the interface changes or ``interval`` passes.
+
+    Args:
+        session: SSH session to the router
+        interface: Interface to monitor
+        interval: Maximum seconds to wait
+        sleep: Sleep function
+
+    Returns:
+        True if an address event arrived
+    """
+    start = time.monotonic()
+    command = MONITOR_COMMAND.format(seconds=max(int(interval), 1), interface=interface)
+    with open_stream(session, command) as stream:
+        for line in stream:
+            if line.strip():
+                break
+        else:
+            line = ""
+    if line.strip():
+        sleep(SETTLE_SECONDS)
+        return True
+    if stream.returncode not in (0, TIMEOUT_STATUS):
+        # No monitor available: fall back to plain polling
+        sleep(max(interval - (time.monotonic() - start), 0.0))
+    return False
+
+
+def watch(
+    host: str,
+    user: str,
+    key_file: str | None,
+    rules: list[MappingRule] | None = None,
+    br_address: str = DEFAULT_BR_ADDRESS,
+    iid_format: str = "draft",
+    tunnel: str = DEFAULT_TUNNEL,
+    env_file: str = DEFAULT_ENV_FILE,
+    interval: float = DEFAULT_INTERVAL,
+    iterations: int | None = None,
+    session_factory: Callable[..., SSHSession] = SSHSession,
+    sleep: Callable[[float], None] = time.sleep,
+) -> int:
+    """Renumber the router whenever its delegated prefix changes.
+
+    Args:
+        host: VyOS hostname or IP
+        user: SSH username
+        key_file: Optional SSH key file path
+        rules: MAP-E mapping rules (None: no MAP-E)
+        br_address: Border Relay address
+        iid_format: Interface ID layout of the CE address
+        tunnel: MAP-E tunnel interface
+        env_file: setup-mape.env on the router
+        interval: Seconds between checks without an address event
+        iterations: Stop after this many checks (None to run until interrupted)
+        session_factory: Callable creating SSH sessions
+        sleep: Sleep function between checks
+
+    Returns:
+        Exit code (0 if the last check succeeded, 1 otherwise)
+    """
+    timeout = max(DEFAULT_APPLY_TIMEOUT, interval * 2)
+    session = session_factory(host, user, key_file, timeout=timeout)
+    checks = 0
+    ok = False
+    interface: str | None = None
+
+    try:
+        while iterations is None or checks < iterations:
+            checks += 1
+            try:
+                plan = check_once(
+                    session, rules, br_address, iid_format, tunnel, env_file
+                )
+                ok = True
+                if plan is not None:
+                    _watch_log(f"Renumbered to {plan.new_prefix}")
+            except PrefixError as e:
+                ok = False
+                _watch_log(f"⚠️  {e}; reconnecting")
+                session.close()
+                session = session_factory(host, user, key_file, timeout=timeout)
+            if iterations is not None and checks >= iterations:
+                break
+            if interface is None or not ok:
+                interface = _lan_interface(session)
+            if interface is None:
+                sleep(interval)
+            elif wait_for_change(session, interface, interval, sleep):
+                _watch_log(f"Address change on {interface}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        session.close()
+
+    return 0 if ok else 1
+
+
+def _lan_interface(session: SSHSession) -> str | None:
+    current = fetch_running_config(session)
+    delegations = parse_delegations(current or [])
+    return delegations[0].lan_interface if delegations else None
+
+
+def _watch_log(message: str) -> None:
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code (0 for success, non-zero for errors)
+    """
+    parser = argparse.ArgumentParser(
+        description="Renumber PD-dependent configuration when the prefix changes"
+    )
+    parser.add_argument(
+        "--host",
+        default="192.168.1.1",
+        help="VyOS hostname or IP (default: 192.168.1.1)",
+    )
+    parser.add_argument("--user", default="vyos", help="SSH username (default: vyos)")
+    parser.add_argument("--key-file", "-i", help="SSH private key file")
+    parser.add_argument(
+        "--rules-file",
+        type=Path,
+        help="MAP-E rule table (see vyos_mape.py); without it MAP-E is left alone",
+    )
+    parser.add_argument(
+        "--br-address",
+        default=DEFAULT_BR_ADDRESS,
+        help=f"Border Relay address (default: {DEFAULT_BR_ADDRESS})",
+    )
+    parser.add_argument(
+        "--iid-format",
+        choices=IID_FORMATS,
+        default="draft",
+        help="Interface ID layout of the CE address (default: draft)",
+    )
+    parser.add_argument(
+        "--tunnel",
+        default=DEFAULT_TUNNEL,
+        help=f"MAP-E tunnel interface (default: {DEFAULT_TUNNEL})",
+    )
+    parser.add_argument(
+        "--env-file",
+        default=DEFAULT_ENV_FILE,
+        help=f"setup-mape.env on the router (default: {DEFAULT_ENV_FILE})",
+    )
+    parser.add_argument(
+        "--prefix",
+        help="Use this delegated prefix instead of reading it from the router "
+        "(implies --once)",
+    )
+    parser.add_argument(
+        "--config-file",
+        type=Path,
+        help="Renumber a saved configuration offline (requires --prefix)",
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="Check once instead of watching"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the changes instead of applying them (implies --once)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="Seconds between checks in watch mode "
+        f"(default: {DEFAULT_INTERVAL:g})",
+    )
+
+    args = parser.parse_args()
+
+    rules = None
+    prefix = None
+    try:
+        if args.rules_file:
+            if not args.rules_file.exists():
+                print(f"Error: File not found: {args.rules_file}", file=sys.stderr)
+                return 1
+            text = args.rules_file.read_text(encoding="utf-8")
+            rules = parse_rules(text.splitlines())
+        if args.prefix:
+            prefix = ipaddress.IPv6Network(args.prefix, strict=False)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.config_file:
+        if prefix is None:
+            print("Error: --config-file requires --prefix", file=sys.stderr)
+            return 1
+        if not args.config_file.exists():
+            print(f"Error: Config file not found: {args.config_file}", file=sys.stderr)
+            return 1
+        commands = load_config_file(args.config_file)
+        delegations = parse_delegations(commands)
+        old = configured_prefix(commands, delegations[0]) if delegations else None
+        if old is None:
+            print("Error: No LAN address numbered from a delegation", file=sys.stderr)
+            return 1
+        try:
+            plan = plan_renumbering(
+                commands, old, prefix, rules, args.br_address, args.iid_format,
+                args.tunnel,
+            )
+        except PrefixError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print("\n".join(plan.commands))
+        script = tunnel_script(
+            plan, args.tunnel, delegations[0].wan_interface, args.env_file
+        )
+        if script:
+            print(f"# sudo sh -s <<'EOF'\n{script}# EOF")
+        return 0
+
+    if args.once or args.dry_run or prefix is not None:
+        with SSHSession(
+            args.host, args.user, args.key_file, timeout=DEFAULT_APPLY_TIMEOUT
+        ) as session:
+            try:
+                plan = check_once(
+                    session, rules, args.br_address, args.iid_format, args.tunnel,
+                    args.env_file, prefix, args.dry_run,
+                )
+            except PrefixError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+        if plan is None:
+            print("Delegated prefix unchanged", file=sys.stderr)
+        return 0
+
+    print(f"Watching {args.user}@{args.host} every {args.interval:g}s...")
+    return watch(
+        args.host,
+        args.user,
+        args.key_file,
+        rules,
+        args.br_address,
+        args.iid_format,
+        args.tunnel,
+        args.env_file,
+        args.interval,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
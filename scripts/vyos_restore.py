@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 """VyOS configuration restore script.
 
-This script generates VyOS configuration commands from a backup file,
-replacing placeholders with actual secret values from environment variables
-or an .env file.
+This script generates VyOS configuration commands from a backup file (set
+commands or config.boot), replacing placeholders with actual secret values
+from environment variables or an .env file.
 
 Usage:
     # Generate restore commands (dry-run, prints to stdout)
@@ -15,6 +15,27 @@ Usage:
     # Output to file
     python vyos_restore.py --output restore-commands.txt
 
+    # Stream a large dump through stdin/stdout
+    cat config-dump.txt | python vyos_restore.py --backup - --output - > restore.txt
+
+    # Cache the compiled template when rendering the same backup repeatedly
+    python vyos_restore.py --template-cache
+
+    # Push the rendered configuration straight to a router, 200 per commit
+    python vyos_restore.py --apply --host 192.168.1.1 --batch-size 200
+
+    # Push only what differs from the running configuration
+    python vyos_restore.py --apply --delta --prune
+
+    # Check every rendered command against the VyOS path schema first
+    python vyos_restore.py --validate --apply
+
+    # Show the delta against a saved configuration
+    python vyos_restore.py --delta --current-config backup.txt
+
+    # Render every site in sites/ (one <site>.env each) into out/<site>.txt
+    python vyos_restore.py --batch-env-dir sites/ --output-dir out/ --jobs 8
+
 Required environment variables (or .env file):
     VYOS_SSH_PUBKEY            - SSH public key (ed25519)
     VYOS_WG_PRIVATE_KEY        - WireGuard server private key
@@ -28,12 +49,33 @@ Required environment variables (or .env file):
 from __future__ import annotations
 
 import argparse
+import contextlib
+import hashlib
+import itertools
+import json
 import os
+import re
 import sys
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import TextIO
 
+from vyos_apply import (
+    DEFAULT_APPLY_TIMEOUT,
+    DEFAULT_BATCH_SIZE,
+    apply_commands,
+    build_apply_script,
+    compute_delta,
+    fetch_running_config,
+    print_apply_result,
+)
+from vyos_boot import iter_boot_commands, sniff_format
+from vyos_config_check import load_config_file
+from vyos_schema import SchemaValidator, print_issues
+from vyos_ssh import SSHSession
+
 
 @dataclass
 class SecretMapping:
@@ -149,40 +191,393 @@ def check_missing_secrets(env_vars: dict[str, str]) -> list[SecretMapping]:
     return missing
 
 
+# Shape shared by every placeholder: a bracketed token without nested brackets
+_PLACEHOLDER_TOKEN = re.compile(r"<[^<>]*>")
+
+
+def _compile_matcher(patterns: Iterable[str]) -> re.Pattern[str]:
+    """Compile one regex finding any of the placeholder patterns.
+
+    Args:
+        patterns: Literal placeholder patterns
+
+    Returns:
+        The generic ``<...>`` token regex if every pattern has that shape
+        (matches must then be looked up), else an escaped alternation
+    """
+    patterns = list(patterns)
+    if all(_PLACEHOLDER_TOKEN.fullmatch(p) for p in patterns):
+        return _PLACEHOLDER_TOKEN
+    alternatives = sorted(patterns, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, alternatives)))
+
+
+class PlaceholderSubstituter:
+    """Substitutes every placeholder of a command in a single pass.
+
+    Secrets are resolved once, when the substituter is created, and all
+    placeholder patterns are compiled into one matcher. When every pattern
+    has the usual ``<...>`` shape, the matcher is a single generic token
+    regex plus a dict lookup, so the cost per line does not grow with the
+    number of mappings.
+    """
+
+    def __init__(
+        self,
+        env_vars: dict[str, str],
+        mappings: Iterable[SecretMapping] = SECRET_MAPPINGS,
+    ) -> None:
+        """Resolve secrets and compile the matcher.
+
+        Args:
+            env_vars: Dictionary of environment variables
+            mappings: Placeholder mappings, in warning priority order
+        """
+        self.mappings = list(mappings)
+        self._order = {m.pattern: i for i, m in enumerate(self.mappings)}
+        self._values = {
+            m.pattern: get_secret_value(m.env_var, env_vars) for m in self.mappings
+        }
+        self._regex = _compile_matcher(self._order)
+
+    def substitute(self, cmd: str) -> tuple[str | None, str | None]:
+        """Replace the placeholders of one command.
+
+        A commented command (``# set ...``) is uncommented once all of its
+        placeholders are replaced, and dropped if any secret is missing. An
+        uncommented command with a missing secret is kept unchanged.
+
+        Args:
+            cmd: VyOS command, possibly commented
+
+        Returns:
+            Tuple of (processed command or None if dropped, warning or None).
+            Only the first missing mapping (in mapping order) is reported.
+        """
+        is_commented = cmd.startswith("# ")
+        body = cmd[2:] if is_commented else cmd
+        missing: int | None = None
+
+        def replace(match: re.Match[str]) -> str:
+            nonlocal missing
+            token = match.group()
+            index = self._order.get(token)
+            if index is None:
+                return token
+            value = self._values[token]
+            if value:
+                return value
+            if missing is None or index < missing:
+                missing = index
+            return token
+
+        result = self._regex.sub(replace, body)
+        if missing is None:
+            return result, None
+
+        mapping = self.mappings[missing]
+        warning = f"Missing {mapping.env_var} for placeholder {mapping.pattern}"
+        return (None if is_commented else cmd), warning
+
+
+@dataclass(frozen=True)
+class CompiledCommand:
+    """A template command split into literal text and placeholder slots."""
+
+    original: str
+    commented: bool
+    # Literal strings and indices into the template's mappings
+    segments: tuple[str | int, ...]
+    # Placeholder indices in warning priority order
+    placeholders: tuple[int, ...]
+    # 1-based line in the source file (0 if unknown)
+    line: int = 0
+
+
+# Bump when the cached representation changes
+TEMPLATE_CACHE_VERSION = 1
+DEFAULT_TEMPLATE_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "limen"
+    / "vyos_restore"
+)
+
+
+def template_cache_path(
+    backup_path: Path, cache_dir: Path = DEFAULT_TEMPLATE_CACHE_DIR
+) -> Path:
+    """Return where the compiled form of a template is cached.
+
+    The file is named after a hash of the template's absolute path, so
+    templates with the same name in different directories don't collide.
+    """
+    key = hashlib.sha256(str(backup_path.resolve()).encode("utf-8")).hexdigest()
+    return cache_dir / f"{backup_path.name}.{key[:16]}.json"
+
+
+@dataclass
+class CompiledTemplate:
+    """A backup template parsed and split once, renderable for many sites.
+
+    Rendering only joins pre-split segments with a site's secret values,
+    with the same output and warnings as replace_placeholders.
+    """
+
+    commands: list[CompiledCommand]
+    mappings: list[SecretMapping]
+
+    @classmethod
+    def compile(
+        cls,
+        commands: Iterable[str],
+        mappings: Iterable[SecretMapping] = SECRET_MAPPINGS,
+    ) -> CompiledTemplate:
+        """Split commands into segments.
+
+        Args:
+            commands: VyOS commands, e.g. from iter_backup_commands
+            mappings: Placeholder mappings, in warning priority order
+
+        Returns:
+            The compiled template
+        """
+        return cls._compile(((0, cmd) for cmd in commands), mappings)
+
+    @classmethod
+    def _compile(
+        cls,
+        numbered: Iterable[tuple[int, str]],
+        mappings: Iterable[SecretMapping],
+    ) -> CompiledTemplate:
+        mappings = list(mappings)
+        order = {m.pattern: i for i, m in enumerate(mappings)}
+        regex = _compile_matcher(order)
+        compiled: list[CompiledCommand] = []
+
+        for line, cmd in numbered:
+            commented = cmd.startswith("# ")
+            body = cmd[2:] if commented else cmd
+            segments: list[str | int] = []
+            last = 0
+            for match in regex.finditer(body):
+                index = order.get(match.group())
+                if index is None:
+                    continue
+                if match.start() > last:
+                    segments.append(body[last : match.start()])
+                segments.append(index)
+                last = match.end()
+            if last < len(body):
+                segments.append(body[last:])
+            placeholders = tuple(sorted({s for s in segments if isinstance(s, int)}))
+            compiled.append(
+                CompiledCommand(cmd, commented, tuple(segments), placeholders, line)
+            )
+
+        return cls(compiled, mappings)
+
+    @classmethod
+    def from_file(
+        cls, backup_path: Path, mappings: Iterable[SecretMapping] = SECRET_MAPPINGS
+    ) -> CompiledTemplate:
+        """Parse and compile a backup file.
+
+        Args:
+            backup_path: Path to the backup file
+            mappings: Placeholder mappings
+
+        Returns:
+            The compiled template
+        """
+        with open(backup_path, encoding="utf-8") as f:
+            return cls._compile(_iter_numbered_commands(f), mappings)
+
+    @classmethod
+    def load(
+        cls,
+        backup_path: Path,
+        mappings: Iterable[SecretMapping] = SECRET_MAPPINGS,
+        cache_dir: Path = DEFAULT_TEMPLATE_CACHE_DIR,
+    ) -> CompiledTemplate:
+        """Return the compiled template, using the on-disk cache when valid.
+
+        The cache is keyed by the SHA-256 of the template's content (and the
+        placeholder patterns), so editing the template invalidates it. A
+        miss compiles the template and rewrites the cache; an unwritable
+        cache location is ignored.
+
+        Args:
+            backup_path: Path to the backup file
+            mappings: Placeholder mappings
+            cache_dir: Cache directory
+
+        Returns:
+            The compiled template
+        """
+        mappings = list(mappings)
+        cache_path = template_cache_path(backup_path, cache_dir)
+        content = backup_path.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        patterns = [m.pattern for m in mappings]
+
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if (
+                data["version"] == TEMPLATE_CACHE_VERSION
+                and data["sha256"] == digest
+                and data["patterns"] == patterns
+            ):
+                return cls(
+                    [
+                        CompiledCommand(
+                            original,
+                            commented,
+                            tuple(segments),
+                            tuple(placeholders),
+                            line,
+                        )
+                        for original, commented, segments, placeholders, line in data[
+                            "commands"
+                        ]
+                    ],
+                    mappings,
+                )
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        lines = content.decode("utf-8").splitlines()
+        template = cls._compile(_iter_numbered_commands(lines), mappings)
+        data = {
+            "version": TEMPLATE_CACHE_VERSION,
+            "sha256": digest,
+            "patterns": patterns,
+            "commands": [
+                [c.original, c.commented, c.segments, c.placeholders, c.line]
+                for c in template.commands
+            ],
+        }
+        tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, cache_path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                tmp.unlink()
+        return template
+
+    def render(self, env_vars: dict[str, str]) -> tuple[list[str], list[str]]:
+        """Render the template for one site.
+
+        Args:
+            env_vars: The site's environment variables
+
+        Returns:
+            Tuple of (processed commands, warnings)
+        """
+        values = [get_secret_value(m.env_var, env_vars) for m in self.mappings]
+        processed: list[str] = []
+        warnings: list[str] = []
+
+        for cmd in self.commands:
+            missing = next((i for i in cmd.placeholders if not values[i]), None)
+            if missing is not None:
+                mapping = self.mappings[missing]
+                warnings.append(
+                    f"Missing {mapping.env_var} for placeholder {mapping.pattern}"
+                )
+                if not cmd.commented:
+                    processed.append(cmd.original)
+                continue
+            processed.append(
+                "".join(
+                    s if isinstance(s, str) else values[s]  # type: ignore[misc]
+                    for s in cmd.segments
+                )
+            )
+
+        return processed, warnings
+
+
+def _iter_numbered_commands(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """Yield (line number, command) for the set commands of a backup.
+
+    A config.boot backup is converted to set commands while streaming.
+    """
+    boot, lines = sniff_format(lines)
+    if boot:
+        yield from iter_boot_commands(lines)
+        return
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip()
+
+        # Skip empty lines and pure comment lines (not commented commands)
+        if not line:
+            continue
+
+        # Handle commented set commands (lines like "# set ...")
+        if line.startswith("# set "):
+            # This is a commented command with placeholder - keep it
+            yield number, line
+            continue
+
+        # Skip other comments
+        if line.startswith("#"):
+            continue
+
+        # Regular set commands
+        if line.startswith("set "):
+            yield number, line
+
+
+def iter_backup_commands(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the VyOS set commands of a backup, one line at a time.
+
+    Args:
+        lines: Lines of the backup file (with or without newlines)
+
+    Yields:
+        VyOS set commands (including commented ones)
+    """
+    for _, command in _iter_numbered_commands(lines):
+        yield command
+
+
 def parse_backup_file(backup_path: Path) -> list[str]:
     """Parse backup file and extract VyOS set commands.
 
     Args:
-        backup_path: Path to the backup file
+        backup_path: Path to the backup file (set commands or config.boot)
 
     Returns:
         List of VyOS set commands (including commented ones)
     """
-    commands: list[str] = []
-
     with open(backup_path, encoding="utf-8") as f:
-        for line in f:
-            line = line.rstrip()
-
-            # Skip empty lines and pure comment lines (not commented commands)
-            if not line:
-                continue
+        return list(iter_backup_commands(f))
 
-            # Handle commented set commands (lines like "# set ...")
-            if line.startswith("# set "):
-                # This is a commented command with placeholder - keep it
-                commands.append(line)
-                continue
 
-            # Skip other comments
-            if line.startswith("#"):
-                continue
+def iter_replace_placeholders(
+    commands: Iterable[str], env_vars: dict[str, str], warnings: list[str]
+) -> Iterator[str]:
+    """Lazily replace placeholders with actual secret values.
 
-            # Regular set commands
-            if line.startswith("set "):
-                commands.append(line)
+    Args:
+        commands: VyOS commands
+        env_vars: Dictionary of environment variables
+        warnings: List that warnings are appended to as they occur
 
-    return commands
+    Yields:
+        Processed commands
+    """
+    substituter = PlaceholderSubstituter(env_vars)
+    for cmd in commands:
+        result, warning = substituter.substitute(cmd)
+        if warning is not None:
+            warnings.append(warning)
+        if result is not None:
+            yield result
 
 
 def replace_placeholders(
@@ -190,6 +585,10 @@ def replace_placeholders(
 ) -> tuple[list[str], list[str]]:
     """Replace placeholders with actual secret values.
 
+    Commands whose secrets are all available are emitted with the values
+    filled in (and uncommented); commented commands with a missing secret
+    are left out.
+
     Args:
         commands: List of VyOS commands
         env_vars: Dictionary of environment variables
@@ -197,46 +596,21 @@ def replace_placeholders(
     Returns:
         Tuple of (processed commands, warnings)
     """
-    processed: list[str] = []
     warnings: list[str] = []
-
-    for cmd in commands:
-        original_cmd = cmd
-        is_commented = cmd.startswith("# ")
-
-        # Remove comment prefix for processing
-        if is_commented:
-            cmd = cmd[2:]
-
-        # Check each secret mapping
-        for mapping in SECRET_MAPPINGS:
-            if mapping.pattern in cmd:
-                value = get_secret_value(mapping.env_var, env_vars)
-                if value:
-                    cmd = cmd.replace(mapping.pattern, value)
-                else:
-                    warnings.append(
-                        f"Missing {mapping.env_var} for placeholder {mapping.pattern}"
-                    )
-                    # Keep original (commented) if secret not available
-                    cmd = original_cmd
-                    break
-
-        # Only add command if it was successfully processed
-        # (either no placeholders or all replaced)
-        if cmd != original_cmd or not is_commented:
-            processed.append(cmd)
-
+    processed = list(iter_replace_placeholders(commands, env_vars, warnings))
     return processed, warnings
 
 
 def generate_restore_script(
-    commands: list[str], output: TextIO, include_header: bool = True
+    commands: Iterable[str], output: TextIO, include_header: bool = True
 ) -> None:
     """Generate VyOS restore script.
 
+    Commands are written as they are produced, so a lazy pipeline streams
+    straight through.
+
     Args:
-        commands: List of VyOS set commands
+        commands: VyOS set commands (any iterable)
         output: Output file handle
         include_header: Whether to include header comments
     """
@@ -264,6 +638,346 @@ def generate_restore_script(
         output.write(f"{cmd}\n")
 
 
+@dataclass
+class SiteReport:
+    """Outcome of rendering the template for one site."""
+
+    site: str
+    output: Path
+    commands: int
+    warnings: list[str]
+    missing: list[SecretMapping]
+
+
+def render_site(
+    template: CompiledTemplate,
+    env_path: Path,
+    output_dir: Path,
+    include_header: bool = True,
+) -> SiteReport:
+    """Render a compiled template with one site's env file.
+
+    Args:
+        template: Compiled template
+        env_path: The site's .env file; its stem names the site
+        output_dir: Directory for ``<site>.txt``
+        include_header: Whether to include header comments
+
+    Returns:
+        The site's report
+    """
+    env_vars = load_env_file(env_path)
+    processed, warnings = template.render(env_vars)
+    output = output_dir / f"{env_path.stem}.txt"
+    with open(output, "w", encoding="utf-8") as f:
+        generate_restore_script(processed, f, include_header=include_header)
+    missing = [
+        m for m in template.mappings if not get_secret_value(m.env_var, env_vars)
+    ]
+    return SiteReport(env_path.stem, output, len(processed), warnings, missing)
+
+
+# Template shared by the batch worker processes (set by _init_worker)
+_worker_template: CompiledTemplate | None = None
+
+
+def _init_worker(template: CompiledTemplate) -> None:
+    global _worker_template
+    _worker_template = template
+
+
+def _render_in_worker(
+    env_path: Path, output_dir: Path, include_header: bool
+) -> SiteReport:
+    if _worker_template is None:
+        raise RuntimeError("Batch worker was not initialized")
+    return render_site(_worker_template, env_path, output_dir, include_header)
+
+
+def render_sites(
+    template: CompiledTemplate,
+    env_files: list[Path],
+    output_dir: Path,
+    include_header: bool = True,
+    jobs: int | None = None,
+) -> list[SiteReport]:
+    """Render many sites from one compiled template, in parallel.
+
+    The template is sent to each worker process once rather than once
+    per site.
+
+    Args:
+        template: Compiled template
+        env_files: One .env file per site
+        output_dir: Directory for the rendered files
+        include_header: Whether to include header comments
+        jobs: Worker processes (default: number of CPUs)
+
+    Returns:
+        Reports in the order of env_files
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = min(jobs or os.cpu_count() or 1, len(env_files))
+    if jobs <= 1:
+        return [
+            render_site(template, path, output_dir, include_header)
+            for path in env_files
+        ]
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(template,)
+    ) as pool:
+        return list(
+            pool.map(
+                _render_in_worker,
+                env_files,
+                itertools.repeat(output_dir),
+                itertools.repeat(include_header),
+            )
+        )
+
+
+def print_site_reports(reports: list[SiteReport]) -> None:
+    """Print per-site results and missing secrets to stderr.
+
+    Args:
+        reports: Site reports from render_sites
+    """
+    for r in reports:
+        status = f"{len(r.missing)} secret(s) missing" if r.missing else "OK"
+        print(
+            f"{r.site}: {r.commands} commands -> {r.output} ({status})",
+            file=sys.stderr,
+        )
+        for m in r.missing:
+            print(f"  Missing {m.env_var}: {m.description}", file=sys.stderr)
+
+
+def _write_restore_script(
+    commands: Iterable[str], args: argparse.Namespace, to_stdout: bool
+) -> None:
+    """Write the restore script to --output or stdout."""
+    if to_stdout:
+        _use_utf8(sys.stdout)
+        generate_restore_script(commands, sys.stdout, include_header=not args.no_header)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            generate_restore_script(commands, f, include_header=not args.no_header)
+
+
+def _use_utf8(stream: TextIO) -> None:
+    """Switch a standard stream to UTF-8 where supported."""
+    reconfigure = getattr(stream, "reconfigure", None)
+    if reconfigure is not None:
+        reconfigure(encoding="utf-8")
+
+
+def batch_main(args: argparse.Namespace) -> int:
+    """Render every site of --batch-env-dir.
+
+    Args:
+        args: Parsed command-line arguments
+
+    Returns:
+        Exit code (0 for success, non-zero for errors)
+    """
+    if not args.batch_env_dir.is_dir():
+        print(f"Error: Directory not found: {args.batch_env_dir}", file=sys.stderr)
+        return 1
+    env_files = sorted(args.batch_env_dir.glob("*.env"))
+    if not env_files:
+        print(f"Error: No .env files in {args.batch_env_dir}", file=sys.stderr)
+        return 1
+
+    if args.check:
+        missing_any = False
+        for path in env_files:
+            missing = check_missing_secrets(load_env_file(path))
+            missing_any = missing_any or bool(missing)
+            status = f"{len(missing)} secret(s) missing" if missing else "OK"
+            print(f"{path.stem}: {status}", file=sys.stderr)
+            for m in missing:
+                print(f"  {m.env_var}: {m.description}", file=sys.stderr)
+        return 1 if missing_any else 0
+
+    if args.output_dir is None:
+        print("Error: --batch-env-dir requires --output-dir", file=sys.stderr)
+        return 1
+    if not args.backup.exists():
+        print(f"Error: Backup file not found: {args.backup}", file=sys.stderr)
+        return 1
+
+    if args.template_cache:
+        template = CompiledTemplate.load(args.backup, cache_dir=args.template_cache_dir)
+    else:
+        template = CompiledTemplate.from_file(args.backup)
+    if not template.commands:
+        print("Error: No commands found in backup file", file=sys.stderr)
+        return 1
+
+    reports = render_sites(
+        template,
+        env_files,
+        args.output_dir,
+        include_header=not args.no_header,
+        jobs=args.jobs,
+    )
+    print_site_reports(reports)
+    return 0
+
+
+def unresolved_commands(commands: Iterable[str]) -> list[str]:
+    """Return commands that still contain a placeholder.
+
+    Args:
+        commands: Rendered commands
+
+    Returns:
+        Commands that would push a literal placeholder to the router
+    """
+    regex = _compile_matcher(m.pattern for m in SECRET_MAPPINGS)
+    patterns = {m.pattern for m in SECRET_MAPPINGS}
+    return [
+        cmd
+        for cmd in commands
+        if any(match.group() in patterns for match in regex.finditer(cmd))
+    ]
+
+
+def report_validation(validator: SchemaValidator) -> bool:
+    """Print schema validation results.
+
+    Args:
+        validator: Validator that has seen every rendered command
+
+    Returns:
+        True if no errors were found (warnings are allowed)
+    """
+    print_issues(validator.issues, source="command")
+    errors = len(validator.errors)
+    warnings = len(validator.issues) - errors
+    if errors:
+        print(
+            f"❌ Validation: {errors} error(s), {warnings} warning(s)",
+            file=sys.stderr,
+        )
+        return False
+    print(f"✅ Validation passed ({warnings} warning(s))", file=sys.stderr)
+    return True
+
+
+def apply_main(args: argparse.Namespace, env_vars: dict[str, str]) -> int:
+    """Render the backup and apply it to a router (--apply and/or --delta).
+
+    With --delta only the difference to the running configuration (or to
+    --current-config) is applied; without --apply it is written out.
+
+    Args:
+        args: Parsed command-line arguments
+        env_vars: Loaded environment variables
+
+    Returns:
+        Exit code (0 for success, non-zero for errors)
+    """
+    if str(args.backup) == "-":
+        _use_utf8(sys.stdin)
+        processed, warnings = replace_placeholders(
+            list(iter_backup_commands(sys.stdin)), env_vars
+        )
+    else:
+        if args.template_cache:
+            template = CompiledTemplate.load(
+                args.backup, cache_dir=args.template_cache_dir
+            )
+        else:
+            template = CompiledTemplate.from_file(args.backup)
+        processed, warnings = template.render(env_vars)
+
+    for warning in warnings:
+        print(f"Warning: {warning}", file=sys.stderr)
+    if not processed:
+        print("Error: No commands found in backup file", file=sys.stderr)
+        return 1
+    unresolved = unresolved_commands(processed)
+    if unresolved:
+        print("Error: Refusing to apply unresolved placeholders:", file=sys.stderr)
+        for cmd in unresolved:
+            print(f"  {cmd}", file=sys.stderr)
+        return 1
+    if args.apply and warnings and not args.allow_missing_secrets:
+        # The commands of a missing secret are left out, but the rest of
+        # their block (peers, NAT rules, login keys) would still be applied
+        print(
+            "Error: Refusing to apply with missing secrets; set them or pass "
+            "--allow-missing-secrets",
+            file=sys.stderr,
+        )
+        return 1
+    if args.validate:
+        validator = SchemaValidator()
+        for number, cmd in enumerate(processed, 1):
+            validator.feed(cmd, number)
+        if not report_validation(validator):
+            return 1
+
+    if args.delta and args.prune and warnings:
+        # Nodes of left-out commands would look removed from the template
+        print(
+            "Error: Refusing to --prune with missing secrets; their nodes "
+            "would be deleted from the router",
+            file=sys.stderr,
+        )
+        return 1
+
+    if args.delta and not args.apply and args.current_config is None:
+        print(
+            "Error: --delta without --apply requires --current-config",
+            file=sys.stderr,
+        )
+        return 1
+
+    # The connection is only opened if the router is actually contacted
+    with SSHSession(
+        args.host, args.user, args.key_file, timeout=args.apply_timeout
+    ) as session:
+        if args.delta:
+            if args.current_config is not None:
+                current = load_config_file(args.current_config)
+            else:
+                current = fetch_running_config(session)
+                if current is None:
+                    error = session.error or "Cannot read running config"
+                    print(f"Error: {error}", file=sys.stderr)
+                    return 1
+            processed = compute_delta(processed, current, prune=args.prune)
+            deletes = sum(1 for cmd in processed if cmd.startswith("delete "))
+            print(
+                f"Delta: {len(processed) - deletes} set, {deletes} delete",
+                file=sys.stderr,
+            )
+
+        if not args.apply:
+            _write_restore_script(
+                processed, args, args.output is None or str(args.output) == "-"
+            )
+            return 0
+        if not processed:
+            print("✅ Router already matches the template", file=sys.stderr)
+            return 0
+        if args.dry_run:
+            _use_utf8(sys.stdout)
+            sys.stdout.write(build_apply_script(processed, args.batch_size))
+            return 0
+
+        print(
+            f"Applying {len(processed)} commands to {args.host} "
+            f"in batches of {args.batch_size}...",
+            file=sys.stderr,
+        )
+        result = apply_commands(session, processed, args.batch_size)
+    print_apply_result(result)
+    return 0 if result.success else 1
+
+
 def main() -> int:
     """Main entry point.
 
@@ -277,7 +991,8 @@ def main() -> int:
         "--backup",
         type=Path,
         default=Path(__file__).parent / "vyos-config-template.txt",
-        help="Path to backup file (default: vyos-config-template.txt)",
+        help="Path to backup file, '-' for stdin "
+        "(default: vyos-config-template.txt)",
     )
     parser.add_argument(
         "--env-file",
@@ -289,7 +1004,7 @@ def main() -> int:
         "--output",
         "-o",
         type=Path,
-        help="Output file (default: stdout)",
+        help="Output file, '-' for stdout (default: stdout)",
     )
     parser.add_argument(
         "--check",
@@ -301,9 +1016,110 @@ def main() -> int:
         action="store_true",
         help="Don't include header comments in output",
     )
+    parser.add_argument(
+        "--template-cache",
+        action="store_true",
+        help="Cache the compiled template between runs; without it the "
+        "backup is streamed with constant memory",
+    )
+    parser.add_argument(
+        "--template-cache-dir",
+        type=Path,
+        default=DEFAULT_TEMPLATE_CACHE_DIR,
+        help="Compiled template cache directory "
+        f"(default: {DEFAULT_TEMPLATE_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--batch-env-dir",
+        type=Path,
+        help="Render one site per *.env file in this directory",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Directory for <site>.txt files (required with --batch-env-dir)",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="Parallel worker processes for batch mode (default: CPU count)",
+    )
+
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Check rendered commands against the VyOS path schema "
+        "(exit 1 on errors; with --apply, nothing is sent)",
+    )
+
+    apply_group = parser.add_argument_group("apply mode")
+    apply_group.add_argument(
+        "--apply",
+        action="store_true",
+        help="Apply the rendered commands to a router in one configure session",
+    )
+    apply_group.add_argument(
+        "--host",
+        default="192.168.1.1",
+        help="VyOS hostname or IP (default: 192.168.1.1)",
+    )
+    apply_group.add_argument(
+        "--user",
+        default="vyos",
+        help="SSH username (default: vyos)",
+    )
+    apply_group.add_argument(
+        "--key-file",
+        "-i",
+        help="SSH private key file",
+    )
+    apply_group.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Commands per commit (default: {DEFAULT_BATCH_SIZE})",
+    )
+    apply_group.add_argument(
+        "--apply-timeout",
+        type=float,
+        default=DEFAULT_APPLY_TIMEOUT,
+        help="Seconds allowed for the whole apply "
+        f"(default: {DEFAULT_APPLY_TIMEOUT:g})",
+    )
+    apply_group.add_argument(
+        "--delta",
+        action="store_true",
+        help="Only emit commands that differ from the running configuration",
+    )
+    apply_group.add_argument(
+        "--prune",
+        action="store_true",
+        help="With --delta, also delete nodes that are not in the template "
+        "(hw-id and encrypted-password are always kept; refused while "
+        "secrets are missing)",
+    )
+    apply_group.add_argument(
+        "--current-config",
+        type=Path,
+        help="Diff against this saved configuration instead of the router",
+    )
+    apply_group.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the apply script instead of running it",
+    )
+    apply_group.add_argument(
+        "--allow-missing-secrets",
+        action="store_true",
+        help="Apply even though commands with missing secrets are left out",
+    )
 
     args = parser.parse_args()
 
+    if args.batch_env_dir is not None:
+        return batch_main(args)
+
     # Load env file
     env_vars = load_env_file(args.env_file)
 
@@ -319,33 +1135,63 @@ def main() -> int:
         return 0
 
     # Check backup file exists
-    if not args.backup.exists():
+    from_stdin = str(args.backup) == "-"
+    if not from_stdin and not args.backup.exists():
         print(f"Error: Backup file not found: {args.backup}", file=sys.stderr)
         return 1
 
-    # Parse backup file
-    commands = parse_backup_file(args.backup)
-    if not commands:
-        print("Error: No commands found in backup file", file=sys.stderr)
-        return 1
+    if args.apply or args.delta:
+        return apply_main(args, env_vars)
 
-    # Replace placeholders
-    processed, warnings = replace_placeholders(commands, env_vars)
+    to_stdout = args.output is None or str(args.output) == "-"
+    validator = SchemaValidator() if args.validate else None
+
+    if not from_stdin and args.template_cache:
+        # Renders from a cache hit skip parsing the template
+        template = CompiledTemplate.load(args.backup, cache_dir=args.template_cache_dir)
+        if not template.commands:
+            print("Error: No commands found in backup file", file=sys.stderr)
+            return 1
+        processed, warnings = template.render(env_vars)
+        _write_restore_script(
+            validator.passthrough(processed) if validator else processed,
+            args,
+            to_stdout,
+        )
+    else:
+        if from_stdin:
+            _use_utf8(sys.stdin)
+            source = contextlib.nullcontext(sys.stdin)
+        else:
+            source = open(args.backup, encoding="utf-8")  # noqa: SIM115
+
+        with source as backup:
+            # Lazy pipeline: read -> filter -> substitute -> write, line by line
+            commands = iter_backup_commands(backup)
+            first = next(commands, None)
+            if first is None:
+                print("Error: No commands found in backup file", file=sys.stderr)
+                return 1
+
+            warnings = []
+            rendered = iter_replace_placeholders(
+                itertools.chain([first], commands), env_vars, warnings
+            )
+            _write_restore_script(
+                validator.passthrough(rendered) if validator else rendered,
+                args,
+                to_stdout,
+            )
 
     # Print warnings
     for warning in warnings:
         print(f"Warning: {warning}", file=sys.stderr)
 
-    # Generate output
-    if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
-            generate_restore_script(processed, f, include_header=not args.no_header)
+    if not to_stdout:
         print(f"Restore commands written to: {args.output}", file=sys.stderr)
-    else:
-        generate_restore_script(
-            processed, sys.stdout, include_header=not args.no_header
-        )
 
+    if validator is not None and not report_validation(validator):
+        return 1
     return 0
 
 
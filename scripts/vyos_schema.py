@@ -0,0 +1,771 @@
+#!/usr/bin/env python3
+"""Offline validation of VyOS set commands against a path schema.
+
+Catches typos, malformed values, leftover ``<...>`` placeholders and
+duplicate or conflicting leaf values before a commit on the router does.
+The schema is a compact trie compiled from the path table below; each
+command is checked in O(depth), so thousands of lines take milliseconds.
+
+Schema lines are paths from the top of the configuration:
+
+    interfaces ethernet <ifname> address <ifaddr|dhcp|dhcpv6>*
+
+- ``<type>`` in the middle of a path is a tag node value (``eth0``)
+- ``<type>`` at the end is the leaf value; ``*`` allows several values
+- ``<a|b>`` accepts any listed type or literal word
+- ``ipv4|ipv6`` outside brackets expands to one path per alternative
+- a path ending in a word is a valueless leaf (``default-log``)
+- a path ending in ``...`` accepts anything below it (unmodelled areas)
+
+Usage:
+    # Validate a rendered restore file or a config.boot
+    python vyos_schema.py restore-commands.txt
+
+    # From Python, one command at a time
+    validator = SchemaValidator()
+    for number, command in enumerate(commands, 1):
+        validator.feed(command, number)
+    validator.errors
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import functools
+import ipaddress
+import itertools
+import re
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from vyos_boot import iter_boot_commands, sniff_format
+from vyos_config_tree import tokenize_command
+
+OPEN = "..."
+
+_FW_RULE = """
+action <accept|drop|reject|jump|return|continue|queue>
+description <text>
+disable
+log
+jump-target <name>
+protocol <proto>
+state <established|related|new|invalid>*
+source|destination address <fwaddr>
+source|destination port <port>
+source|destination mac-address <mac>
+source|destination group address-group|network-group|port-group|domain-group <name>
+inbound-interface|outbound-interface name <ifname>
+inbound-interface|outbound-interface group <name>
+recent count <u32>
+recent time <second|minute|hour>
+limit rate <text>
+limit burst <u32>
+icmp|icmpv6 type-name <name>
+icmp|icmpv6 type <num:0-255>
+icmp|icmpv6 code <num:0-255>
+tcp flags syn|ack|fin|rst|urg|psh|ecn|cwr
+tcp flags not syn|ack|fin|rst|urg|psh|ecn|cwr
+connection-status nat <destination|source>
+"""
+
+_FW_CHAIN = """
+default-action <accept|drop|reject|jump|return|continue>
+default-jump-target <name>
+default-log
+description <text>
+"""
+
+_NAT_RULE = """
+description <text>
+disable
+exclude
+log
+protocol <proto>
+inbound-interface|outbound-interface name <ifname>
+inbound-interface|outbound-interface group <name>
+source|destination address <fwaddr>
+source|destination port <port>
+translation address <fwaddr|masquerade>
+translation port <port>
+"""
+
+_POLICY_RULE = """
+action <accept|drop|reject>
+description <text>
+disable
+log
+protocol <proto>
+set table <u32|main>
+set tcp-mss <num:500-1460>
+source|destination address <fwaddr>
+source|destination port <port>
+tcp flags syn|ack|fin|rst|urg|psh|ecn|cwr
+tcp flags not syn|ack|fin|rst|urg|psh|ecn|cwr
+"""
+
+_IFACE = """
+address <ifaddr|dhcp|dhcpv6>*
+description <text>
+disable
+mtu <num:68-16000>
+ipv6 address autoconf
+ipv6 address eui64 <ipv6net>*
+ipv6 address no-default-link-local
+"""
+
+_DHCPV6_OPTIONS = """
+duid <duid>
+parameters-only
+rapid-commit
+pd <u32> length <num:32-64>
+pd <u32> interface <ifname> address <u32>
+pd <u32> interface <ifname> sla-id <u32>
+"""
+
+
+def _nest(prefixes: str, body: str) -> str:
+    """Prefix every line of ``body`` with each of ``prefixes``' lines."""
+    return "\n".join(
+        f"{prefix} {line}"
+        for prefix in prefixes.split("\n")
+        if prefix.strip()
+        for line in body.strip().splitlines()
+    )
+
+
+SCHEMA = "\n".join(
+    [
+        _nest("interfaces ethernet <ifname>", _IFACE),
+        _nest("interfaces ethernet <ifname> vif <num:0-4094>", _IFACE),
+        _nest("interfaces ethernet <ifname> dhcpv6-options", _DHCPV6_OPTIONS),
+        """
+interfaces ethernet <ifname> hw-id <mac>
+interfaces ethernet <ifname> offload gro|gso|lro|rps|sg|tso
+interfaces loopback <ifname> address <ifaddr>*
+interfaces loopback <ifname> description <text>
+""",
+        _nest("interfaces wireguard <ifname>", _IFACE),
+        """
+interfaces wireguard <ifname> port <num:1-65535>
+interfaces wireguard <ifname> private-key <wgkey>
+interfaces wireguard <ifname> peer <name> allowed-ips <ipnet>*
+interfaces wireguard <ifname> peer <name> public-key <wgkey>
+interfaces wireguard <ifname> peer <name> preshared-key <wgkey>
+interfaces wireguard <ifname> peer <name> address <ip|host>
+interfaces wireguard <ifname> peer <name> port <num:1-65535>
+interfaces wireguard <ifname> peer <name> persistent-keepalive <num:1-65535>
+interfaces wireguard <ifname> peer <name> description <text>
+interfaces wireguard <ifname> peer <name> disable
+""",
+        _nest("interfaces tunnel <ifname>", _IFACE),
+        """
+interfaces tunnel <ifname> encapsulation <ipip6|ip6ip6|ipip|sit|gre|ip6gre|gretap>
+interfaces tunnel <ifname> source-address <ip>
+interfaces tunnel <ifname> source-interface <ifname>
+interfaces tunnel <ifname> remote <ip>
+interfaces tunnel <ifname> parameters ...
+interfaces bridge|bonding|pppoe|vxlan|dummy ...
+""",
+        _nest(
+            "firewall ipv4|ipv6 input|forward|output filter\n"
+            "firewall ipv4|ipv6 name <name>",
+            _FW_CHAIN,
+        ),
+        _nest(
+            "firewall ipv4|ipv6 input|forward|output filter rule <num:1-999999>\n"
+            "firewall ipv4|ipv6 name <name> rule <num:1-999999>",
+            _FW_RULE,
+        ),
+        """
+firewall group address-group|ipv6-address-group <name> address <fwaddr>*
+firewall group network-group|ipv6-network-group <name> network <ipnet>*
+firewall group port-group <name> port <port>*
+firewall group interface-group <name> interface <ifname>*
+firewall group domain-group <name> address <host>*
+firewall group address-group|ipv6-address-group|network-group <name> description <text>
+firewall group ipv6-network-group|port-group|interface-group <name> description <text>
+firewall group domain-group <name> description <text>
+firewall global-options ...
+firewall flowtable ...
+firewall zone ...
+""",
+        _nest("nat source|destination rule <num:1-999999>", _NAT_RULE),
+        _nest(
+            "nat66 source|destination rule <num:1-999999>",
+            """
+description <text>
+outbound-interface name <ifname>
+inbound-interface name <ifname>
+source prefix <ipv6net>
+destination address <ipv6net|ipv6>
+translation address <ipv6net|ipv6|masquerade>
+""",
+        ),
+        """
+policy route|route6 <name> interface <ifname>*
+policy route|route6 <name> description <text>
+policy route|route6 <name> default-log
+""",
+        _nest("policy route|route6 <name> rule <num:1-999999>", _POLICY_RULE),
+        """
+policy prefix-list|prefix-list6 <name> description <text>
+policy prefix-list|prefix-list6 <name> rule <num:1-65535> action <permit|deny>
+policy prefix-list|prefix-list6 <name> rule <num:1-65535> prefix <ipnet>
+policy prefix-list|prefix-list6 <name> rule <num:1-65535> ge|le <num:0-128>
+policy prefix-list|prefix-list6 <name> rule <num:1-65535> description <text>
+policy route-map|access-list|access-list6|as-path-list|community-list|local-route ...
+protocols static route <ipv4net> next-hop <ipv4> distance <num:1-255>
+protocols static route <ipv4net> next-hop <ipv4> interface <ifname>
+protocols static route <ipv4net> next-hop <ipv4> disable
+protocols static route <ipv4net> interface <ifname> distance <num:1-255>
+protocols static route <ipv4net> blackhole distance <num:1-255>
+protocols static route <ipv4net> dhcp-interface <ifname>
+protocols static route <ipv4net> description <text>
+protocols static route6 <ipv6net> next-hop <ipv6> distance <num:1-255>
+protocols static route6 <ipv6net> next-hop <ipv6> interface <ifname>
+protocols static route6 <ipv6net> next-hop <ipv6> disable
+protocols static route6 <ipv6net> interface <ifname> distance <num:1-255>
+protocols static route6 <ipv6net> blackhole distance <num:1-255>
+protocols static route6 <ipv6net> description <text>
+protocols static table ...
+protocols bgp|ospf|ospfv3|rip|ripng|isis|bfd ...
+""",
+        _nest(
+            "service dhcp-server shared-network-name <name>",
+            """
+description <text>
+authoritative
+subnet <ipv4net> subnet-id <u32>
+subnet <ipv4net> lease <u32>
+subnet <ipv4net> option default-router <ipv4>
+subnet <ipv4net> option name-server <ipv4>*
+subnet <ipv4net> option domain-name <host>
+subnet <ipv4net> range <name> start <ipv4>
+subnet <ipv4net> range <name> stop <ipv4>
+subnet <ipv4net> static-mapping <name> ip-address <ipv4>
+subnet <ipv4net> static-mapping <name> mac <mac>
+""",
+        ),
+        _nest(
+            "service router-advert interface <ifname>",
+            """
+prefix <ipv6net>
+prefix <ipv6net> valid-lifetime <u32|infinity>
+prefix <ipv6net> preferred-lifetime <u32|infinity>
+prefix <ipv6net> no-autonomous-flag|no-on-link-flag|deprecate-prefix
+name-server <ipv6>*
+link-mtu <num:0-65535>
+default-preference <low|medium|high>
+default-lifetime <u32>
+interval max|min <u32>
+dnssl <host>*
+managed-flag|other-config-flag|no-send-advert
+""",
+        ),
+        """
+service dhcp-server hostfile-update
+service dhcp-server listen-address <ipv4>*
+service dhcpv6-server ...
+service dns dynamic interval <u32>
+service dns dynamic name <name> address interface <ifname>
+service dns dynamic name <name> protocol <name>
+service dns dynamic name <name> host-name <host>*
+service dns dynamic name <name> zone <host>
+service dns dynamic name <name> username <text>
+service dns dynamic name <name> password <text>
+service dns dynamic name <name> ip-version <ipv4|ipv6|both>
+service dns dynamic name <name> server <host>
+service dns dynamic name <name> description <text>
+service dns forwarding ...
+service ntp server <host>
+service ntp server <host> pool|prefer|noselect|nts
+service ntp allow-client address <ipnet>*
+service ntp listen-address <ip>*
+service ntp interface <ifname>*
+service ssh port <num:1-65535>*
+service ssh listen-address <ip>*
+service ssh disable-password-authentication
+service ssh disable-host-validation
+service ssh client-keepalive-interval <u32>
+service ssh ciphers|mac|key-exchange <text>*
+service https|snmp|lldp|mdns|monitoring|conntrack-sync|webproxy|broadcast-relay ...
+system host-name <host>
+system domain-name <host>
+system domain-search <host>*
+system time-zone <tz>
+system name-server <ip|ifname>*
+system gateway-address <ipv4>
+system config-management commit-revisions <u32>
+system config-management commit-archive location <text>*
+system console device <name> speed <1200|2400|4800|9600|19200|38400|57600|115200>
+system syslog local|global facility <name> level <emerg|alert|crit|err|warning>
+system syslog local|global facility <name> level <notice|info|debug|all>
+system syslog host|remote ...
+system login user <name> authentication encrypted-password <text>
+system login user <name> authentication plaintext-password <text>
+system login user <name> authentication public-keys <text> key <base64>
+system login user <name> authentication public-keys <text> type <sshkeytype>
+system login user <name> full-name <text>
+system login user <name> level <admin|operator>
+system login banner|radius|tacacs ...
+system sysctl parameter <name> value <text>
+system static-host-mapping host-name <host> inet <ip>*
+system static-host-mapping host-name <host> alias <host>*
+system task-scheduler task <name> interval <text>
+system task-scheduler task <name> crontab-spec <text>
+system task-scheduler task <name> executable path <text>
+system task-scheduler task <name> executable arguments <text>
+system option|ip|ipv6|conntrack|flow-accounting|acceleration|frr|update-check ...
+container|vpn|high-availability|qos|load-balancing|pki|vrf ...
+""",
+    ]
+)
+
+
+# ============================================================
+# Value types
+# ============================================================
+
+_NAME = re.compile(r"^[\w.+-]+$")
+_HOST = re.compile(r"^[A-Za-z0-9_]([A-Za-z0-9_.-]*[A-Za-z0-9_])?$")
+_IFNAME = re.compile(r"^[A-Za-z][\w.-]*\+?$")
+_MAC = re.compile(r"^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$")
+_DUID = re.compile(r"^([0-9A-Fa-f]{2}:){3,}[0-9A-Fa-f]{2}$")
+_BASE64 = re.compile(r"^[A-Za-z0-9+/]+=*$")
+_WG_KEY = re.compile(r"^[A-Za-z0-9+/]{43}=$")
+_PROTO = re.compile(r"^!?([a-z][a-z0-9_-]*|\d{1,3})$")
+_TZ = re.compile(r"^(UTC|[A-Za-z_]+(/[A-Za-z0-9_+-]+)+)$")
+_PORT_NAME = re.compile(r"^[a-z][a-z0-9-]*$")
+_PLACEHOLDER = re.compile(r"<[^<>]+>")
+_OCTET = r"(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_IPV4 = re.compile(rf"^{_OCTET}(\.{_OCTET}){{3}}$")
+
+
+def _is_ip(value: str, version: int | None = None) -> bool:
+    # Dotted quads are by far the most common; skip ipaddress for them
+    if _IPV4.match(value):
+        return version != 6
+    try:
+        ip = ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return version is None or ip.version == version
+
+
+def _is_net(value: str, version: int | None = None) -> bool:
+    if "/" not in value:
+        return False
+    try:
+        net = ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return False
+    return version is None or net.version == version
+
+
+def _is_ifaddr(value: str) -> bool:
+    if "/" not in value:
+        return False
+    try:
+        ipaddress.ip_interface(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_fwaddr(value: str) -> bool:
+    value = value.removeprefix("!")
+    if "-" in value:
+        start, _, end = value.partition("-")
+        return _is_ip(start) and _is_ip(end)
+    return _is_ip(value) or _is_net(value)
+
+
+def _in_range(value: str, low: int, high: int) -> bool:
+    return value.isdigit() and low <= int(value) <= high
+
+
+def _is_port(value: str) -> bool:
+    for item in value.removeprefix("!").split(","):
+        start, sep, end = item.partition("-")
+        if sep and start.isdigit():
+            if not (
+                _in_range(start, 1, 65535)
+                and _in_range(end, 1, 65535)
+                and int(start) <= int(end)
+            ):
+                return False
+        elif not (_in_range(item, 1, 65535) or _PORT_NAME.match(item)):
+            return False
+    return bool(value)
+
+
+TYPES: dict[str, Callable[[str], bool]] = {
+    "text": lambda v: True,
+    "name": lambda v: bool(_NAME.match(v)),
+    "host": lambda v: bool(_HOST.match(v)) or _is_ip(v),
+    "ifname": lambda v: bool(_IFNAME.match(v)),
+    "u32": lambda v: _in_range(v, 0, 2**32 - 1),
+    "port": _is_port,
+    "proto": lambda v: bool(_PROTO.match(v)),
+    "ip": _is_ip,
+    "ipv4": lambda v: _is_ip(v, 4),
+    "ipv6": lambda v: _is_ip(v, 6),
+    "ipnet": _is_net,
+    "ipv4net": lambda v: _is_net(v, 4),
+    "ipv6net": lambda v: _is_net(v, 6),
+    "ifaddr": _is_ifaddr,
+    "fwaddr": _is_fwaddr,
+    "mac": lambda v: bool(_MAC.match(v)),
+    "duid": lambda v: bool(_DUID.match(v)),
+    "base64": lambda v: bool(_BASE64.match(v)),
+    "wgkey": lambda v: bool(_WG_KEY.match(v)),
+    "tz": lambda v: bool(_TZ.match(v)),
+    "sshkeytype": lambda v: v.startswith(("ssh-", "ecdsa-", "sk-")),
+}
+
+
+class ValueType:
+    """A ``<...>`` schema type: a union of named types and literal words."""
+
+    __slots__ = ("checks", "literals", "spec")
+
+    def __init__(self, spec: str) -> None:
+        self.spec = spec
+        self.checks: list[Callable[[str], bool]] = []
+        self.literals: set[str] = set()
+        for alt in spec.split("|"):
+            # Every alternative also matches itself (ipv6 in <ipv4|ipv6|both>)
+            self.literals.add(alt)
+            if alt.startswith("num:"):
+                low, _, high = alt[4:].partition("-")
+                self.checks.append(
+                    functools.partial(_in_range, low=int(low), high=int(high))
+                )
+            elif alt in TYPES:
+                self.checks.append(TYPES[alt])
+
+    def __call__(self, value: str) -> bool:
+        return value in self.literals or any(check(value) for check in self.checks)
+
+
+# ============================================================
+# Schema trie
+# ============================================================
+
+
+class SchemaNode:
+    """A node of the schema trie."""
+
+    __slots__ = ("children", "tag", "value", "multi", "leaf", "open")
+
+    def __init__(self) -> None:
+        self.children: dict[str, SchemaNode] = {}
+        # Tag value type and the node below any tag value
+        self.tag: tuple[ValueType, SchemaNode] | None = None
+        self.value: ValueType | None = None
+        self.multi = False
+        self.leaf = False
+        self.open = False
+
+
+def _add_path(root: SchemaNode, tokens: list[str]) -> None:
+    node = root
+    last = len(tokens) - 1
+    for i, token in enumerate(tokens):
+        if token == OPEN:
+            node.open = True
+            return
+        if token.startswith("<"):
+            multi = token.endswith("*")
+            spec = token.rstrip("*")[1:-1]
+            if i == last:
+                node.value = ValueType(spec)
+                node.multi = multi
+                return
+            if node.tag is None:
+                node.tag = (ValueType(spec), SchemaNode())
+            elif node.tag[0].spec != spec:
+                raise ValueError(
+                    f"conflicting tag types <{node.tag[0].spec}> and <{spec}>"
+                )
+            node = node.tag[1]
+            continue
+        child = node.children.get(token)
+        if child is None:
+            child = node.children[token] = SchemaNode()
+        node = child
+    node.leaf = True
+
+
+def compile_schema(text: str) -> SchemaNode:
+    """Compile schema lines into a trie.
+
+    Args:
+        text: Schema lines (see the module docstring)
+
+    Returns:
+        Root node
+    """
+    root = SchemaNode()
+    for line in text.splitlines():
+        tokens = line.split()
+        if not tokens or tokens[0].startswith("#"):
+            continue
+        # "a|b" outside brackets: one path per alternative
+        choices = [[t] if t.startswith("<") else t.split("|") for t in tokens]
+        for path in itertools.product(*choices):
+            _add_path(root, list(path))
+    return root
+
+
+@functools.cache
+def default_schema() -> SchemaNode:
+    """Return the compiled built-in schema (compiled once)."""
+    return compile_schema(SCHEMA)
+
+
+# ============================================================
+# Validation
+# ============================================================
+
+
+@dataclass
+class ValidationIssue:
+    """A problem found in one command."""
+
+    line: int
+    command: str
+    message: str
+    severity: str = "error"
+
+
+@dataclass
+class SchemaValidator:
+    """Incremental validator; feed commands one at a time.
+
+    Remembers leaf values across commands, so a single-valued leaf that is
+    set twice to different values is reported as a conflict and an exact
+    repeat as a duplicate.
+    """
+
+    schema: SchemaNode = field(default_factory=default_schema)
+    issues: list[ValidationIssue] = field(default_factory=list)
+    _values: dict[tuple[str, ...], tuple[str, int]] = field(
+        default_factory=dict, repr=False
+    )
+    _seen: dict[tuple[str, ...], int] = field(default_factory=dict, repr=False)
+
+    @property
+    def errors(self) -> list[ValidationIssue]:
+        """Issues with error severity."""
+        return [i for i in self.issues if i.severity == "error"]
+
+    def _issue(
+        self, line: int, command: str, message: str, severity: str = "error"
+    ) -> None:
+        self.issues.append(ValidationIssue(line, command, message, severity))
+
+    def feed(self, command: str, line: int = 0) -> None:
+        """Validate one command.
+
+        ``set`` commands are checked in full; ``delete`` commands only need
+        a valid path prefix. Other lines are ignored.
+
+        Args:
+            command: Configuration command
+            line: Line or command number for reports
+        """
+        delete = command.startswith("delete ")
+        tokens = tokenize_command("set " + command[7:] if delete else command)
+        if tokens is None:
+            return
+
+        placeholders = (
+            [m.group() for t in tokens for m in _PLACEHOLDER.finditer(t)]
+            if "<" in command
+            else None
+        )
+        if placeholders:
+            self._issue(
+                line, command, f"Unresolved placeholder {', '.join(placeholders)}"
+            )
+            return
+
+        node = self.schema
+        for i, token in enumerate(tokens):
+            if node.open:
+                break
+            child = node.children.get(token)
+            if child is not None:
+                node = child
+                continue
+            if node.tag is not None and node.tag[0](token):
+                node = node.tag[1]
+                continue
+            where = " ".join(tokens[:i]) or "top level"
+            if node.value is not None and i == len(tokens) - 1:
+                if not node.value(token):
+                    self._issue(
+                        line,
+                        command,
+                        f"Invalid value '{token}' for '{where}' "
+                        f"(expected <{node.value.spec}>)",
+                    )
+                    return
+                if not delete:
+                    self._record_value(tuple(tokens[:i]), token, node, line, command)
+                return
+            self._issue(line, command, self._unknown(node, token, where))
+            return
+
+        if delete or node.open:
+            return
+        if node.value is not None and not node.leaf and not node.children:
+            self._issue(line, command, f"Missing value for '{' '.join(tokens)}'")
+            return
+        path = tuple(tokens)
+        if path in self._seen:
+            self._issue(
+                line,
+                command,
+                f"Duplicate of #{self._seen[path]}",
+                severity="warning",
+            )
+        else:
+            self._seen[path] = line
+
+    def passthrough(self, commands: Iterable[str]) -> Iterator[str]:
+        """Validate commands as they stream past, numbering them from 1.
+
+        Args:
+            commands: Configuration commands
+
+        Yields:
+            The same commands, unchanged
+        """
+        for number, command in enumerate(commands, 1):
+            self.feed(command, number)
+            yield command
+
+    def _record_value(
+        self,
+        path: tuple[str, ...],
+        value: str,
+        node: SchemaNode,
+        line: int,
+        command: str,
+    ) -> None:
+        key = (*path, value) if node.multi else path
+        previous = self._values.get(key)
+        if previous is None:
+            self._values[key] = (value, line)
+        elif previous[0] == value:
+            self._issue(
+                line, command, f"Duplicate of #{previous[1]}", severity="warning"
+            )
+        else:
+            self._issue(
+                line,
+                command,
+                f"Conflicts with #{previous[1]} "
+                f"('{' '.join(path)}' is already '{previous[0]}')",
+            )
+
+    @staticmethod
+    def _unknown(node: SchemaNode, token: str, where: str) -> str:
+        if node.value is not None:
+            return f"Unexpected '{token}' after the value of '{where}'"
+        if node.tag is not None and not node.children:
+            spec = node.tag[0].spec
+            return f"Invalid name '{token}' under '{where}' (expected <{spec}>)"
+        message = f"Unknown node '{token}' under '{where}'"
+        close = difflib.get_close_matches(token, node.children, n=1)
+        if close:
+            message += f" (did you mean '{close[0]}'?)"
+        return message
+
+
+def validate_commands(
+    commands: Iterable[str], schema: SchemaNode | None = None
+) -> list[ValidationIssue]:
+    """Validate commands against the schema.
+
+    Args:
+        commands: Configuration commands, numbered from 1 in reports
+        schema: Schema trie (default: the built-in schema)
+
+    Returns:
+        Errors and warnings in command order
+    """
+    validator = SchemaValidator(schema or default_schema())
+    for number, command in enumerate(commands, 1):
+        validator.feed(command, number)
+    return validator.issues
+
+
+def print_issues(issues: list[ValidationIssue], source: str = "line") -> None:
+    """Print validation issues to stderr.
+
+    Args:
+        issues: Issues from a validator
+        source: Word for the number column (``line`` or ``command``)
+    """
+    for issue in issues:
+        label = "Error" if issue.severity == "error" else "Warning"
+        print(f"{label}: {source} {issue.line}: {issue.message}", file=sys.stderr)
+        print(f"    {issue.command}", file=sys.stderr)
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code (0 if no errors, 1 otherwise)
+    """
+    parser = argparse.ArgumentParser(
+        description="Validate VyOS set commands against the path schema"
+    )
+    parser.add_argument(
+        "config_file",
+        type=Path,
+        help="Set commands (e.g. vyos_restore.py output) or config.boot",
+    )
+    args = parser.parse_args()
+
+    try:
+        with open(args.config_file, encoding="utf-8") as f:
+            boot, lines = sniff_format(f)
+            numbered = (
+                iter_boot_commands(lines)
+                if boot
+                else (
+                    (number, line.strip())
+                    for number, line in enumerate(lines, 1)
+                    if line.startswith(("set ", "delete "))
+                )
+            )
+            validator = SchemaValidator()
+            count = 0
+            for number, command in numbered:
+                validator.feed(command, number)
+                count += 1
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print_issues(validator.issues)
+    errors = len(validator.errors)
+    warnings = len(validator.issues) - errors
+    print(
+        f"Checked {count} commands: {errors} error(s), {warnings} warning(s)",
+        file=sys.stderr,
+    )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
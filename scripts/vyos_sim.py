@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Simulated VyOS SSH endpoint for testing and benchmarking.
+
+SimulatedSession is a drop-in replacement for vyos_ssh.SSHSession that
+answers the checker's commands from an in-memory configuration instead of a
+real router. Connect latency, per-command latency, jitter and output size
+are configurable, so checker performance can be measured without hardware.
+
+Usage:
+    profile = SimProfile(latency=0.02, jitter=0.005, config_bytes=1 << 20)
+    factory = functools.partial(SimulatedSession, profile=profile)
+    run_fleet(hosts, "vyos", None, "all", session_factory=factory)
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+
+from vyos_config_check import (
+    REVISION_COMMAND,
+    SNAPSHOT_COMMAND,
+    grep_snapshot,
+    load_config_file,
+    parse_grep_command,
+)
+from vyos_config_tree import tokenize_command
+from vyos_ssh import SessionStats
+
+TEMPLATE = Path(__file__).parent / "vyos-config-template.txt"
+
+# Canned operational output (VyOS 1.4 style)
+INTERFACE_OUTPUT = """\
+{name}: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc mq state UP
+    link/ether 00:11:22:33:44:55 brd ff:ff:ff:ff:ff:ff
+{addresses}    Description: {description}
+
+    RX:  bytes  packets  errors  dropped  overrun       mcast
+      123456789   654321       0        0        0           0
+    TX:  bytes  packets  errors  dropped  carrier  collisions
+       98765432   543210       0        0        0           0
+"""
+
+ROUTE_OUTPUT = """\
+Routing entry for 0.0.0.0/0
+  Known via "static", distance 10, metric 0, best
+  * {next_hop}, via eth0, weight 1
+"""
+
+
+@dataclass
+class SimProfile:
+    """Timing and size characteristics of a simulated router."""
+
+    connect_latency: float = 0.0
+    latency: float = 0.0
+    jitter: float = 0.0
+    config_bytes: int = 0
+    revision: str = "0   2026-01-01 00:00:00 by vyos via cli"
+    seed: int | None = None
+
+
+def template_config(template: Path = TEMPLATE) -> list[str]:
+    """Return the template, placeholders included, as a router configuration.
+
+    Args:
+        template: Path to the set-command template
+
+    Returns:
+        Set commands
+    """
+    return load_config_file(template, include_commented=True)
+
+
+def pad_config(commands: list[str], config_bytes: int) -> list[str]:
+    """Grow a configuration to roughly ``config_bytes`` with inert entries.
+
+    Filler lines are static host mappings, which no check inspects.
+
+    Args:
+        commands: Base set commands
+        config_bytes: Target size in bytes
+
+    Returns:
+        Padded set commands
+    """
+    padded = list(commands)
+    size = sum(len(c) + 1 for c in padded)
+    i = 0
+    while size < config_bytes:
+        line = (
+            f"set system static-host-mapping host-name 'host{i}.lan' "
+            f"inet '10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}'"
+        )
+        padded.append(line)
+        size += len(line) + 1
+        i += 1
+    return padded
+
+
+class SimulatedVyOS:
+    """Command endpoint answering like a VyOS router."""
+
+    def __init__(self, commands: list[str], profile: SimProfile) -> None:
+        self.profile = profile
+        self.commands = pad_config(commands, profile.config_bytes)
+        self.snapshot = "".join(f"{c}\n" for c in self.commands)
+
+    def respond(self, command: str) -> tuple[int, str, str]:
+        """Return (return_code, stdout, stderr) for a command."""
+        if command == REVISION_COMMAND:
+            return 0, self.profile.revision + "\n", ""
+        if command == SNAPSHOT_COMMAND:
+            return 0, self.snapshot, ""
+
+        pattern = parse_grep_command(command)
+        if pattern is not None:
+            output = grep_snapshot(self.commands, pattern)
+            # grep exits 1 when nothing matched
+            return (0 if output else 1), output, ""
+
+        words = command.split()
+        if words[:2] == ["show", "interfaces"] and len(words) == 4:
+            return 0, self._interface(words[2], words[3]), ""
+        if words[:3] == ["show", "ip", "route"]:
+            routes = grep_snapshot(self.commands, "protocols static route 0.0.0.0/0")
+            hop = routes.split("next-hop ")[-1].split()[0] if routes else ""
+            return 0, ROUTE_OUTPUT.format(next_hop=hop.strip("'")), ""
+        return 1, "", f"Invalid command: {command}"
+
+    def _interface(self, kind: str, name: str) -> str:
+        lines = grep_snapshot(self.commands, f"interfaces {kind} {name} ")
+        addresses = ""
+        description = ""
+        for line in lines.splitlines():
+            tokens = tokenize_command(line) or []
+            if tokens[3:4] == ["address"]:
+                family = "inet6" if ":" in tokens[4] else "inet"
+                addresses += f"    {family} {tokens[4]} scope global {name}\n"
+            elif "dhcpv6-options" in tokens:
+                addresses += f"    DHCPv6 client: {' '.join(tokens[3:])}\n"
+            elif tokens[3:4] == ["description"]:
+                description = tokens[4]
+        return INTERFACE_OUTPUT.format(
+            name=name, addresses=addresses, description=description
+        )
+
+
+class SimulatedSession:
+    """Drop-in replacement for SSHSession backed by SimulatedVyOS."""
+
+    def __init__(
+        self,
+        host: str,
+        user: str,
+        key_file: str | None = None,
+        timeout: float = 30.0,
+        deadline: float | None = None,
+        profile: SimProfile | None = None,
+        endpoint: SimulatedVyOS | None = None,
+    ) -> None:
+        self.host = host
+        self.user = user
+        self.profile = profile or SimProfile()
+        self.endpoint = endpoint or SimulatedVyOS(template_config(), self.profile)
+        self.stats = SessionStats()
+        self.error: str | None = None
+        self._rng = random.Random(self.profile.seed)
+        self._opened = False
+
+    def _delay(self, base: float) -> None:
+        delay = base + self._rng.uniform(-self.profile.jitter, self.profile.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def open(self) -> bool:
+        """Simulate establishing the connection."""
+        if not self._opened:
+            self._opened = True
+            start = time.perf_counter()
+            self._delay(self.profile.connect_latency)
+            self.stats.connect_time += time.perf_counter() - start
+        return True
+
+    def run(self, command: str) -> tuple[int, str, str]:
+        """Simulate running a command."""
+        self.open()
+        start = time.perf_counter()
+        try:
+            self._delay(self.profile.latency)
+            return self.endpoint.respond(command)
+        finally:
+            self.stats.command_time += time.perf_counter() - start
+            self.stats.commands += 1
+
+    def close(self) -> None:
+        """Simulate closing the connection."""
+
+    def __enter__(self) -> SimulatedSession:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
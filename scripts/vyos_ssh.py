@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Persistent SSH session layer for VyOS tools.
+
+Opens one OpenSSH ControlMaster connection per host and multiplexes every
+command over it, so a run of N commands costs a single key exchange instead
+of N. Time spent connecting and time spent running commands are recorded
+separately so callers can report them.
+
+Usage:
+    with SSHSession("192.168.1.1", "vyos") as session:
+        returncode, stdout, stderr = session.run("show version")
+    print(session.stats.connect_time, session.stats.command_time)
+
+    # Read large output line by line, stopping early
+    with session.run_stream("show ip route") as stream:
+        for line in stream:
+            if "0.0.0.0/0" in line:
+                break
+    print(stream.returncode, stream.stderr)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+
+SSH_OPTIONS = ["-o", "StrictHostKeyChecking=no", "-o", "BatchMode=yes"]
+DEFAULT_TIMEOUT = 30.0
+CLOSE_TIMEOUT = 5.0
+# Idle seconds after which a master left behind by a killed run exits
+CONTROL_PERSIST = 60
+
+
+def ssh_base_command(key_file: str | None = None) -> list[str]:
+    """Build the common ssh argument list up to (but excluding) the target.
+
+    Args:
+        key_file: Optional SSH key file path
+
+    Returns:
+        ssh argument list
+    """
+    cmd = ["ssh", *SSH_OPTIONS]
+    if key_file:
+        cmd.extend(["-i", key_file])
+    return cmd
+
+
+@dataclass
+class SessionStats:
+    """Timing statistics for an SSH session."""
+
+    connect_time: float = 0.0
+    command_time: float = 0.0
+    commands: int = 0
+
+
+class CommandStream:
+    """Line-by-line output of a command.
+
+    Iterating yields stdout lines without their trailing newline.
+    ``returncode``, ``stderr`` and ``timed_out`` are final once the stream
+    is closed; closing before the output is exhausted abandons the rest of
+    it. ``timed_out`` means the output was cut off by the timeout.
+    """
+
+    def __init__(
+        self, lines: Iterable[str], returncode: int = 0, stderr: str = ""
+    ) -> None:
+        self._lines = lines
+        self.returncode: int | None = returncode
+        self.stderr = stderr
+        self.timed_out = False
+
+    def __iter__(self) -> Iterator[str]:
+        for line in self._lines:
+            yield line.rstrip("\n")
+
+    def close(self) -> None:
+        """Release the stream."""
+
+    def __enter__(self) -> CommandStream:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class ProcessStream(CommandStream):
+    """CommandStream reading from a running ssh process.
+
+    stderr goes to an unlinked temporary file so a chatty remote cannot
+    block stdout. A timer kills the process once ``timeout`` expires.
+    """
+
+    def __init__(
+        self, cmd: list[str], timeout: float, stats: SessionStats
+    ) -> None:
+        self._stats = stats
+        self._start = time.perf_counter()
+        with contextlib.ExitStack() as cleanup:
+            # Owned by the stream once the process runs; closed in close()
+            self._stderr_file = cleanup.enter_context(
+                tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+            )
+            self._process = subprocess.Popen(  # noqa: S603
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=self._stderr_file,
+                text=True,
+            )
+            cleanup.pop_all()
+        self._timed_out = False
+        self._timer = threading.Timer(timeout, self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+        super().__init__(self._process.stdout or (), returncode=None)
+
+    def _expire(self) -> None:
+        self._timed_out = True
+        self._process.kill()
+
+    def close(self) -> None:
+        """Stop the command if still running and collect its exit status."""
+        if self.returncode is not None:
+            return
+        if self._process.poll() is None:
+            # Output no longer needed: don't wait for the remote to finish
+            self._process.kill()
+        self._process.wait()
+        self._timer.cancel()
+        if self._process.stdout is not None:
+            self._process.stdout.close()
+        self._stderr_file.seek(0)
+        self.stderr = self._stderr_file.read()
+        self._stderr_file.close()
+        self.returncode = self._process.returncode
+        if self._timed_out:
+            self.timed_out = True
+            self.returncode = 1
+            self.stderr = "SSH command timed out"
+        self._stats.command_time += time.perf_counter() - self._start
+        self._stats.commands += 1
+
+
+class SSHSession:
+    """Multiplexed SSH session to a single VyOS host.
+
+    The master connection is opened lazily on the first command (or
+    explicitly via ``open``) and torn down by ``close``. If the master
+    cannot be established, every command fails fast with the connect error
+    instead of retrying the handshake.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        user: str,
+        key_file: str | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        deadline: float | None = None,
+    ) -> None:
+        """Create a session.
+
+        Args:
+            host: VyOS hostname or IP
+            user: SSH username
+            key_file: Optional SSH key file path
+            timeout: Per-command timeout in seconds
+            deadline: Optional absolute ``time.monotonic()`` deadline for the
+                whole session; no command may run past it
+        """
+        self.host = host
+        self.user = user
+        self.key_file = key_file
+        self.timeout = timeout
+        self.deadline = deadline
+        self.stats = SessionStats()
+        self.error: str | None = None
+        self._control_dir: Path | None = None
+        self._opened = False
+
+    @property
+    def target(self) -> str:
+        """Return the ``user@host`` SSH target."""
+        return f"{self.user}@{self.host}"
+
+    @property
+    def control_path(self) -> Path | None:
+        """Return the ControlMaster socket path (None before ``open``)."""
+        if self._control_dir is None:
+            return None
+        return self._control_dir / "master.sock"
+
+    def _remaining(self) -> float:
+        """Return the timeout for the next subprocess, honouring the deadline."""
+        if self.deadline is None:
+            return self.timeout
+        return min(self.timeout, self.deadline - time.monotonic())
+
+    def _base(self) -> list[str]:
+        cmd = ssh_base_command(self.key_file)
+        if self.control_path is not None:
+            cmd.extend(["-o", f"ControlPath={self.control_path}"])
+        return cmd
+
+    def open(self) -> bool:
+        """Establish the master connection.
+
+        Returns:
+            True if the master connection is up
+        """
+        if self._opened:
+            return self.error is None
+        self._opened = True
+        self.error = None
+        timeout = self._remaining()
+        if timeout <= 0:
+            self.error = "Deadline exceeded"
+            return False
+        self._control_dir = Path(tempfile.mkdtemp(prefix="vyos-ssh-"))
+
+        cmd = [
+            *self._base(),
+            "-o",
+            "ControlMaster=yes",
+            "-o",
+            f"ControlPersist={CONTROL_PERSIST}",
+            "-N",
+            "-f",
+            self.target,
+        ]
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(  # noqa: S603
+                cmd, capture_output=True, text=True, timeout=timeout
+            )
+            if result.returncode != 0:
+                self.error = result.stderr.strip() or "SSH connection failed"
+        except subprocess.TimeoutExpired:
+            self.error = "SSH connection timed out"
+        except FileNotFoundError:
+            self.error = "SSH client not found"
+        finally:
+            self.stats.connect_time += time.perf_counter() - start
+
+        if self.error is not None:
+            self._remove_control_dir()
+        return self.error is None
+
+    def run(self, command: str, input: str | None = None) -> tuple[int, str, str]:
+        """Run a command over the multiplexed connection.
+
+        Args:
+            command: VyOS operational command
+            input: Optional text sent to the command's stdin
+
+        Returns:
+            Tuple of (return_code, stdout, stderr)
+        """
+        if not self.open():
+            return 1, "", self.error or "SSH connection failed"
+
+        timeout = self._remaining()
+        if timeout <= 0:
+            return 1, "", "Deadline exceeded"
+
+        cmd = [*self._base(), "-o", "ControlMaster=no", self.target, command]
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(  # noqa: S603
+                cmd, capture_output=True, text=True, timeout=timeout, input=input
+            )
+            return result.returncode, result.stdout, result.stderr
+        except subprocess.TimeoutExpired:
+            return 1, "", "SSH command timed out"
+        except FileNotFoundError:
+            return 1, "", "SSH client not found"
+        finally:
+            self.stats.command_time += time.perf_counter() - start
+            self.stats.commands += 1
+
+    def run_stream(self, command: str) -> CommandStream:
+        """Start a command and return its output as a line stream.
+
+        Unlike ``run``, output is never buffered in full, and closing the
+        stream early terminates the remote command.
+
+        Args:
+            command: VyOS operational command
+
+        Returns:
+            Stream of stdout lines; close it (or use ``with``) when done
+        """
+        if not self.open():
+            return CommandStream((), 1, self.error or "SSH connection failed")
+
+        timeout = self._remaining()
+        if timeout <= 0:
+            return CommandStream((), 1, "Deadline exceeded")
+
+        cmd = [*self._base(), "-o", "ControlMaster=no", self.target, command]
+        try:
+            return ProcessStream(cmd, timeout, self.stats)
+        except FileNotFoundError:
+            self.stats.commands += 1
+            return CommandStream((), 1, "SSH client not found")
+
+    def close(self) -> None:
+        """Shut down the master connection and remove its socket."""
+        if self.control_path is not None and self.error is None:
+            with contextlib.suppress(subprocess.TimeoutExpired, FileNotFoundError):
+                subprocess.run(  # noqa: S603
+                    [*self._base(), "-O", "exit", self.target],
+                    capture_output=True,
+                    text=True,
+                    timeout=min(self.timeout, CLOSE_TIMEOUT),
+                )
+        self._remove_control_dir()
+        # A later command opens a fresh master connection
+        self._opened = False
+
+    def _remove_control_dir(self) -> None:
+        if self._control_dir is not None:
+            shutil.rmtree(self._control_dir, ignore_errors=True)
+            self._control_dir = None
+
+    def __enter__(self) -> SSHSession:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,19 @@
+"""Shared fixtures for the tests."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+TEMPLATE = Path(__file__).parent.parent / "scripts" / "vyos-config-template.txt"
+
+
+@pytest.fixture
+def template_commands() -> list[str]:
+    """Return the set commands of the configuration template."""
+    return [
+        line
+        for line in TEMPLATE.read_text(encoding="utf-8").splitlines()
+        if line.startswith("set ")
+    ]
@@ -0,0 +1,265 @@
+"""Tests for applying configuration commands over SSH."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_apply import (
+    MARKER,
+    PRE_APPLY_CONFIG,
+    apply_commands,
+    batched,
+    build_apply_script,
+    commit_batches,
+    compute_delta,
+    fetch_running_config,
+    parse_apply_output,
+)
+from vyos_ssh import SessionStats
+
+
+class RecordingSession:
+    """Session stand-in recording the script it receives."""
+
+    def __init__(self, stdout: str, returncode: int = 0, stderr: str = "") -> None:
+        self.response = (returncode, stdout, stderr)
+        self.calls: list[tuple[str, str | None]] = []
+        self.stats = SessionStats()
+
+    def run(self, command: str, input: str | None = None) -> tuple[int, str, str]:
+        self.calls.append((command, input))
+        return self.response
+
+
+class TestBatched:
+    """Tests for batched function."""
+
+    def test_splits_with_remainder(self) -> None:
+        """Test that the last batch holds the remainder."""
+        assert list(batched(["a", "b", "c"], 2)) == [["a", "b"], ["c"]]
+
+    def test_minimum_size(self) -> None:
+        """Test that a non-positive size yields single-command batches."""
+        assert list(batched(["a", "b"], 0)) == [["a"], ["b"]]
+
+
+class TestCommitBatches:
+    """Tests for commit_batches function."""
+
+    def test_plain_commands_split_like_batched(self) -> None:
+        """Test that commands without deletes are split at the batch size."""
+        commands = ["set a", "set b", "set c"]
+        assert list(commit_batches(commands, 2)) == list(batched(commands, 2))
+
+    def test_delete_shares_batch_with_replacement(self) -> None:
+        """Test that a delete is committed together with its new value."""
+        commands = [
+            "set system host-name 'r'",
+            "delete interfaces ethernet eth0 address 192.168.1.1/24",
+            "set interfaces ethernet eth0 address '10.0.0.1/24'",
+            "set service ssh port '22'",
+        ]
+
+        assert list(commit_batches(commands, 2)) == [
+            commands[:3],
+            commands[3:],
+        ]
+
+    def test_unreplaced_delete_splits_normally(self) -> None:
+        """Test that a delete with no new value does not hold the batch open."""
+        commands = ["delete service dhcp-server", "set system host-name 'r'"]
+        assert list(commit_batches(commands, 1)) == [commands[:1], commands[1:]]
+
+
+class TestBuildApplyScript:
+    """Tests for build_apply_script function."""
+
+    def test_one_commit_per_batch(self) -> None:
+        """Test that every batch is followed by a timed commit."""
+        commands = [f"set system option {i}" for i in range(5)]
+
+        script = build_apply_script(commands, batch_size=2)
+        lines = script.splitlines()
+
+        assert lines[:2] == [
+            "source /opt/vyatta/etc/functions/script-template",
+            "configure",
+        ]
+        assert lines.count("commit") == 3
+        assert f"save {PRE_APPLY_CONFIG}" in lines[2]
+        assert "set system option 4 || errors=$((errors+1))" in lines
+        assert lines[-2:] == [f"echo '{MARKER} DONE'", "exit"]
+
+    def test_rollback_loads_saved_config(self) -> None:
+        """Test that the rollback restores the pre-apply configuration."""
+        script = build_apply_script(["set a"])
+
+        assert f"  load {PRE_APPLY_CONFIG} >/dev/null" in script.splitlines()
+        assert "[ $rc -eq 0 ] || limen_rollback" in script
+
+    def test_no_save(self) -> None:
+        """Test that saving to config.boot can be skipped."""
+        script = build_apply_script(["set a"], save=False)
+
+        assert "save >/dev/null" not in script
+
+
+class TestParseApplyOutput:
+    """Tests for parse_apply_output function."""
+
+    def test_success(self) -> None:
+        """Test that commit timings are read from the markers."""
+        stdout = (
+            f"{MARKER} COMMIT 1 100 10.0 11.5 0\n"
+            "noise from commit\n"
+            f"{MARKER} COMMIT 2 20 11.5 12.0 0\n"
+            f"{MARKER} DONE\n"
+        )
+
+        result = parse_apply_output(stdout)
+
+        assert result.success
+        assert [(c.batch, c.commands, c.seconds) for c in result.commits] == [
+            (1, 100, 1.5),
+            (2, 20, 0.5),
+        ]
+
+    def test_failed_commit_rolled_back(self) -> None:
+        """Test that a failed commit and its rollback are reported."""
+        stdout = (
+            f"{MARKER} COMMIT 1 100 10.0 11.0 0\n"
+            f"{MARKER} COMMIT 2 100 11.0 11.2 1\n"
+            f"{MARKER} ROLLBACK 0\n"
+        )
+
+        result = parse_apply_output(stdout)
+
+        assert not result.success
+        assert result.rolled_back
+        assert result.error == "Commit of batch 2 failed"
+        assert not result.commits[1].ok
+
+    def test_rejected_set(self) -> None:
+        """Test that rejected set commands fail the apply."""
+        result = parse_apply_output(f"{MARKER} SETFAIL 1 2\n{MARKER} ROLLBACK 0\n")
+
+        assert not result.success
+        assert result.error == "2 command(s) of batch 1 rejected"
+
+    def test_truncated_output(self) -> None:
+        """Test that output without the DONE marker is a failure."""
+        assert not parse_apply_output(f"{MARKER} COMMIT 1 1 1.0 2.0 0\n").success
+
+
+class TestApplyCommands:
+    """Tests for apply_commands function."""
+
+    def test_single_session_call(self) -> None:
+        """Test that the whole apply is one command fed through stdin."""
+        session = RecordingSession(f"{MARKER} COMMIT 1 2 1.0 1.1 0\n{MARKER} DONE\n")
+
+        result = apply_commands(session, ["set a", "set b"])
+
+        assert result.success
+        assert len(session.calls) == 1
+        command, script = session.calls[0]
+        assert command == "vbash -s"
+        assert script is not None and "set b || errors" in script
+
+    def test_connection_error(self) -> None:
+        """Test that transport errors are reported."""
+        session = RecordingSession("", returncode=255, stderr="Connection refused")
+
+        result = apply_commands(session, ["set a"])
+
+        assert not result.success
+        assert result.error == "Connection refused"
+
+
+CURRENT = [
+    "set system host-name 'vyos'",
+    "set interfaces ethernet eth0 address '192.168.1.1/24'",
+    "set interfaces ethernet eth0 hw-id '00:11:22:33:44:55'",
+    "set system login user vyos authentication encrypted-password '$6$x'",
+    "set service dhcp-server shared-network-name LAN subnet 192.168.1.0/24",
+    "set service dhcp-server shared-network-name LAN option 'x'",
+    "set service ssh",
+]
+
+
+class TestComputeDelta:
+    """Tests for compute_delta function."""
+
+    def test_identical_config_is_empty(self) -> None:
+        """Test that quoting differences are not changes."""
+        desired = [line.replace("'", "") for line in CURRENT]
+
+        assert compute_delta(desired, CURRENT, prune=True) == []
+
+    def test_only_changes_are_set(self) -> None:
+        """Test that only new or changed paths are emitted."""
+        desired = [
+            "set system host-name 'router'",
+            "set interfaces ethernet eth0 address '192.168.1.1/24'",
+            "set interfaces ethernet eth0 address '2001:db8::1/64'",
+        ]
+
+        assert compute_delta(desired, CURRENT) == [
+            "set system host-name 'router'",
+            "set interfaces ethernet eth0 address '2001:db8::1/64'",
+        ]
+
+    def test_prune_deletes_highest_missing_node(self) -> None:
+        """Test that a removed subtree is deleted with one command."""
+        desired = [
+            "set system host-name 'vyos'",
+            "set interfaces ethernet eth0 address '10.0.0.1/24'",
+            "set service ssh port '22'",
+        ]
+
+        delta = compute_delta(desired, CURRENT, prune=True)
+
+        assert delta == [
+            "delete interfaces ethernet eth0 address 192.168.1.1/24",
+            "set interfaces ethernet eth0 address '10.0.0.1/24'",
+            "delete service dhcp-server",
+            "set service ssh port '22'",
+        ]
+
+    def test_removals_precede_replacements(self) -> None:
+        """Test that deletes with nothing replacing them come first."""
+        desired = [
+            "set interfaces ethernet eth0 address '10.0.0.1/24'",
+            "set interfaces ethernet eth0 address '2001:db8::1/64'",
+            "set interfaces ethernet eth0 hw-id '00:11:22:33:44:55'",
+        ]
+
+        delta = compute_delta(desired, CURRENT, prune=True)
+
+        assert delta == [
+            "delete service",
+            "delete system host-name",
+            "delete interfaces ethernet eth0 address 192.168.1.1/24",
+            "set interfaces ethernet eth0 address '10.0.0.1/24'",
+            "set interfaces ethernet eth0 address '2001:db8::1/64'",
+        ]
+
+    def test_preserved_nodes_never_deleted(self) -> None:
+        """Test that router-generated nodes survive pruning."""
+        delta = compute_delta(["set system host-name 'vyos'"], CURRENT, prune=True)
+
+        assert delta == [
+            "delete interfaces ethernet eth0 address",
+            "delete service",
+        ]
+
+    def test_fetch_running_config(self) -> None:
+        """Test that the running configuration is read over the session."""
+        session = RecordingSession("set a\nset b\n")
+
+        assert fetch_running_config(session) == ["set a", "set b"]
+        assert session.calls == [("show configuration commands", None)]
@@ -0,0 +1,233 @@
+"""Tests for VyOS config.boot helpers."""
+
+from __future__ import annotations
+
+import shlex
+import sys
+from pathlib import Path
+from textwrap import dedent
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_boot import (
+    boot_quote,
+    boot_to_commands,
+    commands_to_boot,
+    is_boot_format,
+    is_tag_node,
+    iter_boot_paths,
+    quote_value,
+    sniff_format,
+    split_boot_line,
+)
+from vyos_config_tree import tokenize_command
+
+SCRIPTS = Path(__file__).parent.parent / "scripts"
+INITIAL_CONFIG = SCRIPTS / "ci" / "initial-config.boot"
+TEMPLATE = SCRIPTS / "vyos-config-template.txt"
+
+BOOT = dedent("""
+    interfaces {
+        ethernet eth0 {
+            address 192.168.1.1/24
+            description "LAN (Initial Config)"
+        }
+    }
+    firewall {
+        ipv4 {
+            input {
+                filter {
+                    default-log
+                }
+            }
+        }
+    }
+    // trailing comment
+""").strip().splitlines()
+
+
+class TestIsBootFormat:
+    """Tests for is_boot_format function."""
+
+    def test_boot_file(self) -> None:
+        """Test that config.boot content is detected."""
+        assert is_boot_format(BOOT)
+
+    def test_set_commands(self) -> None:
+        """Test that set commands are not detected as boot format."""
+        assert not is_boot_format(["# header", "set system host-name vyos"])
+
+    def test_empty(self) -> None:
+        """Test that empty input is not boot format."""
+        assert not is_boot_format([])
+
+
+class TestBootToCommands:
+    """Tests for boot_to_commands function."""
+
+    def test_nested_nodes(self) -> None:
+        """Test conversion of tag nodes, values and valueless leaves."""
+        assert boot_to_commands(BOOT) == [
+            "set interfaces ethernet eth0 address '192.168.1.1/24'",
+            "set interfaces ethernet eth0 description 'LAN (Initial Config)'",
+            "set firewall ipv4 input filter default-log",
+        ]
+
+    def test_initial_config(self) -> None:
+        """Test converting the CI initial config."""
+        commands = boot_to_commands(INITIAL_CONFIG.read_text().splitlines())
+
+        assert "set system host-name 'vyos'" in commands
+        assert "set system login user vyos authentication plaintext-password ''" in (
+            commands
+        )
+        assert "set system console device ttyS0 speed '115200'" in commands
+
+    def test_quote_value_with_single_quote(self) -> None:
+        """Test that values containing single quotes use double quotes."""
+        assert quote_value("it's") == '"it\'s"'
+
+    def test_empty_block(self) -> None:
+        """Test that an empty tag node block becomes a bare set command."""
+        lines = ["service {", "ntp {", "server ntp.nict.jp {", "}", "}", "}"]
+        assert boot_to_commands(lines) == ["set service ntp server ntp.nict.jp"]
+
+
+class TestStreamingParser:
+    """Tests for the streaming config.boot parser."""
+
+    def test_reads_lazily(self) -> None:
+        """Test that leaves are produced before the input is exhausted."""
+
+        def lines():
+            yield "system {"
+            yield "    host-name vyos"
+            raise AssertionError("read past the first leaf")
+
+        assert next(iter_boot_paths(lines())) == ("system", "host-name", "vyos")
+
+    def test_block_comments(self) -> None:
+        """Test that multi-line block comments are skipped."""
+        lines = ["/* Warning:", "   do not edit */", "system {", "time-zone UTC", "}"]
+        assert boot_to_commands(lines) == ["set system time-zone 'UTC'"]
+
+    def test_split_matches_shlex(self) -> None:
+        """Test that the regex tokenizer splits like shlex."""
+        for line in (
+            'description "LAN (Initial Config)"',
+            'plaintext-password ""',
+            'description "say \\"hi\\" \\\\ now"',
+            'value "a\\nb"',
+            "value 4096 65536",
+        ):
+            assert split_boot_line(line) == shlex.split(line), line
+        assert split_boot_line("description it's") == ["description", "it's"]
+
+    def test_paths_match_commands(self) -> None:
+        """Test that streamed paths equal the tokenized set commands."""
+        lines = INITIAL_CONFIG.read_text().splitlines()
+        assert list(iter_boot_paths(lines)) == [
+            tuple(tokenize_command(c) or ()) for c in boot_to_commands(lines)
+        ]
+
+    def test_sniff_format_keeps_lines(self) -> None:
+        """Test that format detection does not consume the stream."""
+        boot, lines = sniff_format(iter(["// comment", "system {", "}"]))
+        assert boot
+        assert list(lines) == ["// comment", "system {", "}"]
+
+        boot, lines = sniff_format(iter(["set a b"]))
+        assert not boot
+        assert list(lines) == ["set a b"]
+
+
+def _paths(commands: list[str]) -> set[tuple[str, ...]]:
+    return {tuple(t) for c in commands if (t := tokenize_command(c))}
+
+
+class TestCommandsToBoot:
+    """Tests for commands_to_boot function."""
+
+    def test_tag_nodes_and_leaves(self) -> None:
+        """Test tag nodes, multi-valued leaves, valueless leaves and quoting."""
+        boot = list(
+            commands_to_boot(
+                [
+                    "set interfaces ethernet eth0 address '192.168.1.1/24'",
+                    "set interfaces ethernet eth0 address 'fd00::1/64'",
+                    "set interfaces ethernet eth0 description 'LAN port'",
+                    "set interfaces ethernet eth0 ipv6 address autoconf",
+                    "set firewall ipv4 input filter default-log",
+                    "# set system host-name '<placeholder>'",
+                ]
+            )
+        )
+        assert boot == [
+            "firewall {",
+            "    ipv4 {",
+            "        input {",
+            "            filter {",
+            "                default-log",
+            "            }",
+            "        }",
+            "    }",
+            "}",
+            "interfaces {",
+            "    ethernet eth0 {",
+            "        address 192.168.1.1/24",
+            "        address fd00::1/64",
+            '        description "LAN port"',
+            "        ipv6 {",
+            "            address {",
+            "                autoconf",
+            "            }",
+            "        }",
+            "    }",
+            "}",
+        ]
+
+    def test_rules_sorted_numerically(self) -> None:
+        """Test that rule numbers sort as numbers."""
+        boot = list(
+            commands_to_boot(
+                [
+                    "set nat source rule 100 translation address 'masquerade'",
+                    "set nat source rule 20 translation address 'masquerade'",
+                ]
+            )
+        )
+        rules = [line.strip() for line in boot if "rule" in line]
+        assert rules == ["rule 20 {", "rule 100 {"]
+
+    def test_tag_node_context(self) -> None:
+        """Test that ``name`` is a tag node only where VyOS defines one."""
+        assert is_tag_node(("firewall", "ipv4", "name"))
+        assert not is_tag_node(
+            ("firewall", "ipv4", "input", "filter", "rule", "10", "inbound-interface")
+        )
+        assert not is_tag_node(("nat", "source", "rule", "100", "source", "address"))
+
+    def test_boot_quote(self) -> None:
+        """Test that only values with special characters are quoted."""
+        assert boot_quote("192.168.1.1/24") == "192.168.1.1/24"
+        assert boot_quote("") == '""'
+        assert boot_quote('say "hi"') == '"say \\"hi\\""'
+
+    def test_round_trip_initial_config(self) -> None:
+        """Test that the CI initial config compiles back to itself."""
+        lines = INITIAL_CONFIG.read_text().splitlines()
+        boot = list(commands_to_boot(boot_to_commands(lines)))
+        expected = [line for line in lines if line and not line.startswith("//")]
+        assert boot == expected
+
+    def test_round_trip_template(self) -> None:
+        """Test that every template path survives set -> boot -> set."""
+        commands = [
+            line
+            for line in TEMPLATE.read_text(encoding="utf-8").splitlines()
+            if line.startswith("set ")
+        ]
+        boot = list(commands_to_boot(commands))
+        assert is_boot_format(boot)
+        assert _paths(boot_to_commands(boot)) == _paths(commands)
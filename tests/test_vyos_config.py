@@ -10,7 +10,10 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
 
 from vyos_config import (
+    PHASES,
     Config,
+    GeneratorState,
+    generate_all,
     generate_phase0,
     generate_phase1,
     generate_phase2,
@@ -18,7 +21,7 @@ from vyos_config import (
     generate_phase4,
     generate_phase5,
     generate_phase6,
-    generate_all,
+    phase_view,
 )
 
 
@@ -284,6 +287,88 @@ class TestInterfaceCustomization:
         assert "enp3s0" in output
 
 
+class TestIncrementalGeneration:
+    """差分生成のテスト"""
+
+    def test_unchanged_config_is_cached(self):
+        """入力が変わらなければ再生成されないこと"""
+        state = GeneratorState()
+        first = generate_all(Config(), state=state)
+        assert state.rendered == list(range(7))
+        second = generate_all(Config(), state=state)
+        assert state.rendered == []
+        assert first == second
+
+    def test_only_affected_phases_rerendered(self):
+        """変更したフィールドを読むフェーズだけ再生成されること"""
+        state = GeneratorState()
+        generate_all(Config(), state=state)
+        generate_all(Config(backup_dir="/config/archive"), state=state)
+        assert state.rendered == [6]
+
+    def test_dependency_rerendered_on_upstream_change(self):
+        """上流フェーズの出力が変わると依存フェーズも再生成されること"""
+        state = GeneratorState()
+        generate_all(Config(), state=state)
+        output = generate_all(Config(wg_port=12345), state=state)
+        assert state.rendered == [3, 5]
+        assert "port 12345" in "\n".join(output)
+
+    def test_extras_invalidate_phase(self):
+        """peer追加でPhase 3が再生成されること"""
+        state = GeneratorState()
+        generate_all(Config(), state=state)
+        peers = {"phone": {"pubkey": "Key", "ipv4": "10.10.10.2/32"}}
+        output = generate_all(Config(), peers=peers, state=state)
+        assert 3 in state.rendered
+        assert "peer phone" in "\n".join(output)
+
+    def test_state_round_trip(self, tmp_path):
+        """状態ファイルを保存・読み込みできること"""
+        path = tmp_path / "state.json"
+        state = GeneratorState()
+        expected = generate_all(Config(), state=state)
+        state.save(path)
+        loaded = GeneratorState.load(path)
+        assert generate_all(Config(), state=loaded) == expected
+        assert loaded.rendered == []
+
+    def test_corrupt_state_ignored(self, tmp_path):
+        """壊れた状態ファイルは空の状態として扱われること"""
+        path = tmp_path / "state.json"
+        path.write_text("not json")
+        assert GeneratorState.load(path).digests == {}
+
+
+class TestPhaseDeclarations:
+    """フェーズ入力宣言のテスト"""
+
+    def test_undeclared_field_not_visible(self):
+        """宣言していないフィールドは参照できないこと"""
+        view = phase_view(PHASES[6], Config())
+        assert view.backup_dir == "/config/backup"
+        assert not hasattr(view, "wan_interface")
+
+    def test_declared_fields_exist(self):
+        """宣言されたフィールドがConfigに存在すること"""
+        cfg = Config()
+        for phase in PHASES:
+            for name in phase.fields:
+                assert hasattr(cfg, name), (phase.number, name)
+
+    def test_phases_are_lazy(self):
+        """フェーズはイテレータとして遅延生成されること"""
+        commands = generate_phase0(Config())
+        assert iter(commands) is commands
+        assert next(commands) == "set system host-name vyos"
+
+    def test_firewall_logging_follows_upstream(self):
+        """上流フェーズで定義されたチェーンにdefault-logが設定されること"""
+        output = "\n".join(generate_phase5(Config()))
+        assert "set firewall ipv6 name WAN6_IN default-log" in output
+        assert "set firewall ipv4 name VPN_TO_LAN default-log" in output
+
+
 if __name__ == "__main__":
     import pytest
     pytest.main([__file__, "-v"])
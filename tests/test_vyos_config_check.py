@@ -0,0 +1,957 @@
+"""Tests for VyOS configuration checker and SSH session layer."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_config_check import (
+    CONFIG_CHECKS,
+    DETAIL_LINES,
+    FIREWALL_HITS_COMMAND,
+    REVISION_COMMAND,
+    SNAPSHOT_COMMAND,
+    CacheEntry,
+    CheckResult,
+    ConfigCheck,
+    HostReport,
+    ResultCache,
+    affected_categories,
+    check_ddns,
+    check_firewall_hits,
+    check_wireguard_interface,
+    check_wireguard_peers,
+    grep_snapshot,
+    load_config_file,
+    load_inventory,
+    print_profile,
+    render_json,
+    render_junit,
+    run_checks,
+    run_fleet,
+    run_offline_checks,
+    select_checks,
+    validate,
+    watch,
+)
+from vyos_ssh import CONTROL_PERSIST, CommandStream, SessionStats, SSHSession
+
+SCRIPTS = Path(__file__).parent.parent / "scripts"
+TEMPLATE = SCRIPTS / "vyos-config-template.txt"
+INITIAL_CONFIG = SCRIPTS / "ci" / "initial-config.boot"
+
+
+def _completed(
+    returncode: int = 0, stdout: str = "", stderr: str = ""
+) -> subprocess.CompletedProcess[str]:
+    return subprocess.CompletedProcess([], returncode, stdout, stderr)
+
+
+class FakeSession:
+    """Minimal session stand-in returning canned output per command."""
+
+    def __init__(self, outputs: dict[str, str]) -> None:
+        self.outputs = outputs
+        self.commands: list[str] = []
+        self.stats = SessionStats()
+
+    def run(self, command: str) -> tuple[int, str, str]:
+        self.commands.append(command)
+        if command in self.outputs:
+            return 0, self.outputs[command], ""
+        return 1, "", "unknown command"
+
+
+class CutOffSession(FakeSession):
+    """Fake session whose streams time out after their first line."""
+
+    def run_stream(self, command: str) -> CommandStream:
+        self.commands.append(command)
+        stream = CommandStream(self.outputs.get(command, "").splitlines()[:1], 1)
+        stream.timed_out = True
+        stream.stderr = "SSH command timed out"
+        return stream
+
+
+class TestSSHSession:
+    """Tests for SSHSession."""
+
+    def test_single_handshake_for_many_commands(self) -> None:
+        """Test that the master connection is opened once and reused."""
+        with (
+            patch("vyos_ssh.subprocess.run", return_value=_completed()) as run,
+            SSHSession("router", "vyos") as session,
+        ):
+            for _ in range(5):
+                session.run("show version")
+
+        calls = [c.args[0] for c in run.call_args_list]
+        masters = [c for c in calls if "ControlMaster=yes" in c]
+        exits = [c for c in calls if "-O" in c]
+        assert len(masters) == 1
+        # A master outliving a killed run exits once idle
+        assert f"ControlPersist={CONTROL_PERSIST}" in masters[0]
+        assert len(exits) == 1
+        assert session.stats.commands == 5
+
+    def test_commands_use_control_path(self) -> None:
+        """Test that commands are multiplexed over the control socket."""
+        with (
+            patch("vyos_ssh.subprocess.run", return_value=_completed()) as run,
+            SSHSession("router", "vyos", key_file="/tmp/key") as session,
+        ):
+            session.run("show version")
+            control_path = str(session.control_path)
+
+        command_call = run.call_args_list[1].args[0]
+        assert f"ControlPath={control_path}" in command_call
+        assert command_call[-2:] == ["vyos@router", "show version"]
+        assert "-i" in command_call
+
+    def test_connect_failure_fails_fast(self) -> None:
+        """Test that a failed master connection is not retried per command."""
+        with patch(
+            "vyos_ssh.subprocess.run",
+            return_value=_completed(255, stderr="Connection refused"),
+        ) as run:
+            session = SSHSession("router", "vyos")
+            first = session.run("show version")
+            second = session.run("show interfaces")
+            session.close()
+
+        assert first == (1, "", "Connection refused")
+        assert second == (1, "", "Connection refused")
+        assert run.call_count == 1
+        assert session.control_path is None
+
+    def test_reopen_after_close(self) -> None:
+        """Test that a closed session reconnects instead of using a dead socket."""
+        with patch("vyos_ssh.subprocess.run", return_value=_completed()) as run:
+            session = SSHSession("router", "vyos")
+            session.run("show version")
+            session.close()
+            assert session.control_path is None
+            session.run("show version")
+            control_path = str(session.control_path)
+            session.close()
+
+        calls = [c.args[0] for c in run.call_args_list]
+        masters = [c for c in calls if "ControlMaster=yes" in c]
+        assert len(masters) == 2
+        assert f"ControlPath={control_path}" in calls[-2]
+
+    def test_input_sent_to_stdin(self) -> None:
+        """Test that input text is passed to the remote command."""
+        with (
+            patch("vyos_ssh.subprocess.run", return_value=_completed()) as run,
+            SSHSession("router", "vyos") as session,
+        ):
+            session.run("vbash -s", input="configure\n")
+
+        assert run.call_args_list[1].kwargs["input"] == "configure\n"
+
+    def test_missing_ssh_client(self) -> None:
+        """Test that a missing ssh binary is reported as an error."""
+        with patch("vyos_ssh.subprocess.run", side_effect=FileNotFoundError):
+            session = SSHSession("router", "vyos")
+            result = session.run("show version")
+
+        assert result == (1, "", "SSH client not found")
+
+    def test_deadline_exceeded(self) -> None:
+        """Test that nothing runs once the session deadline has passed."""
+        with patch("vyos_ssh.subprocess.run") as run:
+            session = SSHSession("router", "vyos", deadline=time.monotonic() - 1)
+            result = session.run("show version")
+
+        assert result == (1, "", "Deadline exceeded")
+        run.assert_not_called()
+
+    def test_deadline_bounds_timeout(self) -> None:
+        """Test that subprocess timeouts never exceed the remaining deadline."""
+        with (
+            patch("vyos_ssh.subprocess.run", return_value=_completed()) as run,
+            SSHSession(
+                "router", "vyos", timeout=30, deadline=time.monotonic() + 5
+            ) as session,
+        ):
+            session.run("show version")
+
+        assert all(c.kwargs["timeout"] <= 5 for c in run.call_args_list)
+
+    def test_records_timing(self) -> None:
+        """Test that connect and command time are tracked separately."""
+        with (
+            patch("vyos_ssh.subprocess.run", return_value=_completed()),
+            SSHSession("router", "vyos") as session,
+        ):
+            session.run("show version")
+
+        assert session.stats.connect_time > 0
+        assert session.stats.command_time > 0
+
+
+def _fake_ssh(script: str):
+    """Return a Popen replacement running a Python script instead of ssh."""
+    real_popen = subprocess.Popen
+
+    def popen(cmd: list[str], **kwargs: object) -> subprocess.Popen[str]:
+        return real_popen([sys.executable, "-c", script], **kwargs)
+
+    return popen
+
+
+class TestRunStream:
+    """Tests for SSHSession.run_stream."""
+
+    def test_streams_lines(self) -> None:
+        """Test that output is yielded line by line with the exit status."""
+        script = (
+            "import sys; print('a'); print('b'); "
+            "sys.stderr.write('warn'); sys.exit(3)"
+        )
+        with (
+            patch("vyos_ssh.subprocess.run", return_value=_completed()),
+            patch("vyos_ssh.subprocess.Popen", side_effect=_fake_ssh(script)),
+            SSHSession("router", "vyos") as session,
+            session.run_stream("show version") as stream,
+        ):
+            lines = list(stream)
+
+        assert lines == ["a", "b"]
+        assert stream.returncode == 3
+        assert stream.stderr == "warn"
+        assert session.stats.commands == 1
+
+    def test_early_close_stops_command(self) -> None:
+        """Test that closing the stream early does not wait for the command."""
+        script = "import time; print('first', flush=True); time.sleep(30)"
+        with (
+            patch("vyos_ssh.subprocess.run", return_value=_completed()),
+            patch("vyos_ssh.subprocess.Popen", side_effect=_fake_ssh(script)),
+            SSHSession("router", "vyos") as session,
+        ):
+            start = time.monotonic()
+            with session.run_stream("show log") as stream:
+                first = next(iter(stream))
+
+        assert first == "first"
+        assert time.monotonic() - start < 10
+        assert stream.returncode != 0
+
+    def test_failed_start_closes_stderr_file(self) -> None:
+        """Test that the stderr file is not leaked when ssh cannot start."""
+        real_tempfile = tempfile.TemporaryFile
+        files = []
+
+        def temporary_file(*args: object, **kwargs: object):
+            files.append(real_tempfile(*args, **kwargs))
+            return files[-1]
+
+        with (
+            patch("vyos_ssh.subprocess.run", return_value=_completed()),
+            patch("vyos_ssh.subprocess.Popen", side_effect=FileNotFoundError),
+            patch("vyos_ssh.tempfile.TemporaryFile", side_effect=temporary_file),
+            SSHSession("router", "vyos") as session,
+        ):
+            stream = session.run_stream("show log")
+
+        assert (stream.returncode, stream.stderr) == (1, "SSH client not found")
+        assert len(files) == 1
+        assert files[0].closed
+
+    def test_timeout_kills_command(self) -> None:
+        """Test that a command running past its timeout is killed."""
+        script = "import time; time.sleep(30)"
+        with (
+            patch("vyos_ssh.subprocess.run", return_value=_completed()),
+            patch("vyos_ssh.subprocess.Popen", side_effect=_fake_ssh(script)),
+            SSHSession("router", "vyos", timeout=0.2) as session,
+            session.run_stream("show log") as stream,
+        ):
+            lines = list(stream)
+
+        assert lines == []
+        assert (stream.returncode, stream.stderr) == (1, "SSH command timed out")
+        assert stream.timed_out
+
+    def test_deadline_exceeded(self) -> None:
+        """Test that no command starts once the deadline has passed."""
+        with patch("vyos_ssh.subprocess.Popen") as popen:
+            session = SSHSession("router", "vyos", deadline=time.monotonic() - 1)
+            stream = session.run_stream("show version")
+
+        assert list(stream) == []
+        assert (stream.returncode, stream.stderr) == (1, "Deadline exceeded")
+        popen.assert_not_called()
+
+
+class TestStreamingValidation:
+    """Tests for line-by-line validation with bounded details."""
+
+    def test_validator_stops_at_verdict(self) -> None:
+        """Test that validators stop reading once the verdict is known."""
+        consumed: list[int] = []
+
+        def lines():
+            yield "inet 192.168.100.2/24"
+            for i in range(1000):
+                consumed.append(i)
+                yield "filler"
+
+        result = validate(CONFIG_CHECKS[0], lines())
+
+        assert result.passed
+        assert consumed == []
+        assert result.output_bytes == len("inet 192.168.100.2/24") + 1
+
+    def test_details_are_bounded(self) -> None:
+        """Test that a failed result keeps only an excerpt of the output."""
+        output = "".join(f"line {i}\n" for i in range(10_000))
+        session = FakeSession({"show interfaces ethernet eth0": output})
+
+        result = run_checks("router", "vyos", None, "interface", False, session)[0]
+
+        assert not result.passed
+        lines = result.details.splitlines()
+        assert len(lines) == DETAIL_LINES + 1
+        assert lines[-1] == f"... ({10_000 - DETAIL_LINES} more lines)"
+        assert result.output_bytes == len(output)
+
+
+class TestRunChecks:
+    """Tests for run_checks function."""
+
+    def test_all_commands_share_session(self) -> None:
+        """Test that every check command runs on the given session."""
+        session = FakeSession({})
+
+        results = run_checks("router", "vyos", None, "all", False, session)
+
+        assert len(results) == len(CONFIG_CHECKS)
+        assert session.commands == [c.command for c in CONFIG_CHECKS]
+
+    def test_failed_command_reports_error(self) -> None:
+        """Test that a failing command produces a failed result."""
+        session = FakeSession({})
+
+        results = run_checks("router", "vyos", None, "ddns", False, session)
+
+        assert results == [
+            CheckResult("DDNS", False, "Command failed: unknown command")
+        ]
+
+    def test_cut_off_output_fails_command(self) -> None:
+        """Test that a timeout after some output is not judged as a verdict."""
+        session = CutOffSession(
+            {"show interfaces ethernet eth0": "eth0: <UP>\ninet 192.168.100.2/24"}
+        )
+
+        results = run_checks("router", "vyos", None, "interface", False, session)
+
+        assert results[0].message == "Command failed: SSH command timed out"
+
+    def test_validator_receives_output(self) -> None:
+        """Test that command output is passed to the validator."""
+        session = FakeSession(
+            {"show interfaces ethernet eth0": "inet 192.168.100.2/24"}
+        )
+
+        results = run_checks("router", "vyos", None, "interface", False, session)
+
+        assert results[0].passed
+
+    def test_opens_own_session_when_not_given(self) -> None:
+        """Test that run_checks manages a session if none is passed."""
+        fake = MagicMock()
+        fake.__enter__.return_value = FakeSession({})
+        with patch("vyos_config_check.SSHSession", return_value=fake) as factory:
+            run_checks("router", "vyos", None, "ddns", False)
+
+        factory.assert_called_once_with("router", "vyos", None)
+        fake.__exit__.assert_called_once()
+
+
+SNAPSHOT = """\
+set interfaces ethernet eth0 address '192.168.100.2/24'
+set interfaces ethernet eth1 dhcpv6-options pd 0 length '56'
+set service router-advert interface eth2 prefix '2404:db8::/64'
+set firewall ipv4 input filter rule 10 action 'accept'
+set firewall ipv4 forward filter rule 10 action 'accept'
+set interfaces wireguard wg0 port '51820'
+set interfaces wireguard wg0 peer mac public-key 'x'
+set interfaces wireguard wg0 peer iphone public-key 'y'
+set service dns dynamic name cloudflare protocol 'cloudflare'
+set service dns dynamic name cloudflare host-name 'router.murata-lab.net'
+set nat source rule 100 translation address 'masquerade'
+"""
+
+
+class TestGrepPattern:
+    """Tests for ConfigCheck.grep_pattern."""
+
+    def test_quoted_pattern(self) -> None:
+        """Test that quoted grep patterns are unquoted."""
+        check = ConfigCheck(
+            "x", "show configuration commands | grep 'nat source'", check_ddns, "x"
+        )
+
+        assert check.grep_pattern == "nat source"
+
+    def test_operational_command(self) -> None:
+        """Test that operational commands have no grep pattern."""
+        check = ConfigCheck("x", "show ip route 0.0.0.0/0", check_ddns, "x")
+
+        assert check.grep_pattern is None
+
+    def test_other_pipe(self) -> None:
+        """Test that non-grep pipelines are not treated as config queries."""
+        check = ConfigCheck(
+            "x", "show configuration commands | match nat", check_ddns, "x"
+        )
+
+        assert check.grep_pattern is None
+
+
+class TestGrepSnapshot:
+    """Tests for grep_snapshot function."""
+
+    def test_regex_pattern(self) -> None:
+        """Test that grep wildcards are honoured."""
+        result = grep_snapshot(SNAPSHOT.splitlines(), "wireguard.*peer")
+
+        assert result.count("\n") == 2
+
+    def test_bre_literals(self) -> None:
+        """Test that BRE-literal characters match literally."""
+        lines = ["set a (x)", "set a x"]
+
+        assert grep_snapshot(lines, "(x)") == "set a (x)\n"
+
+    def test_no_match(self) -> None:
+        """Test that no match yields empty output."""
+        assert grep_snapshot(["set a"], "zzz") == ""
+
+
+class TestSnapshotMode:
+    """Tests for run_checks in snapshot mode."""
+
+    def test_fetches_snapshot_once(self) -> None:
+        """Test that config checks share one snapshot fetch."""
+        session = FakeSession(
+            {
+                SNAPSHOT_COMMAND: SNAPSHOT,
+                "show ip route 0.0.0.0/0": "S>* 0.0.0.0/0 [10/0] via 192.168.100.1",
+            }
+        )
+
+        results = run_checks(
+            "router", "vyos", None, "all", False, session, snapshot=True
+        )
+
+        operational = [c for c in CONFIG_CHECKS if c.grep_pattern is None]
+        assert session.commands[0] == SNAPSHOT_COMMAND
+        assert session.commands[1:] == [c.command for c in operational]
+        by_name = {r.name: r for r in results}
+        assert by_name["WG Peers"].passed
+        assert by_name["NAT Source"].passed
+        assert by_name["Default Route"].passed
+
+    def test_matches_live_results(self) -> None:
+        """Test that snapshot results equal per-command grep results."""
+        outputs = {SNAPSHOT_COMMAND: SNAPSHOT}
+        for check in CONFIG_CHECKS:
+            if check.grep_pattern is not None:
+                outputs[check.command] = grep_snapshot(
+                    SNAPSHOT.splitlines(), check.grep_pattern
+                )
+
+        live = run_checks("r", "vyos", None, "firewall", False, FakeSession(outputs))
+        local = run_checks(
+            "r", "vyos", None, "firewall", False, FakeSession(outputs), snapshot=True
+        )
+
+        assert live == local
+
+    def test_snapshot_failure(self) -> None:
+        """Test that a failed snapshot fails every config check."""
+        session = FakeSession({})
+
+        results = run_checks(
+            "router", "vyos", None, "ddns", False, session, snapshot=True
+        )
+
+        assert results == [
+            CheckResult("DDNS", False, "Command failed: unknown command")
+        ]
+        assert session.commands == [SNAPSHOT_COMMAND]
+
+
+class SlowSession(FakeSession):
+    """Fake session that sleeps per command and supports context management."""
+
+    delays: dict[str, float] = {}
+
+    def __init__(self, host: str, user: str, key_file: str | None, **_: object):
+        super().__init__({SNAPSHOT_COMMAND: SNAPSHOT})
+        self.host = host
+        self.stats = SessionStats()
+
+    def run(self, command: str) -> tuple[int, str, str]:
+        time.sleep(self.delays.get(self.host, 0.0))
+        self.stats.commands += 1
+        return super().run(command)
+
+    def __enter__(self) -> SlowSession:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+
+class TestFleet:
+    """Tests for fleet mode."""
+
+    def test_load_inventory(self, tmp_path: Path) -> None:
+        """Test that inventory comments and blank lines are skipped."""
+        inventory = tmp_path / "routers.txt"
+        inventory.write_text("# branch routers\nr1\n\nr2  # tokyo\n")
+
+        assert load_inventory(inventory) == ["r1", "r2"]
+
+    def test_reports_in_host_order(self) -> None:
+        """Test that reports follow the order of the host list."""
+        SlowSession.delays = {"r1": 0.05}
+        reports = run_fleet(
+            ["r1", "r2", "r3"], "vyos", None, "routing", True,
+            session_factory=SlowSession,
+        )
+
+        assert [r.host for r in reports] == ["r1", "r2", "r3"]
+        assert all(len(r.results) == 2 for r in reports)
+        assert all(r.stats.commands == 2 for r in reports)
+
+    def test_hosts_run_concurrently(self) -> None:
+        """Test that fleet wall time tracks the slowest host, not the sum."""
+        SlowSession.delays = {f"r{i}": 0.1 for i in range(8)}
+        hosts = list(SlowSession.delays)
+        start = time.monotonic()
+        run_fleet(
+            hosts, "vyos", None, "ddns", True, jobs=8, session_factory=SlowSession
+        )
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.5
+
+    def test_failed_host_fails_report(self) -> None:
+        """Test that a host with failing checks is reported as failed."""
+        SlowSession.delays = {}
+        reports = run_fleet(
+            ["r1"], "vyos", None, "routing", False, session_factory=SlowSession
+        )
+
+        assert not reports[0].passed
+
+    def test_exception_fails_only_that_host(self) -> None:
+        """Test that an error on one host does not abort the fleet report."""
+        SlowSession.delays = {}
+
+        def factory(host: str, *args: object, **kwargs: object) -> SlowSession:
+            if host == "r2":
+                raise OSError("No route to host")
+            return SlowSession(host, *args, **kwargs)
+
+        reports = run_fleet(
+            ["r1", "r2", "r3"], "vyos", None, "routing", True,
+            session_factory=factory,
+        )
+
+        assert [r.host for r in reports] == ["r1", "r2", "r3"]
+        assert len(reports[0].results) == len(reports[2].results) == 2
+        assert reports[1].results == [
+            CheckResult("Host", False, "Error: No route to host")
+        ]
+
+
+class TestTreeValidators:
+    """Tests for validators backed by the configuration tree."""
+
+    def test_peer_in_description_not_counted(self) -> None:
+        """Test that 'peer' text in a description is not counted as a peer."""
+        output = (
+            "set interfaces wireguard wg0 description 'peer peer peer'\n"
+            "set interfaces wireguard wg0 peer mac public-key 'x'\n"
+        )
+
+        result = check_wireguard_peers(output)
+
+        assert not result.passed
+        assert result.message == "Expected 2 peers, found 1"
+
+    def test_wireguard_port_value(self) -> None:
+        """Test that the port must be the value of the port leaf."""
+        output = "set interfaces wireguard wg0 description 'port 51820'\n"
+
+        assert not check_wireguard_interface(output).passed
+
+
+class TestFirewallHits:
+    """Tests for the opt-in firewall hit-order check."""
+
+    COUNTERS = (
+        'ipv4 Firewall "forward filter"\n'
+        "Rule     Action    Protocol      Packets    Bytes  Conditions\n"
+        "10       accept    all               10      900  ct state\n"
+        "85       accept    all             5000   600000  iifname \"wg0\"\n"
+        "default  drop      all                0        0\n"
+    )
+    CONFIG = (
+        "set firewall ipv4 forward filter rule 10 action accept\n"
+        "set firewall ipv4 forward filter rule 10 state established\n"
+        "set firewall ipv4 forward filter rule 85 action accept\n"
+        "set firewall ipv4 forward filter rule 85 inbound-interface name wg0\n"
+    )
+
+    def test_not_part_of_all(self) -> None:
+        """Test that the check only runs when its category is named."""
+        assert all(c.category != "firewall-hits" for c in select_checks("all"))
+        checks = select_checks("firewall-hits")
+        assert [c.command for c in checks] == [FIREWALL_HITS_COMMAND]
+
+    def test_reorder_recommended(self) -> None:
+        """Test that a hot rule behind a cold one fails the check."""
+        result = check_firewall_hits(self.COUNTERS + self.CONFIG)
+        assert not result.passed
+        assert result.message.endswith("ipv4 forward filter 2.00→1.00")
+
+    def test_hot_rule_first(self) -> None:
+        """Test that a chain already in hit order passes."""
+        counters = self.COUNTERS.replace("  10  ", "  9000").replace("5000", "   5")
+        assert check_firewall_hits(counters + self.CONFIG).passed
+
+
+class TestOfflineMode:
+    """Tests for offline checks against local files."""
+
+    def test_template_passes(self) -> None:
+        """Test that the template passes all checks with placeholders."""
+        commands = load_config_file(TEMPLATE, include_commented=True)
+
+        results = run_offline_checks(commands, "all", False)
+
+        assert len(results) == len(CONFIG_CHECKS)
+        assert all(r.passed for r in results), [r for r in results if not r.passed]
+
+    def test_template_without_commented_lines(self) -> None:
+        """Test that placeholder-only peers are missing without the flag."""
+        commands = load_config_file(TEMPLATE)
+
+        results = run_offline_checks(commands, "wireguard", False)
+
+        assert [r.passed for r in results] == [True, False]
+
+    def test_skips_restore_header(self, tmp_path: Path) -> None:
+        """Test that restore output header comments are ignored."""
+        restore = tmp_path / "restore.txt"
+        restore.write_text(
+            "# VyOS Configuration Restore Commands\n"
+            "set nat source rule 100 translation address masquerade\n"
+        )
+
+        assert load_config_file(restore) == [
+            "set nat source rule 100 translation address masquerade"
+        ]
+
+    def test_boot_file(self) -> None:
+        """Test that config.boot files are converted before checking."""
+        commands = load_config_file(INITIAL_CONFIG)
+
+        assert "set system host-name 'vyos'" in commands
+
+    def test_operational_check_uses_config(self) -> None:
+        """Test that the default route check falls back to static routes."""
+        commands = [
+            "set protocols static route 0.0.0.0/0 next-hop 192.168.100.1 distance 10"
+        ]
+
+        results = run_offline_checks(commands, "routing", False)
+
+        assert results[0].passed
+
+
+class TestResultCache:
+    """Tests for the commit-revision result cache."""
+
+    REVISION = "0   2026-10-18 09:00:00 by vyos via cli"
+
+    def _session(self, revision: str) -> FakeSession:
+        return FakeSession(
+            {
+                REVISION_COMMAND: revision + "\n",
+                SNAPSHOT_COMMAND: SNAPSHOT,
+                "show ip route 0.0.0.0/0": "S>* 0.0.0.0/0 via 192.168.100.1",
+                "show configuration commands | grep 'nat source'": (
+                    "set nat source rule 100 translation address 'masquerade'\n"
+                ),
+            }
+        )
+
+    def test_repeat_run_only_queries_revision(self, tmp_path: Path) -> None:
+        """Test that an unchanged router costs a single revision query."""
+        cache = ResultCache(tmp_path)
+        first = self._session(self.REVISION)
+        second = self._session(self.REVISION)
+
+        cold = run_checks("r1", "vyos", None, "routing", False, first, cache=cache)
+        warm = run_checks("r1", "vyos", None, "routing", False, second, cache=cache)
+
+        assert len(first.commands) == 3
+        # The route is operational state and is always queried
+        assert second.commands == [REVISION_COMMAND, "show ip route 0.0.0.0/0"]
+        assert warm == cold
+
+    def test_operational_state_not_cached(self, tmp_path: Path) -> None:
+        """Test that a lost route is reported without a new commit."""
+        cache = ResultCache(tmp_path)
+        run_checks("r1", "vyos", None, "routing", False,
+                   self._session(self.REVISION), cache=cache)
+        session = self._session(self.REVISION)
+        session.outputs["show ip route 0.0.0.0/0"] = ""
+
+        results = run_checks("r1", "vyos", None, "routing", False, session,
+                             cache=cache)
+
+        by_name = {r.name: r for r in results}
+        assert not by_name["Default Route"].passed
+        assert by_name["NAT Source"].passed
+
+    def test_timeout_not_cached(self, tmp_path: Path) -> None:
+        """Test that a check cut off by a timeout runs again next time."""
+        cache = ResultCache(tmp_path)
+        cut_off = CutOffSession(self._session(self.REVISION).outputs)
+        run_checks("r1", "vyos", None, "routing", False, cut_off, cache=cache)
+        session = self._session(self.REVISION)
+
+        results = run_checks("r1", "vyos", None, "routing", False, session,
+                             cache=cache)
+
+        assert len(session.commands) == 3
+        assert all(r.passed for r in results)
+
+    def test_new_revision_invalidates(self, tmp_path: Path) -> None:
+        """Test that a new commit revision forces a re-fetch."""
+        cache = ResultCache(tmp_path)
+        run_checks("r1", "vyos", None, "routing", False,
+                   self._session(self.REVISION), cache=cache)
+        session = self._session("0   2026-10-18 09:05:00 by vyos via cli")
+
+        run_checks("r1", "vyos", None, "routing", False, session, cache=cache)
+
+        assert len(session.commands) == 3
+
+    def test_ttl_expiry(self, tmp_path: Path) -> None:
+        """Test that entries older than the TTL are ignored."""
+        cache = ResultCache(tmp_path, ttl=-1)
+        run_checks("r1", "vyos", None, "routing", False,
+                   self._session(self.REVISION), cache=cache)
+        session = self._session(self.REVISION)
+
+        run_checks("r1", "vyos", None, "routing", False, session, cache=cache)
+
+        assert len(session.commands) == 3
+
+    def test_snapshot_output_reused(self, tmp_path: Path) -> None:
+        """Test that a cached snapshot answers checks not yet cached."""
+        cache = ResultCache(tmp_path)
+        run_checks("r1", "vyos", None, "ddns", False,
+                   self._session(self.REVISION), snapshot=True, cache=cache)
+        session = self._session(self.REVISION)
+
+        results = run_checks(
+            "r1", "vyos", None, "wireguard", False, session,
+            snapshot=True, cache=cache,
+        )
+
+        assert session.commands == [REVISION_COMMAND]
+        assert all(r.passed for r in results)
+
+    def test_transport_failures_not_cached(self, tmp_path: Path) -> None:
+        """Test that failed commands are retried on the next run."""
+        cache = ResultCache(tmp_path)
+        run_checks("r1", "vyos", None, "ddns", False,
+                   FakeSession({REVISION_COMMAND: self.REVISION}), cache=cache)
+        session = FakeSession({REVISION_COMMAND: self.REVISION})
+
+        run_checks("r1", "vyos", None, "ddns", False, session, cache=cache)
+
+        assert len(session.commands) == 2
+
+    def test_no_revision_disables_cache(self, tmp_path: Path) -> None:
+        """Test that nothing is stored when the revision is unavailable."""
+        cache = ResultCache(tmp_path)
+
+        run_checks("r1", "vyos", None, "ddns", False, FakeSession({}), cache=cache)
+
+        assert not list(tmp_path.iterdir())
+
+    def test_corrupt_cache_ignored(self, tmp_path: Path) -> None:
+        """Test that an unreadable cache file is treated as a miss."""
+        (tmp_path / "r1.json").write_text("{not json")
+
+        assert ResultCache(tmp_path).load("r1", self.REVISION) == CacheEntry()
+
+
+class ScriptedSession(FakeSession):
+    """Fake session whose outputs change between polls."""
+
+    script: list[dict[str, str]] = []
+    log: list[str] = []
+
+    def __init__(self, host: str, user: str, key_file: str | None) -> None:
+        super().__init__({})
+        self.stats = SessionStats()
+
+    def run(self, command: str) -> tuple[int, str, str]:
+        if command == REVISION_COMMAND and ScriptedSession.script:
+            self.outputs = ScriptedSession.script.pop(0)
+        ScriptedSession.log.append(command)
+        return super().run(command)
+
+    def close(self) -> None:
+        pass
+
+
+class TestWatch:
+    """Tests for watch mode."""
+
+    ROUTE = {"show ip route 0.0.0.0/0": "S>* 0.0.0.0/0 via 192.168.100.1"}
+
+    def _state(self, revision: str, snapshot: str) -> dict[str, str]:
+        return {REVISION_COMMAND: revision, SNAPSHOT_COMMAND: snapshot, **self.ROUTE}
+
+    def test_affected_categories(self) -> None:
+        """Test that only categories matching changed lines are selected."""
+        old = SNAPSHOT.splitlines()
+        new = [*old, "set firewall ipv4 input filter rule 20 action 'drop'"]
+
+        assert affected_categories(old, new, list(CONFIG_CHECKS)) == {"firewall"}
+        assert affected_categories(old, old, list(CONFIG_CHECKS)) == set()
+
+    def test_rechecks_only_changed_category(self, capsys) -> None:
+        """Test that a commit re-runs only the affected category."""
+        broken = SNAPSHOT.replace("ipv4 input filter", "ipv4 output filter")
+        ScriptedSession.script = [
+            self._state("rev1", SNAPSHOT),
+            self._state("rev1", SNAPSHOT),
+            self._state("rev2", broken),
+        ]
+        ScriptedSession.log = []
+
+        code = watch(
+            "r1", "vyos", None, "all", 0, iterations=3,
+            session_factory=ScriptedSession, sleep=lambda _: None,
+        )
+
+        out = capsys.readouterr().out
+        assert code == 1
+        assert "ALERT FW Input" in out
+        assert "re-checked: firewall)" in out
+        # Initial full run hits the route once; the firewall change does not
+        assert ScriptedSession.log.count("show ip route 0.0.0.0/0") == 1
+        assert ScriptedSession.log.count(SNAPSHOT_COMMAND) == 2
+
+    def test_unchanged_revision_is_cheap(self) -> None:
+        """Test that polls without a commit only query the revision."""
+        ScriptedSession.script = [self._state("rev1", SNAPSHOT)] * 4
+        ScriptedSession.log = []
+
+        watch(
+            "r1", "vyos", None, "all", 0, iterations=4,
+            session_factory=ScriptedSession, sleep=lambda _: None,
+        )
+
+        polls_after_first = ScriptedSession.log[
+            ScriptedSession.log.index(REVISION_COMMAND, 1):
+        ]
+        assert set(polls_after_first) == {REVISION_COMMAND}
+
+
+class TestInstrumentation:
+    """Tests for per-check timing and machine-readable output."""
+
+    def _report(self) -> HostReport:
+        session = FakeSession(
+            {
+                "show configuration commands | grep 'nat source'": (
+                    "set nat source rule 100 translation address 'masquerade'\n"
+                )
+            }
+        )
+        results = run_checks("r1", "vyos", None, "routing", False, session)
+        return HostReport("r1", results, session.stats, 0.5)
+
+    def test_results_carry_timing(self) -> None:
+        """Test that each result records size, category and timings."""
+        commands = load_config_file(TEMPLATE, include_commented=True)
+
+        results = run_offline_checks(commands, "firewall", False)
+
+        assert all(r.category == "firewall" for r in results)
+        assert all(r.output_bytes > 0 for r in results)
+        assert all(r.validator_time > 0 for r in results)
+
+    def test_timing_ignored_in_equality(self) -> None:
+        """Test that instrumentation fields do not affect comparisons."""
+        assert CheckResult("a", True, "ok", wall_time=1.0) == CheckResult(
+            "a", True, "ok"
+        )
+
+    def test_render_json(self) -> None:
+        """Test that JSON output contains per-check instrumentation."""
+        data = json.loads(render_json([self._report()]))
+
+        assert data["passed"] is False
+        host = data["hosts"][0]
+        assert host["host"] == "r1"
+        assert {r["name"] for r in host["results"]} == {
+            "Default Route",
+            "NAT Source",
+        }
+        assert "validator_time" in host["results"][0]
+
+    def test_render_junit(self) -> None:
+        """Test that JUnit output has one failure per failed check."""
+        root = ET.fromstring(render_junit([self._report()]))
+
+        suite = root.find("testsuite")
+        assert suite is not None
+        assert suite.get("tests") == "2"
+        assert suite.get("failures") == "1"
+        failed = [c for c in suite.iter("testcase") if c.find("failure") is not None]
+        assert [c.get("name") for c in failed] == ["Default Route"]
+        assert failed[0].get("classname") == "vyos.routing"
+
+    def test_print_profile(self, capsys) -> None:
+        """Test that the profile lists the slowest checks first."""
+        report = HostReport(
+            "r1",
+            [
+                CheckResult("fast", True, "", wall_time=0.1),
+                CheckResult("slow", True, "", wall_time=2.0),
+            ],
+        )
+
+        print_profile([report], top=1)
+
+        err = capsys.readouterr().err
+        assert "slow" in err
+        assert "fast" not in err
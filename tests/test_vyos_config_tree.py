@@ -0,0 +1,129 @@
+"""Tests for VyOS configuration tree."""
+
+from __future__ import annotations
+
+import shlex
+import sys
+from pathlib import Path
+from textwrap import dedent
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_config_tree import ConfigTree, matches_path, tokenize_command
+
+TEMPLATE = Path(__file__).parent.parent / "scripts" / "vyos-config-template.txt"
+
+COMMANDS = dedent("""
+    set interfaces wireguard wg0 address '10.10.10.1/24'
+    set interfaces wireguard wg0 address 'fd00:10:10:10::1/64'
+    set interfaces wireguard wg0 description 'peer link for peers'
+    set interfaces wireguard wg0 port '51820'
+    set interfaces wireguard wg0 peer mac allowed-ips '10.10.10.2/32'
+    set interfaces wireguard wg0 peer iphone allowed-ips '10.10.10.3/32'
+    set firewall ipv4 input filter default-log
+""").strip().splitlines()
+
+
+class TestTokenizeCommand:
+    """Tests for tokenize_command function."""
+
+    def test_quotes_removed(self) -> None:
+        """Test that quoted and unquoted values tokenize the same."""
+        assert tokenize_command("set a b '1.2.3.4/24'") == tokenize_command(
+            "set a b 1.2.3.4/24"
+        )
+
+    def test_quoted_value_with_spaces(self) -> None:
+        """Test that a quoted value with spaces stays one token."""
+        result = tokenize_command("set x value '4096 65536 16777216'")
+
+        assert result == ["x", "value", "4096 65536 16777216"]
+
+    def test_non_set_line(self) -> None:
+        """Test that non-set lines are rejected."""
+        assert tokenize_command("# set a b") is None
+        assert tokenize_command("delete a b") is None
+
+    def test_unbalanced_quote(self) -> None:
+        """Test that an unbalanced quote falls back to whitespace splitting."""
+        assert tokenize_command("set a 'b") == ["a", "'b"]
+
+    def test_matches_shlex(self) -> None:
+        """Test that the fast path splits exactly like shlex."""
+        for line in (
+            "set a 'b c' d 'e'",
+            "set a '' b",
+            "set a b'c'",
+            "set a 'x''y'",
+            'set a "b c"',
+            "set a 'it'\\''s'",
+            "set a b\\ c",
+        ):
+            assert tokenize_command(line) == shlex.split(line)[1:], line
+
+
+class TestMatchesPath:
+    """Tests for matches_path function."""
+
+    def test_prefix_with_wildcard(self) -> None:
+        """Test that a pattern matches a longer path with wildcards."""
+        tokens = tokenize_command(
+            "set nat source rule 100 outbound-interface name 'eth1'"
+        )
+        assert matches_path(tokens, "nat source rule *")
+        assert not matches_path(tokens, "nat destination rule *")
+
+    def test_shorter_path(self) -> None:
+        """Test that a path shorter than the pattern does not match."""
+        assert not matches_path(["nat", "source"], "nat source rule *")
+        assert not matches_path(None, "nat")
+
+
+class TestConfigTree:
+    """Tests for ConfigTree class."""
+
+    def test_values(self) -> None:
+        """Test extracting multiple values of a leaf."""
+        tree = ConfigTree.from_commands(COMMANDS)
+
+        assert tree.values("interfaces wireguard wg0 address") == [
+            "10.10.10.1/24",
+            "fd00:10:10:10::1/64",
+        ]
+        assert tree.value("interfaces wireguard wg0 port") == "51820"
+
+    def test_wildcard_match(self) -> None:
+        """Test that wildcards select peers, not description text."""
+        tree = ConfigTree.from_commands(COMMANDS)
+
+        peers = [p[-1] for p in tree.match("interfaces wireguard wg0 peer *")]
+
+        assert peers == ["mac", "iphone"]
+
+    def test_exists(self) -> None:
+        """Test prefix and valueless-leaf lookups."""
+        tree = ConfigTree.from_commands(COMMANDS)
+
+        assert tree.exists("firewall ipv4 input filter default-log")
+        assert tree.exists(["interfaces", "wireguard"])
+        assert not tree.exists("interfaces ethernet")
+        assert "interfaces wireguard wg0" in tree
+
+    def test_paths_and_len(self) -> None:
+        """Test leaf path enumeration."""
+        tree = ConfigTree.from_commands(["set a b 1", "set a b 2", "set a c"])
+
+        assert list(tree.paths()) == [("a", "b", "1"), ("a", "b", "2"), ("a", "c")]
+        assert list(tree.paths("a b")) == [("a", "b", "1"), ("a", "b", "2")]
+        assert len(tree) == 3
+        assert len(ConfigTree()) == 0
+
+    def test_from_template_with_commented(self) -> None:
+        """Test loading commented placeholder commands from the template."""
+        plain = ConfigTree.from_file(TEMPLATE)
+        full = ConfigTree.from_file(TEMPLATE, include_commented=True)
+
+        assert not any(plain.match("interfaces wireguard wg0 peer *"))
+        assert len(list(full.match("interfaces wireguard wg0 peer *"))) == 2
+        assert full.value("interfaces wireguard wg0 private-key") == "<VyOS秘密鍵>"
@@ -0,0 +1,191 @@
+"""Tests for the firewall hit-counter profiler."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_firewall import (
+    ChainProfile,
+    FirewallRule,
+    mean_evaluations,
+    must_precede,
+    parse_firewall_counters,
+    parse_firewall_rules,
+    profile_firewall,
+    renumber_commands,
+    reorder_rules,
+    rules_overlap,
+)
+
+SHOW_FIREWALL = """\
+Rulesets Information
+
+---------------------------------
+ipv4 Firewall "forward filter"
+
+Rule     Action    Protocol      Packets    Bytes  Conditions
+-------  --------  ----------  ---------  -------  ----------
+10       accept    all              1000    90000  ct state { established, related }
+15       drop      tcp                 5      300  tcp dport 8006 iifname "eth1"  drop
+20       accept    all               200    20000  iifname "eth2"  accept
+80       drop      all                 1       60  iifname "wg0" oifname "eth0"  drop
+85       accept    all              5000   600000  iifname "wg0"  accept
+default  drop      all                10      600
+
+---------------------------------
+ipv4 Firewall "input filter"
+
+Rule     Action    Protocol      Packets    Bytes  Conditions
+-------  --------  ----------  ---------  -------  ----------
+10       accept    all               100     9000  ct state { established, related }
+20       accept    icmp                5      300  meta l4proto icmp  accept
+30       accept    all                 5      300  ip saddr 192.168.1.0/24  accept
+35       accept    all                 5      300  ip saddr 10.10.10.0/24  accept
+40       drop      udp                 1       80  udp dport 51820 ...  drop
+50       accept    udp              9000   900000  udp dport 51820  accept
+default  drop      all                 0        0
+"""
+
+
+def _rule(number: int, *settings: str) -> FirewallRule:
+    chain = parse_firewall_rules(
+        f"set firewall ipv4 input filter rule {number} {s}" for s in settings
+    )
+    return chain["ipv4", "input", "filter"].rules[0]
+
+
+def _profile(commands: list[str], key: tuple[str, str, str]) -> ChainProfile:
+    profiles = profile_firewall(commands, SHOW_FIREWALL.splitlines())
+    return next(p for p in profiles if p.chain.key == key)
+
+
+def _numbers(rules: list[FirewallRule]) -> list[int]:
+    return [r.number for r in rules]
+
+
+class TestParsing:
+    """Tests for rule and counter parsing."""
+
+    def test_template_chains(self, template_commands: list[str]) -> None:
+        """Test that the template's base chains and matchers are parsed."""
+        chains = parse_firewall_rules(template_commands)
+        assert ("ipv4", "input", "filter") in chains
+        assert ("ipv6", "forward", "filter") in chains
+        chain = chains["ipv4", "input", "filter"]
+        assert chain.default_action == "drop"
+        assert _numbers(chain.rules) == [10, 20, 30, 35, 40, 50]
+        rule = chain.rules[4]
+        assert rule.action == "drop"
+        assert rule.protocols == {"udp"}
+        assert rule.destination_ports == ((51820, 51820),)
+        assert rule.has_effects
+        assert chain.rules[0].states == {"established", "related"}
+
+    def test_counters(self) -> None:
+        """Test that per-rule and default counters are read per chain."""
+        counters = parse_firewall_counters(SHOW_FIREWALL.splitlines())
+        forward = counters["ipv4", "forward", "filter"]
+        assert forward.rules[85].packets == 5000
+        assert forward.rules[85].bytes == 600000
+        assert forward.default.packets == 10
+        assert counters["ipv4", "input", "filter"].rules[50].packets == 9000
+
+
+class TestDependencies:
+    """Tests for the ordering constraints between rules."""
+
+    def test_disjoint_interfaces(self) -> None:
+        """Test that rules on different input interfaces never overlap."""
+        a = _rule(10, "action drop", "inbound-interface name eth1")
+        b = _rule(20, "action accept", "inbound-interface name wg0")
+        assert not rules_overlap(a, b)
+        c = _rule(20, "action accept", "inbound-interface name eth*")
+        assert rules_overlap(a, c)
+
+    def test_disjoint_ports_and_addresses(self) -> None:
+        """Test that port ranges and networks separate rules."""
+        a = _rule(10, "action drop", "protocol udp", "destination port 5136-5151")
+        b = _rule(20, "action accept", "protocol tcp_udp", "destination port 9232")
+        assert not rules_overlap(a, b)
+        c = _rule(10, "action drop", "source address 10.0.0.0/8")
+        d = _rule(20, "action accept", "source address 10.1.0.0/16")
+        e = _rule(20, "action accept", "source address 192.168.0.1-192.168.0.9")
+        assert rules_overlap(c, d)
+        assert not rules_overlap(c, e)
+
+    def test_same_verdict_commutes(self) -> None:
+        """Test that overlapping rules may swap only with the same verdict."""
+        accept = _rule(10, "action accept", "source address 192.168.1.0/24")
+        other = _rule(20, "action accept", "protocol udp")
+        drop = _rule(20, "action drop", "protocol udp")
+        assert not must_precede(accept, other)
+        assert must_precede(accept, drop)
+
+    def test_side_effects_pin_order(self) -> None:
+        """Test that logging and rate-limit rules keep their place."""
+        limited = _rule(10, "action accept", "recent count 10")
+        logged = _rule(10, "action accept", "log")
+        plain = _rule(20, "action accept")
+        assert must_precede(limited, plain)
+        assert must_precede(logged, plain)
+
+    def test_negation_is_opaque(self) -> None:
+        """Test that a negated matcher is not mistaken for a positive one."""
+        rule = _rule(10, "action accept", "source address !10.0.0.0/8")
+        assert rule.sources is None
+        assert rules_overlap(rule, _rule(20, "source address 10.1.0.0/16"))
+
+
+class TestReorder:
+    """Tests for the recommended order."""
+
+    def test_no_counters_keeps_order(self, template_commands: list[str]) -> None:
+        """Test that a chain without traffic is left as it is."""
+        chain = parse_firewall_rules(template_commands)["ipv4", "input", "filter"]
+        assert reorder_rules(chain.rules, {}) == chain.rules
+
+    def test_hot_rule_moves_first(self, template_commands: list[str]) -> None:
+        """Test that a hot rule moves ahead together with the rules it must follow."""
+        profile = _profile(template_commands, ("ipv4", "forward", "filter"))
+        # The VPN accept stays behind the established accept and the WXR drop
+        assert _numbers(profile.order) == [10, 80, 85, 20, 15]
+        assert profile.after < profile.before
+        assert profile.changed
+
+    def test_constraints_respected(self, template_commands: list[str]) -> None:
+        """Test that the rate limit stays between the LAN and WireGuard rules."""
+        profile = _profile(template_commands, ("ipv4", "input", "filter"))
+        order = _numbers(profile.order)
+        assert order.index(30) < order.index(40) < order.index(50)
+        rules = profile.chain.rules
+        for i, first in enumerate(rules):
+            for second in rules[i + 1 :]:
+                if must_precede(first, second):
+                    assert order.index(first.number) < order.index(second.number)
+
+    def test_mean_evaluations(self) -> None:
+        """Test the per-packet rule count, default-action packets included."""
+        rules = [FirewallRule(10), FirewallRule(20)]
+        assert mean_evaluations(rules, {10: 1, 20: 1}, default_hits=2) == 1.75
+        assert mean_evaluations(rules, {}) == 0.0
+
+    def test_renumber_commands(self, template_commands: list[str]) -> None:
+        """Test that the rewritten chain keeps every setting under new numbers."""
+        profile = _profile(template_commands, ("ipv4", "forward", "filter"))
+        commands = renumber_commands(profile)
+        assert commands[0] == "delete firewall ipv4 forward filter rule"
+        assert commands[7:10] == [
+            "set firewall ipv4 forward filter rule 30 action accept",
+            "set firewall ipv4 forward filter rule 30 description "
+            "'VPN→LAN: All allowed'",
+            "set firewall ipv4 forward filter rule 30 inbound-interface name wg0",
+        ]
+        old = parse_firewall_rules(template_commands)["ipv4", "forward", "filter"]
+        new = parse_firewall_rules(commands[1:])["ipv4", "forward", "filter"]
+        assert sorted(map(sorted, (r.body for r in new.rules))) == sorted(
+            map(sorted, (r.body for r in old.rules))
+        )
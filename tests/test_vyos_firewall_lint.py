@@ -0,0 +1,273 @@
+"""Tests for the firewall shadowing/redundancy analyzer."""
+
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_apply import compute_delta
+from vyos_firewall import FirewallChain, parse_firewall_rules
+from vyos_firewall_lint import (
+    ChainAnalysis,
+    analyse_chain,
+    analyse_firewall,
+    prove_equivalent,
+)
+from vyos_firewall_sim import FirewallSimulator, parse_selector, sample_flows
+from vyos_schema import validate_commands
+
+
+def _chain(*lines: str, default: str = "drop") -> FirewallChain:
+    prefix = "set firewall ipv4 forward filter"
+    commands = [f"{prefix} default-action {default}"]
+    commands += [f"{prefix} rule {line}" for line in lines]
+    return parse_firewall_rules(commands)["ipv4", "forward", "filter"]
+
+
+def _analyse(*lines: str, default: str = "drop") -> ChainAnalysis:
+    return analyse_chain(_chain(*lines, default=default))
+
+
+def _findings(analysis: ChainAnalysis) -> list[tuple[str, list[int]]]:
+    return [(f.kind, f.rules) for f in analysis.findings]
+
+
+class TestTemplate:
+    """Tests against the configuration template."""
+
+    def test_findings(self, template_commands: list[str]) -> None:
+        """Test that only the foldable runs are found."""
+        analyses, _ = analyse_firewall(template_commands)
+        by_chain = {a.chain.name: a for a in analyses}
+        forward = by_chain["ipv4 forward filter"]
+        # The VPN-to-WXR drop (rule 80) precedes the VPN accept it overlaps
+        assert _findings(forward) == []
+        assert _findings(by_chain["ipv4 input filter"]) == [("folded", [30, 35])]
+        # Rule 15 drops without logging while the default action logs
+        assert _findings(by_chain["ipv6 forward filter"]) == [("folded", [20, 85])]
+        assert by_chain["ipv6 forward filter"].regions > 0
+
+    def test_delta_is_valid(self, template_commands: list[str]) -> None:
+        """Test that the rewrite applies as a small, schema-valid delta."""
+        _, rewritten = analyse_firewall(template_commands)
+        delta = compute_delta(rewritten, template_commands, prune=True)
+        assert "delete firewall ipv6 forward filter rule 85" in delta
+        assert not any("ipv4 forward" in cmd for cmd in delta)
+        assert (
+            "set firewall ipv4 input filter rule 30 source group "
+            "network-group ipv4-input-30-src"
+        ) in delta
+        assert (
+            "set firewall group ipv6-network-group ipv6-input-30-src "
+            "network fd00:10:10:10::/64"
+        ) in delta
+        assert validate_commands(rewritten) == []
+
+    def test_simulator_agrees(self, template_commands: list[str]) -> None:
+        """Test that sampled flows get the same verdicts before and after."""
+        _, rewritten = analyse_firewall(template_commands)
+        before = FirewallSimulator(template_commands, use_numpy=False)
+        after = FirewallSimulator(rewritten, use_numpy=False)
+        rng = random.Random(1)
+        for hook in ("input", "forward"):
+            selector = parse_selector(f"{hook} proto=tcp,udp,icmp dport=0-100,51820")
+            batch = sample_flows(selector, 2000, before.interfaces, rng)
+            assert list(before.evaluate(hook, batch).actions) == list(
+                after.evaluate(hook, batch).actions
+            )
+
+
+class TestRemoval:
+    """Tests for shadowed and redundant rules."""
+
+    def test_shadowed_by_union(self) -> None:
+        """Test a rule covered only by several earlier rules together."""
+        analysis = _analyse(
+            "10 action accept",
+            "10 source address 10.0.0.0/25",
+            "20 action drop",
+            "20 source address 10.0.0.128/25",
+            "30 action drop",
+            "30 source address 10.0.0.0/24",
+            "30 protocol tcp",
+            default="reject",
+        )
+        assert _findings(analysis) == [("shadowed", [30])]
+        assert str(analysis.findings[0]) == "rule 30: shadowed by rules 10, 20"
+
+    def test_subsumed_by_later_rule(self) -> None:
+        """Test that a rule a later one repeats is redundant, not the later one."""
+        analysis = _analyse(
+            "10 action accept",
+            "10 source address 10.0.0.0/25",
+            "20 action accept",
+            "20 source address 10.0.0.0/24",
+            default="accept",
+        )
+        assert _findings(analysis) == [("redundant", [10]), ("redundant", [20])]
+        analysis = _analyse(
+            "10 action accept",
+            "10 source address 10.0.0.0/25",
+            "20 action accept",
+            "20 source address 10.0.0.0/24",
+        )
+        assert _findings(analysis) == [("redundant", [10])]
+
+    def test_redundant_needs_same_logging(self) -> None:
+        """Test that a silent drop is not redundant before a logged default."""
+        lines = (
+            "15 action drop",
+            "15 protocol tcp",
+            "15 destination port 8006",
+            "15 inbound-interface name eth1",
+        )
+        assert _findings(_analyse(*lines)) == [("redundant", [15])]
+        chain = _chain(*lines)
+        chain.default_log = True
+        assert analyse_chain(chain).findings == []
+
+    def test_hidden_condition(self) -> None:
+        """Test that a rate limit only shadows the packets it can catch."""
+        analysis = _analyse(
+            "10 action drop",
+            "10 protocol udp",
+            "10 destination port 51820",
+            "10 recent count 10",
+            "20 action accept",
+            "20 protocol udp",
+            "20 destination port 51820",
+            "30 action accept",
+            "30 protocol udp",
+            "30 destination port 51820",
+            "30 recent count 10",
+        )
+        # Rule 30 only matches rate-limited packets, which rule 10 drops
+        assert _findings(analysis) == [("shadowed", [30])]
+
+    def test_unmodelled_action_skips_chain(self) -> None:
+        """Test that chains with jumps are left alone."""
+        analysis = _analyse(
+            "10 action jump",
+            "10 jump-target WAN_IN",
+            "20 action accept",
+            "30 action accept",
+        )
+        assert analysis.skipped == "action jump not modelled"
+        assert not analysis.changed
+
+
+class TestFolding:
+    """Tests for folding rule runs into groups."""
+
+    def test_port_group(self) -> None:
+        """Test that port lists are split into group members."""
+        analysis = _analyse(
+            "10 action accept",
+            "10 protocol tcp",
+            "10 destination port 80,443",
+            "20 action accept",
+            "20 protocol tcp",
+            "20 destination port 8000-8080",
+        )
+        assert _findings(analysis) == [("folded", [10, 20])]
+        groups = analysis.groups
+        assert groups["port-group", "ipv4-forward-10-dport"] == [
+            "80",
+            "443",
+            "8000-8080",
+        ]
+        assert analysis.rules[0].body[-1] == (
+            "destination",
+            "group",
+            "port-group",
+            "ipv4-forward-10-dport",
+        )
+
+    def test_address_kinds(self) -> None:
+        """Test that hosts join prefixes in network groups but not ranges."""
+        analysis = _analyse(
+            "10 action drop",
+            "10 source address 192.0.2.1",
+            "20 action drop",
+            "20 source address 198.51.100.0/24",
+            default="accept",
+        )
+        assert analysis.groups == {
+            ("network-group", "ipv4-forward-10-src"): [
+                "192.0.2.1/32",
+                "198.51.100.0/24",
+            ]
+        }
+        analysis = _analyse(
+            "10 action drop",
+            "10 source address 192.0.2.1-192.0.2.9",
+            "20 action drop",
+            "20 source address 198.51.100.0/24",
+            default="accept",
+        )
+        assert analysis.findings == []
+
+    def test_fold_across_independent_rule(self) -> None:
+        """Test that a rule may join a run past rules it cannot conflict with."""
+        lines = [
+            "10 action accept",
+            "10 source address 10.0.1.0/24",
+            "20 action drop",
+            "20 source address 10.0.2.0/24",
+            "30 action accept",
+            "30 source address 10.0.3.0/24",
+        ]
+        analysis = _analyse(*lines, default="accept")
+        assert _findings(analysis) == [("redundant", [10]), ("redundant", [30])]
+        analysis = _analyse(*lines, default="reject")
+        assert _findings(analysis) == [("folded", [10, 30])]
+        assert [r.number for r in analysis.rules] == [10, 20]
+        # A drop overlapping rule 30 pins it behind
+        lines[3] = "20 source address 10.0.3.0/25"
+        assert _analyse(*lines, default="reject").findings == []
+
+
+class TestProof:
+    """Tests for the equivalence proof."""
+
+    def test_counterexample(self) -> None:
+        """Test that a changed verdict yields a packet that shows it."""
+        original = _chain(
+            "10 action accept",
+            "10 inbound-interface name eth2",
+            "20 action drop",
+            "20 protocol tcp",
+            "20 destination port 22",
+        )
+        reordered = _chain(
+            "10 action drop",
+            "10 protocol tcp",
+            "10 destination port 22",
+            "20 action accept",
+            "20 inbound-interface name eth2",
+        )
+        _, mismatch = prove_equivalent(original, reordered)
+        assert mismatch is not None
+        assert "in=eth2" in mismatch
+        assert "proto=tcp" in mismatch
+        assert "dport=22" in mismatch
+        regions, mismatch = prove_equivalent(original, original)
+        assert mismatch is None
+        assert regions > 1
+
+    def test_wildcard_interfaces(self) -> None:
+        """Test that a wildcard covers the names it matches and no others."""
+        wildcard = _chain("10 action accept", "10 inbound-interface name eth*")
+        names = _chain(
+            "10 action accept",
+            "10 inbound-interface name eth0",
+            "20 action accept",
+            "20 inbound-interface name eth1",
+        )
+        _, mismatch = prove_equivalent(wildcard, names)
+        assert mismatch is not None
+        assert "in=eth*" in mismatch
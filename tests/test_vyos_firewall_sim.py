@@ -0,0 +1,223 @@
+"""Tests for the offline firewall policy simulator."""
+
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_firewall_sim import (
+    FirewallSimulator,
+    Flow,
+    FlowBatch,
+    PolicyError,
+    check_policy,
+    load_commands,
+    np,
+    parse_policy,
+    parse_selector,
+    sample_flows,
+)
+
+SCRIPTS = Path(__file__).parent.parent / "scripts"
+TEMPLATE = SCRIPTS / "vyos-config-template.txt"
+POLICY = SCRIPTS / "firewall-policy.txt"
+
+BACKENDS = [
+    False,
+    pytest.param(
+        True, marks=pytest.mark.skipif(np is None, reason="numpy not installed")
+    ),
+]
+
+
+def _simulator(extra: list[str] | None = None, **kwargs: object) -> FirewallSimulator:
+    return FirewallSimulator(load_commands(TEMPLATE) + (extra or []), **kwargs)
+
+
+class TestTemplatePolicy:
+    """Tests for the shipped policy against the template."""
+
+    @pytest.mark.parametrize("use_numpy", BACKENDS)
+    def test_policy_holds(self, use_numpy: bool) -> None:
+        """Test that every expectation of firewall-policy.txt holds."""
+        simulator = _simulator(use_numpy=use_numpy)
+        expectations = parse_policy(POLICY.read_text(encoding="utf-8").splitlines())
+
+        results = check_policy(simulator, expectations, samples=2000)
+
+        assert [r.expectation.comment for r in results if not r.passed] == []
+        assert all(r.checked > 0 for r in results)
+
+    def test_missing_rule_detected(self) -> None:
+        """Test that dropping the WireGuard accept rule breaks the policy."""
+        commands = [c for c in load_commands(TEMPLATE) if "filter rule 50 " not in c]
+        expectations = parse_policy(
+            ["accept input proto=udp dport=51820 state=new  # WireGuard"]
+        )
+
+        (result,) = check_policy(FirewallSimulator(commands), expectations, 500)
+
+        assert result.failures == result.checked == 500
+        assert result.example is not None
+        _, action, chain, rule = result.example
+        assert action == "drop"
+        assert rule == 0
+
+    def test_shadowed_drop_detected(self) -> None:
+        """Test that the VPN-to-WXR drop fails when numbered after the VPN accept."""
+        commands = [
+            c.replace("forward filter rule 80 ", "forward filter rule 91 ")
+            for c in load_commands(TEMPLATE)
+        ]
+        expectations = parse_policy(
+            ["drop forward in=wg0 out=eth0 family=ipv4 state=new  # VPN to WXR"]
+        )
+
+        (result,) = check_policy(FirewallSimulator(commands), expectations, 500)
+
+        assert result.failures == result.checked == 500
+        assert result.example is not None
+        _, action, _, rule = result.example
+        assert (action, rule) == ("accept", 85)
+
+    def test_first_matching_line_wins(self) -> None:
+        """Test that flows covered by an earlier line are not checked again."""
+        expectations = parse_policy(
+            [
+                "accept forward in=eth2",
+                "drop forward in=eth0,eth1,eth2 state=new",
+            ]
+        )
+
+        results = check_policy(_simulator(), expectations, samples=900)
+
+        assert all(r.passed for r in results)
+        assert 0 < results[1].checked < 900
+
+
+class TestVerdicts:
+    """Tests for single-flow verdicts."""
+
+    def test_lan_to_wan(self) -> None:
+        """Test that LAN traffic is forwarded by the eth2 rule."""
+        flow = Flow("192.168.1.10", "8.8.8.8", "tcp", 40000, 443, "eth2", "eth0")
+        assert _simulator().verdict("forward", flow) == (
+            "accept",
+            "ipv4 forward filter",
+            20,
+        )
+
+    def test_blocked_port(self) -> None:
+        """Test that WAN to :8006 is dropped by its own rule."""
+        flow = Flow("2001:db8::1", "2001:db8:1::5", "tcp", 40000, 8006, "eth1", "eth2")
+        assert _simulator().verdict("forward", flow) == (
+            "drop",
+            "ipv6 forward filter",
+            15,
+        )
+
+    def test_recent_is_approximated(self) -> None:
+        """Test that the rate-limit rule is reported and never triggers."""
+        simulator = _simulator()
+        flow = Flow("203.0.113.9", "192.168.100.2", "udp", 5555, 51820, "eth0")
+
+        assert simulator.verdict("input", flow)[2] == 50
+        assert any("recent" in note for note in simulator.notes)
+
+    def test_no_chain_accepts(self) -> None:
+        """Test that a hook without a filter chain accepts everything."""
+        flow = Flow("192.168.1.1", "8.8.8.8", "udp", 123, 123, "", "eth0")
+        assert _simulator().verdict("output", flow) == ("accept", "", 0)
+
+    def test_groups_and_jump(self) -> None:
+        """Test group matchers and rules in a jumped-to named chain."""
+        simulator = FirewallSimulator(
+            [
+                "set firewall group address-group ADMINS address 10.0.0.5",
+                "set firewall group port-group WEB port 80",
+                "set firewall group port-group WEB port 8000-8080",
+                "set firewall ipv4 name SERVICES default-action return",
+                "set firewall ipv4 name SERVICES rule 10 action accept",
+                "set firewall ipv4 name SERVICES rule 10 protocol tcp",
+                "set firewall ipv4 name SERVICES rule 10 destination group "
+                "port-group WEB",
+                "set firewall ipv4 input filter default-action drop",
+                "set firewall ipv4 input filter rule 10 action jump",
+                "set firewall ipv4 input filter rule 10 jump-target SERVICES",
+                "set firewall ipv4 input filter rule 20 action accept",
+                "set firewall ipv4 input filter rule 20 source group "
+                "address-group ADMINS",
+            ]
+        )
+
+        def verdict(src: str, port: int) -> tuple[str, str, int]:
+            return simulator.verdict("input", Flow(src, "10.0.0.1", "tcp", 1, port))
+
+        assert verdict("192.0.2.1", 8080) == ("accept", "ipv4 name SERVICES", 10)
+        assert verdict("10.0.0.5", 22) == ("accept", "ipv4 input filter", 20)
+        assert verdict("192.0.2.1", 22) == ("drop", "ipv4 input filter", 0)
+
+
+class TestSampling:
+    """Tests for selectors and flow sampling."""
+
+    def test_samples_stay_in_selector(self) -> None:
+        """Test that sampled flows match the selector they came from."""
+        selector = parse_selector(
+            "forward in=eth2 src=192.168.1.0/24 proto=tcp,udp dport=5136-5151"
+        )
+        simulator = _simulator()
+        batch = sample_flows(selector, 300, simulator.interfaces, random.Random(1))
+
+        assert len(simulator.matching(selector, batch)) == 300
+        flow = batch.flow(0)
+        assert flow.inbound == "eth2"
+        assert 5136 <= flow.dport <= 5151
+
+    def test_family_follows_addresses(self) -> None:
+        """Test that an address alternative fixes the address family."""
+        assert parse_selector("input src=fe80::/10").families == (6,)
+        with pytest.raises(PolicyError):
+            parse_selector("input src=10.0.0.0/8 dst=::1")
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "permit input",
+            "accept sideways",
+            "accept input port=22",
+            "drop input dport=x",
+        ],
+    )
+    def test_invalid_policy(self, line: str) -> None:
+        """Test that malformed policy lines are rejected with their number."""
+        with pytest.raises(PolicyError, match="Line 1"):
+            parse_policy([line])
+
+    @pytest.mark.skipif(np is None, reason="numpy not installed")
+    def test_backends_agree(self) -> None:
+        """Test that numpy and pure-Python evaluation give the same verdicts."""
+        extra = [
+            "set firewall ipv6 forward filter rule 5 action drop",
+            "set firewall ipv6 forward filter rule 5 destination address "
+            "2001:db8::/32",
+        ]
+        fast, slow = _simulator(extra, use_numpy=True), _simulator(extra)
+        for hook in ("input", "forward"):
+            batch = sample_flows(parse_selector(hook), 5000, fast.interfaces)
+            assert fast.evaluate(hook, batch) == slow.evaluate(hook, batch)
+
+    def test_batch_round_trip(self) -> None:
+        """Test that flows survive the columnar representation."""
+        flows = [
+            Flow("10.0.0.1", "10.0.0.2", "udp", 1, 2, "eth0", "", "related"),
+            Flow("2001:db8::1", "2001:db8::2", "icmpv6", inbound="wg0"),
+        ]
+        batch = FlowBatch.from_flows(flows)
+        assert [batch.flow(i) for i in range(len(batch))] == flows
@@ -0,0 +1,191 @@
+"""Tests for the MAP-E calculator and NAT generator."""
+
+from __future__ import annotations
+
+import ipaddress
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_mape import (
+    MapeError,
+    MappingRule,
+    compute_mape,
+    env_lines,
+    nat_commands,
+    parse_rules,
+    select_rule,
+    source_port_shares,
+)
+from vyos_schema import validate_commands
+
+SCRIPTS = Path(__file__).parent.parent / "scripts"
+TEMPLATE = SCRIPTS / "vyos-config-template.txt"
+
+# RFC 7597 Appendix A, example 1
+RFC_RULE = MappingRule(
+    ipaddress.IPv6Network("2001:db8::/40"),
+    ipaddress.IPv4Network("192.0.2.0/24"),
+    ea_length=16,
+    psid_offset=6,
+)
+# Same rule with the PSID offset of the Japanese services
+JP_RULE = MappingRule(RFC_RULE.ipv6_prefix, RFC_RULE.ipv4_prefix, 16)
+
+
+def _ports(text: str) -> list[tuple[int, int]]:
+    ranges = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        ranges.append((int(low), int(high or low)))
+    return ranges
+
+
+class TestCompute:
+    """Tests for compute_mape."""
+
+    def test_rfc_example(self) -> None:
+        """Test the worked example of RFC 7597."""
+        params = compute_mape("2001:db8:12:3400::/56", RFC_RULE, iid_format="rfc7597")
+        assert str(params.ipv4_address) == "192.0.2.18"
+        assert params.psid == 0x34
+        assert params.ce_address == ipaddress.IPv6Address(
+            "2001:db8:12:3400:0:c000:212:34"
+        )
+        blocks = params.port_blocks()
+        assert blocks[0] == (1232, 1235)
+        assert blocks[-1] == (64720, 64723)
+        assert len(blocks) == 63
+        assert params.port_count == 252
+
+    def test_template_port_blocks(self) -> None:
+        """Test that PSID 65 with offset 4 gives the template's 15 blocks."""
+        params = compute_mape("2001:db8:12:4100::/56", JP_RULE)
+        assert params.psid == 65
+        assert params.block_size == 16
+        template = re.findall(
+            r"translation port '([\d-]+)'", TEMPLATE.read_text(encoding="utf-8")
+        )
+        assert [r for t in template for r in _ports(t)] == params.port_blocks()
+        assert params.port_blocks()[:2] == [(5136, 5151), (9232, 9247)]
+
+    def test_draft_interface_id(self) -> None:
+        """Test the v6プラス CE address layout (IPv4 at bit 72, PSID at 104)."""
+        params = compute_mape("2001:db8:12:4100::/56", JP_RULE)
+        assert params.ce_address == ipaddress.IPv6Address(
+            "2001:db8:12:4100:c0:2:1200:4100"
+        )
+
+    def test_host_bits_ignored(self) -> None:
+        """Test that an address inside the delegated prefix works too."""
+        params = compute_mape("2001:db8:12:4101::1/56", JP_RULE)
+        assert params.prefix == ipaddress.IPv6Network("2001:db8:12:4100::/56")
+
+    def test_subnet_id_ignored(self) -> None:
+        """Test that a LAN /64 with subnet ID 1 maps like its delegation."""
+        params = compute_mape("2001:db8:12:4101::/64", JP_RULE)
+        expected = compute_mape("2001:db8:12:4100::/56", JP_RULE)
+        assert params == expected
+        assert params.ce_address == ipaddress.IPv6Address(
+            "2001:db8:12:4100:c0:2:1200:4100"
+        )
+
+    def test_rule_mismatch(self) -> None:
+        """Test that prefixes outside the rule or too short are rejected."""
+        with pytest.raises(MapeError, match="not inside"):
+            compute_mape("2001:db9:12:3400::/56", RFC_RULE)
+        with pytest.raises(MapeError, match="shorter"):
+            compute_mape("2001:db8:12::/48", RFC_RULE)
+        too_long = MappingRule(RFC_RULE.ipv6_prefix, RFC_RULE.ipv4_prefix, 24, 10)
+        with pytest.raises(MapeError, match="exceeds 16 bits"):
+            compute_mape("2001:db8:12:3456::/64", too_long)
+
+
+class TestRules:
+    """Tests for rule tables."""
+
+    def test_parse_and_select(self) -> None:
+        """Test that the longest covering rule prefix wins."""
+        rules = parse_rules(
+            [
+                "# ipv6 prefix   ipv4 prefix    ea  offset",
+                "2001:db8::/32   198.51.100.0/24 24",
+                "2001:db8::/40   192.0.2.0/24    16  6  # more specific",
+                "",
+            ]
+        )
+        assert len(rules) == 2
+        assert rules[0].psid_offset == 4
+        assert select_rule(rules, "2001:db8:12:3400::/56") == RFC_RULE
+        assert select_rule(rules, "2001:db8:100::/56") == rules[0]
+        with pytest.raises(MapeError, match="No mapping rule"):
+            select_rule(rules, "2001:db9::/56")
+
+    def test_malformed_line(self) -> None:
+        """Test that errors name the line."""
+        with pytest.raises(MapeError, match="Line 2"):
+            parse_rules(["2001:db8::/40 192.0.2.0/24 16", "2001:db8::/40 x 16"])
+
+
+class TestNat:
+    """Tests for the generated NAT rules."""
+
+    def test_every_block_is_used(self) -> None:
+        """Test that the rules split the source ports instead of shadowing."""
+        params = compute_mape("2001:db8:12:4100::/56", JP_RULE)
+        commands = nat_commands(params)
+        assert validate_commands(commands) == []
+        rules = {}
+        for command in commands:
+            match = re.match(r"set nat source rule (\d+) (.*)", command)
+            assert match
+            rules.setdefault(int(match[1]), []).append(match[2])
+        assert sorted(rules) == list(range(200, 215))
+        assert "translation port 5136-5151" in rules[200]
+        assert "translation address 192.0.2.18" in rules[214]
+        # Every rule but the last has its own share of the source ports
+        shares = [s for r in rules.values() for s in r if s.startswith("source port")]
+        assert len(shares) == 14
+        assert not any(s.startswith("source port") for s in rules[214])
+
+    def test_shares_partition_ports(self) -> None:
+        """Test that the source port shares are disjoint and complete."""
+        shares = source_port_shares(15)
+        ports = sorted(
+            port
+            for share in shares
+            for low, high in _ports(share)
+            for port in range(low, high + 1)
+        )
+        assert ports == list(range(1, 65536))
+        # The Windows ephemeral range reaches every rule
+        windows = [s for s in shares if any(high >= 49152 for _, high in _ports(s))]
+        assert len(windows) == 15
+
+    def test_contiguous_blocks_merge(self) -> None:
+        """Test that a PSID offset of 0 needs a single rule."""
+        rule = MappingRule(JP_RULE.ipv6_prefix, JP_RULE.ipv4_prefix, 16, 0)
+        params = compute_mape("2001:db8:12:4100::/56", rule)
+        assert params.port_ranges() == [(16640, 16895)]
+        commands = nat_commands(params, first_rule=300, interface="tun0")
+        assert commands == [
+            "set nat source rule 300 outbound-interface name tun0",
+            "set nat source rule 300 protocol tcp_udp",
+            "set nat source rule 300 translation address 192.0.2.18",
+            "set nat source rule 300 translation port 16640-16895",
+        ]
+
+    def test_env_lines(self) -> None:
+        """Test the setup-mape.env settings."""
+        params = compute_mape("2001:db8:12:4100::/56", JP_RULE)
+        assert env_lines(params) == [
+            "MAPE_CE_ADDRESS=2001:db8:12:4100:c0:2:1200:4100",
+            "MAPE_BR_ADDRESS=2001:260:700:1::1:275",
+            "MAPE_IPV4_ADDRESS=192.0.2.18",
+            "MAPE_FIRST_PORT_RANGE=5136-5151",
+        ]
@@ -0,0 +1,234 @@
+"""Tests for the delegated-prefix watcher."""
+
+from __future__ import annotations
+
+import ipaddress
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_apply import MARKER
+from vyos_config_check import SNAPSHOT_COMMAND
+from vyos_mape import compute_mape, nat_commands, parse_rules
+from vyos_prefix_watch import (
+    ADDRESS_COMMAND,
+    MONITOR_COMMAND,
+    SETTLE_SECONDS,
+    Delegation,
+    PrefixError,
+    check_once,
+    configured_prefix,
+    drop_overwritten,
+    observed_prefix,
+    parse_delegations,
+    plan_renumbering,
+    renumber_commands,
+    tunnel_script,
+    wait_for_change,
+    watch,
+)
+from vyos_schema import validate_commands
+from vyos_ssh import SessionStats
+
+OLD = ipaddress.IPv6Network("2404:7a82:4d02:4100::/56")
+NEW = ipaddress.IPv6Network("2404:7a82:4d02:4200::/56")
+RULES = parse_rules(["2404:7a80::/30 133.200.0.0/14 26"])
+DELEGATION = Delegation("eth1", "eth2", 56, 1, 1)
+
+
+def _running(commands: list[str]) -> list[str]:
+    """Template with the MAP-E NAT rules rendered for the old prefix."""
+    return commands + nat_commands(compute_mape(OLD, RULES[0]))
+
+
+def _addr_line(address: str, flags: str = "") -> str:
+    return (
+        f"4: eth2    inet6 {address} scope global {flags}\\       "
+        "valid_lft forever preferred_lft forever"
+    )
+
+
+class FakeRouter:
+    """Session stand-in answering the watcher's commands."""
+
+    def __init__(self, commands: list[str], addresses: list[str]) -> None:
+        self.outputs = {
+            SNAPSHOT_COMMAND: "\n".join(commands),
+            ADDRESS_COMMAND.format(interface="eth2"): "\n".join(addresses),
+        }
+        self.calls: list[tuple[str, str | None]] = []
+        self.stats = SessionStats()
+        self.error: str | None = None
+
+    def run(self, command: str, input: str | None = None) -> tuple[int, str, str]:
+        self.calls.append((command, input))
+        if command == "vbash -s":
+            return 0, f"{MARKER} COMMIT 1 3 0.0 0.5 0\n{MARKER} DONE\n", ""
+        if command == "sudo sh -s":
+            return 0, "", ""
+        if command in self.outputs:
+            return 0, self.outputs[command], ""
+        return 124, "", ""
+
+    def close(self) -> None:
+        pass
+
+
+class TestDelegation:
+    """Tests for reading the delegation and the prefixes."""
+
+    def test_template_delegation(self, template_commands: list[str]) -> None:
+        """Test that the template's pd 0 numbers eth2 from a /56."""
+        assert parse_delegations(template_commands) == [DELEGATION]
+        assert configured_prefix(template_commands, DELEGATION) == OLD
+
+    def test_observed_prefers_new_address(self) -> None:
+        """Test that the dhcp6c address of a new delegation wins."""
+        output = "\n".join(
+            [
+                _addr_line("2404:7a82:4d02:4101::1/64"),
+                _addr_line("2404:7a82:4d02:4301::1/64", "deprecated"),
+                _addr_line("2404:7a82:4d02:4201::1/64", "dynamic"),
+                # Other subnet ID or interface ID: not from the delegation
+                _addr_line("2404:7a82:4d02:4202::1/64"),
+                _addr_line("2404:7a82:4d02:4401::2/64"),
+            ]
+        )
+        assert observed_prefix(output, DELEGATION, OLD) == NEW
+        only_static = _addr_line("2404:7a82:4d02:4101::1/64")
+        assert observed_prefix(only_static, DELEGATION, OLD) == OLD
+        assert observed_prefix("", DELEGATION, OLD) is None
+
+
+class TestRenumber:
+    """Tests for renumbering the configuration."""
+
+    def test_template_delta(self, template_commands: list[str]) -> None:
+        """Test that only the LAN address and RA prefix change."""
+        plan = plan_renumbering(template_commands, OLD, NEW)
+        assert plan.commands == [
+            "delete interfaces ethernet eth2 address 2404:7a82:4d02:4101::1/64",
+            "set interfaces ethernet eth2 address 2404:7a82:4d02:4201::1/64",
+            "delete service router-advert interface eth2 prefix "
+            "2404:7a82:4d02:4101::/64",
+            "set service router-advert interface eth2 prefix 2404:7a82:4d02:4201::/64",
+        ]
+        assert validate_commands(plan.commands) == []
+        assert tunnel_script(plan) == ""
+
+    def test_address_forms(self) -> None:
+        """Test negated addresses, ranges and addresses outside the prefix."""
+        prefix = "set firewall ipv6 forward filter rule 10"
+        commands = [
+            f"{prefix} source address '!2404:7a82:4d02:4101::/64'",
+            f"{prefix} destination address "
+            "2404:7a82:4d02:4101::10-2404:7a82:4d02:4101::20",
+            "set protocols static route6 2001:260:700:1::1:275/128 next-hop "
+            "fe80::1 interface 'eth1'",
+        ]
+        assert renumber_commands(commands, OLD, NEW) == [
+            f"{prefix} source address '!2404:7a82:4d02:4201::/64'",
+            f"{prefix} destination address "
+            "2404:7a82:4d02:4201::10-2404:7a82:4d02:4201::20",
+            commands[2],
+        ]
+
+    def test_length_change_rejected(self) -> None:
+        """Test that a delegation of another size is not renumbered."""
+        with pytest.raises(PrefixError, match="length changed"):
+            renumber_commands([], OLD, ipaddress.IPv6Network("2404:7a82:4d02::/48"))
+
+    def test_mape_nat_and_tunnel(self, template_commands: list[str]) -> None:
+        """Test that NAT rules are updated in place and the tunnel follows."""
+        plan = plan_renumbering(_running(template_commands), OLD, NEW, RULES)
+        assert plan.old_mape is not None and plan.new_mape is not None
+        assert plan.new_mape.psid == plan.old_mape.psid + 1
+        nat = [cmd for cmd in plan.commands if " nat " in f" {cmd}"]
+        # Same rule numbers: only the translation ports change
+        assert len(nat) == 15
+        assert nat[0] == "set nat source rule 200 translation port 5152-5167"
+        assert validate_commands(plan.commands) == []
+
+        script = tunnel_script(plan)
+        new_ce, old_ce = plan.new_mape.ce_address, plan.old_mape.ce_address
+        assert f"ip -6 addr replace {new_ce}/64 dev eth1" in script
+        assert "ip -6 tunnel change mape mode ip4ip6 " in script
+        assert f"local {new_ce}" in script
+        assert f"ip -6 addr del {old_ce}/64 dev eth1" in script
+        assert f"s|^MAPE_CE_ADDRESS=.*|MAPE_CE_ADDRESS={new_ce}|" in script
+
+    def test_drop_overwritten(self) -> None:
+        """Test that only deletes of single-valued leaves are dropped."""
+        delta = [
+            "delete nat source rule 200 translation port 5136-5151",
+            "delete interfaces ethernet eth2 address 2001:db8::1/64",
+            "set nat source rule 200 translation port 5152-5167",
+            "set interfaces ethernet eth2 address 2001:db8:1::1/64",
+        ]
+        assert drop_overwritten(delta) == delta[1:]
+
+
+class TestRouter:
+    """Tests against a router stand-in."""
+
+    def test_renumbers_on_change(self, template_commands: list[str]) -> None:
+        """Test that a new prefix is applied and the tunnel updated."""
+        router = FakeRouter(
+            _running(template_commands),
+            [
+                _addr_line("2404:7a82:4d02:4101::1/64"),
+                _addr_line("2404:7a82:4d02:4201::1/64"),
+            ],
+        )
+        plan = check_once(router, RULES)
+        assert plan is not None and plan.new_prefix == NEW
+        commands = [command for command, _ in router.calls]
+        assert commands[-2:] == ["vbash -s", "sudo sh -s"]
+        script = router.calls[-2][1] or ""
+        assert "set interfaces ethernet eth2 address 2404:7a82:4d02:4201::1/64" in (
+            script
+        )
+
+    def test_unchanged_prefix(self, template_commands: list[str]) -> None:
+        """Test that nothing is sent while the prefix is unchanged."""
+        router = FakeRouter(
+            _running(template_commands),
+            [_addr_line("2404:7a82:4d02:4101::1/64")],
+        )
+        assert check_once(router, RULES) is None
+        assert [command for command, _ in router.calls] == [
+            SNAPSHOT_COMMAND,
+            ADDRESS_COMMAND.format(interface="eth2"),
+        ]
+
+    def test_wait_for_change(self) -> None:
+        """Test that an address event wakes the watcher after settling."""
+        router = FakeRouter([], [])
+        monitor = MONITOR_COMMAND.format(seconds=30, interface="eth2")
+        slept: list[float] = []
+        assert not wait_for_change(router, "eth2", 30, slept.append)
+        assert slept == []
+        router.outputs[monitor] = "3: eth2    inet6 2404:7a82:4d02:4201::1/64 ..."
+        assert wait_for_change(router, "eth2", 30, slept.append)
+        assert slept == [SETTLE_SECONDS]
+
+    def test_watch_reconnects(self, template_commands: list[str]) -> None:
+        """Test that a failed check opens a new session."""
+        sessions: list[FakeRouter] = []
+
+        def factory(*args: object, **kwargs: object) -> FakeRouter:
+            # The first router has no configuration to read
+            router = FakeRouter(_running(template_commands) if sessions else [], [])
+            sessions.append(router)
+            return router
+
+        code = watch(
+            "r1", "vyos", None, RULES, interval=1, iterations=2,
+            session_factory=factory, sleep=lambda _: None,
+        )
+        assert code == 0
+        assert len(sessions) == 2
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import itertools
+import json
 import sys
 from io import StringIO
 from pathlib import Path
@@ -16,15 +18,24 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "secrets" / "scripts"))
 
 from vyos_restore import (
     SECRET_MAPPINGS,
+    CompiledTemplate,
+    PlaceholderSubstituter,
     SecretMapping,
     check_missing_secrets,
     generate_restore_script,
     get_secret_value,
+    iter_backup_commands,
+    iter_replace_placeholders,
     load_env_file,
+    main,
     parse_backup_file,
+    render_sites,
     replace_placeholders,
+    template_cache_path,
 )
 
+TEMPLATE = Path(__file__).parent.parent / "scripts" / "vyos-config-template.txt"
+
 if TYPE_CHECKING:
     pass
 
@@ -204,6 +215,24 @@ class TestParseBackupFile:
 
         assert result == ["set foo", "set bar"]
 
+    def test_parse_boot_file(self, tmp_path: Path) -> None:
+        """Test that a config.boot backup is converted to set commands."""
+        backup = tmp_path / "config.boot"
+        backup.write_text(
+            dedent("""
+            // header comment
+            interfaces {
+                wireguard wg0 {
+                    private-key "<VyOS秘密鍵>"
+                }
+            }
+        """).strip()
+        )
+
+        result = parse_backup_file(backup)
+
+        assert result == ["set interfaces wireguard wg0 private-key '<VyOS秘密鍵>'"]
+
 
 class TestReplacePlaceholders:
     """Tests for replace_placeholders function."""
@@ -252,6 +281,99 @@ class TestReplacePlaceholders:
         assert warnings == []
 
 
+def _reference_replace(
+    commands: list[str], env_vars: dict[str, str]
+) -> tuple[list[str], list[str]]:
+    """Per-mapping substitution, as replace_placeholders originally did it."""
+    processed: list[str] = []
+    warnings: list[str] = []
+    for cmd in commands:
+        original_cmd = cmd
+        is_commented = cmd.startswith("# ")
+        if is_commented:
+            cmd = cmd[2:]
+        for mapping in SECRET_MAPPINGS:
+            if mapping.pattern in cmd:
+                value = get_secret_value(mapping.env_var, env_vars)
+                if value:
+                    cmd = cmd.replace(mapping.pattern, value)
+                else:
+                    warnings.append(
+                        f"Missing {mapping.env_var} for placeholder {mapping.pattern}"
+                    )
+                    cmd = original_cmd
+                    break
+        if cmd != original_cmd or not is_commented:
+            processed.append(cmd)
+    return processed, warnings
+
+
+class TestPlaceholderSubstituter:
+    """Tests for PlaceholderSubstituter class."""
+
+    COMMANDS = [
+        "set system host-name 'router'",
+        "# set system login user vyos authentication public-keys k key '<公開鍵>'",
+        "# set interfaces wireguard wg0 peer mac public-key '<Mac公開鍵>'",
+        "# set service dns dynamic name cf password '<Cloudflare APIトークン>'",
+        "set interfaces ethernet eth1 dhcpv6-options duid '<DUID>'",
+        "# set x '<DUID>' '<Mac公開鍵>' '<DUID>' '<VyOS秘密鍵>'",
+        "# set x '<MAP-E IPv4>' '<iPhone公開鍵>' '<Cloudflare APIトークン>'",
+        "# set system option '<not a placeholder>'",
+        "set firewall group address-group a address '10.0.0.1'",
+    ]
+
+    @pytest.mark.parametrize(
+        "present",
+        [
+            [],
+            ["VYOS_SSH_PUBKEY", "VYOS_WG_MAC_PUBKEY"],
+            ["VYOS_DHCPV6_DUID", "VYOS_WG_MAC_PUBKEY"],
+            ["VYOS_MAPE_IPV4", "VYOS_CF_ACCOUNT_API_TOKEN"],
+            [m.env_var for m in SECRET_MAPPINGS],
+        ],
+    )
+    def test_matches_per_mapping_substitution(self, present: list[str]) -> None:
+        """Test that output and warnings equal per-mapping substitution."""
+        env_vars = {name: f"value-of-{name}" for name in present}
+
+        with patch.dict("os.environ", {}, clear=True):
+            assert replace_placeholders(self.COMMANDS, env_vars) == (
+                _reference_replace(self.COMMANDS, env_vars)
+            )
+
+    def test_secrets_resolved_once(self) -> None:
+        """Test that each secret is looked up once, not once per command."""
+        with patch(
+            "vyos_restore.get_secret_value", return_value="v"
+        ) as lookup:
+            replace_placeholders(self.COMMANDS * 100, {})
+
+        assert lookup.call_count == len(SECRET_MAPPINGS)
+
+    def test_many_placeholders(self) -> None:
+        """Test substitution with hundreds of mappings in one line."""
+        mappings = [
+            SecretMapping(f"<S{i}>", f"VYOS_S{i}", f"secret {i}") for i in range(500)
+        ]
+        env_vars = {f"VYOS_S{i}": f"v{i}" for i in range(500)}
+        substituter = PlaceholderSubstituter(env_vars, mappings)
+
+        result, warning = substituter.substitute(
+            "# set x " + " ".join(f"<S{i}>" for i in range(500))
+        )
+
+        assert result == "set x " + " ".join(f"v{i}" for i in range(500))
+        assert warning is None
+
+    def test_non_bracket_patterns(self) -> None:
+        """Test that arbitrary literal patterns are still supported."""
+        mappings = [SecretMapping("@@KEY@@", "VYOS_KEY", "key")]
+        substituter = PlaceholderSubstituter({"VYOS_KEY": "k"}, mappings)
+
+        assert substituter.substitute("# set a '@@KEY@@'") == ("set a 'k'", None)
+
+
 class TestGenerateRestoreScript:
     """Tests for generate_restore_script function."""
 
@@ -331,3 +453,354 @@ class TestIntegration:
         assert "set interfaces ethernet eth0 address '192.168.1.1/24'" in result
         assert "set interfaces wireguard wg0 private-key 'test_private_key'" in result
         assert "<VyOS秘密鍵>" not in result
+
+
+class TestStreamingPipeline:
+    """Tests for the lazy parse -> substitute -> write pipeline."""
+
+    def test_first_command_without_reading_all(self) -> None:
+        """Test that commands are produced before the input ends."""
+        lines = itertools.chain(
+            ["# header\n", "set system host-name 'r'\n"],
+            itertools.repeat("set foo\n"),
+        )
+
+        commands = iter_backup_commands(lines)
+
+        assert next(commands) == "set system host-name 'r'"
+        assert next(commands) == "set foo"
+
+    def test_warnings_collected_as_it_goes(self) -> None:
+        """Test that warnings appear while the pipeline is consumed."""
+        warnings: list[str] = []
+        processed = iter_replace_placeholders(
+            ["set a", "# set b '<DUID>'", "set c"], {}, warnings
+        )
+
+        with patch.dict("os.environ", {}, clear=True):
+            assert next(processed) == "set a"
+            assert warnings == []
+            assert next(processed) == "set c"
+
+        assert len(warnings) == 1
+        assert "VYOS_DHCPV6_DUID" in warnings[0]
+
+    def test_stdin_to_stdout(self, tmp_path: Path, capsys) -> None:
+        """Test that '-' streams the backup from stdin to stdout."""
+        backup = "# dump\nset system host-name 'r'\n# set x '<DUID>'\n"
+        argv = [
+            "vyos_restore.py",
+            "--backup", "-",
+            "--output", "-",
+            "--no-header",
+            "--env-file", str(tmp_path / "missing.env"),
+        ]
+
+        with patch.object(sys, "argv", argv), patch.object(
+            sys, "stdin", StringIO(backup)
+        ), patch.dict("os.environ", {"VYOS_DHCPV6_DUID": "00:03"}, clear=True):
+            assert main() == 0
+
+        assert capsys.readouterr().out == "set system host-name 'r'\nset x '00:03'\n"
+
+    def test_empty_stdin(self, tmp_path: Path, capsys) -> None:
+        """Test that input without commands is an error."""
+        argv = ["vyos_restore.py", "--backup", "-", "--env-file", str(tmp_path / "x")]
+
+        with patch.object(sys, "argv", argv), patch.object(
+            sys, "stdin", StringIO("# nothing\n")
+        ):
+            assert main() == 1
+
+        assert "No commands found" in capsys.readouterr().err
+
+
+class TestCompiledTemplate:
+    """Tests for CompiledTemplate and batch rendering."""
+
+    @pytest.mark.parametrize(
+        "present",
+        [
+            [],
+            ["VYOS_WG_PRIVATE_KEY", "VYOS_DHCPV6_DUID"],
+            [m.env_var for m in SECRET_MAPPINGS],
+        ],
+    )
+    def test_render_matches_replace_placeholders(self, present: list[str]) -> None:
+        """Test that rendering equals replace_placeholders on the template."""
+        env_vars = {name: f"value-of-{name}" for name in present}
+        commands = parse_backup_file(TEMPLATE)
+
+        with patch.dict("os.environ", {}, clear=True):
+            rendered = CompiledTemplate.compile(commands).render(env_vars)
+            assert rendered == replace_placeholders(commands, env_vars)
+
+    def test_render_sites(self, tmp_path: Path) -> None:
+        """Test that each site gets its own output and missing-secret report."""
+        sites = tmp_path / "sites"
+        sites.mkdir()
+        (sites / "tokyo.env").write_text("VYOS_DHCPV6_DUID=00:03:00:01:aa\n")
+        (sites / "osaka.env").write_text("VYOS_DHCPV6_DUID=00:03:00:01:bb\n")
+        template = CompiledTemplate.compile(
+            ["set system host-name 'r'", "# set x duid '<DUID>'", "# set y '<公開鍵>'"]
+        )
+
+        with patch.dict("os.environ", {}, clear=True):
+            reports = render_sites(
+                template,
+                sorted(sites.glob("*.env")),
+                tmp_path / "out",
+                include_header=False,
+                jobs=2,
+            )
+
+        assert [r.site for r in reports] == ["osaka", "tokyo"]
+        assert (tmp_path / "out" / "tokyo.txt").read_text() == (
+            "set system host-name 'r'\nset x duid '00:03:00:01:aa'\n"
+        )
+        assert reports[0].commands == 2
+        assert reports[0].warnings == [
+            "Missing VYOS_SSH_PUBKEY for placeholder <公開鍵>"
+        ]
+        assert "VYOS_SSH_PUBKEY" in [m.env_var for m in reports[1].missing]
+
+    def test_batch_requires_output_dir(self, tmp_path: Path, capsys) -> None:
+        """Test that batch mode without --output-dir is rejected."""
+        (tmp_path / "a.env").write_text("")
+        argv = ["vyos_restore.py", "--batch-env-dir", str(tmp_path)]
+
+        with patch.object(sys, "argv", argv):
+            assert main() == 1
+
+        assert "--output-dir" in capsys.readouterr().err
+
+
+class TestTemplateCache:
+    """Tests for the content-hash keyed compiled template cache."""
+
+    def _template(self, tmp_path: Path) -> Path:
+        backup = tmp_path / "template.txt"
+        backup.write_text(
+            "# header\nset system host-name 'r'\n\n# set x '<DUID>'\n",
+            encoding="utf-8",
+        )
+        return backup
+
+    def test_cache_written_and_reused(self, tmp_path: Path) -> None:
+        """Test that a second load skips parsing."""
+        backup = self._template(tmp_path)
+        cold = CompiledTemplate.load(backup, cache_dir=tmp_path / "cache")
+        assert template_cache_path(backup, tmp_path / "cache").exists()
+
+        with patch.object(
+            CompiledTemplate, "_compile", side_effect=AssertionError("parsed")
+        ):
+            warm = CompiledTemplate.load(backup, cache_dir=tmp_path / "cache")
+
+        assert warm == cold
+        assert [c.line for c in warm.commands] == [2, 4]
+        assert warm.commands[1].segments == ("set x '", 5, "'")
+
+    def test_template_change_invalidates(self, tmp_path: Path) -> None:
+        """Test that editing the template recompiles it."""
+        backup = self._template(tmp_path)
+        CompiledTemplate.load(backup, cache_dir=tmp_path)
+        backup.write_text("set system host-name 'other'\n", encoding="utf-8")
+
+        template = CompiledTemplate.load(backup, cache_dir=tmp_path)
+
+        assert [c.original for c in template.commands] == [
+            "set system host-name 'other'"
+        ]
+
+    def test_corrupt_cache_ignored(self, tmp_path: Path) -> None:
+        """Test that an unreadable cache is rebuilt."""
+        backup = self._template(tmp_path)
+        cache_path = template_cache_path(backup, tmp_path)
+        cache_path.write_text("{broken")
+
+        template = CompiledTemplate.load(backup, cache_dir=tmp_path)
+
+        assert len(template.commands) == 2
+        assert json.loads(cache_path.read_text())["version"] == 1
+
+    def test_unwritable_cache_location(self, tmp_path: Path) -> None:
+        """Test that a cache that cannot be written is skipped."""
+        backup = self._template(tmp_path)
+
+        blocker = tmp_path / "not-a-dir"
+        blocker.write_text("")
+
+        template = CompiledTemplate.load(backup, cache_dir=blocker / "cache")
+
+        assert template == CompiledTemplate.from_file(backup)
+
+    def test_same_name_in_other_directory(self, tmp_path: Path) -> None:
+        """Test that templates sharing a file name get separate cache files."""
+        first = self._template(tmp_path)
+        (tmp_path / "other").mkdir()
+        second = tmp_path / "other" / first.name
+        second.write_text("set system host-name 'other'\n", encoding="utf-8")
+
+        assert template_cache_path(first, tmp_path) != template_cache_path(
+            second, tmp_path
+        )
+
+    def test_cache_is_opt_in(self, tmp_path: Path, capsys) -> None:
+        """Test that rendering writes no cache unless --template-cache is given."""
+        backup = self._template(tmp_path)
+        cache_dir = tmp_path / "cache"
+        argv = [
+            "vyos_restore.py",
+            "--backup", str(backup),
+            "--env-file", str(tmp_path / "missing.env"),
+            "--output", "-",
+            "--template-cache-dir", str(cache_dir),
+        ]
+
+        with patch.object(sys, "argv", argv), patch.dict(
+            "os.environ", {}, clear=True
+        ):
+            assert main() == 0
+            assert not cache_dir.exists()
+            with patch.object(sys, "argv", [*argv, "--template-cache"]):
+                assert main() == 0
+
+        assert "set system host-name 'r'" in capsys.readouterr().out
+        assert [p.name for p in cache_dir.iterdir()] == [
+            template_cache_path(backup, cache_dir).name
+        ]
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["cache", "template.txt"]
+
+
+class TestApplyMode:
+    """Tests for --apply."""
+
+    def _run(
+        self, tmp_path: Path, backup: str, *extra: str, apply: bool = True
+    ) -> int:
+        path = tmp_path / "backup.txt"
+        path.write_text(backup, encoding="utf-8")
+        argv = [
+            "vyos_restore.py",
+            "--backup", str(path),
+            "--env-file", str(tmp_path / "missing.env"),
+            *(["--apply"] if apply else []),
+            *extra,
+        ]
+        with patch.object(sys, "argv", argv), patch.dict(
+            "os.environ", {}, clear=True
+        ):
+            return main()
+
+    def test_refuses_unresolved_placeholders(self, tmp_path: Path, capsys) -> None:
+        """Test that literal placeholders are never pushed to the router."""
+        with patch("vyos_restore.SSHSession") as session:
+            code = self._run(tmp_path, "set x duid '<DUID>'\n")
+
+        assert code == 1
+        assert "unresolved placeholders" in capsys.readouterr().err
+        session.assert_not_called()
+
+    def test_dry_run_prints_script(self, tmp_path: Path, capsys) -> None:
+        """Test that --dry-run prints the apply script."""
+        code = self._run(
+            tmp_path,
+            "set a\nset b\n# set c '<DUID>'\n",
+            "--dry-run",
+            "--batch-size",
+            "1",
+            "--allow-missing-secrets",
+        )
+
+        out = capsys.readouterr().out
+        assert code == 0
+        assert out.splitlines().count("commit") == 2
+        assert "set c" not in out
+
+    def test_refuses_missing_secrets(self, tmp_path: Path, capsys) -> None:
+        """Test that a block with a left-out secret is not half applied."""
+        backup = (
+            "set interfaces wireguard wg0 peer mac allowed-ips '10.10.10.2/32'\n"
+            "# set interfaces wireguard wg0 peer mac public-key '<Mac公開鍵>'\n"
+        )
+        with patch("vyos_restore.SSHSession") as session:
+            code = self._run(tmp_path, backup, "--dry-run")
+
+        captured = capsys.readouterr()
+        assert code == 1
+        assert "--allow-missing-secrets" in captured.err
+        assert captured.out == ""
+        session.assert_not_called()
+
+    def test_validate_blocks_apply(self, tmp_path: Path, capsys) -> None:
+        """Test that --validate refuses to apply commands with schema errors."""
+        with patch("vyos_restore.SSHSession") as session:
+            code = self._run(
+                tmp_path,
+                "set system host-name a\nset system host-nmae b\n",
+                "--validate",
+            )
+
+        assert code == 1
+        assert "did you mean 'host-name'" in capsys.readouterr().err
+        session.assert_not_called()
+
+    def test_validate_render(self, tmp_path: Path, capsys) -> None:
+        """Test that --validate checks rendered output without --apply."""
+        code = self._run(
+            tmp_path,
+            "set system host-name a\nset system host-name b\n",
+            "--validate",
+            apply=False,
+        )
+
+        captured = capsys.readouterr()
+        assert code == 1
+        assert "set system host-name b" in captured.out
+        assert "Conflicts with #1" in captured.err
+
+    def test_delta_against_saved_config(self, tmp_path: Path, capsys) -> None:
+        """Test that --delta writes only the differing commands."""
+        current = tmp_path / "current.txt"
+        current.write_text("set system host-name vyos\nset service ssh port '22'\n")
+
+        code = self._run(
+            tmp_path,
+            "set system host-name 'vyos'\nset system time-zone 'Asia/Tokyo'\n",
+            "--delta",
+            "--prune",
+            "--no-header",
+            "--current-config",
+            str(current),
+            apply=False,
+        )
+
+        assert code == 0
+        assert capsys.readouterr().out == (
+            "delete service\nset system time-zone 'Asia/Tokyo'\n"
+        )
+
+    def test_prune_refused_with_missing_secrets(
+        self, tmp_path: Path, capsys
+    ) -> None:
+        """Test that a left-out secret is never pruned from the router."""
+        current = tmp_path / "current.txt"
+        current.write_text(
+            "set interfaces wireguard wg0 private-key 'secret'\n"
+            "set system host-name 'vyos'\n"
+        )
+        backup = (
+            "set system host-name 'vyos'\n"
+            "# set interfaces wireguard wg0 private-key '<VyOS秘密鍵>'\n"
+        )
+        argv = ["--delta", "--current-config", str(current)]
+
+        code = self._run(tmp_path, backup, *argv, "--prune", apply=False)
+
+        captured = capsys.readouterr()
+        assert code == 1
+        assert "Refusing to --prune" in captured.err
+        assert "delete" not in captured.out
+        assert self._run(tmp_path, backup, *argv, "--no-header", apply=False) == 0
+        assert capsys.readouterr().out == ""
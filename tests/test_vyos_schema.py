@@ -0,0 +1,155 @@
+"""Tests for VyOS schema validation."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_config import Config, generate_all
+from vyos_schema import (
+    SchemaValidator,
+    ValueType,
+    compile_schema,
+    validate_commands,
+)
+
+SCRIPTS = Path(__file__).parent.parent / "scripts"
+TEMPLATE = SCRIPTS / "vyos-config-template.txt"
+WG_KEY = "A" * 43 + "="
+
+
+def _messages(commands: list[str]) -> list[str]:
+    return [issue.message for issue in validate_commands(commands)]
+
+
+class TestValueType:
+    """Tests for ValueType."""
+
+    def test_union_of_types_and_literals(self) -> None:
+        """Test that types and literal words can be combined."""
+        value = ValueType("ifaddr|dhcp")
+        assert value("192.168.1.1/24")
+        assert value("fd00::1/64")
+        assert value("dhcp")
+        assert not value("192.168.1.1")
+        assert not value("dhcpv6")
+
+    def test_type_name_as_literal(self) -> None:
+        """Test that a type name in an enum also matches literally."""
+        assert ValueType("ipv4|ipv6|both")("ipv6")
+
+    def test_number_range(self) -> None:
+        """Test that num:low-high bounds values."""
+        value = ValueType("num:1-65535")
+        assert value("51820")
+        assert not value("0")
+        assert not value("70000")
+
+    def test_ports(self) -> None:
+        """Test port lists, ranges and service names."""
+        value = ValueType("port")
+        assert value("51820")
+        assert value("5136-5151,9232-9247")
+        assert value("https")
+        assert not value("5151-5136")
+
+
+class TestSchemaValidator:
+    """Tests for SchemaValidator."""
+
+    def test_template_is_valid(self) -> None:
+        """Test that every set command of the template validates."""
+        commands = [
+            line.rstrip()
+            for line in TEMPLATE.read_text(encoding="utf-8").splitlines()
+            if line.startswith("set ")
+        ]
+        assert validate_commands(commands) == []
+
+    def test_generated_config_is_valid(self) -> None:
+        """Test that the phased generator only emits valid commands."""
+        output = generate_all(
+            Config(
+                ddns_zone="example.com",
+                ddns_hostname="r.example.com",
+                ddns_api_token="token",
+            ),
+            ssh_pubkey="ssh-ed25519 AAAAC3NzaC1lZDI1NTE5 me@mac",
+            peers={"phone": {"pubkey": WG_KEY, "ipv4": "10.10.10.2/32"}},
+        )
+        assert validate_commands(output) == []
+
+    def test_unknown_node_suggests_fix(self) -> None:
+        """Test that a typo is reported with the closest valid node."""
+        messages = _messages(["set interfaces ethernet eth0 adress 1.2.3.4/24"])
+        assert messages == [
+            "Unknown node 'adress' under 'interfaces ethernet eth0' "
+            "(did you mean 'address'?)"
+        ]
+
+    def test_invalid_value(self) -> None:
+        """Test that a malformed value is rejected."""
+        messages = _messages(["set interfaces wireguard wg0 port 70000"])
+        assert "Invalid value '70000'" in messages[0]
+
+    def test_invalid_tag(self) -> None:
+        """Test that a tag value of the wrong type is rejected."""
+        messages = _messages(["set nat source rule abc exclude"])
+        assert messages[0].startswith("Invalid name 'abc'")
+
+    def test_missing_value(self) -> None:
+        """Test that a leaf without its value is reported."""
+        assert _messages(["set system time-zone"]) == [
+            "Missing value for 'system time-zone'"
+        ]
+
+    def test_placeholder(self) -> None:
+        """Test that leftover placeholders are errors."""
+        messages = _messages(
+            ["set nat source rule 200 translation address '<MAP-E IPv4>'"]
+        )
+        assert messages == ["Unresolved placeholder <MAP-E IPv4>"]
+
+    def test_conflict_and_duplicate(self) -> None:
+        """Test that single-valued leaves conflict and repeats warn."""
+        issues = validate_commands(
+            [
+                "set system host-name a",
+                "set system host-name 'a'",
+                "set system host-name b",
+                "set interfaces ethernet eth0 address 10.0.0.1/24",
+                "set interfaces ethernet eth0 address 10.0.1.1/24",
+            ]
+        )
+        assert [(i.line, i.severity) for i in issues] == [
+            (2, "warning"),
+            (3, "error"),
+        ]
+        assert issues[1].message.startswith("Conflicts with #1")
+
+    def test_open_subtree_and_delete(self) -> None:
+        """Test that unmodelled areas and delete prefixes are accepted."""
+        assert _messages(
+            [
+                "set protocols bgp system-as 65000",
+                "delete interfaces ethernet eth0",
+            ]
+        ) == []
+
+    def test_passthrough(self) -> None:
+        """Test that commands stream through unchanged while validated."""
+        validator = SchemaValidator()
+        commands = ["set system host-name vyos", "set system bogus x"]
+        assert list(validator.passthrough(commands)) == commands
+        assert [i.line for i in validator.errors] == [2]
+
+    def test_custom_schema(self) -> None:
+        """Test compiling a schema with alternatives and tag nodes."""
+        schema = compile_schema("a b|c <u32> value <name>*\na b <u32> flag")
+        validator = SchemaValidator(schema)
+        for command in ("set a c 1 value x", "set a b 2 flag", "set a c 3 flag"):
+            validator.feed(command)
+        assert [i.command for i in validator.errors] == ["set a c 3 flag"]
@@ -0,0 +1,155 @@
+"""Tests for the simulated VyOS endpoint and benchmark suite."""
+
+from __future__ import annotations
+
+import functools
+import json
+import sys
+from pathlib import Path
+
+# Add scripts to path for import
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from vyos_bench import (
+    BenchResult,
+    bench_boot,
+    bench_checker,
+    bench_firewall,
+    bench_schema,
+    bench_template,
+    compare_results,
+    load_results,
+    save_results,
+)
+from vyos_config_check import run_checks, run_fleet
+from vyos_sim import (
+    SimProfile,
+    SimulatedSession,
+    SimulatedVyOS,
+    pad_config,
+    template_config,
+)
+
+
+class TestSimulatedVyOS:
+    """Tests for the simulated command endpoint."""
+
+    def test_pad_config_reaches_size(self) -> None:
+        """Test that padding grows the configuration to the requested size."""
+        padded = pad_config(["set system host-name 'r1'"], 10_000)
+        assert sum(len(c) + 1 for c in padded) >= 10_000
+        assert padded[0] == "set system host-name 'r1'"
+
+    def test_grep_without_match_fails(self) -> None:
+        """Test that a grep matching nothing exits like grep does."""
+        endpoint = SimulatedVyOS(["set system host-name 'r1'"], SimProfile())
+        rc, stdout, _ = endpoint.respond(
+            "show configuration commands | grep 'nat source'"
+        )
+        assert rc == 1
+        assert stdout == ""
+
+    def test_unknown_command(self) -> None:
+        """Test that unsupported commands are rejected."""
+        endpoint = SimulatedVyOS([], SimProfile())
+        rc, _, stderr = endpoint.respond("reboot now")
+        assert rc == 1
+        assert "Invalid command" in stderr
+
+
+class TestSimulatedSession:
+    """Tests for SimulatedSession."""
+
+    def test_checks_pass_against_template(self) -> None:
+        """Test that the template configuration passes the checks."""
+        session = SimulatedSession("sim", "vyos")
+        results = run_checks("sim", "vyos", None, "all", False, session=session)
+        failed = [r.name for r in results if not r.passed]
+        assert failed == []
+
+    def test_modes_agree(self) -> None:
+        """Test that snapshot and per-command modes give the same verdicts."""
+        endpoint = SimulatedVyOS(template_config(), SimProfile(config_bytes=20_000))
+        factory = functools.partial(SimulatedSession, endpoint=endpoint)
+        per_command = run_fleet(["a"], "vyos", None, "all", session_factory=factory)
+        snapshot = run_fleet(
+            ["a"], "vyos", None, "all", snapshot=True, session_factory=factory
+        )
+        assert per_command[0].results == snapshot[0].results
+
+    def test_latency_is_recorded(self) -> None:
+        """Test that simulated latency shows up in the session stats."""
+        session = SimulatedSession(
+            "sim", "vyos", profile=SimProfile(connect_latency=0.01, latency=0.01)
+        )
+        session.run("show system commit | head -n 1")
+        session.run("show system commit | head -n 1")
+        assert session.stats.commands == 2
+        assert session.stats.connect_time >= 0.01
+        assert session.stats.command_time >= 0.02
+
+
+class TestBench:
+    """Tests for the benchmark suite."""
+
+    def test_checker_scenarios(self) -> None:
+        """Test that every mode, fleet size and config size is measured."""
+        results = bench_checker(
+            [1, 2], ["tiny"], latency=0, jitter=0, connect_latency=0, repeat=1
+        )
+        assert [r.name for r in results] == [
+            "checker/per-command/hosts=1/size=tiny",
+            "checker/snapshot/hosts=1/size=tiny",
+            "checker/per-command/hosts=2/size=tiny",
+            "checker/snapshot/hosts=2/size=tiny",
+        ]
+        assert all(r.seconds > 0 for r in results)
+
+    def test_template_scenarios(self) -> None:
+        """Test that cold parse, cached load and render are measured."""
+        results = bench_template([2], repeat=1)
+
+        assert [r.name for r in results] == [
+            "template/parse/scale=2",
+            "template/cached-load/scale=2",
+            "template/render/scale=2",
+        ]
+        assert results[0].params["commands"] > 0
+
+    def test_boot_scenarios(self) -> None:
+        """Test that config.boot compile and parse are measured."""
+        results = bench_boot(["tiny"], repeat=1)
+
+        assert [r.name for r in results] == [
+            "boot/compile/size=tiny",
+            "boot/parse/size=tiny",
+        ]
+        assert results[0].params["boot_lines"] > 0
+
+    def test_schema_scenarios(self) -> None:
+        """Test that schema validation is measured."""
+        results = bench_schema(["tiny"], repeat=1)
+
+        assert [r.name for r in results] == ["schema/validate/size=tiny"]
+        assert results[0].params["commands"] > 100
+
+    def test_firewall_scenarios(self) -> None:
+        """Test that flow evaluation is measured per hook."""
+        results = bench_firewall([100], repeat=1)
+
+        names = [r.name for r in results]
+        assert "firewall/input/flows=100/backend=python" in names
+        assert "firewall/forward/flows=100/backend=python" in names
+
+    def test_save_and_compare(self, tmp_path: Path) -> None:
+        """Test that results round-trip and compare against a baseline."""
+        path = save_results([BenchResult("a", 2.0)], tmp_path, revision="abc1234")
+        assert path == tmp_path / "abc1234.json"
+        assert json.loads(path.read_text())["revision"] == "abc1234"
+
+        baseline = load_results(path)
+        lines = compare_results(
+            [BenchResult("a", 1.0), BenchResult("b", 1.0)], baseline
+        )
+        assert "-50.0%" in lines[0]
+        assert "(new)" in lines[1]